@@ -44,15 +44,15 @@ import signal
 import atexit
 
 # Initialize extensions
-db = SQLAlchemy()
+from app.utils.db_routing import RoutingSession
+db = SQLAlchemy(session_options={'class_': RoutingSession})  # Read-only endpoints may use the replica bind
 login_manager = LoginManager()
 migrate = Migrate()
 socketio = SocketIO()
 limiter = Limiter(
     key_func=get_remote_address,
     default_limits=["5000 per day", "1000 per hour", "200 per minute"],
-    # storage_uri will be set from config during init_app()
-    storage_options={"cluster": False}
+    # storage_uri is resolved from config (RATELIMIT_STORAGE_URI) during init_app()
 )
 csrf = CSRFProtect()
 babel = Babel()
@@ -165,6 +165,7 @@ class PaginationHelper:
 
 def create_app(config_name=None):
     """Application factory pattern"""
+    startup_started = time.perf_counter()
     # Set template folder to the templates directory in the project root
     # Use absolute path to ensure templates are found regardless of app root path
     template_dir = os.path.abspath('templates')
@@ -172,6 +173,10 @@ def create_app(config_name=None):
     # Set template and static folders
     app = Flask(__name__, template_folder=template_dir, static_folder=static_dir)
     
+    # jsonify() through orjson (same output as Flask's default provider)
+    from app.utils.fast_json import FastJSONProvider
+    app.json = FastJSONProvider(app)
+    
     # Check if we're in development mode for simplified logging
     is_development = (os.environ.get('FLASK_ENV') == 'development' or 
                      os.environ.get('DEBUG') == 'True' or 
@@ -239,11 +244,30 @@ def create_app(config_name=None):
     # Log CORS configuration for debugging
     app.logger.info(f"CORS enabled for origins: {cors_origins}")
     
+    # Size connection pools from workers/threads before the engines exist
+    from app.utils.connection_pool_optimizer import ConnectionPoolOptimizer
+    ConnectionPoolOptimizer.size_engine_options(app)
+    
     # Initialize extensions
     db.init_app(app)
     login_manager.init_app(app)
     migrate.init_app(app, db)
-    socketio.init_app(app, cors_allowed_origins="*", async_mode='threading')
+    # Cross-worker Socket.IO fan-out: with a message queue every emit is
+    # published once and delivered by each worker to its own clients
+    socketio_message_queue = app.config.get('SOCKETIO_MESSAGE_QUEUE')
+    redis_enabled = app.config.get('REDIS_ENABLED', False)
+    if isinstance(redis_enabled, str):
+        redis_enabled = redis_enabled.lower() == 'true'
+    if not socketio_message_queue and redis_enabled and app.config.get('REDIS_URL'):
+        socketio_message_queue = app.config.get('REDIS_URL')
+    app.config['SOCKETIO_MESSAGE_QUEUE'] = socketio_message_queue
+    socketio.init_app(
+        app,
+        cors_allowed_origins="*",
+        async_mode='threading',
+        message_queue=socketio_message_queue,
+        channel=app.config.get('SOCKETIO_CHANNEL', 'pipelinepro-socketio')
+    )
     jwt.init_app(app)  # Initialize JWT for token-based authentication
     
     # Initialize Flask-Session BEFORE other extensions that might use sessions
@@ -256,8 +280,12 @@ def create_app(config_name=None):
         app.logger.warning("Flask-Session not available, using default Flask session")
     
     # Configure rate limiter storage from config
+    # Flask-Limiter reads RATELIMIT_STORAGE_URI; share limits across workers
+    # through Redis whenever it is enabled so counts are exact cluster-wide
     storage_uri = app.config.get('RATELIMIT_STORAGE_URL', 'memory://')
-    limiter.storage_uri = storage_uri
+    if storage_uri.startswith('memory://') and redis_enabled and app.config.get('REDIS_URL'):
+        storage_uri = app.config.get('REDIS_URL')
+    app.config['RATELIMIT_STORAGE_URI'] = storage_uri
     limiter.init_app(app)
     csrf.init_app(app)
     
@@ -281,39 +309,27 @@ def create_app(config_name=None):
     create_api_versioning_middleware(app)
     
     # Initialize query performance monitoring
-    from app.utils.query_performance_monitor import QueryPerformanceMonitor
-    query_monitor = QueryPerformanceMonitor(app)
-    app.query_performance_monitor = query_monitor
+    from app.utils.query_performance_monitor import query_performance_monitor
+    query_performance_monitor.init_app(app)
+    app.query_performance_monitor = query_performance_monitor
     
     # Initialize request tracing middleware (enhanced request ID tracking)
     from app.middleware.request_tracing import request_tracing_middleware
     request_tracing_middleware(app)
     
+    # Request timing, Prometheus metrics and slow-request logging in one
+    # hook pair; log records are written by a background thread
+    from app.utils.instrumentation import request_instrumentation
+    request_instrumentation.init_app(app)
+    atexit.register(request_instrumentation.stop)
+    app.request_instrumentation = request_instrumentation
+    
     # Initialize tenant middleware for multi-tenancy support
     from app.middleware.tenant_middleware import tenant_middleware
     tenant_middleware.init_app(app)
     app.tenant_middleware = tenant_middleware
     
-    # Initialize distributed tracing
-    from app.utils.distributed_tracing import TraceManager
-    @app.before_request
-    def init_trace_context():
-        """Initialize trace context for each request"""
-        TraceManager.create_trace_context()
-    
-    # Add request ID tracking middleware (legacy support)
-    from app.utils.enhanced_error_responses import add_request_id, log_request_completion
-    
-    @app.after_request
-    def after_request_handler(response):
-        """Log request completion"""
-        try:
-            from flask import g
-            g.response_status = response.status_code
-            log_request_completion()
-        except:
-            pass  # Don't break the response if logging fails
-        return response
+    # Distributed tracing contexts are created lazily by TraceManager.start_span()
     
     # Add advanced cache to app context
     app.advanced_cache = advanced_cache
@@ -323,6 +339,36 @@ def create_app(config_name=None):
     redis_service.init_app(app)
     app.redis_service = redis_service
     
+    # Initialize asynchronous audit writer
+    from app.services.audit_writer_service import audit_writer
+    audit_writer.init_app(app)
+    app.audit_writer = audit_writer
+
+    # Initialize auth principal cache (after Redis, before user_loader runs)
+    from app.services.auth_principal_service import principal_service
+    principal_service.init_app(app)
+    app.principal_service = principal_service
+
+    # Translation catalog (languages compile on first lookup)
+    from app.services.translation_catalog import translation_catalog
+    translation_catalog.init_app(app)
+
+    # Data version counters for conditional (ETag/304) dashboard responses
+    from app.services.data_version_service import data_version_service
+    data_version_service.init_app(app)
+
+    # Dimension keys (psp/client/company/payment method) dual-written on flush
+    from app.services.dimension_service import dimension_service
+    dimension_service.init_app(app)
+
+    # Monthly transaction partitions (PostgreSQL, once converted)
+    from app.services.partition_service import transaction_partition_service
+    transaction_partition_service.init_app(app)
+
+    # Post-commit side effects of writes (cache tags, events, audit rows) in one flush
+    from app.services.unit_of_work import unit_of_work
+    unit_of_work.init_app(app)
+    
     # Initialize background task service
     from app.services.background_service import background_task_service
     background_task_service.init_app(app)
@@ -333,6 +379,7 @@ def create_app(config_name=None):
     from app.services.enhanced_cache_service import cache_service
     from app.services.microservice_service import microservice_service
     from app.services.real_time_service import init_real_time_service
+    event_service.init_app(app)
     
     # Initialize configuration manager
     from app.services.config_manager import init_config_manager
@@ -340,14 +387,17 @@ def create_app(config_name=None):
     
     # Initialize monitoring and alerting service
     from app.services.monitoring_service import get_monitoring_service
+    from app.services.job_scheduler_service import job_scheduler
     monitoring_service = get_monitoring_service()
-    # Start monitoring after app is fully initialized
-    monitoring_service.start_monitoring()
+    # Collected by the cluster job scheduler (once per deployment, not per worker)
+    job_scheduler.register('monitoring_metrics', monitoring_service.collect_once, interval=60)
+    # Upcoming partitions are created (and expired ones archived) well before they are needed
+    job_scheduler.register('transaction_partitions', transaction_partition_service.maintain, interval=6 * 60 * 60)
     app.monitoring_service = monitoring_service
     
     # Initialize enhanced rate limiting service
     from app.services.rate_limit_service import init_rate_limit_service
-    rate_limit_service = init_rate_limit_service(limiter)
+    rate_limit_service = init_rate_limit_service(limiter, app=app)
     app.rate_limit_service = rate_limit_service
     
     # Initialize performance optimizer
@@ -355,8 +405,19 @@ def create_app(config_name=None):
     init_performance_optimizer(app)
     
     # Initialize real-time service with SocketIO
-    real_time_service = init_real_time_service(socketio, event_service)
+    real_time_service = init_real_time_service(
+        socketio, event_service,
+        coalesce_window_ms=app.config.get('REALTIME_COALESCE_WINDOW_MS', 250)
+    )
     app.real_time_service = real_time_service
+    
+    # Drain the event stream through the shared consumer group so each event
+    # is handled once cluster-wide and fanned out via the message queue
+    if app.config.get('EVENT_STREAM_DISPATCH_ENABLED', True) and socketio_message_queue:
+        try:
+            event_service.start_stream_dispatcher(app)
+        except Exception as e:
+            app.logger.warning(f"Event stream dispatcher not started: {e}")
     app.event_service = event_service
     app.cache_service = cache_service
     app.microservice_service = microservice_service
@@ -471,16 +532,6 @@ def create_app(config_name=None):
     # from app.services.security_service import security_service
     # security_service.init_app(app)
     
-    # Initialize and start monitoring service in production
-    try:
-        from app.services.monitoring_service import get_monitoring_service
-        monitoring_service = get_monitoring_service()
-        # Start monitoring with 60 second interval (production-optimized)
-        monitoring_service.start_monitoring(interval=60)
-        app.logger.info("Production monitoring service started")
-    except Exception as e:
-        app.logger.warning(f"Failed to start monitoring service: {e}")
-    
     # Configure login manager
     login_manager.login_view = 'auth.login'
     login_manager.login_message = 'Please log in to access this page.'
@@ -519,13 +570,12 @@ def create_app(config_name=None):
     # Configure user loader
     @login_manager.user_loader
     def load_user(user_id):
-        """Load user for Flask-Login"""
+        """Load the cached auth principal for Flask-Login (no ORM User load)"""
         from app.models.user import User
+        from app.services.auth_principal_service import principal_service
         try:
-            # Try to convert to int, but handle UUID strings gracefully
             try:
-                user_id_int = int(user_id)
-                user = User.query.get(user_id_int)
+                return principal_service.get(int(user_id))
             except (ValueError, TypeError):
                 # If conversion fails, it might be a UUID or other format
                 # Try to query by username or other identifier
@@ -537,7 +587,7 @@ def create_app(config_name=None):
                     user = User.query.filter_by(id=user_id).first()
             
             if user and user.is_active:
-                return user
+                return principal_service.from_user(user)
             else:
                 return None
         except Exception as e:
@@ -613,6 +663,10 @@ def create_app(config_name=None):
     from app.routes.monitoring import monitoring_bp, setup_prometheus_metrics
     app.register_blueprint(monitoring_bp)
     
+    # Read replica routing for reporting blueprints (needs every view registered)
+    from app.utils.db_routing import replica_router
+    replica_router.init_app(app)
+    
     # Production optimization: Direct /api/health endpoint to fix 404 errors
     # Some monitoring tools don't follow redirects, so we provide direct response
     @app.route('/api/health', methods=['GET', 'HEAD'], strict_slashes=False)
@@ -881,10 +935,12 @@ def create_app(config_name=None):
     @app.context_processor
     def inject_translation_functions():
         """Inject translation functions into templates"""
+        from app.services.translation_catalog import translation_catalog
         return dict(
             _=gettext,
             ngettext=ngettext,
-            get_locale=get_locale
+            get_locale=get_locale,
+            t=translation_catalog.translate
         )
     
     @app.context_processor
@@ -1022,72 +1078,19 @@ def create_app(config_name=None):
     # Initialize Babel with locale selector
     babel.init_app(app, locale_selector=get_locale)
     
-    # Request timing and logging middleware
-    import time
-    
+    # Session initialization and security headers
     @app.before_request
     def before_request():
-        """Log request start and store start time"""
-        request.start_time = time.time()
-        
-        # Generate unique request ID for tracking
-        import uuid
-        request.request_id = str(uuid.uuid4())
-        
+        """Initialize the session (timing/logging is done by request_instrumentation)"""
         # Ensure session is properly initialized
         from flask import session
         if 'csrf_token' not in session:
             # Initialize session if needed
             session.permanent = True
-        
-        # Skip logging for static files and excluded paths
-        excluded_paths = ['/static/', '/health/', '/favicon.ico', '/robots.txt', '/sitemap.xml']
-        should_log = True
-        
-        for excluded in excluded_paths:
-            if request.path.startswith(excluded):
-                should_log = False
-                break
-        
-        # Only log non-static requests (skip in development for cleaner output)
-        if should_log and request.method not in ['OPTIONS', 'HEAD'] and not is_development:
-            enhanced_logger = get_logger("RequestHandler")
-            enhanced_logger.info(f"Request started: {request.method} {request.path}", {
-                'request_id': request.request_id,
-                'operation': 'request_start'
-            })
 
     @app.after_request
     def after_request(response):
-        """Log request completion and add security headers"""
-        # Calculate request duration
-        duration = time.time() - getattr(request, 'start_time', time.time())
-        
-        # Skip logging for static files and excluded paths
-        excluded_paths = ['/static/', '/health/', '/favicon.ico', '/robots.txt', '/sitemap.xml']
-        should_log = True
-        
-        for excluded in excluded_paths:
-            if request.path.startswith(excluded):
-                should_log = False
-                break
-        
-        # Only log non-static requests and slow requests (skip in development for cleaner output)
-        if should_log and request.method not in ['OPTIONS', 'HEAD'] and not is_development:
-            # Only log if request took more than 100ms or had an error
-            if duration > 0.1 or response.status_code >= 400:
-                enhanced_logger = get_logger("RequestHandler")
-                enhanced_logger.log_performance(
-                    operation=f"HTTP {response.status_code}",
-                    duration=duration,
-                    extra_data={
-                        'request_id': getattr(request, 'request_id', 'Unknown'),
-                        'method': request.method,
-                        'url': request.path,  # Use path instead of full URL
-                        'status_code': response.status_code
-                    }
-                )
-        
+        """Add security headers"""
         # Add security headers
         security_headers = app.config.get('SECURITY_HEADERS', {})
         for header, value in security_headers.items():
@@ -1373,8 +1376,9 @@ def create_app(config_name=None):
     try:
         # Use enhanced exchange rate service (legacy service deprecated)
         from app.services.enhanced_exchange_rate_service import enhanced_exchange_service
-        enhanced_exchange_service.start_auto_update(app)
-        app.logger.info("Exchange rate auto-update service started (using enhanced multi-provider service)")
+        job_scheduler.register('exchange_rates', lambda: enhanced_exchange_service.update_all_rates(app),
+                               interval=15 * 60)
+        app.logger.info("Exchange rate auto-update job registered (using enhanced multi-provider service)")
     except Exception as e:
         app.logger.error(f"Failed to start exchange rate service: {e}")
 
@@ -1403,35 +1407,39 @@ def create_app(config_name=None):
                     app.logger.info("SQLite WAL mode enabled and configured")
                 except Exception as wal_error:
                     app.logger.warning(f"Could not enable SQLite WAL mode: {wal_error}")
-            
-            # create_performance_indexes is a static method that returns an integer
-            indexes_created = unified_db_service.create_performance_indexes()
-            if indexes_created > 0:
-                app.logger.info(f"Database optimization completed: {indexes_created} indexes created")
-            else:
-                app.logger.info(f"Database optimization completed with no new indexes")
+        
+        # Indexes ship as Alembic migrations; nothing is created at startup.
+        # Once a day the leader reviews the captured workload and logs what
+        # `flask database advise-indexes --write-migration` would add.
+        def review_index_workload():
+            from app.services.index_advisor_service import index_advisor
+            with app.app_context():
+                analysis = index_advisor.analyze(evaluate=False)
+            for recommendation in analysis['recommendations']:
+                app.logger.info(f"Index advisor suggests: {recommendation['ddl']}")
+        
+        if app.config.get('INDEX_ADVISOR_ENABLED', True):
+            job_scheduler.register('index_advisor', review_index_workload, interval=24 * 60 * 60)
     except Exception as e:
         app.logger.error(f"Failed to initialize database optimization: {e}")
     
-    # Optimize connection pool
+    # Connection pool events: idle-connection checks and error-driven reconnects
     try:
         from app.utils.connection_pool_optimizer import ConnectionPoolOptimizer
         with app.app_context():
-            # Get workload type from config (default: mixed)
-            workload_type = app.config.get('DB_WORKLOAD_TYPE', 'mixed')
-            ConnectionPoolOptimizer.optimize_for_workload(db.engine, workload_type)
-            ConnectionPoolOptimizer.setup_pool_events(db.engine)
-            app.logger.info("Connection pool optimized and monitoring enabled")
+            for engine in {id(engine): engine for engine in db.engines.values()}.values():
+                ConnectionPoolOptimizer.setup_pool_events(engine, app.config.get('DB_POOL_IDLE_CHECK_SECONDS', 300))
+            app.logger.info("Connection pool monitoring enabled")
     except Exception as e:
-        app.logger.error(f"Failed to optimize connection pool: {e}")
+        app.logger.error(f"Failed to set up connection pool events: {e}")
 
     # Initialize system monitoring
     try:
         from app.services.system_monitoring_service import get_system_monitor
-        with app.app_context():
-            system_monitor = get_system_monitor()
-            system_monitor.start_monitoring(interval=60)  # Monitor every minute
-            app.logger.info("System monitoring initialized")
+        system_monitor = get_system_monitor()
+        job_scheduler.register('system_monitoring', system_monitor.collect_once, interval=60,
+                               leader_only=False)  # Monitor every minute, in every worker
+        app.logger.info("System monitoring initialized")
     except Exception as e:
         app.logger.error(f"Failed to initialize system monitoring: {e}")
     
@@ -1448,23 +1456,12 @@ def create_app(config_name=None):
         from app.utils.feature_flags import FeatureFlags
         if FeatureFlags.ENABLE_PROMETHEUS_METRICS:
             try:
-                import threading
                 from app.utils.prometheus_metrics import update_system_metrics
                 
-                def update_metrics_periodically():
-                    """Update system metrics every 30 seconds"""
-                    while True:
-                        try:
-                            with app.app_context():
-                                update_system_metrics()
-                            time.sleep(30)
-                        except Exception as e:
-                            app.logger.error(f"Error updating metrics: {e}")
-                            time.sleep(30)
-                
-                metrics_thread = threading.Thread(target=update_metrics_periodically, daemon=True)
-                metrics_thread.start()
-                app.logger.info("Prometheus metrics updater started")
+                # Update system metrics every 30 seconds
+                job_scheduler.register('prometheus_system_metrics', update_system_metrics, interval=30,
+                                       leader_only=False)
+                app.logger.info("Prometheus metrics updater registered")
             except Exception as e:
                 app.logger.warning(f"Failed to start Prometheus metrics updater: {e}")
     except ImportError:
@@ -1473,10 +1470,9 @@ def create_app(config_name=None):
     # Initialize scalability services
     try:
         from app.services.scalability_service import get_scalability_service
-        with app.app_context():
-            scalability_service = get_scalability_service()
-            scalability_service.start_services()
-            app.logger.info("Scalability services initialized")
+        scalability_service = get_scalability_service()
+        job_scheduler.register('auto_scaling', scalability_service.check_scaling, interval=60)
+        app.logger.info("Scalability services initialized")
     except Exception as e:
         app.logger.error(f"Failed to initialize scalability services: {e}")
 
@@ -1485,7 +1481,8 @@ def create_app(config_name=None):
         try:
             from app.services.scheduled_backup_service import scheduled_backup_service
             scheduled_backup_service.init_app(app)
-            scheduled_backup_service.start()
+            job_scheduler.register('scheduled_backup', scheduled_backup_service.run_scheduled_backup,
+                                   daily_at=scheduled_backup_service.schedule_time, jitter=0)
             next_backup = scheduled_backup_service.get_next_backup_time()
             if next_backup:
                 app.logger.info(f"Scheduled backup service initialized - Next backup: {next_backup}")
@@ -1501,32 +1498,12 @@ def create_app(config_name=None):
         from flask import session, request, jsonify
         from flask_login import current_user
         from datetime import datetime, timezone
-        import json
-        
-        # #region agent log
-        try:
-            with open(r'c:\PipLinePro\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                f.write(json.dumps({"sessionId":"debug-session","runId":"runtime","hypothesisId":"A","location":"app/__init__.py:1248","message":"Session timeout check started","data":{"is_authenticated":current_user.is_authenticated,"path":request.path},"timestamp":int(datetime.now().timestamp()*1000)}) + '\n')
-        except: pass
-        # #endregion
         
         # Enforce session timeout on all authenticated requests
         if current_user.is_authenticated:
             session_timeout = app.config.get('PERMANENT_SESSION_LIFETIME')
-            # #region agent log
-            try:
-                with open(r'c:\PipLinePro\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                    f.write(json.dumps({"sessionId":"debug-session","runId":"runtime","hypothesisId":"A","location":"app/__init__.py:1256","message":"Session timeout config","data":{"timeout_seconds":session_timeout.total_seconds() if session_timeout else None},"timestamp":int(datetime.now().timestamp()*1000)}) + '\n')
-            except: pass
-            # #endregion
             if session_timeout:
                 session_created = session.get('_session_created')
-                # #region agent log
-                try:
-                    with open(r'c:\PipLinePro\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                        f.write(json.dumps({"sessionId":"debug-session","runId":"runtime","hypothesisId":"A","location":"app/__init__.py:1261","message":"Session created time","data":{"session_created":str(session_created) if session_created else None},"timestamp":int(datetime.now().timestamp()*1000)}) + '\n')
-                except: pass
-                # #endregion
                 if session_created:
                     try:
                         if isinstance(session_created, str):
@@ -1537,22 +1514,10 @@ def create_app(config_name=None):
                                 session_created = session_created.replace(tzinfo=timezone.utc)
                             
                             session_age = datetime.now(timezone.utc) - session_created
-                            # #region agent log
-                            try:
-                                with open(r'c:\PipLinePro\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                                    f.write(json.dumps({"sessionId":"debug-session","runId":"runtime","hypothesisId":"A","location":"app/__init__.py:1274","message":"Session age calculated","data":{"session_age_seconds":session_age.total_seconds(),"timeout_seconds":session_timeout.total_seconds(),"is_expired":session_age > session_timeout},"timestamp":int(datetime.now().timestamp()*1000)}) + '\n')
-                            except: pass
-                            # #endregion
                             if session_age > session_timeout:
                                 # Session expired - logout and return error
                                 from flask_login import logout_user
                                 logout_user()
-                                # #region agent log
-                                try:
-                                    with open(r'c:\PipLinePro\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                                        f.write(json.dumps({"sessionId":"debug-session","runId":"runtime","hypothesisId":"A","location":"app/__init__.py:1282","message":"Session expired - user logged out","data":{"path":request.path},"timestamp":int(datetime.now().timestamp()*1000)}) + '\n')
-                                except: pass
-                                # #endregion
                                 if request.path.startswith('/api/'):
                                     return jsonify({
                                         'error': 'Session expired',
@@ -1561,66 +1526,58 @@ def create_app(config_name=None):
                                 # For non-API requests, redirect handled by Flask-Login
                     except (ValueError, TypeError) as e:
                         app.logger.warning(f"Error checking session timeout: {e}")
-                        # #region agent log
-                        try:
-                            with open(r'c:\PipLinePro\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                                f.write(json.dumps({"sessionId":"debug-session","runId":"runtime","hypothesisId":"A","location":"app/__init__.py:1293","message":"Session timeout check error","data":{"error":str(e)},"timestamp":int(datetime.now().timestamp()*1000)}) + '\n')
-                        except: pass
-                        # #endregion
                 else:
                     # No session creation time - set it now
                     session['_session_created'] = datetime.now(timezone.utc).isoformat()
                     session.modified = True
-                    # #region agent log
-                    try:
-                        with open(r'c:\PipLinePro\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                            f.write(json.dumps({"sessionId":"debug-session","runId":"runtime","hypothesisId":"A","location":"app/__init__.py:1300","message":"Session created time set","data":{"created_time":session['_session_created']},"timestamp":int(datetime.now().timestamp()*1000)}) + '\n')
-                    except: pass
-                    # #endregion
     
     # Add periodic connection pool monitoring
     try:
-        import threading
         from app.utils.connection_pool_optimizer import ConnectionPoolOptimizer
         
         def monitor_connection_pool():
-            """Periodically monitor connection pool and log warnings"""
-            import json
-            from datetime import datetime
-            while True:
-                try:
-                    time.sleep(60)  # Check every minute
-                    with app.app_context():
-                        stats = ConnectionPoolOptimizer.get_pool_stats(db.engine)
-                        utilization = stats.get('utilization', 0)
-                        # #region agent log
-                        try:
-                            with open(r'c:\PipLinePro\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                                f.write(json.dumps({"sessionId":"debug-session","runId":"runtime","hypothesisId":"F","location":"app/__init__.py:1289","message":"Connection pool stats collected","data":{"pool_size":stats.get('size'),"checked_out":stats.get('checked_out'),"utilization":utilization},"timestamp":int(datetime.now().timestamp()*1000)}) + '\n')
-                        except: pass
-                        # #endregion
-                        
-                        # Warn if pool utilization is high
-                        if utilization > 80:
-                            app.logger.warning(
-                                f"High connection pool utilization: {utilization:.1f}% - "
-                                f"Size: {stats.get('size', 0)}, "
-                                f"Checked out: {stats.get('checked_out', 0)}"
-                            )
-                except Exception as e:
-                    app.logger.error(f"Error in connection pool monitoring: {e}")
-                    # #region agent log
-                    try:
-                        with open(r'c:\PipLinePro\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                            f.write(json.dumps({"sessionId":"debug-session","runId":"runtime","hypothesisId":"F","location":"app/__init__.py:1304","message":"Connection pool monitoring error","data":{"error":str(e)},"timestamp":int(datetime.now().timestamp()*1000)}) + '\n')
-                    except: pass
-                    # #endregion
+            """Check connection pool utilization and log warnings"""
+            try:
+                stats = ConnectionPoolOptimizer.get_pool_stats(db.engine)
+                utilization = stats.get('utilization', 0)
+                wait = stats.get('checkout_wait', {})
+                
+                # Warn if pool utilization is high or callers queue for connections
+                if utilization > 80 or wait.get('timeouts') or (wait.get('p95_wait_ms') or 0) >= 100:
+                    app.logger.warning(
+                        f"Connection pool pressure: {utilization:.1f}% of "
+                        f"{stats.get('size', 0)}+{stats.get('max_overflow', 0)} in use, "
+                        f"p95 checkout wait {wait.get('p95_wait_ms')}ms, {wait.get('timeouts', 0)} timeouts"
+                    )
+            except Exception as e:
+                app.logger.error(f"Error in connection pool monitoring: {e}")
         
-        # Start monitoring thread
-        monitor_thread = threading.Thread(target=monitor_connection_pool, daemon=True)
-        monitor_thread.start()
+        # Check every minute
+        job_scheduler.register('connection_pool_monitor', monitor_connection_pool, interval=60,
+                               leader_only=False)
         app.logger.info("Connection pool monitoring started")
     except Exception as e:
         app.logger.warning(f"Could not start connection pool monitoring: {e}")
+    
+    # Trust wallet sync (registers a 15-minute job when enabled)
+    if app.config.get('TRUST_WALLET_SYNC_ENABLED', False):
+        try:
+            from app.services.trust_wallet_sync_scheduler import trust_wallet_scheduler
+            trust_wallet_scheduler._app = app
+            trust_wallet_scheduler.start_scheduler()
+        except Exception as e:
+            app.logger.error(f"Failed to initialize Trust wallet sync: {e}")
+    
+    # Start the cluster job scheduler - every worker runs the election loop,
+    # only the elected leader dispatches the jobs registered above
+    try:
+        job_scheduler.init_app(app)
+        job_scheduler.start()
+        app.job_scheduler = job_scheduler
+    except Exception as e:
+        app.logger.error(f"Failed to start job scheduler: {e}")
+    
+    app.startup_seconds = round(time.perf_counter() - startup_started, 3)
+    app.logger.info(f"Application initialized in {app.startup_seconds}s")
 
     return app 
\ No newline at end of file
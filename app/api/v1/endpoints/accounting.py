@@ -12,7 +12,7 @@ import logging
 
 from app import db, limiter
 from app.models.transaction import Transaction
-from app.models.financial import DailyNet, Expense, ExpenseBudget, MonthlyCurrencySummary
+from app.models.financial import DailyNet, Expense, ExpenseBudget, MonthlyCurrencySummary, daily_net_encoder
 from flask_login import current_user
 from datetime import timedelta
 from app.utils.tenant_helpers import set_tenant_on_new_record, add_tenant_filter, validate_tenant_access
@@ -795,11 +795,12 @@ def get_net_history():
             except ValueError:
                 pass
         
-        records = query.order_by(DailyNet.date.desc()).limit(limit).all()
+        # Plain column rows, encoded like DailyNet.to_dict() without building ORM objects
+        records = query.with_entities(*daily_net_encoder.columns).order_by(DailyNet.date.desc()).limit(limit).all()
         
         return jsonify({
             "success": True,
-            "data": [record.to_dict() for record in records],
+            "data": daily_net_encoder.encode_rows(records),
             "count": len(records)
         }), 200
         
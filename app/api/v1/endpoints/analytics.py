@@ -1,7 +1,7 @@
 """
 Analytics API endpoints for Flask
 """
-from flask import Blueprint, request, jsonify, session, Response
+from flask import Blueprint, request, jsonify, session, Response, has_request_context
 from flask_login import login_required, current_user
 from app.utils.unified_logger import log_api_call, get_logger
 import time
@@ -11,6 +11,7 @@ from sqlalchemy import func, and_, or_, text, case
 from datetime import datetime, timedelta, timezone
 from app.models.transaction import Transaction
 from app.models.financial import PspTrack
+from app.repositories.transaction_repository import TransactionRepository
 from app import db, limiter
 from app.services.enhanced_cache_service import cache_service as cache, cached as _enhanced_cached
 from app.utils.unified_logger import log_function_call as monitor_performance
@@ -34,14 +35,17 @@ def cached(ttl: int = 3600, key_prefix: str = None, key_func=None):
     if key_prefix and not key_func:
         # Convert key_prefix to key_func
         def prefix_key_func(*args, **kwargs):
-            return f"pipeline:{key_prefix}:{args}:{kwargs}"
+            # Query string and data version keep variants and versions apart
+            variant = request.query_string.decode('latin-1') if has_request_context() else ''
+            return f"pipeline:{key_prefix}:{variant}:{request_version_tag()}:{args}:{kwargs}"
         return _enhanced_cached(ttl=ttl, key_func=prefix_key_func)
     elif key_func:
         return _enhanced_cached(ttl=ttl, key_func=key_func)
     else:
         return _enhanced_cached(ttl=ttl)
 from app.utils.query_optimizer import query_optimizer
-from app.utils.response_optimizer import optimized_response
+from app.utils.response_optimizer import optimized_response, versioned_response
+from app.services.data_version_service import request_version_tag
 from app.utils.financial_utils import (
     safe_decimal, safe_add, safe_subtract, safe_divide, 
     round_currency, to_float, safe_percentage, safe_abs
@@ -58,44 +62,14 @@ logger = logging.getLogger(__name__)
 import json
 
 analytics_api = Blueprint('analytics_api', __name__)
+transaction_repository = TransactionRepository()
 
 # CSRF protection is handled via @require_csrf decorator on critical endpoints
 from app import csrf
 csrf.exempt(analytics_api)  # Still exempt blueprint, but use @require_csrf on critical routes
 from app.utils.csrf_decorator import require_csrf
 
-# Blueprint-level timing for all analytics requests
-_analytics_logger = get_logger('Analytics')
-
-@analytics_api.before_request
-def _analytics_before_request():
-    try:
-        from flask import g, request
-        g._analytics_req_start = time.time()
-        g._analytics_path = request.path
-        g._analytics_query = dict(request.args)
-    except Exception:
-        pass
-
-@analytics_api.after_request
-def _analytics_after_request(response):
-    try:
-        from flask import g
-        start = getattr(g, '_analytics_req_start', None)
-        if start is not None:
-            duration = time.time() - start
-            _analytics_logger.log_performance(
-                'analytics_request',
-                duration,
-                {
-                    'path': getattr(g, '_analytics_path', ''),
-                    'status': response.status_code,
-                    'query': getattr(g, '_analytics_query', {}),
-                }
-            )
-    except Exception:
-        pass
-    return response
+# Request timing for analytics endpoints is recorded by app.utils.instrumentation
 
 # Advanced caching configuration
 ANALYTICS_CACHE_DURATION = 600  # 10 minutes for analytics data
@@ -161,22 +135,20 @@ def generate_chart_data(time_range='7d'):
         # Group by date and calculate sums/counts at database level
         daily_summary = db.session.query(
             Transaction.date,
-            func.sum(func.coalesce(Transaction.net_amount_try, Transaction.net_amount, Transaction.amount)).label('total_net_amount'),
+            func.sum(Transaction.effective_net_try).label('total_net_amount'),
             func.sum(func.coalesce(Transaction.commission_try, Transaction.commission, 0)).label('total_commission'),
             func.count(Transaction.id).label('transaction_count'),
             func.count(func.distinct(Transaction.client_name)).label('unique_clients'),
             # Separate deposits and withdrawals
             func.sum(
                 case(
-                    (func.upper(Transaction.category).in_(['DEP', 'DEPOSIT', 'INVESTMENT']),
-                     func.coalesce(Transaction.net_amount_try, Transaction.net_amount, Transaction.amount)),
+                    (Transaction.direction == 'DEP', Transaction.effective_net_try),
                     else_=0
                 )
             ).label('total_deposits'),
             func.sum(
                 case(
-                    (func.upper(Transaction.category).in_(['WD', 'WITHDRAW', 'WITHDRAWAL']),
-                     func.abs(func.coalesce(Transaction.net_amount_try, Transaction.net_amount, Transaction.amount))),
+                    (Transaction.direction == 'WD', func.abs(Transaction.effective_net_try)),
                     else_=0
                 )
             ).label('total_withdrawals')
@@ -275,6 +247,7 @@ def generate_chart_data(time_range='7d'):
 
 @analytics_api.route("/dashboard/stats")
 @login_required
+@versioned_response('transactions', 'allocations', 'devir', 'kasa_top', 'expenses', 'rates', 'psp_config')
 @limiter.limit("20 per minute, 200 per hour")  # Dashboard endpoint - frequently accessed
 @log_api_call
 @handle_api_errors
@@ -325,20 +298,18 @@ def dashboard_stats():
     # Get aggregated stats in one query
     stats = base_query.with_entities(
         func.count(Transaction.id).label('total_transactions'),
-        func.sum(func.coalesce(Transaction.amount_try, Transaction.amount)).label('total_revenue'),
+        func.sum(Transaction.effective_amount_try).label('total_revenue'),
         func.sum(func.coalesce(Transaction.commission_try, Transaction.commission, 0)).label('total_commission'),
-        func.sum(func.coalesce(Transaction.net_amount_try, Transaction.net_amount, Transaction.amount)).label('total_net_amount'),
+        func.sum(Transaction.effective_net_try).label('total_net_amount'),
         func.sum(
             case(
-                (func.upper(Transaction.category).in_(['DEP', 'DEPOSIT', 'INVESTMENT']),
-                 func.abs(func.coalesce(Transaction.net_amount_try, Transaction.net_amount, Transaction.amount))),
+                (Transaction.direction == 'DEP', func.abs(Transaction.effective_net_try)),
                 else_=0
             )
         ).label('total_deposits'),
         func.sum(
             case(
-                (func.upper(Transaction.category).in_(['WD', 'WITHDRAW', 'WITHDRAWAL']),
-                 func.abs(func.coalesce(Transaction.net_amount_try, Transaction.net_amount, Transaction.amount))),
+                (Transaction.direction == 'WD', func.abs(Transaction.effective_net_try)),
                 else_=0
             )
         ).label('total_withdrawals')
@@ -373,7 +344,7 @@ def dashboard_stats():
     # Get previous period stats with aggregation
     prev_stats = db.session.query(
         func.count(Transaction.id).label('total_transactions'),
-        func.sum(func.coalesce(Transaction.amount_try, Transaction.amount)).label('total_revenue')
+        func.sum(Transaction.effective_amount_try).label('total_revenue')
     ).filter(
         Transaction.date >= prev_start_date.date(),
         Transaction.date < prev_end_date.date()
@@ -637,6 +608,7 @@ def analytics_data():
 
 @analytics_api.route("/dashboard")
 @login_required
+@versioned_response('transactions', 'allocations', 'devir', 'kasa_top', 'expenses', 'rates', 'psp_config')
 def get_dashboard_data():
     """Get dashboard analytics data"""
     try:
@@ -662,6 +634,7 @@ def get_dashboard_data():
 
 @analytics_api.route("/psp-summary")
 @login_required
+@versioned_response('transactions', 'allocations', 'devir', 'kasa_top', 'rates', 'psp_config')
 def get_psp_summary():
     """Get PSP summary analytics"""
     try:
@@ -691,6 +664,7 @@ def get_psp_summary():
 
 @analytics_api.route("/ledger-data")
 @login_required
+@versioned_response('transactions', 'allocations', 'devir', 'kasa_top', 'rates', 'psp_config')
 @handle_api_errors
 def get_ledger_data():
     """Get ledger data grouped by date with PSP allocations"""
@@ -698,16 +672,13 @@ def get_ledger_data():
     page = int(request.args.get('page', 1))
     per_page = int(request.args.get('per_page', 1000))  # Default to 1000 for performance
     
-    # Get transactions with PSP data (with pagination for large datasets)
+    # Stream the amount columns of transactions with PSP data (no ORM instances)
     if per_page >= 10000:  # If requesting very large dataset, get all
-        transactions = Transaction.query.filter(
-            Transaction.psp.isnot(None)
-        ).all()
+        transactions = transaction_repository.iter_ledger_rows()
     else:
         # Use pagination for better performance
-        transactions = Transaction.query.filter(
-            Transaction.psp.isnot(None)
-        ).paginate(page=page, per_page=per_page, error_out=False).items
+        page = max(page, 1)
+        transactions = transaction_repository.iter_ledger_rows(limit=per_page, offset=(page - 1) * per_page)
     
     # Query and process transactions with PSP data
     
@@ -2464,6 +2435,7 @@ def commission_analytics():
 
 @analytics_api.route("/consolidated-dashboard")
 @login_required
+@versioned_response('transactions', 'allocations', 'devir', 'kasa_top', 'expenses', 'rates', 'psp_config')
 @cached(ttl=DASHBOARD_CACHE_DURATION, key_prefix="consolidated_dashboard")
 @monitor_performance
 @limiter.limit("10 per minute, 100 per hour")  # Rate limiting for analytics
@@ -3153,6 +3125,7 @@ def data_health_check():
 
 @analytics_api.route("/revenue-detailed")
 @login_required
+@versioned_response('transactions', 'rates', 'psp_config')
 @cached(ttl=ANALYTICS_CACHE_DURATION, key_prefix="revenue_detailed")
 @monitor_performance
 @optimized_response(cache_type='analytics', compress=True)
@@ -3184,18 +3157,16 @@ def revenue_detailed():
         # Get total stats with aggregation
         total_stats = base_query.with_entities(
             func.count(Transaction.id).label('total_transactions'),
-            func.sum(func.coalesce(Transaction.amount_try, Transaction.amount, 0)).label('total_revenue'),
+            func.sum(Transaction.effective_amount_try).label('total_revenue'),
             func.sum(
                 case(
-                    (func.upper(Transaction.category).in_(['DEP', 'DEPOSIT', 'INVESTMENT']),
-                     func.abs(func.coalesce(Transaction.net_amount_try, Transaction.net_amount, Transaction.amount))),
+                    (Transaction.direction == 'DEP', func.abs(Transaction.effective_net_try)),
                     else_=0
                 )
             ).label('total_deposits'),
             func.sum(
                 case(
-                    (func.upper(Transaction.category).in_(['WD', 'WITHDRAW', 'WITHDRAWAL']),
-                     func.abs(func.coalesce(Transaction.net_amount_try, Transaction.net_amount, Transaction.amount))),
+                    (Transaction.direction == 'WD', func.abs(Transaction.effective_net_try)),
                     else_=0
                 )
             ).label('total_withdrawals')
@@ -3216,18 +3187,16 @@ def revenue_detailed():
         # Get daily revenue aggregated by date
         daily_summary = base_query.with_entities(
             Transaction.date,
-            func.sum(func.coalesce(Transaction.net_amount_try, Transaction.net_amount, Transaction.amount)).label('net_amount'),
+            func.sum(Transaction.effective_net_try).label('net_amount'),
             func.sum(
                 case(
-                    (func.upper(Transaction.category).in_(['DEP', 'DEPOSIT', 'INVESTMENT']),
-                     func.abs(func.coalesce(Transaction.net_amount_try, Transaction.net_amount, Transaction.amount))),
+                    (Transaction.direction == 'DEP', func.abs(Transaction.effective_net_try)),
                     else_=0
                 )
             ).label('deposits'),
             func.sum(
                 case(
-                    (func.upper(Transaction.category).in_(['WD', 'WITHDRAW', 'WITHDRAWAL']),
-                     func.abs(func.coalesce(Transaction.net_amount_try, Transaction.net_amount, Transaction.amount))),
+                    (Transaction.direction == 'WD', func.abs(Transaction.effective_net_try)),
                     else_=0
                 )
             ).label('withdrawals'),
@@ -3249,13 +3218,13 @@ def revenue_detailed():
         # Get client totals with aggregation
         client_summary = base_query.with_entities(
             Transaction.client_name,
-            func.sum(func.coalesce(Transaction.net_amount_try, Transaction.net_amount, Transaction.amount)).label('total_amount'),
+            func.sum(Transaction.effective_net_try).label('total_amount'),
             func.count(Transaction.id).label('transaction_count')
         ).filter(
             Transaction.client_name.isnot(None),
             Transaction.client_name != ''
         ).group_by(Transaction.client_name).order_by(
-            func.sum(func.coalesce(Transaction.net_amount_try, Transaction.net_amount, Transaction.amount)).desc()
+            func.sum(Transaction.effective_net_try).desc()
         ).limit(10).all()
         
         client_totals = {
@@ -3269,13 +3238,13 @@ def revenue_detailed():
         # Get PSP totals with aggregation
         psp_summary = base_query.with_entities(
             Transaction.psp,
-            func.sum(func.coalesce(Transaction.amount_try, Transaction.amount, 0)).label('total_amount'),
+            func.sum(Transaction.effective_amount_try).label('total_amount'),
             func.count(Transaction.id).label('transaction_count')
         ).filter(
             Transaction.psp.isnot(None),
             Transaction.psp != ''
         ).group_by(Transaction.psp).order_by(
-            func.sum(func.coalesce(Transaction.amount_try, Transaction.amount)).desc()
+            func.sum(Transaction.effective_amount_try).desc()
         ).all()
         
         psp_totals = {
@@ -3289,7 +3258,7 @@ def revenue_detailed():
         # Get category totals with aggregation
         category_summary = base_query.with_entities(
             Transaction.category,
-            func.sum(func.coalesce(Transaction.amount_try, Transaction.amount, 0)).label('total_amount'),
+            func.sum(Transaction.effective_amount_try).label('total_amount'),
             func.count(Transaction.id).label('transaction_count')
         ).filter(
             Transaction.category.isnot(None)
@@ -3391,6 +3360,7 @@ def revenue_detailed():
 
 @analytics_api.route("/psp-rollover-summary")
 @login_required
+@versioned_response('transactions', 'allocations', 'devir', 'kasa_top', 'rates', 'psp_config')
 def get_psp_rollover_summary():
     """Get PSP rollover summary for dashboard display"""
     try:
@@ -3403,19 +3373,17 @@ def get_psp_rollover_summary():
         psp_stats = db.session.query(
             Transaction.psp,
             func.count(Transaction.id).label('transaction_count'),
-            func.sum(func.coalesce(Transaction.amount_try, Transaction.amount, 0)).label('total_amount'),
-            func.sum(func.coalesce(Transaction.net_amount_try, Transaction.net_amount, 0)).label('total_net'),
+            func.sum(Transaction.effective_amount_try).label('total_amount'),
+            func.sum(Transaction.effective_net_try).label('total_net'),
             func.sum(
                 case(
-                    (func.upper(Transaction.category).in_(['DEP', 'DEPOSIT', 'INVESTMENT']),
-                     func.abs(func.coalesce(Transaction.net_amount_try, Transaction.net_amount, Transaction.amount))),
+                    (Transaction.direction == 'DEP', func.abs(Transaction.effective_net_try)),
                     else_=0
                 )
             ).label('total_deposits'),
             func.sum(
                 case(
-                    (func.upper(Transaction.category).in_(['WD', 'WITHDRAW', 'WITHDRAWAL']),
-                     func.abs(func.coalesce(Transaction.net_amount_try, Transaction.net_amount, Transaction.amount))),
+                    (Transaction.direction == 'WD', func.abs(Transaction.effective_net_try)),
                     else_=0
                 )
             ).label('total_withdrawals'),
@@ -655,26 +655,12 @@ def request_password_reset():
         # But only generate token if user exists
         if user and user.is_active:
             try:
-                # #region agent log
-                import json
-                from datetime import datetime
-                try:
-                    with open(r'c:\PipLinePro\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                        f.write(json.dumps({"sessionId":"debug-session","runId":"runtime","hypothesisId":"C","location":"app/api/v1/endpoints/auth.py:541","message":"Generating password reset token","data":{"user_id":user.id,"username":user.username},"timestamp":int(datetime.now().timestamp()*1000)}) + '\n')
-                except: pass
-                # #endregion
                 # Generate reset token (1 hour expiry)
                 reset_token = PasswordResetToken.generate_token(
                     user_id=user.id,
                     ip_address=ip_address,
                     expiry_hours=1
                 )
-                # #region agent log
-                try:
-                    with open(r'c:\PipLinePro\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                        f.write(json.dumps({"sessionId":"debug-session","runId":"runtime","hypothesisId":"C","location":"app/api/v1/endpoints/auth.py:549","message":"Password reset token generated","data":{"token_id":reset_token.id,"expires_at":reset_token.expires_at.isoformat() if reset_token.expires_at else None},"timestamp":int(datetime.now().timestamp()*1000)}) + '\n')
-                except: pass
-                # #endregion
                 
                 # In a real implementation, send email here
                 # For now, return token in response (NOT RECOMMENDED FOR PRODUCTION)
@@ -13,6 +13,8 @@ import logging
 from app.services.enhanced_cache_service import cache_service
 from app.utils.unified_logger import get_logger, PerformanceLogger
 from app.utils.api_response import make_response
+from app.utils.response_optimizer import versioned_response
+from app.services.data_version_service import request_version_tag
 
 logger = logging.getLogger(__name__)
 api_logger = get_logger('app.api.consolidated_dashboard')
@@ -53,6 +55,7 @@ if os.environ.get('FLASK_ENV') != 'production':
 
 @consolidated_dashboard_api.route("/dashboard/consolidated")
 # @login_required  # Temporarily disabled for debugging
+@versioned_response('transactions', 'allocations', 'devir', 'kasa_top', 'expenses', 'rates', 'psp_config')
 @limiter.limit("15 per minute, 300 per hour")  # Dashboard endpoint - frequently accessed
 def get_consolidated_dashboard():
     """Get all dashboard data in a single optimized request"""
@@ -67,7 +70,7 @@ def get_consolidated_dashboard():
         # CRITICAL FIX: Check cache but allow bypass with query parameter
         bypass_cache = request.args.get('_t') is not None  # Cache buster query parameter
         user_id = current_user.id if current_user.is_authenticated else 'anonymous'
-        cache_key = f"consolidated_dashboard:{user_id}:{time_range}"
+        cache_key = f"consolidated_dashboard:{user_id}:{time_range}:{request_version_tag()}"
         
         if not bypass_cache:
             cached_result = cache_service.get(cache_key)
@@ -106,7 +109,7 @@ def get_consolidated_dashboard():
         # CRITICAL FIX: Get current exchange rate FIRST before any calculations
         # This prevents currency mixing bugs
         from app.models.config import ExchangeRate
-        exchange_rate_cache_key = "latest_exchange_rate"
+        exchange_rate_cache_key = f"latest_exchange_rate:{request_version_tag()}"
         cached_rate = cache_service.get(exchange_rate_cache_key)
         
         if cached_rate:
@@ -177,8 +180,8 @@ def get_consolidated_dashboard():
         
         # Calculate actual deposits and withdrawals for accurate net cash - FIXED
         # CRITICAL FIX: Use amount_try (gross amount) not net_amount_try for deposits/withdrawals
-        deposits_base = base_query.filter(Transaction.category == 'DEP')
-        withdrawals_base = base_query.filter(Transaction.category == 'WD')
+        deposits_base = base_query.filter(Transaction.direction == 'DEP')
+        withdrawals_base = base_query.filter(Transaction.direction == 'WD')
         
         # Deposits with amount_try (gross amount in TL)
         deposits_with_try = deposits_base.filter(Transaction.amount_try.isnot(None)).with_entities(
@@ -445,7 +448,7 @@ def get_consolidated_dashboard():
         # Daily deposits and withdrawals
         daily_deposits_base = db.session.query(Transaction).filter(
             Transaction.date == today,
-            Transaction.category == 'DEP'
+            Transaction.direction == 'DEP'
         )
         daily_deposits_with_try = daily_deposits_base.filter(Transaction.amount_try.isnot(None)).with_entities(
             func.sum(func.abs(Transaction.amount_try))
@@ -472,7 +475,7 @@ def get_consolidated_dashboard():
         
         daily_withdrawals_base = db.session.query(Transaction).filter(
             Transaction.date == today,
-            Transaction.category == 'WD'
+            Transaction.direction == 'WD'
         )
         daily_withdrawals_with_try = daily_withdrawals_base.filter(Transaction.amount_try.isnot(None)).with_entities(
             func.sum(func.abs(Transaction.amount_try))
@@ -501,7 +504,7 @@ def get_consolidated_dashboard():
         monthly_deposits_base = db.session.query(Transaction).filter(
             Transaction.date >= month_start,
             Transaction.date <= today,
-            Transaction.category == 'DEP'
+            Transaction.direction == 'DEP'
         )
         monthly_deposits_with_try = monthly_deposits_base.filter(Transaction.amount_try.isnot(None)).with_entities(
             func.sum(func.abs(Transaction.amount_try))
@@ -529,7 +532,7 @@ def get_consolidated_dashboard():
         monthly_withdrawals_base = db.session.query(Transaction).filter(
             Transaction.date >= month_start,
             Transaction.date <= today,
-            Transaction.category == 'WD'
+            Transaction.direction == 'WD'
         )
         monthly_withdrawals_with_try = monthly_withdrawals_base.filter(Transaction.amount_try.isnot(None)).with_entities(
             func.sum(func.abs(Transaction.amount_try))
@@ -825,7 +828,7 @@ def get_consolidated_dashboard():
         ).scalar() or 0
         
         # Calculate previous period net cash (deposits - withdrawals)
-        prev_deposits_base = prev_base_query.filter(Transaction.category == 'DEP')
+        prev_deposits_base = prev_base_query.filter(Transaction.direction == 'DEP')
         prev_deposits_with_try = prev_deposits_base.filter(Transaction.amount_try.isnot(None)).with_entities(
             func.sum(func.abs(Transaction.amount_try))
         ).scalar() or 0
@@ -852,7 +855,7 @@ def get_consolidated_dashboard():
         
         prev_total_deposits = float(prev_deposits_with_try) + prev_deposits_without_try
         
-        prev_withdrawals_base = prev_base_query.filter(Transaction.category == 'WD')
+        prev_withdrawals_base = prev_base_query.filter(Transaction.direction == 'WD')
         prev_withdrawals_with_try = prev_withdrawals_base.filter(Transaction.amount_try.isnot(None)).with_entities(
             func.sum(func.abs(Transaction.amount_try))
         ).scalar() or 0
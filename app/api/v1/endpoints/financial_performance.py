@@ -14,6 +14,8 @@ from decimal import Decimal
 import logging
 import time
 from functools import lru_cache
+from app.utils.response_optimizer import versioned_response
+from app.services.data_version_service import request_version_tag
 
 logger = logging.getLogger(__name__)
 
@@ -373,6 +375,7 @@ def calculate_financial_metrics_with_daily_conversion(start_date, end_date):
 @financial_performance_bp.route('/financial-performance', methods=['GET'])
 @limiter.limit("20 per minute, 200 per hour")  # Dashboard endpoint - moderate frequency
 @login_required  # Add login requirement for security
+@versioned_response('transactions', 'expenses', 'rates', 'psp_config')
 def get_financial_performance():
     """Get financial performance data for dashboard - optimized with caching"""
     start_time = time.time()
@@ -382,7 +385,7 @@ def get_financial_performance():
         view_type = request.args.get('view', 'net')  # 'gross' or 'net'
         
         # Check cache first
-        cache_key = f"financial_performance_{time_range}"
+        cache_key = f"financial_performance_{time_range}_{request_version_tag()}"
         current_time = time.time()
         
         if cache_key in _financial_performance_cache:
@@ -575,7 +578,9 @@ def get_financial_performance():
         elapsed_time = time.time() - start_time
         logger.info(f"Financial performance data retrieved for range {time_range}: Daily={daily_metrics.get('total_transactions', 0)}, Monthly={monthly_metrics.get('total_transactions', 0)}, Annual={annual_metrics.get('total_transactions', 0)} transactions (took {elapsed_time:.2f}s)")
         
-        # Cache the response
+        # Cache the response, dropping entries of older data versions
+        for stale_key in [key for key in _financial_performance_cache if key.startswith(f"financial_performance_{time_range}_")]:
+            del _financial_performance_cache[stale_key]
         _financial_performance_cache[cache_key] = (response_data, current_time)
         
         return jsonify(response_data)
@@ -591,6 +596,7 @@ def get_financial_performance():
         }), 500
 
 @financial_performance_bp.route('/financial-performance/daily', methods=['GET'])
+@versioned_response('transactions', 'expenses', 'rates', 'psp_config')
 def get_daily_financial_performance():
     """Get daily financial performance data for a specific date"""
     try:
@@ -714,6 +720,7 @@ def get_daily_financial_performance():
 # Removed duplicate route - using the one with year/month parameters below
 
 @financial_performance_bp.route('/financial-performance/annual', methods=['GET'])
+@versioned_response('transactions', 'expenses', 'rates', 'psp_config')
 def get_annual_financial_performance():
     """Get annual financial performance data"""
     return get_financial_performance_with_range('annual')
@@ -781,6 +788,7 @@ def get_financial_performance_with_range(time_range):
         }), 500
 
 @financial_performance_bp.route('/financial-performance/monthly', methods=['GET'])
+@versioned_response('transactions', 'expenses', 'rates', 'psp_config')
 def get_monthly_financial_performance_by_date():
     """Get monthly financial performance data for a specific month"""
     try:
@@ -840,6 +840,7 @@ def database_optimization():
                         'index': missing_idx['index'],
                         'columns': missing_idx['columns'],
                         'suggestions': [
+                            missing_idx.get('ddl') or
                             f"CREATE INDEX {missing_idx['index']} ON \"{missing_idx['table']}\" ({', '.join(missing_idx['columns'])})"
                         ]
                     }
@@ -8,12 +8,20 @@ from sqlalchemy import func, text, case, and_
 from datetime import datetime, timedelta, timezone
 from app.models.transaction import Transaction
 from app.models.financial import PspTrack
+from app.repositories.transaction_repository import TransactionRepository
 from app import db, limiter
 from decimal import Decimal, InvalidOperation
 import logging
 import os
 import json
-from app.services.enhanced_cache_service import cache_service, cached
+from app.services.enhanced_cache_service import cache_service, cached, CacheKey, TRANSACTION_CACHE_TAGS
+from app.services.event_service import EventType
+from app.services.unit_of_work import unit_of_work
+from app.services.audit_service import AuditService
+from app.services.audit_writer_service import serialize_audit_values
+from app.services.data_version_service import request_version_tag
+from app.services.dimension_service import dimension_service
+from app.utils.response_optimizer import versioned_response
 from app.services.unified_database_service import monitor_query_performance
 from app.utils.unified_logger import get_logger
 from app.utils.input_sanitizer import (
@@ -33,6 +41,7 @@ logger = logging.getLogger(__name__)
 api_logger = get_logger('app.api.transactions')
 
 transactions_api = Blueprint('transactions_api', __name__)
+transaction_repository = TransactionRepository()
 
 # CSRF protection is handled via @require_csrf decorator on critical endpoints
 # GET requests are exempt, POST/PUT/DELETE require CSRF token in X-CSRFToken header
@@ -40,6 +49,30 @@ from app import csrf
 csrf.exempt(transactions_api)  # Still exempt blueprint, but use @require_csrf on critical routes
 from app.utils.csrf_decorator import require_csrf
 
+
+def _defer_transaction_side_effects(transaction, event_type, action, old_values=None, new_values=None):
+    """Register a transaction write's cache, event and audit side effects on the session
+
+    They are applied together right after the write commits (see unit_of_work).
+    """
+    unit_of_work.invalidate(tags=TRANSACTION_CACHE_TAGS, keys=[CacheKey.transaction_detail(transaction.id)])
+    unit_of_work.publish(event_type, {
+        'transaction_id': transaction.id,
+        'client_name': transaction.client_name,
+        'amount': float(transaction.amount),
+        'psp': transaction.psp,
+        'user_id': current_user.id
+    }, source='api_v1')
+    unit_of_work.audit({
+        'user_id': current_user.id,
+        'action': action,
+        'table_name': 'transaction',
+        'record_id': transaction.id,
+        'old_values': serialize_audit_values(old_values),
+        'new_values': serialize_audit_values(new_values),
+        'ip_address': AuditService.get_ip_address()
+    })
+
 @transactions_api.route("", methods=['POST'])
 @transactions_api.route("/", methods=['POST'])
 @limiter.limit("30 per minute, 500 per hour")  # Rate limiting for transaction creation
@@ -199,7 +232,6 @@ def create_transaction():
     # Create transaction using transaction helper
     # Keep PSP as-is (None or string) - don't convert to empty string
     logger.info(f"Creating transaction with PSP: '{psp}' (type: {type(psp)}, will be saved to database)")
-    transaction_id = None
     with db_transaction() as session:
         transaction = Transaction(
             client_name=client_name,
@@ -226,42 +258,24 @@ def create_transaction():
         
         session.add(transaction)
         session.flush()  # Ensure the transaction gets an ID
-        transaction_id = transaction.id  # Save ID before commit
-        # Transaction will auto-commit here
-    
-    # Force WAL checkpoint to ensure transaction is immediately visible (SQLite specific)
-    try:
-        db.session.execute(text("PRAGMA wal_checkpoint(FULL)"))
-        db.session.commit()
-    except Exception:
-        # Ignore if not SQLite
-        pass
-    
-    # Invalidate cache after transaction creation
-    try:
-        from app.services.query_service import QueryService
-        QueryService.invalidate_transaction_cache()
-        logger.info("Cache invalidated after API transaction creation")
-    except Exception as cache_error:
-        logger.warning(f"Failed to invalidate cache after API transaction creation: {cache_error}")
-    
-    # Reload transaction from database to ensure we have all fields
-    transaction = Transaction.query.get(transaction_id)
-    if not transaction:
-        raise DatabaseError("Transaction was created but could not be retrieved")
-    
-    logger.info(f"Transaction {transaction_id} reloaded from database - PSP value: '{transaction.psp}'")
+        
+        # Prepare response data from the flushed object (backward compatible format for frontend)
+        transaction_data = {
+            'id': transaction.id,
+            'client_name': transaction.client_name,
+            'amount': float(transaction.amount),
+            'commission': float(transaction.commission),
+            'net_amount': float(transaction.net_amount),
+            'currency': transaction.currency,
+            'date': transaction.date.isoformat() if transaction.date else None
+        }
+        _defer_transaction_side_effects(
+            transaction, EventType.TRANSACTION_CREATED, AuditService.ACTION_CREATE,
+            new_values=transaction.to_dict()
+        )
+        # Transaction will auto-commit here; cache, event and audit follow in one flush
     
-    # Prepare response data (backward compatible format for frontend)
-    transaction_data = {
-        'id': transaction.id,
-        'client_name': transaction.client_name,
-        'amount': float(transaction.amount),
-        'commission': float(transaction.commission),
-        'net_amount': float(transaction.net_amount),
-        'currency': transaction.currency,
-        'date': transaction.date.isoformat() if transaction.date else None
-    }
+    logger.info(f"Transaction {transaction_data['id']} created - PSP value: '{psp}'")
     
     # Return standardized response with backward compatibility
     # Frontend expects 'success' and 'transaction' fields at root level
@@ -345,7 +359,7 @@ def get_clients():
                 func.count(Transaction.id).label('transaction_count'),
                 # Use amount_try (converted to TRY) if available, otherwise fallback to amount
                 func.sum(
-                    func.coalesce(Transaction.amount_try, Transaction.amount)
+                    Transaction.effective_amount_try
                 ).label('total_amount'),
                 # Use commission_try (converted to TRY) if available, otherwise fallback to commission
                 func.sum(
@@ -354,22 +368,20 @@ def get_clients():
                 # Calculate deposits separately (for Net Cash calculation)
                 func.sum(
                     case(
-                        (func.upper(Transaction.category).in_(['DEP', 'DEPOSIT', 'INVESTMENT']),
-                         func.abs(func.coalesce(Transaction.amount_try, Transaction.amount))),
+                        (Transaction.direction == 'DEP', func.abs(Transaction.effective_amount_try)),
                         else_=0
                     )
                 ).label('total_deposits'),
                 # Calculate withdrawals separately (for Net Cash calculation)
                 func.sum(
                     case(
-                        (func.upper(Transaction.category).in_(['WD', 'WITHDRAW', 'WITHDRAWAL']),
-                         func.abs(func.coalesce(Transaction.amount_try, Transaction.amount))),
+                        (Transaction.direction == 'WD', func.abs(Transaction.effective_amount_try)),
                         else_=0
                     )
                 ).label('total_withdrawals'),
                 # For average, use converted amounts as well
                 func.avg(
-                    func.coalesce(Transaction.amount_try, Transaction.amount)
+                    Transaction.effective_amount_try
                 ).label('average_amount'),
                 func.min(Transaction.created_at).label('first_transaction'),
                 func.max(Transaction.created_at).label('last_transaction')
@@ -750,7 +762,7 @@ def search_clients():
         client_stats = db.session.query(
             Transaction.client_name,
             func.count(Transaction.id).label('transaction_count'),
-            func.sum(func.coalesce(Transaction.amount_try, Transaction.amount)).label('total_amount'),
+            func.sum(Transaction.effective_amount_try).label('total_amount'),
             func.sum(func.coalesce(Transaction.commission_try, Transaction.commission)).label('total_commission'),
             func.min(Transaction.date).label('first_transaction'),
             func.max(Transaction.date).label('last_transaction')
@@ -919,6 +931,7 @@ def get_client_details(client_name):
 
 @transactions_api.route("/psp_summary_stats")
 @login_required
+@versioned_response('transactions', 'allocations', 'devir', 'kasa_top', 'rates', 'psp_config')
 @limiter.limit("20 per minute, 200 per hour")  # Dashboard endpoint - frequently accessed
 def get_psp_summary_stats():
     """Get PSP summary statistics including allocations with caching"""
@@ -927,7 +940,7 @@ def get_psp_summary_stats():
         logger.info("Starting PSP summary stats query...")
         
         # Check cache first
-        cache_key = f"psp_summary:{current_user.id}"
+        cache_key = f"psp_summary:{current_user.id}:{request_version_tag()}"
         cached_result = cache_service.get(cache_key)
         if cached_result is not None:
             api_logger.info(f"Cache get: {cache_key} (hit)")
@@ -936,35 +949,36 @@ def get_psp_summary_stats():
         # Get PSP statistics from actual transactions using TRY amounts
         # Calculate deposits and withdrawals separately, then compute net total
         # Use separate queries to avoid SQLAlchemy case function issues
-        psp_stats = db.session.query(
-            Transaction.psp,
+        # (grouped on the integer PSP key once the dimension is backfilled)
+        psp_stats = dimension_service.grouped_query(
+            'psp',
             func.count(Transaction.id).label('transaction_count'),
-            func.sum(func.coalesce(Transaction.amount_try, Transaction.amount)).label('total_amount_try'),
-            func.avg(func.coalesce(Transaction.amount_try, Transaction.amount)).label('average_amount_try')
+            func.sum(Transaction.effective_amount_try).label('total_amount_try'),
+            func.avg(Transaction.effective_amount_try).label('average_amount_try')
         ).filter(
             Transaction.psp.isnot(None),
             Transaction.psp != ''
-        ).group_by(Transaction.psp).all()
+        ).all()
         
         # Get deposits separately
-        psp_deposits = db.session.query(
-            Transaction.psp,
-            func.sum(func.coalesce(Transaction.amount_try, Transaction.amount)).label('total_deposits_try')
+        psp_deposits = dimension_service.grouped_query(
+            'psp',
+            func.sum(Transaction.effective_amount_try).label('total_deposits_try')
         ).filter(
             Transaction.psp.isnot(None),
             Transaction.psp != '',
-            func.upper(Transaction.category).in_(['DEP', 'DEPOSIT', 'INVESTMENT'])
-        ).group_by(Transaction.psp).all()
+            Transaction.direction == 'DEP'
+        ).all()
         
         # Get withdrawals separately
-        psp_withdrawals = db.session.query(
-            Transaction.psp,
-            func.sum(func.coalesce(Transaction.amount_try, Transaction.amount)).label('total_withdrawals_try')
+        psp_withdrawals = dimension_service.grouped_query(
+            'psp',
+            func.sum(Transaction.effective_amount_try).label('total_withdrawals_try')
         ).filter(
             Transaction.psp.isnot(None),
             Transaction.psp != '',
-            func.upper(Transaction.category).in_(['WD', 'WITHDRAW', 'WITHDRAWAL'])
-        ).group_by(Transaction.psp).all()
+            Transaction.direction == 'WD'
+        ).all()
         
         # Get allocations from PSPAllocation table (if table exists)
         allocations_dict = {}
@@ -1056,14 +1070,6 @@ def get_psp_summary_stats():
         cache_service.set(cache_key, psp_data, ttl=300)
         api_logger.info(f"Cache set: {cache_key} (miss)")
         
-        # Invalidate cache to ensure fresh data
-        try:
-            from app.services.query_service import QueryService
-            QueryService.invalidate_transaction_cache()
-            logger.info("Cache invalidated after PSP summary stats")
-        except Exception as cache_error:
-            logger.warning(f"Failed to invalidate cache after PSP summary stats: {cache_error}")
-        
         return jsonify(psp_data)
         
     except Exception as e:
@@ -1077,8 +1083,20 @@ def get_psp_summary_stats():
             'message': str(e)
         }), 500
 
+def _psp_monthly_stats_months():
+    """The requested month and the one before it (its last day seeds the rollover)"""
+    now = datetime.now()
+    year = request.args.get('year', now.year, type=int)
+    month = request.args.get('month', now.month, type=int)
+    if not 1 <= month <= 12:
+        return None
+    previous = (year - 1, 12) if month == 1 else (year, month - 1)
+    return [f"{previous[0]:04d}-{previous[1]:02d}", f"{year:04d}-{month:02d}"]
+
 @transactions_api.route("/psp_monthly_stats")
 @login_required
+@versioned_response('transactions', 'allocations', 'devir', 'kasa_top', 'rates', 'psp_config', months=_psp_monthly_stats_months,
+                    whole_history=('devir', 'psp_config'))
 def get_psp_monthly_stats():
     """Get PSP monthly statistics with date filtering and caching
     
@@ -1133,16 +1151,10 @@ def get_psp_monthly_stats():
             Transaction.psp,
             func.count(Transaction.id).label('transaction_count'),
             func.sum(
-                case(
-                    (func.upper(Transaction.psp) == 'TETHER', func.coalesce(Transaction.amount, 0)),
-                    else_=func.coalesce(Transaction.amount_try, Transaction.amount)
-                )
+                Transaction.reporting_amount
             ).label('total_amount'),
             func.avg(
-                case(
-                    (func.upper(Transaction.psp) == 'TETHER', func.coalesce(Transaction.amount, 0)),
-                    else_=func.coalesce(Transaction.amount_try, Transaction.amount)
-                )
+                Transaction.reporting_amount
             ).label('average_amount')
         ).filter(
             Transaction.psp.isnot(None),
@@ -1225,15 +1237,12 @@ def get_psp_monthly_stats():
         psp_deposits = db.session.query(
             Transaction.psp,
             func.sum(
-                case(
-                    (func.upper(Transaction.psp) == 'TETHER', func.coalesce(Transaction.amount, 0)),
-                    else_=func.coalesce(Transaction.amount_try, Transaction.amount)
-                )
+                Transaction.reporting_amount
             ).label('total_deposits')
         ).filter(
             Transaction.psp.isnot(None),
             Transaction.psp != '',
-            func.upper(Transaction.category).in_(['DEP', 'DEPOSIT', 'INVESTMENT']),
+            Transaction.direction == 'DEP',
             Transaction.date >= start_date,
             Transaction.date <= end_date
         ).group_by(Transaction.psp).all()
@@ -1243,15 +1252,12 @@ def get_psp_monthly_stats():
         psp_withdrawals = db.session.query(
             Transaction.psp,
             func.sum(
-                case(
-                    (func.upper(Transaction.psp) == 'TETHER', func.coalesce(Transaction.amount, 0)),
-                    else_=func.coalesce(Transaction.amount_try, Transaction.amount)
-                )
+                Transaction.reporting_amount
             ).label('total_withdrawals')
         ).filter(
             Transaction.psp.isnot(None),
             Transaction.psp != '',
-            func.upper(Transaction.category).in_(['WD', 'WITHDRAW', 'WITHDRAWAL']),
+            Transaction.direction == 'WD',
             Transaction.date >= start_date,
             Transaction.date <= end_date
         ).group_by(Transaction.psp).all()
@@ -1324,15 +1330,12 @@ def get_psp_monthly_stats():
             Transaction.psp,
             Transaction.date,
             func.sum(
-                case(
-                    (func.upper(Transaction.psp) == 'TETHER', func.coalesce(Transaction.amount, 0)),
-                    else_=func.coalesce(Transaction.amount_try, Transaction.amount)
-                )
+                Transaction.reporting_amount
             ).label('daily_deposits'),
             func.count(Transaction.id).label('deposit_count')
         ).filter(
             Transaction.psp.in_([psp.psp for psp in psp_stats]),
-            func.upper(Transaction.category).in_(['DEP', 'DEPOSIT', 'INVESTMENT']),
+            Transaction.direction == 'DEP',
             Transaction.date >= start_date,
             Transaction.date <= end_date
         ).group_by(Transaction.psp, Transaction.date).all()
@@ -1342,15 +1345,12 @@ def get_psp_monthly_stats():
             Transaction.psp,
             Transaction.date,
             func.sum(
-                case(
-                    (func.upper(Transaction.psp) == 'TETHER', func.coalesce(Transaction.amount, 0)),
-                    else_=func.coalesce(Transaction.amount_try, Transaction.amount)
-                )
+                Transaction.reporting_amount
             ).label('daily_withdrawals'),
             func.count(Transaction.id).label('withdrawal_count')
         ).filter(
             Transaction.psp.in_([psp.psp for psp in psp_stats]),
-            func.upper(Transaction.category).in_(['WD', 'WITHDRAW', 'WITHDRAWAL']),
+            Transaction.direction == 'WD',
             Transaction.date >= start_date,
             Transaction.date <= end_date
         ).group_by(Transaction.psp, Transaction.date).all()
@@ -1360,10 +1360,7 @@ def get_psp_monthly_stats():
             Transaction.psp,
             Transaction.date,
             func.sum(
-                case(
-                    (func.upper(Transaction.psp) == 'TETHER', func.coalesce(Transaction.amount, 0)),
-                    else_=func.coalesce(Transaction.amount_try, Transaction.amount)
-                )
+                Transaction.reporting_amount
             ).label('daily_total'),
             func.count(Transaction.id).label('transaction_count')
         ).filter(
@@ -1441,28 +1438,22 @@ def get_psp_monthly_stats():
             prev_deposits = db.session.query(
                 Transaction.psp,
                 func.sum(
-                    case(
-                        (func.upper(Transaction.psp) == 'TETHER', func.coalesce(Transaction.amount, 0)),
-                        else_=func.coalesce(Transaction.amount_try, Transaction.amount)
-                    )
+                    Transaction.reporting_amount
                 ).label('deposits')
             ).filter(
                 Transaction.psp.in_([psp.psp for psp in psp_stats]),
-                func.upper(Transaction.category).in_(['DEP', 'DEPOSIT', 'INVESTMENT']),
+                Transaction.direction == 'DEP',
                 Transaction.date == prev_month_last_day
             ).group_by(Transaction.psp).all()
             
             prev_withdrawals = db.session.query(
                 Transaction.psp,
                 func.sum(
-                    case(
-                        (func.upper(Transaction.psp) == 'TETHER', func.coalesce(Transaction.amount, 0)),
-                        else_=func.coalesce(Transaction.amount_try, Transaction.amount)
-                    )
+                    Transaction.reporting_amount
                 ).label('withdrawals')
             ).filter(
                 Transaction.psp.in_([psp.psp for psp in psp_stats]),
-                func.upper(Transaction.category).in_(['WD', 'WITHDRAW', 'WITHDRAWAL']),
+                Transaction.direction == 'WD',
                 Transaction.date == prev_month_last_day
             ).group_by(Transaction.psp).all()
             
@@ -1637,27 +1628,21 @@ def get_psp_monthly_stats():
                                     # Get previous day's transactions
                                     prev_day_deposits = db.session.query(
                                         func.sum(
-                                            case(
-                                                (func.upper(Transaction.psp) == 'TETHER', func.coalesce(Transaction.amount, 0)),
-                                                else_=func.coalesce(Transaction.amount_try, Transaction.amount)
-                                            )
+                                            Transaction.reporting_amount
                                         )
                                     ).filter(
                                         Transaction.psp == psp.psp,
-                                        func.upper(Transaction.category).in_(['DEP', 'DEPOSIT', 'INVESTMENT']),
+                                        Transaction.direction == 'DEP',
                                         Transaction.date == previous_date
                                     ).scalar() or 0.0
                                     
                                     prev_day_withdrawals = db.session.query(
                                         func.sum(
-                                            case(
-                                                (func.upper(Transaction.psp) == 'TETHER', func.coalesce(Transaction.amount, 0)),
-                                                else_=func.coalesce(Transaction.amount_try, Transaction.amount)
-                                            )
+                                            Transaction.reporting_amount
                                         )
                                     ).filter(
                                         Transaction.psp == psp.psp,
-                                        func.upper(Transaction.category).in_(['WD', 'WITHDRAW', 'WITHDRAWAL']),
+                                        Transaction.direction == 'WD',
                                         Transaction.date == previous_date
                                     ).scalar() or 0.0
                                     
@@ -2150,10 +2135,6 @@ def get_transactions():
     # Multi-tenancy: Apply organization filter
     query = add_tenant_filter(query, Transaction)
     
-    # Log total transactions before any filters
-    total_before_filters = query.count()
-    logger.debug(f"Total transactions before filters: {total_before_filters}")
-    
     if category:
         query = query.filter(Transaction.category == category)
         logger.info(f"Applied category filter: {category}")
@@ -2221,73 +2202,45 @@ def get_transactions():
         )
         logger.info(f"Applied search filter: {search}")
     
-    # Log total transactions after all filters
-    total_after_filters = query.count()
-    logger.debug(f"Total transactions after filters: {total_after_filters}")
+    # One count for the pagination metadata
+    total = query.order_by(None).count()
+    
+    # Determine sort column
+    sort_column = Transaction.created_at  # Default
+    if sort_by == 'date':
+        sort_column = Transaction.date
+    elif sort_by == 'amount':
+        sort_column = Transaction.amount
+    elif sort_by == 'commission':
+        sort_column = Transaction.commission
+    elif sort_by == 'client_name':
+        sort_column = Transaction.client_name
+    elif sort_by == 'category':
+        sort_column = Transaction.category
+    
+    # Apply sort order
+    if sort_order == 'asc':
+        query = query.order_by(sort_column.asc())
+    else:
+        query = query.order_by(sort_column.desc())
+    
+    page = max(page, 1)
+    logger.info(f"Applied sorting: {sort_by} {sort_order} | Filtered count: {total} | Requesting page {page} with {per_page} per page")
     
-    # Paginate
-    try:
-        # Force WAL checkpoint to ensure we see latest transactions
-        db.session.execute(text("PRAGMA wal_checkpoint(FULL)"))
-        db.session.commit()
-        
-        # Add debugging to see what transactions are being returned
-        total_count = query.count()
-        logger.debug(f"Total transactions matching filters: {total_count}")
-        
-        # Determine sort column
-        sort_column = Transaction.created_at  # Default
-        if sort_by == 'date':
-            sort_column = Transaction.date
-        elif sort_by == 'amount':
-            sort_column = Transaction.amount
-        elif sort_by == 'commission':
-            sort_column = Transaction.commission
-        elif sort_by == 'client_name':
-            sort_column = Transaction.client_name
-        elif sort_by == 'category':
-            sort_column = Transaction.category
-        
-        # Apply sort order
-        if sort_order == 'asc':
-            query = query.order_by(sort_column.asc())
-        else:
-            query = query.order_by(sort_column.desc())
-        
-        logger.info(f"Applied sorting: {sort_by} {sort_order} | Filtered count: {total_count} | Requesting page {page} with {per_page} per page")
-        
-        # Check what's in the pagination results
-        pagination = query.paginate(
-            page=page, per_page=per_page, error_out=False
-        )
-        
-        # Log the first 10 transactions in pagination to see what's being returned
-        logger.debug(f"First 10 transactions in pagination:")
-        for i, trans in enumerate(pagination.items[:10]):
-            logger.debug(f"  {i+1}. ID={trans.id}, Client={trans.client_name}, Amount={trans.amount}, Date={trans.date}, Created={trans.created_at}")
-        
-        # Log date range of returned transactions
-        if pagination.items:
-            dates = [trans.date for trans in pagination.items if trans.date]
-            if dates:
-                logger.info(f"Returned transactions date range: {min(dates)} to {max(dates)} ({len(pagination.items)} transactions)")
-        
-        logger.debug(f"Returning {len(pagination.items)} transactions for page {page}")
-        if pagination.items:
-            latest_transaction = pagination.items[0]
-            logger.debug(f"Latest transaction: ID={latest_transaction.id}, Client={latest_transaction.client_name}, Amount={latest_transaction.amount}, Created={latest_transaction.created_at}")
-    except Exception as pagination_error:
-        # Handle pagination error gracefully
-        # Fallback to simple query without pagination (sorting already applied to query)
-        transactions_data = query.all()
-        pagination = type('obj', (object,), {
-            'items': transactions_data,
-            'total': len(transactions_data),
-            'pages': 1
-        })
+    # Only the listed columns, as plain rows (no ORM instances)
+    rows = list(transaction_repository.iter_list_rows(query.limit(per_page).offset((page - 1) * per_page)))
+    pages = (total + per_page - 1) // per_page
+    
+    # Log date range of returned transactions
+    dates = [row.date for row in rows if row.date]
+    if dates:
+        logger.info(f"Returned transactions date range: {min(dates)} to {max(dates)} ({len(rows)} transactions)")
+    
+    # PSP commission rates, loaded once if a row needs one
+    psp_rates = None
     
     transactions = []
-    for transaction in pagination.items:
+    for transaction in rows:
         try:
             # Debug logging for specific transactions
             # Process special transactions without debug output
@@ -2305,18 +2258,16 @@ def get_transactions():
                     # Try to get PSP-specific commission rate for non-WD transactions
                     commission_rate = None
                     if transaction.psp:
-                        try:
-                            from app.models.config import Option
-                            psp_option = Option.query.filter_by(
-                                field_name='psp',
-                                value=transaction.psp,
-                                is_active=True
-                            ).first()
-                            
-                            if psp_option and psp_option.commission_rate is not None:
-                                commission_rate = psp_option.commission_rate
-                        except Exception:
-                            pass  # Use 0 rate if error occurs
+                        if psp_rates is None:
+                            try:
+                                from app.models.config import Option
+                                psp_rates = dict(db.session.query(Option.value, Option.commission_rate).filter_by(
+                                    field_name='psp',
+                                    is_active=True
+                                ).all())
+                            except Exception:
+                                psp_rates = {}  # Use 0 rate if error occurs
+                        commission_rate = psp_rates.get(transaction.psp)
                     
                     if commission_rate is not None:
                         commission = float(transaction.amount) * float(commission_rate)
@@ -2354,19 +2305,19 @@ def get_transactions():
             continue
     
     # Return processed transactions
-    logger.info(f"Returning {len(transactions)} transactions (total in DB: {pagination.total})")
-    if len(transactions) == 0 and pagination.total > 0:
-        logger.warning(f"WARNING: pagination.total={pagination.total} but transactions array is empty!")
+    logger.info(f"Returning {len(transactions)} transactions (total in DB: {total})")
+    if len(transactions) == 0 and total > 0 and page <= pages:
+        logger.warning(f"WARNING: total={total} but transactions array is empty!")
     
     return jsonify(paginated_response(
         items=transactions,
         page=page,
         per_page=per_page,
-        total=pagination.total,
+        total=total,
         meta={
             'message': 'Transactions retrieved successfully',
             'transactions': transactions,  # Backward compatibility
-            'pages': pagination.pages  # Backward compatibility
+            'pages': pages  # Backward compatibility
         }
     )), 200
 
@@ -2837,8 +2788,6 @@ def delete_transaction(transaction_id):
     transaction = Transaction.query.get(transaction_id)
     if not transaction:
         logger.warning(f"Transaction {transaction_id} not found for deletion by user {current_user.username}")
-        # Check if transaction was recently deleted (might be a race condition)
-        logger.info(f"Querying all transactions to verify: {Transaction.query.count()} total transactions exist")
         return jsonify({
             'error': 'Transaction not found',
             'message': f'Transaction with ID {transaction_id} does not exist'
@@ -2858,9 +2807,13 @@ def delete_transaction(transaction_id):
         'date': transaction.date.isoformat() if transaction.date else None
     }
     
-    # Delete transaction using service (includes automatic PSP sync)
+    # Delete transaction using service; cache, event and audit follow its commit
     try:
         from app.services.transaction_service import TransactionService
+        _defer_transaction_side_effects(
+            transaction, EventType.TRANSACTION_DELETED, AuditService.ACTION_DELETE,
+            old_values=transaction.to_dict()
+        )
         service = TransactionService()
         service.delete_transaction(transaction.id)
         
@@ -2965,6 +2918,7 @@ def update_transaction(transaction_id):
         is_valid, error = validate_tenant_access(transaction, "transaction")
         if not is_valid:
             return error
+        old_values = transaction.to_dict()
         
         # Validate required fields
         client_name = data.get('client_name', '').strip()
@@ -3132,68 +3086,76 @@ def update_transaction(transaction_id):
         transaction.net_amount_try = net_amount_try
         transaction.exchange_rate = exchange_rate
         
-        # Save to database
-        db.session.commit()
+        # Flush so onupdate and derived columns are current when serialized
+        db.session.flush()
         
-        # Save custom exchange rate after transaction update
+        # Save the custom exchange rate in a savepoint inside the transaction's commit
         if currency in ['USD', 'EUR'] and custom_rate:
             try:
                 from app.models.exchange_rate import ExchangeRate
                 currency_pair = 'USDTRY' if currency == 'USD' else 'EURTRY'
                 
-                # Check if rate already exists for this date
-                existing_rate = ExchangeRate.query.filter_by(
-                    date=transaction_date,
-                    currency_pair=currency_pair
-                ).first()
-                
-                if existing_rate:
-                    # Update existing rate
-                    existing_rate.rate = custom_rate
-                    existing_rate.updated_at = datetime.now(timezone.utc)
-                    logger.info(f"Updated existing {currency} rate for {transaction_date} to {custom_rate}")
-                else:
-                    # Create new rate entry
-                    new_rate = ExchangeRate(
-                        currency_pair=currency_pair,
-                        rate=custom_rate,
+                with db.session.begin_nested():
+                    # Check if rate already exists for this date
+                    existing_rate = ExchangeRate.query.filter_by(
                         date=transaction_date,
-                        created_at=datetime.now(timezone.utc),
-                        updated_at=datetime.now(timezone.utc)
-                    )
-                    db.session.add(new_rate)
-                    logger.info(f"Created new {currency} rate for {transaction_date}: {custom_rate}")
-                
-                db.session.commit()
-                logger.info(f"Exchange rate saved successfully for {currency}")
+                        currency_pair=currency_pair
+                    ).first()
+                    
+                    if existing_rate:
+                        # Update existing rate
+                        existing_rate.rate = custom_rate
+                        existing_rate.updated_at = datetime.now(timezone.utc)
+                        logger.info(f"Updated existing {currency} rate for {transaction_date} to {custom_rate}")
+                    else:
+                        # Create new rate entry
+                        new_rate = ExchangeRate(
+                            currency_pair=currency_pair,
+                            rate=custom_rate,
+                            date=transaction_date,
+                            created_at=datetime.now(timezone.utc),
+                            updated_at=datetime.now(timezone.utc)
+                        )
+                        db.session.add(new_rate)
+                        logger.info(f"Created new {currency} rate for {transaction_date}: {custom_rate}")
             except Exception as e:
                 logger.error(f"Error saving custom exchange rate to database: {e}")
                 # Don't fail the transaction update if rate saving fails
         
+        # Serialize the flushed row before the commit expires it, so no re-select is needed
+        transaction_data = {
+            'id': transaction.id,
+            'client_name': transaction.client_name,
+            'company': transaction.company,
+            'payment_method': transaction.payment_method,
+            'category': transaction.category,
+            'amount': float(transaction.amount),
+            'commission': float(transaction.commission),
+            'net_amount': float(transaction.net_amount),
+            'currency': transaction.currency,
+            'psp': transaction.psp,
+            'notes': transaction.notes,
+            'date': transaction.date.isoformat() if transaction.date else None,
+            'updated_at': transaction.updated_at.isoformat() if transaction.updated_at else None,
+            'amount_try': float(transaction.amount_try) if transaction.amount_try else None,
+            'commission_try': float(transaction.commission_try) if transaction.commission_try else None,
+            'net_amount_try': float(transaction.net_amount_try) if transaction.net_amount_try else None,
+            'exchange_rate': float(transaction.exchange_rate) if transaction.exchange_rate else None,
+        }
+        _defer_transaction_side_effects(
+            transaction, EventType.TRANSACTION_UPDATED, AuditService.ACTION_UPDATE,
+            old_values=old_values, new_values=transaction.to_dict()
+        )
+        
+        # Save to database; cache, event and audit follow in one flush
+        db.session.commit()
+        
         logger.info(f"Transaction {transaction_id} updated successfully by user {current_user.username}")
         
         return jsonify({
             'status': 'success',
             'message': 'Transaction updated successfully',
-            'transaction': {
-                'id': transaction.id,
-                'client_name': transaction.client_name,
-                'company': transaction.company,
-                'payment_method': transaction.payment_method,
-                'category': transaction.category,
-                'amount': float(transaction.amount),
-                'commission': float(transaction.commission),
-                'net_amount': float(transaction.net_amount),
-                'currency': transaction.currency,
-                'psp': transaction.psp,
-                'notes': transaction.notes,
-                'date': transaction.date.isoformat() if transaction.date else None,
-                'updated_at': transaction.updated_at.isoformat() if transaction.updated_at else None,
-                'amount_try': float(transaction.amount_try) if transaction.amount_try else None,
-                'commission_try': float(transaction.commission_try) if transaction.commission_try else None,
-                'net_amount_try': float(transaction.net_amount_try) if transaction.net_amount_try else None,
-                'exchange_rate': float(transaction.exchange_rate) if transaction.exchange_rate else None,
-            }
+            'transaction': transaction_data
         }), 200
         
     except Exception as e:
@@ -3223,10 +3185,10 @@ def get_clients_by_date():
             func.count(Transaction.id).label('transaction_count'),
             # Use amount_try (converted to TRY) if available, otherwise fallback to amount
             func.sum(
-                func.coalesce(Transaction.amount_try, Transaction.amount)
+                Transaction.effective_amount_try
             ).label('total_amount'),
             func.avg(
-                func.coalesce(Transaction.amount_try, Transaction.amount)
+                Transaction.effective_amount_try
             ).label('average_amount'),
             # Use commission_try (converted to TRY) if available, otherwise fallback to commission
             func.sum(
@@ -3235,16 +3197,14 @@ def get_clients_by_date():
             # Calculate deposits separately (for Net Cash calculation)
             func.sum(
                 case(
-                    (func.upper(Transaction.category).in_(['DEP', 'DEPOSIT', 'INVESTMENT']),
-                     func.abs(func.coalesce(Transaction.amount_try, Transaction.amount))),
+                    (Transaction.direction == 'DEP', func.abs(Transaction.effective_amount_try)),
                     else_=0
                 )
             ).label('total_deposits'),
             # Calculate withdrawals separately (for Net Cash calculation)
             func.sum(
                 case(
-                    (func.upper(Transaction.category).in_(['WD', 'WITHDRAW', 'WITHDRAWAL']),
-                     func.abs(func.coalesce(Transaction.amount_try, Transaction.amount))),
+                    (Transaction.direction == 'WD', func.abs(Transaction.effective_amount_try)),
                     else_=0
                 )
             ).label('total_withdrawals')
@@ -1,6 +1,7 @@
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, request, jsonify, current_app, Response
 from flask_login import login_required, current_user
 from app.services.translation_service import TranslationService
+from app.services.translation_catalog import translation_catalog
 from app.models.translation import (
     TranslationKey, Translation, CustomDictionary, 
     TranslationMemory, TranslationLog, TranslationSettings
@@ -14,6 +15,28 @@ translations_bp = Blueprint('translations', __name__)
 translation_service = TranslationService()
 
 
+@translations_bp.route('/catalog/<language>', methods=['GET'])
+def get_translation_catalog(language):
+    """Flat key -> text catalog for the frontend, revalidated with its ETag"""
+    try:
+        if language not in translation_service.supported_languages:
+            return jsonify({'success': False, 'error': f'Unsupported language: {language}'}), 404
+        
+        catalog = translation_catalog.catalog(language)
+        if catalog.etag in request.if_none_match:
+            response = Response(status=304)
+        else:
+            response = Response(catalog.payload, mimetype='application/json')
+        response.headers['ETag'] = catalog.etag
+        response.headers['Cache-Control'] = 'public, no-cache'
+        response.headers['Vary'] = 'Accept-Encoding'
+        return response
+        
+    except Exception as e:
+        logger.error(f"Error getting translation catalog: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
 @translations_bp.route('/keys', methods=['GET'])
 @login_required
 def get_translation_keys():
@@ -62,7 +62,7 @@ def get_dashboard_stats():
         }
         
         # Cache the result
-        cache_service.set(cache_key, dashboard_data, ttl=1800)  # 30 minutes
+        cache_service.set(cache_key, dashboard_data, ttl=1800, tags=["dashboard"])  # 30 minutes
         
         return jsonify({
             'status': 'success',
@@ -95,7 +95,7 @@ def get_psp_summary():
         summary_data = PspAnalyticsService.get_psp_summary_stats()
         
         # Cache the result
-        cache_service.set(cache_key, summary_data, ttl=3600)  # 1 hour
+        cache_service.set(cache_key, summary_data, ttl=3600, tags=["psp"])  # 1 hour
         
         return jsonify({
             'status': 'success',
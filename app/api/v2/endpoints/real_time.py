@@ -2,10 +2,9 @@
 Real-Time API endpoints for PipLinePro v2
 WebSocket connections and real-time data streaming
 """
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_login import login_required, current_user
 from flask_socketio import emit, join_room, leave_room
-from app.services.real_time_service import real_time_service
 from app.services.event_service import event_service, EventType
 import logging
 
@@ -147,6 +146,7 @@ def mark_notification_read(notification_id):
 def get_connection_stats():
     """Get real-time connection statistics"""
     try:
+        real_time_service = getattr(current_app, 'real_time_service', None)
         if real_time_service:
             stats = real_time_service.get_connection_stats()
             return jsonify({
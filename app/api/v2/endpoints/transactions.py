@@ -88,7 +88,7 @@ def get_transactions():
         if CACHE_SERVICE_AVAILABLE:
             try:
                 cache_key = CacheKey.transaction_list(filters, page, per_page)
-                cache_service.set(cache_key, result, ttl=1800)  # 30 minutes
+                cache_service.set(cache_key, result, ttl=1800, tags=["transaction"])  # 30 minutes
             except Exception as e:
                 logger.warning(f"Cache service error: {e}")
         
@@ -201,7 +201,7 @@ def get_transaction(transaction_id):
         }
         
         # Cache the result
-        cache_service.set(cache_key, transaction_data, ttl=3600)  # 1 hour
+        cache_service.set(cache_key, transaction_data, ttl=3600, tags=["transaction"])  # 1 hour
         
         return jsonify({
             'status': 'success',
@@ -296,6 +296,7 @@ def bulk_create_transactions():
             return jsonify({'error': 'No transactions provided'}), 400
         
         created_transactions = []
+        created_events = []
         errors = []
         
         for i, transaction_data in enumerate(transactions_data):
@@ -310,25 +311,23 @@ def bulk_create_transactions():
                         'amount': float(transaction.amount)
                     })
                     
-                    # Publish event for each transaction
-                    event_service.publish_event(
-                        EventType.TRANSACTION_CREATED,
-                        {
-                            'transaction_id': transaction.id,
-                            'client_name': transaction.client_name,
-                            'amount': float(transaction.amount),
-                            'psp': transaction.psp,
-                            'user_id': current_user.id,
-                            'bulk_operation': True
-                        },
-                        source='api_v2'
-                    )
+                    created_events.append({
+                        'transaction_id': transaction.id,
+                        'client_name': transaction.client_name,
+                        'amount': float(transaction.amount),
+                        'psp': transaction.psp,
+                        'user_id': current_user.id,
+                        'bulk_operation': True
+                    })
                 else:
                     errors.append(f'Transaction {i+1}: Failed to create')
                     
             except Exception as e:
                 errors.append(f'Transaction {i+1}: {str(e)}')
         
+        # Publish all creation events in pipelined batches
+        event_service.publish_many(EventType.TRANSACTION_CREATED, created_events, source='api_v2')
+        
         # Invalidate cache after bulk operation
         cache_service.invalidate_transaction_cache()
         
@@ -43,7 +43,8 @@ def update_profile():
         
         # Update allowed fields
         if 'email' in data:
-            current_user.email = data['email']
+            user = current_user.load_user()
+            user.email = data['email']
         
         from app import db
         db.session.commit()
@@ -150,6 +150,46 @@ def optimize():
     except Exception as e:
         click.echo(f"❌ Error optimizing database: {e}")
 
+@database.command()
+@with_appcontext
+def indexes():
+    """Create the baseline performance indexes (new indexes ship as migrations)."""
+    try:
+        created = db_optimization_service.create_performance_indexes()
+        click.echo(f"✅ Performance indexes checked: {created} created")
+        
+    except Exception as e:
+        click.echo(f"❌ Error creating indexes: {e}")
+
+@database.command('advise-indexes')
+@click.option('--limit', default=20, show_default=True, help='Heaviest statements to analyze')
+@click.option('--evaluate/--no-evaluate', default=True, show_default=True,
+              help='Estimate savings with hypothetical indexes (hypopg) or a scratch copy (SQLite)')
+@click.option('--write-migration', is_flag=True, help='Write an Alembic revision with the recommendations')
+@with_appcontext
+def advise_indexes(limit, evaluate, write_migration):
+    """Recommend covering/partial indexes from the captured query workload."""
+    from app.services.index_advisor_service import index_advisor
+    try:
+        analysis = index_advisor.analyze(limit=limit, evaluate=evaluate)
+        click.echo(f"📊 {analysis['statements']} statements analyzed ({analysis['dialect']}, "
+                   f"evaluation: {analysis['evaluation']}, {analysis['duration_seconds']}s)")
+        if not analysis['recommendations']:
+            click.echo("✅ No index recommendations for the captured workload")
+            return
+        for advice in analysis['recommendations']:
+            saving = advice['estimated_saving_ms']
+            click.echo(f"  {advice['ddl']}")
+            click.echo(f"     {advice['calls']} calls, {advice['workload_time'] * 1000:.0f}ms captured"
+                       + (f", ~{saving:.0f}ms saved" if saving is not None else ''))
+        if write_migration:
+            path = index_advisor.write_migration(analysis['recommendations'])
+            click.echo(f"✅ Migration written: {path}")
+            click.echo("   Review it, then apply with: python scripts/apply_migrations.py")
+        
+    except Exception as e:
+        click.echo(f"❌ Error analyzing indexes: {e}")
+
 @database.command()
 @with_appcontext
 def backup():
@@ -254,6 +294,53 @@ def cache():
     except Exception as e:
         click.echo(f"❌ Error getting cache statistics: {e}")
 
+@performance.command()
+@click.option('--top', default=25, show_default=True, help='Number of top-level imports to list')
+@click.option('--config', 'config_name', default=None, help='Config to boot with (development, production, testing)')
+@click.option('--json', 'as_json', is_flag=True, help='Print the raw report as JSON')
+def startup(top, config_name, as_json):
+    """Profile application startup (import time and create_app)."""
+    from app.utils.lazy_loader import profile_startup
+    
+    click.echo("⏱️  Booting the app in a fresh interpreter with -X importtime...")
+    report = profile_startup(config_name=config_name, top=top)
+    
+    if as_json:
+        click.echo(json.dumps(report, indent=2))
+        return
+    
+    if not report['success']:
+        click.echo(f"❌ Startup failed: {report['error']}")
+        return
+    
+    click.echo(f"\n🚀 Startup Profile:")
+    click.echo(f"   Total boot time: {report['total_seconds']:.3f}s")
+    click.echo(f"   Importing app package: {report['import_seconds']:.3f}s")
+    click.echo(f"   All imports (self time): {report['all_imports_ms']:.1f}ms")
+    
+    click.echo(f"\n📦 Slowest top-level imports:")
+    for entry in report['top_imports']:
+        click.echo(f"   {entry['cumulative_ms']:9.1f}ms  {entry['module']}")
+
+@performance.command('instrumentation-bench')
+@click.option('--iterations', default=10000, show_default=True, type=click.IntRange(min=1),
+              help='Requests to simulate')
+@with_appcontext
+def instrumentation_bench(iterations):
+    """Measure per-request overhead of the instrumentation hooks."""
+    from app.utils.instrumentation import request_instrumentation
+    
+    try:
+        result = request_instrumentation.benchmark(iterations=iterations)
+        status = "✅" if result['within_budget'] else "⚠️ "
+        click.echo(f"\n{status} Instrumentation overhead ({result['iterations']} requests):")
+        click.echo(f"   Mean: {result['mean_us']}µs")
+        click.echo(f"   p50:  {result['p50_us']}µs")
+        click.echo(f"   p99:  {result['p99_us']}µs (budget {result['budget_us']}µs)")
+        
+    except Exception as e:
+        click.echo(f"❌ Error running instrumentation benchmark: {e}")
+
 def register_cli_commands(app):
     """Initialize CLI commands for the Flask app."""
     app.cli.add_command(currency)
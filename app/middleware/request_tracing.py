@@ -8,7 +8,6 @@ import logging
 from functools import wraps
 from typing import Callable, Optional
 from flask import request, g, current_app
-from app.utils.prometheus_metrics import http_request_total, http_request_duration
 
 logger = logging.getLogger(__name__)
 
@@ -35,9 +34,12 @@ def request_tracing_middleware(app):
     Flask middleware for request tracing
     
     Adds:
-    - request_id: Unique identifier for each request
+    - request_id: Unique identifier for each request (X-Request-ID in/out)
     - request_start_time: Request start timestamp
-    - request_metrics: Performance metrics
+    - request_metrics: Per-request counters
+    
+    Timing, Prometheus metrics and request logging are recorded by
+    app.utils.instrumentation so each request is measured once.
     """
     
     @app.before_request
@@ -56,63 +58,13 @@ def request_tracing_middleware(app):
             'cache_misses': 0,
             'slow_queries': [],
         }
-        
-        # Log request start
-        logger.info(
-            f"Request started: {request.method} {request.path}",
-            extra={
-                'request_id': request_id,
-                'method': request.method,
-                'path': request.path,
-                'remote_addr': request.remote_addr,
-            }
-        )
     
     @app.after_request
     def after_request(response):
-        # Calculate request duration
-        if hasattr(g, 'request_start_time'):
-            duration = time.time() - g.request_start_time
-            
-            # Add request ID to response headers
-            request_id = get_request_id()
-            if request_id:
-                response.headers['X-Request-ID'] = request_id
-            
-            # Record Prometheus metrics
-            try:
-                endpoint = request.endpoint or 'unknown'
-                http_request_total.labels(
-                    method=request.method,
-                    endpoint=endpoint,
-                    status=response.status_code
-                ).inc()
-                
-                http_request_duration.labels(
-                    method=request.method,
-                    endpoint=endpoint
-                ).observe(duration)
-            except Exception as e:
-                logger.warning(f"Failed to record Prometheus metrics: {e}")
-            
-            # Log request completion
-            log_level = logging.INFO
-            if duration > 2.0:  # Slow request
-                log_level = logging.WARNING
-            
-            logger.log(
-                log_level,
-                f"Request completed: {request.method} {request.path} - {response.status_code} - {duration:.3f}s",
-                extra={
-                    'request_id': request_id,
-                    'method': request.method,
-                    'path': request.path,
-                    'status_code': response.status_code,
-                    'duration': duration,
-                    'query_count': getattr(g, 'request_metrics', {}).get('query_count', 0),
-                }
-            )
-        
+        # Add request ID to response headers
+        request_id = get_request_id()
+        if request_id:
+            response.headers['X-Request-ID'] = request_id
         return response
     
     @app.teardown_request
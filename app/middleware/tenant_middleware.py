@@ -32,8 +32,9 @@ class TenantMiddleware:
         # Register before_request handler
         app.before_request(self._set_tenant_context)
         
-        # Register after_request handler for logging
-        app.after_request(self._log_tenant_context)
+        # Register after_request handler for logging (debug only - it runs on every request)
+        if app.debug:
+            app.after_request(self._log_tenant_context)
         
         logger.info("Tenant middleware initialized")
     
@@ -9,6 +9,7 @@ from .config import Option, ExchangeRate, UserSettings
 from .financial import PspTrack, DailyBalance, PSPAllocation, DailyNet, Expense, ExpenseBudget, MonthlyCurrencySummary
 from .trust_wallet import TrustWallet, TrustWalletTransaction
 from .password_reset import PasswordResetToken
+from .dimension import PspDimension, ClientDimension, CompanyDimension, PaymentMethodDimension
 
 # Import all models to ensure they are registered with SQLAlchemy
 __all__ = [
@@ -18,5 +19,6 @@ __all__ = [
     'Option', 'ExchangeRate', 'UserSettings',
     'PspTrack', 'DailyBalance', 'PSPAllocation', 'DailyNet', 'Expense', 'ExpenseBudget', 'MonthlyCurrencySummary',
     'TrustWallet', 'TrustWalletTransaction',
-    'PasswordResetToken'
+    'PasswordResetToken',
+    'PspDimension', 'ClientDimension', 'CompanyDimension', 'PaymentMethodDimension'
 ] 
\ No newline at end of file
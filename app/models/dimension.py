@@ -0,0 +1,70 @@
+"""
+Dimension models for PipLine Treasury System
+Dictionary-encoded PSP, client, company and payment method values referenced from transactions
+"""
+from app import db
+from datetime import datetime, timezone
+
+
+class PspDimension(db.Model):
+    """One row per distinct PSP name"""
+    __tablename__ = 'dim_psp'
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(50), nullable=False)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
+    __table_args__ = (
+        db.Index('idx_dim_psp_name', 'name', unique=True),
+    )
+
+    def __repr__(self):
+        return f'<PspDimension {self.id}: {self.name}>'
+
+
+class ClientDimension(db.Model):
+    """One row per distinct client name"""
+    __tablename__ = 'dim_client'
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
+    __table_args__ = (
+        db.Index('idx_dim_client_name', 'name', unique=True),
+    )
+
+    def __repr__(self):
+        return f'<ClientDimension {self.id}: {self.name}>'
+
+
+class CompanyDimension(db.Model):
+    """One row per distinct company name"""
+    __tablename__ = 'dim_company'
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
+    __table_args__ = (
+        db.Index('idx_dim_company_name', 'name', unique=True),
+    )
+
+    def __repr__(self):
+        return f'<CompanyDimension {self.id}: {self.name}>'
+
+
+class PaymentMethodDimension(db.Model):
+    """One row per distinct payment method"""
+    __tablename__ = 'dim_payment_method'
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(50), nullable=False)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
+    __table_args__ = (
+        db.Index('idx_dim_payment_method_name', 'name', unique=True),
+    )
+
+    def __repr__(self):
+        return f'<PaymentMethodDimension {self.id}: {self.name}>'
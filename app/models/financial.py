@@ -6,6 +6,8 @@ from datetime import datetime, timezone
 from decimal import Decimal, InvalidOperation
 from sqlalchemy.orm import validates
 
+from app.utils.fast_json import RowEncoder
+
 class PspTrack(db.Model):
     """PSP tracking model"""
     __tablename__ = 'psp_track'
@@ -35,23 +37,18 @@ class PspTrack(db.Model):
     
     def to_dict(self):
         """Convert to dictionary"""
-        return {
-            'id': self.id,
-            'psp_name': self.psp_name,
-            'date': self.date.isoformat() if self.date else None,
-            'amount': float(self.amount) if self.amount else 0.0,
-            'commission_rate': float(self.commission_rate) if self.commission_rate else 0.0,
-            'commission_amount': float(self.commission_amount) if self.commission_amount else 0.0,
-            'difference': float(self.difference) if self.difference else 0.0,
-            'withdraw': float(self.withdraw) if self.withdraw else 0.0,
-            'allocation': float(self.allocation) if self.allocation else 0.0,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
-        }
+        return psp_track_encoder.encode(self)
     
     def __repr__(self):
         return f'<PspTrack {self.psp_name}:{self.date}:{self.amount}>'
 
+
+psp_track_encoder = RowEncoder(
+    PspTrack,
+    fields=('id', 'psp_name', 'date', 'amount', 'commission_rate', 'commission_amount',
+            'difference', 'withdraw', 'allocation', 'created_at', 'updated_at')
+)
+
 class DailyBalance(db.Model):
     """Daily balance tracking model"""
     __tablename__ = 'daily_balance'
@@ -304,32 +301,20 @@ class DailyNet(db.Model):
     
     def to_dict(self):
         """Convert to dictionary"""
-        return {
-            'id': self.id,
-            'date': self.date.isoformat() if self.date else None,
-            'net_cash_usd': float(self.net_cash_usd) if self.net_cash_usd else 0.0,
-            'expenses_usd': float(self.expenses_usd) if self.expenses_usd else 0.0,
-            'commissions_usd': float(self.commissions_usd) if self.commissions_usd else 0.0,
-            'rollover_usd': float(self.rollover_usd) if self.rollover_usd else 0.0,
-            'net_saglama_usd': float(self.net_saglama_usd) if self.net_saglama_usd else 0.0,
-            'onceki_kapanis_usd': float(self.onceki_kapanis_usd) if self.onceki_kapanis_usd else 0.0,
-            'company_cash_usd': float(self.company_cash_usd) if self.company_cash_usd else 0.0,
-            'crypto_balance_usd': float(self.crypto_balance_usd) if self.crypto_balance_usd else 0.0,
-            'anlik_kasa_usd': float(self.anlik_kasa_usd) if self.anlik_kasa_usd else 0.0,
-            'anlik_kasa_manual': self.anlik_kasa_manual if self.anlik_kasa_manual else False,
-            'bekleyen_tahsilat_usd': float(self.bekleyen_tahsilat_usd) if self.bekleyen_tahsilat_usd else 0.0,
-            'fark_usd': float(self.fark_usd) if self.fark_usd else 0.0,
-            'fark_bottom_usd': float(self.fark_bottom_usd) if self.fark_bottom_usd else 0.0,
-            'notes': self.notes,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
-            'created_by': self.created_by
-        }
+        return daily_net_encoder.encode(self)
     
     def __repr__(self):
         return f'<DailyNet {self.date}: NET_SAGLAMA={self.net_saglama_usd}>'
 
 
+daily_net_encoder = RowEncoder(
+    DailyNet,
+    fields=('id', 'date', 'net_cash_usd', 'expenses_usd', 'commissions_usd', 'rollover_usd',
+            'net_saglama_usd', 'onceki_kapanis_usd', 'company_cash_usd', 'crypto_balance_usd',
+            'anlik_kasa_usd', 'anlik_kasa_manual', 'bekleyen_tahsilat_usd', 'fark_usd',
+            'fark_bottom_usd', 'notes', 'created_at', 'updated_at', 'created_by')
+)
+
 class Expense(db.Model):
     """Expense model for Accounting → Expenses tab"""
     __tablename__ = 'expenses'
@@ -4,10 +4,18 @@ Transaction model with business logic and validation
 from app import db
 from datetime import datetime, timezone
 from decimal import Decimal, InvalidOperation
-from sqlalchemy import func, and_
+from sqlalchemy import func, and_, event
 from sqlalchemy.orm import validates
 import json
 
+from app.utils.fast_json import RowEncoder
+
+# Category spellings that count as a deposit / withdrawal
+DEPOSIT_CATEGORIES = ('DEP', 'DEPOSIT', 'INVESTMENT')
+WITHDRAWAL_CATEGORIES = ('WD', 'WITHDRAW', 'WITHDRAWAL')
+# PSP reported in its own (USD) amounts rather than in TRY
+USD_REPORTING_PSP = 'TETHER'
+
 class Transaction(db.Model):
     """Transaction model with enhanced validation and business logic"""
     __tablename__ = 'transactions'  # Standard table name
@@ -32,6 +40,14 @@ class Transaction(db.Model):
     net_amount_try = db.Column(db.Numeric(15, 2), nullable=True)
     exchange_rate = db.Column(db.Numeric(10, 4), nullable=True)
     
+    # Derived columns, maintained on every write (see refresh_derived_columns)
+    # so aggregates filter and sum plain indexed columns instead of
+    # UPPER()/COALESCE()/CASE expressions
+    direction = db.Column(db.String(3), nullable=True)  # 'DEP', 'WD' or NULL
+    effective_amount_try = db.Column(db.Numeric(15, 2), nullable=True)  # COALESCE(amount_try, amount)
+    effective_net_try = db.Column(db.Numeric(15, 2), nullable=True)  # COALESCE(net_amount_try, net_amount)
+    reporting_amount = db.Column(db.Numeric(15, 2), nullable=True)  # amount for Tether (USD), else effective_amount_try
+    
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
     updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
     created_by = db.Column(db.Integer, db.ForeignKey('users.id'))
@@ -39,6 +55,13 @@ class Transaction(db.Model):
     # Multi-tenancy: Organization relationship
     organization_id = db.Column(db.Integer, db.ForeignKey('organizations.id'), nullable=True)
     
+    # Dimension keys, dual-written with the string columns above by
+    # dimension_service; aggregates group on these integers
+    psp_id = db.Column(db.Integer, db.ForeignKey('dim_psp.id'), nullable=True)
+    client_id = db.Column(db.Integer, db.ForeignKey('dim_client.id'), nullable=True)
+    company_id = db.Column(db.Integer, db.ForeignKey('dim_company.id'), nullable=True)
+    payment_method_id = db.Column(db.Integer, db.ForeignKey('dim_payment_method.id'), nullable=True)
+    
     # Enhanced database indexes for performance optimization
     __table_args__ = (
         db.Index('idx_transaction_organization', 'organization_id'),
@@ -66,13 +89,27 @@ class Transaction(db.Model):
         # CRITICAL: Monthly stats query optimization - PSP + date + category together
         db.Index('idx_transaction_psp_date_category', 'psp', 'date', 'category'),
         
+        # Dimension keys
+        db.Index('idx_transaction_psp_id', 'psp_id'),
+        db.Index('idx_transaction_client_id', 'client_id'),
+        db.Index('idx_transaction_company_id', 'company_id'),
+        db.Index('idx_transaction_payment_method_id', 'payment_method_id'),
+        db.Index('idx_transaction_date_psp_id', 'date', 'psp_id'),
+        db.Index('idx_transaction_psp_id_date_category', 'psp_id', 'date', 'category'),
+        
+        # Covering indexes for range aggregates on the derived columns
+        db.Index('idx_transaction_date_direction_amounts', 'date', 'direction', 'effective_amount_try', 'effective_net_try'),
+        db.Index('idx_transaction_date_psp_direction_reporting', 'date', 'psp', 'direction', 'reporting_amount'),
+        
         # Partial indexes for active records (if supported by database)
         # Note: SQLite doesn't support partial indexes, but PostgreSQL does
     )
     
-    # Relationships - PERFORMANCE: Use selectinload to prevent N+1 queries
-    user = db.relationship('User', backref=db.backref('transactions', lazy='selectin'))
-    organization = db.relationship('Organization', backref=db.backref('transactions', lazy='selectin'))
+    # Relationships - backrefs load lazily; use selectinload() explicitly where a
+    # collection is needed (eager backrefs made every User/Organization load
+    # pull all of its transactions)
+    user = db.relationship('User', backref=db.backref('transactions', lazy='select'))
+    organization = db.relationship('Organization', backref=db.backref('transactions', lazy='select'))
     
     @validates('client_name')
     def validate_client_name(self, key, value):
@@ -141,6 +178,39 @@ class Transaction(db.Model):
             return value.upper()  # Normalize to uppercase
         return value
     
+    @staticmethod
+    def derived_values(category, psp, amount, amount_try, net_amount, net_amount_try):
+        """Values of the derived columns for the given source values
+        
+        Also used by raw bulk inserts, which bypass the mapper events.
+        """
+        category = (category or '').strip().upper()
+        if category in DEPOSIT_CATEGORIES:
+            direction = 'DEP'
+        elif category in WITHDRAWAL_CATEGORIES:
+            direction = 'WD'
+        else:
+            direction = None
+        effective_amount_try = amount_try if amount_try is not None else amount
+        effective_net_try = net_amount_try if net_amount_try is not None else net_amount
+        if psp and psp.strip().upper() == USD_REPORTING_PSP:
+            reporting_amount = amount if amount is not None else Decimal('0')
+        else:
+            reporting_amount = effective_amount_try
+        return {
+            'direction': direction,
+            'effective_amount_try': effective_amount_try,
+            'effective_net_try': effective_net_try,
+            'reporting_amount': reporting_amount
+        }
+    
+    def refresh_derived_columns(self):
+        """Recompute the derived columns from the source columns"""
+        values = self.derived_values(self.category, self.psp, self.amount, self.amount_try,
+                                     self.net_amount, self.net_amount_try)
+        for key, value in values.items():
+            setattr(self, key, value)
+    
     def calculate_net_amount(self):
         """Calculate net amount based on amount and commission"""
         return self.amount - self.commission
@@ -225,28 +295,7 @@ class Transaction(db.Model):
     
     def to_dict(self):
         """Convert transaction to dictionary"""
-        return {
-            'id': self.id,
-            'client_name': self.client_name,
-            'company': self.company,
-            'payment_method': self.payment_method,
-
-            'date': self.date.isoformat() if self.date else None,
-            'category': self.category,
-            'amount': float(self.amount) if self.amount else 0.0,
-            'commission': float(self.commission) if self.commission else 0.0,
-            'net_amount': float(self.net_amount) if self.net_amount else 0.0,
-            'currency': self.currency,
-            'psp': self.psp,
-            'notes': self.notes,
-            'amount_try': float(self.amount_try) if self.amount_try else None,
-            'commission_try': float(self.commission_try) if self.commission_try else None,
-            'net_amount_try': float(self.net_amount_try) if self.net_amount_try else None,
-            'exchange_rate': float(self.exchange_rate) if self.exchange_rate else None,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
-            'created_by': self.created_by
-        }
+        return transaction_encoder.encode(self)
     
     @classmethod
     def get_daily_summary(cls, date_obj, psp=None):
@@ -281,4 +330,20 @@ class Transaction(db.Model):
         ).group_by(cls.psp).all()
     
     def __repr__(self):
-        return f'<Transaction {self.id}: {self.client_name} - {self.amount} {self.currency}>' 
\ No newline at end of file
+        return f'<Transaction {self.id}: {self.client_name} - {self.amount} {self.currency}>'
+
+
+
+# Precompiled to_dict; list endpoints use it on rows selected with its columns
+transaction_encoder = RowEncoder(
+    Transaction,
+    fields=('id', 'client_name', 'company', 'payment_method', 'date', 'category', 'amount',
+            'commission', 'net_amount', 'currency', 'psp', 'notes', 'amount_try', 'commission_try',
+            'net_amount_try', 'exchange_rate', 'created_at', 'updated_at', 'created_by'),
+    nullable=('amount_try', 'commission_try', 'net_amount_try', 'exchange_rate')
+)
+
+@event.listens_for(Transaction, 'before_insert')
+@event.listens_for(Transaction, 'before_update')
+def _refresh_transaction_derived_columns(mapper, connection, target):
+    target.refresh_derived_columns()
@@ -8,6 +8,8 @@ from sqlalchemy import func, and_, Index
 from sqlalchemy.orm import validates
 import json
 
+from app.utils.fast_json import RowEncoder
+
 class TrustWallet(db.Model):
     """Model for managing Trust wallet addresses"""
     __tablename__ = 'trust_wallets'
@@ -243,32 +245,7 @@ class TrustWalletTransaction(db.Model):
     
     def to_dict(self):
         """Convert transaction to dictionary"""
-        return {
-            'id': self.id,
-            'wallet_id': self.wallet_id,
-            'transaction_hash': self.transaction_hash,
-            'block_number': self.block_number,
-            'block_timestamp': self.block_timestamp.isoformat() if self.block_timestamp else None,
-            'from_address': self.from_address,
-            'to_address': self.to_address,
-            'token_symbol': self.token_symbol,
-            'token_name': self.token_name,
-            'token_address': self.token_address,
-            'token_amount': float(self.token_amount) if self.token_amount else 0.0,
-            'token_decimals': self.token_decimals,
-            'transaction_type': self.transaction_type,
-            'gas_fee': float(self.gas_fee) if self.gas_fee else 0.0,
-            'gas_fee_token': self.gas_fee_token,
-            'status': self.status,
-            'confirmations': self.confirmations,
-            'network': self.network,
-            'exchange_rate': float(self.exchange_rate) if self.exchange_rate else None,
-            'amount_try': float(self.amount_try) if self.amount_try else None,
-            'gas_fee_try': float(self.gas_fee_try) if self.gas_fee_try else None,
-            'notes': self.notes,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
-        }
+        return trust_wallet_transaction_encoder.encode(self)
     
     @classmethod
     def get_wallet_summary(cls, wallet_id, start_date=None, end_date=None):
@@ -312,3 +289,14 @@ class TrustWalletTransaction(db.Model):
     
     def __repr__(self):
         return f'<TrustWalletTransaction {self.id}: {self.token_symbol} {self.token_amount} ({self.transaction_type})>'
+
+
+trust_wallet_transaction_encoder = RowEncoder(
+    TrustWalletTransaction,
+    fields=('id', 'wallet_id', 'transaction_hash', 'block_number', 'block_timestamp', 'from_address',
+            'to_address', 'token_symbol', 'token_name', 'token_address', 'token_amount',
+            'token_decimals', 'transaction_type', 'gas_fee', 'gas_fee_token', 'status',
+            'confirmations', 'network', 'exchange_rate', 'amount_try', 'gas_fee_try', 'notes',
+            'created_at', 'updated_at'),
+    nullable=('exchange_rate', 'amount_try', 'gas_fee_try')
+)
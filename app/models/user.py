@@ -37,9 +37,10 @@ class User(UserMixin, db.Model):
     # nullable=True for backwards compatibility - existing users will have NULL initially
     organization_id = db.Column(db.Integer, db.ForeignKey('organizations.id'), nullable=True)
     
-    # Relationships - PERFORMANCE: Use selectinload to prevent N+1 queries
-    created_admins = db.relationship('User', backref=db.backref('creator', remote_side=[id], lazy='selectin'))
-    organization = db.relationship('Organization', backref=db.backref('users', lazy='selectin'))
+    # Relationships - backrefs load lazily; use selectinload() explicitly where a
+    # collection is needed so loading a User never pulls its whole history
+    created_admins = db.relationship('User', backref=db.backref('creator', remote_side=[id], lazy='select'))
+    organization = db.relationship('Organization', backref=db.backref('users', lazy='select'))
     
     # Add cascade delete relationships for related models
     # These will be defined in the respective models, but we can add them here for clarity
@@ -3,7 +3,7 @@ Repository Pattern for Database Access
 Provides a clean abstraction layer for database operations
 """
 from .base_repository import BaseRepository
-from .transaction_repository import TransactionRepository
+from .transaction_repository import TransactionRepository, TransactionListRow, LedgerRow
 
-__all__ = ['BaseRepository', 'TransactionRepository']
+__all__ = ['BaseRepository', 'TransactionRepository', 'TransactionListRow', 'LedgerRow']
 
@@ -2,16 +2,52 @@
 Transaction Repository
 Repository pattern implementation for Transaction model
 """
-from typing import Optional, List, TYPE_CHECKING
+from typing import Optional, List, Iterator, NamedTuple, TYPE_CHECKING
 from datetime import date, datetime
 from decimal import Decimal
 from sqlalchemy import and_, func
-from app.repositories.base_repository import BaseRepository
+from sqlalchemy.orm import Query
+from app.repositories.base_repository import BaseRepository, READ_BATCH_SIZE
 
 if TYPE_CHECKING:
     from app.models.transaction import Transaction
 
 
+class TransactionListRow(NamedTuple):
+    """Read model for transaction lists and exports"""
+    id: int
+    client_name: str
+    company: Optional[str]
+    payment_method: Optional[str]
+    date: date
+    category: Optional[str]
+    amount: Decimal
+    commission: Optional[Decimal]
+    net_amount: Decimal
+    currency: Optional[str]
+    psp: Optional[str]
+    notes: Optional[str]
+    amount_try: Optional[Decimal]
+    commission_try: Optional[Decimal]
+    net_amount_try: Optional[Decimal]
+    exchange_rate: Optional[Decimal]
+    created_at: Optional[datetime]
+
+
+class LedgerRow(NamedTuple):
+    """Read model for the ledger's per-day PSP totals"""
+    date: date
+    created_at: Optional[datetime]
+    psp: Optional[str]
+    category: Optional[str]
+    amount: Decimal
+    commission: Optional[Decimal]
+    net_amount: Decimal
+    amount_try: Optional[Decimal]
+    commission_try: Optional[Decimal]
+    net_amount_try: Optional[Decimal]
+
+
 class TransactionRepository(BaseRepository):
     """Repository for Transaction operations"""
     
@@ -171,3 +207,42 @@ class TransactionRepository(BaseRepository):
             query = query.filter_by(organization_id=organization_id)
         
         return query.count()
+    
+    def iter_list_rows(
+        self,
+        query: Optional[Query] = None,
+        batch_size: int = READ_BATCH_SIZE
+    ) -> Iterator[TransactionListRow]:
+        """
+        Stream transactions as list rows instead of ORM instances
+        
+        Args:
+            query: Filtered, ordered or paginated Transaction query (all transactions if omitted)
+            batch_size: Rows fetched per round trip
+        
+        Returns:
+            Iterator of TransactionListRow, one per matching transaction
+        """
+        return self.iter_rows(TransactionListRow, query, batch_size)
+    
+    def iter_ledger_rows(
+        self,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        batch_size: int = READ_BATCH_SIZE
+    ) -> Iterator[LedgerRow]:
+        """
+        Stream the amounts of transactions that have a PSP, in id order
+        
+        Args:
+            limit: Optional maximum number of rows
+            offset: Number of rows to skip
+            batch_size: Rows fetched per round trip
+        
+        Returns:
+            Iterator of LedgerRow, one per transaction
+        """
+        query = self.query().filter(self.model.psp.isnot(None)).order_by(self.model.id)
+        if limit:
+            query = query.limit(limit).offset(offset)
+        return self.iter_rows(LedgerRow, query, batch_size)
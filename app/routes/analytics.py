@@ -5,7 +5,6 @@ from flask import Blueprint, render_template, request, redirect, url_for, flash,
 from flask_login import login_required, current_user
 from datetime import datetime, date, timedelta, timezone
 from sqlalchemy import func, extract, desc, and_, or_, case, cast, Float
-import pandas as pd
 import json
 from decimal import Decimal, InvalidOperation
 from collections import defaultdict
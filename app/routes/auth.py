@@ -390,8 +390,9 @@ def change_password():
     
     # Update password
     from werkzeug.security import generate_password_hash
-    current_user.password = generate_password_hash(new_password)
-    current_user.password_changed_at = datetime.now(timezone.utc)
+    user = current_user.load_user()
+    user.password = generate_password_hash(new_password)
+    user.password_changed_at = datetime.now(timezone.utc)
     db.session.commit()
     
     flash('Password changed successfully.', 'success')
@@ -441,7 +442,7 @@ def upload_profile_picture():
     file.save(upload_path)
     
     # Update user profile
-    current_user.profile_picture = filename
+    current_user.load_user().profile_picture = filename
     db.session.commit()
     
     flash('Profile picture updated successfully.', 'success')
@@ -290,6 +290,92 @@ def application_metrics():
                 'error_counts': error_service.error_counts
             }
         
+        # Audit writer queue metrics
+        try:
+            from app.services.audit_writer_service import audit_writer
+            metrics['audit_writer'] = audit_writer.get_metrics()
+        except:
+            pass
+        
+        # Auth principal cache stats
+        try:
+            from app.services.auth_principal_service import principal_service
+            metrics['auth_principals'] = principal_service.get_stats()
+        except:
+            pass
+        
+        # Request instrumentation (span window, hook overhead)
+        try:
+            from app.utils.instrumentation import request_instrumentation
+            metrics['instrumentation'] = request_instrumentation.get_stats()
+        except:
+            pass
+        
+        # Per-request SQL profile (queries per endpoint, N+1 patterns)
+        try:
+            from app.utils.query_performance_monitor import query_performance_monitor
+            metrics['sql_profiler'] = query_performance_monitor.get_endpoint_stats()
+        except:
+            pass
+        
+        # Translation catalog (compiled languages, reloads)
+        try:
+            from app.services.translation_catalog import translation_catalog
+            metrics['translation_catalog'] = translation_catalog.get_stats()
+        except:
+            pass
+        
+        # Data version ETags (304 ratio, counter bumps)
+        try:
+            from app.services.data_version_service import data_version_service
+            metrics['data_versions'] = data_version_service.get_stats()
+        except:
+            pass
+        
+        # Dimension tables (dual-write, backfill readiness)
+        try:
+            from app.services.dimension_service import dimension_service
+            metrics['dimensions'] = dimension_service.get_stats()
+        except:
+            pass
+        
+        try:
+            from app.services.index_advisor_service import index_advisor
+            metrics['index_advisor'] = index_advisor.get_stats()
+        except:
+            pass
+        
+        try:
+            from app.services.partition_service import transaction_partition_service
+            metrics['transaction_partitions'] = transaction_partition_service.get_stats()
+        except:
+            pass
+        
+        try:
+            from app.utils.db_routing import replica_router
+            metrics['read_replica'] = replica_router.get_stats()
+        except:
+            pass
+        
+        try:
+            from app.utils.connection_pool_optimizer import ConnectionPoolOptimizer
+            metrics['connection_pool_waits'] = ConnectionPoolOptimizer.wait_histograms()
+        except:
+            pass
+        
+        try:
+            from app.services.unit_of_work import unit_of_work
+            metrics['unit_of_work'] = unit_of_work.get_stats()
+        except:
+            pass
+        
+        # Background job scheduler (leader, job registry, last runs)
+        try:
+            from app.services.job_scheduler_service import job_scheduler
+            metrics['scheduler'] = job_scheduler.get_status()
+        except:
+            pass
+        
         # Cache stats (if available)
         try:
             from app import advanced_cache
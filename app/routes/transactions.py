@@ -1,11 +1,10 @@
 """
 Transaction routes blueprint
 """
-from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, Response, current_app
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, Response, current_app, stream_with_context
 from flask_login import login_required, current_user
 from datetime import datetime, date, timedelta, timezone
 from sqlalchemy import func, extract, desc, and_, or_
-import pandas as pd
 from werkzeug.utils import secure_filename
 import os
 import csv
@@ -18,40 +17,30 @@ import logging
 from app import db
 from app.models.transaction import Transaction
 from app.models.config import Option
+from app.repositories.transaction_repository import TransactionRepository
 from app.utils.unified_error_handler import handle_errors, handle_api_errors
 from app.utils.db_compat import ilike_compat
+from app.utils.db_routing import read_replica
 from app.services.decimal_float_fix_service import decimal_float_service
 from app.services.datetime_fix_service import fix_template_data_dates
+from app.services.daily_summary_service import daily_summary_service, normalize_payment_method, MAX_DAYS as SUMMARY_MAX_DAYS
+from app.utils.response_optimizer import versioned_response, request_months
+from app.services.dimension_service import dimension_service
 
 logger = logging.getLogger(__name__)
 
-def normalize_payment_method(payment_method):
-    """Normalize payment method to standard categories: BANK, CC, TETHER, or OTHER"""
-    if not payment_method:
-        return 'OTHER'
-    
-    pm_str = str(payment_method).strip()
-    if not pm_str:
-        return 'OTHER'
-    
-    pm_lower = pm_str.lower()
-    
-    # Bank variations (includes IBAN transfers)
-    if any(keyword in pm_lower for keyword in ['bank', 'banka', 'havale', 'eft', 'wire', 'transfer', 'iban']):
-        return 'BANK'
-    
-    # Credit card variations
-    if any(keyword in pm_lower for keyword in ['kk', 'credit', 'card', 'kredi', 'visa', 'mastercard', 'amex']):
-        return 'CC'
-    
-    # Tether variations
-    if any(keyword in pm_lower for keyword in ['tether', 'usdt', 'crypto', 'kasa']):
-        return 'TETHER'
-    
-    return 'OTHER'
-
 # Create blueprint
 transactions_bp = Blueprint('transactions', __name__)
+transaction_repository = TransactionRepository()
+
+
+def _distinct_values(kind, column):
+    """Filter options for a dimension column, from its dimension table once backfilled"""
+    names = dimension_service.names(kind)
+    if names is not None:
+        return names
+    return [r[0] for r in db.session.query(column).distinct().filter(column.isnot(None)).all()]
+
 
 # Define Analytics class outside of route functions to avoid scope issues
 class Analytics:
@@ -132,10 +121,10 @@ def transactions_main():
     }
     
     # Get distinct values for filters
-    psp_options = [r[0] for r in db.session.query(Transaction.psp).distinct().filter(Transaction.psp.isnot(None)).all()]
+    psp_options = _distinct_values('psp', Transaction.psp)
     category_options = [r[0] for r in db.session.query(Transaction.category).distinct().filter(Transaction.category.isnot(None)).all()]
     currency_options = [r[0] for r in db.session.query(Transaction.currency).distinct().filter(Transaction.currency.isnot(None)).all()]
-    payment_method_options = [r[0] for r in db.session.query(Transaction.payment_method).distinct().filter(Transaction.payment_method.isnot(None)).all()]
+    payment_method_options = _distinct_values('payment_method', Transaction.payment_method)
     
     # Calculate summary statistics
     summary = {
@@ -206,23 +195,20 @@ def secure_filename_upload(file):
     return f"{name}_{timestamp}{ext}"
 
 def log_audit(action, table_name, record_id, old_values=None, new_values=None):
-    """Log audit trail"""
+    """Log audit trail (persisted asynchronously by the audit writer)"""
     try:
-        from app.models.audit import AuditLog
-        audit_log = AuditLog(
-            user_id=current_user.id,
-            action=action,
-            table_name=table_name,
-            record_id=record_id,
-            old_values=json.dumps(old_values) if old_values else None,
-            new_values=json.dumps(new_values) if new_values else None,
-            ip_address=request.remote_addr
-        )
-        db.session.add(audit_log)
-        db.session.commit()
+        from app.services.audit_writer_service import audit_writer, serialize_audit_values
+        audit_writer.enqueue({
+            'user_id': current_user.id,
+            'action': action,
+            'table_name': table_name,
+            'record_id': record_id,
+            'old_values': serialize_audit_values(old_values),
+            'new_values': serialize_audit_values(new_values),
+            'ip_address': request.remote_addr
+        })
     except Exception as e:
         logger.error(f"Failed to log audit: {str(e)}")
-        db.session.rollback()
 
 def calculate_commission(amount, psp, category=None):
     """Calculate commission based on PSP and category"""
@@ -413,8 +399,7 @@ def add_transaction():
         ibans = [iban[0] for iban in ibans if iban[0]]
     
     if not payment_methods:
-        payment_methods = db.session.query(Transaction.payment_method).distinct().filter(Transaction.payment_method.isnot(None)).all()
-        payment_methods = [pm[0] for pm in payment_methods if pm[0]]
+        payment_methods = [pm for pm in _distinct_values('payment_method', Transaction.payment_method) if pm]
     
     if not companies:
         companies = db.session.query(Transaction.company_order).distinct().filter(Transaction.company_order.isnot(None)).all()
@@ -429,8 +414,7 @@ def add_transaction():
         categories = [cat[0] for cat in categories if cat[0]]
     
     if not psps:
-        psps = db.session.query(Transaction.psp).distinct().filter(Transaction.psp.isnot(None)).all()
-        psps = [psp[0] for psp in psps if psp[0]]
+        psps = [psp for psp in _distinct_values('psp', Transaction.psp) if psp]
     
         return serve_frontend('/add-transaction')
 
@@ -548,8 +532,7 @@ def edit_transaction(id):
         ibans = [iban[0] for iban in ibans if iban[0]]
     
     if not payment_methods:
-        payment_methods = db.session.query(Transaction.payment_method).distinct().filter(Transaction.payment_method.isnot(None)).all()
-        payment_methods = [pm[0] for pm in payment_methods if pm[0]]
+        payment_methods = [pm for pm in _distinct_values('payment_method', Transaction.payment_method) if pm]
     
     if not companies:
         companies = db.session.query(Transaction.company_order).distinct().filter(Transaction.company_order.isnot(None)).all()
@@ -564,8 +547,7 @@ def edit_transaction(id):
         categories = [cat[0] for cat in categories if cat[0]]
     
     if not psps:
-        psps = db.session.query(Transaction.psp).distinct().filter(Transaction.psp.isnot(None)).all()
-        psps = [psp[0] for psp in psps if psp[0]]
+        psps = [psp for psp in _distinct_values('psp', Transaction.psp) if psp]
     
     from app.utils.frontend_helper import serve_frontend
     return serve_frontend(f'/transactions/{id}/edit')
@@ -776,10 +758,10 @@ def clients():
         
         # Get distinct values for filters
         distinct_values = {
-            'payment_method': [r[0] for r in db.session.query(Transaction.payment_method).distinct().filter(Transaction.payment_method.isnot(None)).all()],
+            'payment_method': _distinct_values('payment_method', Transaction.payment_method),
             'category': [r[0] for r in db.session.query(Transaction.category).distinct().filter(Transaction.category.isnot(None)).all()],
-            'psp': [r[0] for r in db.session.query(Transaction.psp).distinct().filter(Transaction.psp.isnot(None)).all()],
-            'company_order': [r[0] for r in db.session.query(Transaction.company).distinct().filter(Transaction.company.isnot(None)).all()],
+            'psp': _distinct_values('psp', Transaction.psp),
+            'company_order': _distinct_values('company', Transaction.company),
             'currency': [r[0] for r in db.session.query(Transaction.currency).distinct().filter(Transaction.currency.isnot(None)).all()]
         }
         
@@ -990,6 +972,8 @@ def import_transactions():
             return serve_frontend('/import')
         
         try:
+            import pandas as pd
+            
             # Read file
             if file.filename.endswith('.csv'):
                 df = pd.read_csv(file)
@@ -1093,6 +1077,7 @@ def import_transactions():
 @transactions_bp.route('/export')
 @login_required
 @handle_errors
+@read_replica
 def export_transactions():
     """Export transactions to CSV"""
     try:
@@ -1105,42 +1090,47 @@ def export_transactions():
         # Order by date (newest first)
         query = query.order_by(desc(Transaction.date))
         
-        transactions = query.all()
+        # Rows are streamed from the database in batches and written as they arrive
+        rows = transaction_repository.iter_list_rows(query)
         
-        # Create CSV
-        output = StringIO()
-        writer = csv.writer(output)
-        
-        # Write header
-        writer.writerow([
-            'ID', 'Client Name', 'IBAN', 'Payment Method', 'Company Order',
-            'Date', 'Category', 'Amount', 'Commission', 'Net Amount',
-            'Currency', 'PSP', 'Notes', 'Created At'
-        ])
-        
-        # Write data
-        for transaction in transactions:
+        def generate():
+            output = StringIO()
+            writer = csv.writer(output)
+            
+            # Write header
             writer.writerow([
-                transaction.id,
-                transaction.client_name,
-                transaction.iban or '',
-                transaction.payment_method or '',
-                transaction.company_order or '',
-                transaction.date.strftime('%Y-%m-%d'),
-                transaction.category or '',
-                float(transaction.amount),
-                float(transaction.commission),
-                float(transaction.net_amount),
-                transaction.currency,
-                transaction.psp or '',
-                transaction.notes or '',
-                transaction.created_at.strftime('%Y-%m-%d %H:%M:%S') if transaction.created_at else ''
+                'ID', 'Client Name', 'IBAN', 'Payment Method', 'Company Order',
+                'Date', 'Category', 'Amount', 'Commission', 'Net Amount',
+                'Currency', 'PSP', 'Notes', 'Created At'
             ])
+            
+            # Write data (there is no IBAN column; Company Order carries the company)
+            for count, transaction in enumerate(rows, 1):
+                writer.writerow([
+                    transaction.id,
+                    transaction.client_name,
+                    '',
+                    transaction.payment_method or '',
+                    transaction.company or '',
+                    transaction.date.strftime('%Y-%m-%d'),
+                    transaction.category or '',
+                    float(transaction.amount),
+                    float(transaction.commission or 0),
+                    float(transaction.net_amount),
+                    transaction.currency,
+                    transaction.psp or '',
+                    transaction.notes or '',
+                    transaction.created_at.strftime('%Y-%m-%d %H:%M:%S') if transaction.created_at else ''
+                ])
+                if count % 1000 == 0:
+                    yield output.getvalue()
+                    output.seek(0)
+                    output.truncate()
+            yield output.getvalue()
         
         # Create response
-        output.seek(0)
         return Response(
-            output.getvalue(),
+            stream_with_context(generate()),
             mimetype='text/csv',
             headers={'Content-Disposition': 'attachment; filename=transactions.csv'}
         )
@@ -2098,290 +2088,102 @@ def api_summary(date):
         return jsonify({'error': 'Error loading summary data'}), 500
 
 
+def _parse_quarter(value):
+    """(first day, last day) of a YYYY-Qn quarter; ValueError when it is not a real quarter"""
+    year_str, q_str = value.upper().split('-Q')
+    year, quarter = int(year_str), int(q_str)
+    if not 1 <= quarter <= 4 or not 1 <= year <= 9998:
+        raise ValueError(value)
+    start_date = date(year, 3 * quarter - 2, 1)
+    end_date = date(year + 1, 1, 1) - timedelta(days=1) if quarter == 4 else date(year, 3 * quarter + 1, 1) - timedelta(days=1)
+    return start_date, end_date
+
+
+def _summary_batch_months():
+    """Months touched by the dates/start/end/quarter parameters of api_summary_batch"""
+    quarter_param = request.args.get('quarter')
+    if quarter_param:
+        try:
+            start_date, _ = _parse_quarter(quarter_param)
+        except ValueError:
+            return None
+        return [f"{start_date.year:04d}-{month:02d}" for month in range(start_date.month, start_date.month + 3)]
+    if request.args.get('start') or request.args.get('end'):
+        return request_months()
+    months = {d.strip()[:7] for d in request.args.get('dates', '').split(',') if d.strip()}
+    return sorted(months) if months else None
+
+
 @transactions_bp.route('/api/summary/batch', methods=['GET'])
 # @login_required  # Temporarily disabled for debugging
+@versioned_response('transactions', 'rates', 'psp_config', months=_summary_batch_months)
 def api_summary_batch():
-    """Batch API endpoint for multiple date summaries - PERFORMANCE SOLUTION"""
+    """Batch summaries for many dates - one grouped query for the whole batch
+
+    Query parameters:
+        dates: comma separated YYYY-MM-DD dates, or
+        start/end: an inclusive date range, or
+        quarter: e.g. 2025-Q3 (a whole calendar quarter)
+        format: 'columnar' for column arrays instead of per-date objects
+    """
     try:
-        # Get dates from query parameter (comma-separated)
         dates_param = request.args.get('dates', '')
-        if not dates_param:
-            return jsonify({'error': 'No dates provided'}), 400
-        
-        # Parse dates
-        date_strings = [d.strip() for d in dates_param.split(',') if d.strip()]
-        if not date_strings:
-            return jsonify({'error': 'No valid dates provided'}), 400
-        
-        # Limit to reasonable batch size
-        if len(date_strings) > 100:
-            return jsonify({'error': 'Too many dates requested (max 100)'}), 400
+        start_param = request.args.get('start')
+        end_param = request.args.get('end')
+        quarter_param = request.args.get('quarter')
         
-        # Parse and validate all dates first
-        date_objects = []
-        for date_str in date_strings:
+        if quarter_param:
             try:
-                date_obj = datetime.strptime(date_str, '%Y-%m-%d').date()
-                date_objects.append((date_str, date_obj))
+                start_date, end_date = _parse_quarter(quarter_param)
             except ValueError:
-                logger.warning(f"Invalid date format: {date_str}")
-                continue
-        
-        if not date_objects:
-            return jsonify({'error': 'No valid dates in request'}), 400
-        
-        # Get all transactions for all dates in one query (optimization)
-        all_dates = [date_obj for _, date_obj in date_objects]
-        all_transactions = Transaction.query.filter(Transaction.date.in_(all_dates)).all()
-        
-        # Group transactions by date
-        transactions_by_date = defaultdict(list)
-        for transaction in all_transactions:
-            if transaction.date:
-                transactions_by_date[transaction.date].append(transaction)
-        
-        # Daily KUR rates from KASA.xlsx (used as fallback when no USD transactions)
-        from app.services.excel_import_service import ExcelImportService
-        DAILY_KUR_RATES = ExcelImportService.DAILY_KUR_RATES
-        
-        # Build response for each date
-        summaries = {}
-        
-        for date_str, date_obj in date_objects:
-            transactions = transactions_by_date.get(date_obj, [])
-            
-            # Get exchange rate from USD transactions for this date (most accurate)
-            usd_rate = None
-            for t in transactions:
-                if t.currency and t.currency.upper() == 'USD' and t.exchange_rate:
-                    rate_value = decimal_float_service.safe_decimal(t.exchange_rate)
-                    if rate_value and rate_value > 1:  # Valid rate
-                        usd_rate = rate_value
-                        break
-            
-            # Fallback 1: Use the daily KUR rates from KASA.xlsx
-            if usd_rate is None and date_str in DAILY_KUR_RATES:
-                usd_rate = DAILY_KUR_RATES[date_str]
-            
-            # Fallback 2: Try ExchangeRate table
-            if usd_rate is None:
-                from app.models.config import ExchangeRate
-                exchange_rate = ExchangeRate.query.filter_by(date=date_obj).first()
-                if exchange_rate and exchange_rate.usd_to_tl:
-                    usd_rate = decimal_float_service.safe_decimal(exchange_rate.usd_to_tl)
-            
-            # Final fallback: Use a default rate (should rarely happen)
-            if usd_rate is None:
-                usd_rate = Decimal('42.0')  # Final fallback rate
-            
-            # Calculate summary statistics (same logic as single endpoint)
-            total_deposits_tl = Decimal('0')
-            total_withdrawals_tl = Decimal('0')
-            total_deposits_usd = Decimal('0')
-            total_withdrawals_usd = Decimal('0')
-            total_commission_tl = Decimal('0')
-            total_commission_usd = Decimal('0')
-            total_net_tl = Decimal('0')
-            total_net_usd = Decimal('0')
-            
-            for transaction in transactions:
-                amount = decimal_float_service.safe_decimal(transaction.amount)
-                # Handle commission - if None or 0, try to calculate it for DEP transactions
-                commission = decimal_float_service.safe_decimal(transaction.commission)
-                
-                # Check if this is a deposit (not withdrawal)
-                is_deposit = transaction.category and transaction.category.upper() not in ['WD', 'WITHDRAW', 'WITHDRAWAL']
-                
-                # If commission is 0 or None and this is a DEP transaction, try to calculate it
-                if (commission is None or commission == Decimal('0')) and is_deposit:
-                    # Try to get commission rate from PSP
-                    try:
-                        from app.models.config import Option
-                        psp_option = Option.query.filter_by(
-                            field_name='psp',
-                            value=transaction.psp,
-                            is_active=True
-                        ).first()
-                        
-                        if psp_option and psp_option.commission_rate is not None:
-                            commission = abs(amount) * psp_option.commission_rate
-                        else:
-                            # Default 2.5% commission rate for DEP transactions
-                            commission = abs(amount) * Decimal('0.025')
-                    except Exception as e:
-                        logger.warning(f"Error calculating commission for transaction {transaction.id}: {e}")
-                        # Default 2.5% commission rate as fallback
-                        commission = abs(amount) * Decimal('0.025')
-                
-                # Ensure commission is not None
-                if commission is None:
-                    commission = Decimal('0')
-                
-                net_amount = decimal_float_service.safe_decimal(transaction.net_amount)
-                
-                is_withdrawal = (
-                    transaction.category and transaction.category.upper() in ['WD', 'WITHDRAW', 'WITHDRAWAL']
-                ) or (amount < 0)
-                
-                if transaction.currency and transaction.currency.upper() == 'USD':
-                    if is_withdrawal:
-                        total_withdrawals_usd += abs(amount)  # Store as positive value
-                    else:
-                        total_deposits_usd += amount
-                    total_commission_usd += commission
-                    total_net_usd += net_amount
-                    
-                    # NOTE: USD transactions are NOT converted to TRY for gross balance calculation
-                    # They remain as USD and are used directly in the USD-first calculation
-                else:
-                    # TL transactions
-                    if is_withdrawal:
-                        total_withdrawals_tl += abs(amount)
-                        total_net_tl -= net_amount
-                    else:
-                        total_deposits_tl += amount
-                        total_net_tl += net_amount
-                    total_commission_tl += commission
-            
-            # NEW CALCULATION LOGIC (USD-first approach):
-            # Step 1: Calculate net amounts for each currency (deposits - withdrawals)
-            try_net = total_deposits_tl - total_withdrawals_tl
-            usd_net = total_deposits_usd - total_withdrawals_usd
-            
-            # DEBUG: Log calculation details for September 30th
-            if date_str == '2025-09-30':
-                print(f"🔍 DEBUG September 30th:")
-                print(f"  Total Deposits TL: {total_deposits_tl}")
-                print(f"  Total Withdrawals TL: {total_withdrawals_tl}")
-                print(f"  Total Deposits USD: {total_deposits_usd}")
-                print(f"  Total Withdrawals USD: {total_withdrawals_usd}")
-                print(f"  TRY Net: {try_net}")
-                print(f"  USD Net: {usd_net}")
-                print(f"  Exchange Rate: {usd_rate}")
-            
-            # Step 2: Calculate USD Gross Balance FIRST
-            # Formula: (TRY_net / rate) + USD_net
-            if usd_rate and usd_rate != Decimal('0'):
-                gross_balance_usd = decimal_float_service.safe_divide(try_net, usd_rate, 'decimal') + usd_net
-            else:
-                # Fallback if no rate available
-                gross_balance_usd = usd_net
-            
-            # Step 3: Calculate TRY Gross Balance from USD
-            # Formula: USD_gross * rate
-            if usd_rate and usd_rate != Decimal('0'):
-                gross_balance_tl = decimal_float_service.safe_multiply(gross_balance_usd, usd_rate, 'decimal')
-            else:
-                # Fallback if no rate available
-                gross_balance_tl = try_net
+                return jsonify({'error': 'Invalid quarter (expected YYYY-Qn)'}), 400
+            all_dates = daily_summary_service.date_range(start_date, end_date)
+        elif start_param or end_param:
+            try:
+                start_date = datetime.strptime(start_param or '', '%Y-%m-%d').date()
+                end_date = datetime.strptime(end_param or '', '%Y-%m-%d').date()
+            except ValueError:
+                return jsonify({'error': 'start and end must be YYYY-MM-DD dates'}), 400
+            if end_date < start_date:
+                return jsonify({'error': 'end must not be before start'}), 400
+            if (end_date - start_date).days + 1 > SUMMARY_MAX_DAYS:
+                return jsonify({'error': f'Too many dates requested (max {SUMMARY_MAX_DAYS})'}), 400
+            all_dates = daily_summary_service.date_range(start_date, end_date)
+        else:
+            if not dates_param:
+                return jsonify({'error': 'No dates provided'}), 400
             
-            # Calculate totals for normalized payment methods (BANK, CC, TETHER)
-            payment_method_totals = {
-                'BANK': {'amount_tl': Decimal('0'), 'amount_usd': Decimal('0'), 'count': 0},
-                'CC': {'amount_tl': Decimal('0'), 'amount_usd': Decimal('0'), 'count': 0},
-                'TETHER': {'amount_tl': Decimal('0'), 'amount_usd': Decimal('0'), 'count': 0}
-            }
+            # Parse dates
+            date_strings = [d.strip() for d in dates_param.split(',') if d.strip()]
+            if not date_strings:
+                return jsonify({'error': 'No valid dates provided'}), 400
             
-            for transaction in transactions:
-                normalized_method = normalize_payment_method(transaction.payment_method)
-                
-                if normalized_method in ['BANK', 'CC', 'TETHER']:
-                    amount = decimal_float_service.safe_decimal(transaction.amount)
-                    is_withdrawal = (
-                        transaction.category and transaction.category.upper() in ['WD', 'WITHDRAW', 'WITHDRAWAL']
-                    ) or (amount < 0)
-                    
-                    # IMPORTANT: Only count DEPOSITS for payment method totals
-                    if is_withdrawal:
-                        continue  # Skip withdrawals
-                    
-                    # For deposits only, use GROSS amounts (amount_try) for payment method totals
-                    # The spreadsheet shows BANK = gross amount before commission
-                    # Use amount_try if available (already converted to TRY), otherwise convert amount
-                    amount_try = decimal_float_service.safe_decimal(transaction.amount_try) if transaction.amount_try else None
-                    
-                    if normalized_method == 'TETHER':
-                        # TETHER always uses USD - use GROSS USD amount (before commission)
-                        if transaction.currency and transaction.currency.upper() == 'USD':
-                            payment_method_totals[normalized_method]['amount_usd'] += abs(amount)
-                        else:
-                            # TETHER in TL is unusual, but convert to USD
-                            if usd_rate and usd_rate != Decimal('0'):
-                                payment_method_totals[normalized_method]['amount_usd'] += abs(decimal_float_service.safe_divide(amount, usd_rate, 'decimal'))
-                            else:
-                                payment_method_totals[normalized_method]['amount_usd'] += abs(amount)
-                    else:
-                        # BANK/CC: use GROSS TL amounts - prefer amount_try if available
-                        if transaction.currency and transaction.currency.upper() == 'USD':
-                            # USD transaction - use amount_try if available, otherwise convert amount
-                            if amount_try is not None:
-                                payment_method_totals[normalized_method]['amount_tl'] += abs(amount_try)
-                            else:
-                                # Convert GROSS USD to TL using exchange rate
-                                transaction_rate = transaction.exchange_rate if transaction.exchange_rate else usd_rate
-                                if transaction_rate and transaction_rate != Decimal('0'):
-                                    amount_tl = abs(decimal_float_service.safe_multiply(amount, transaction_rate, 'decimal'))
-                                    payment_method_totals[normalized_method]['amount_tl'] += amount_tl
-                                else:
-                                    payment_method_totals[normalized_method]['amount_tl'] += abs(amount)
-                            # Also track USD for BANK/CC (gross amount)
-                            payment_method_totals[normalized_method]['amount_usd'] += abs(amount)
-                        else:
-                            # TL/TRY transaction - use GROSS amount directly (or amount_try if set)
-                            if amount_try is not None:
-                                payment_method_totals[normalized_method]['amount_tl'] += abs(amount_try)
-                            else:
-                                payment_method_totals[normalized_method]['amount_tl'] += abs(amount)
-                            # Convert to USD for tracking
-                            if usd_rate and usd_rate != Decimal('0'):
-                                if amount_try is not None:
-                                    payment_method_totals[normalized_method]['amount_usd'] += abs(decimal_float_service.safe_divide(amount_try, usd_rate, 'decimal'))
-                                else:
-                                    payment_method_totals[normalized_method]['amount_usd'] += abs(decimal_float_service.safe_divide(amount, usd_rate, 'decimal'))
-                            else:
-                                payment_method_totals[normalized_method]['amount_usd'] += abs(amount)
-                    
-                    payment_method_totals[normalized_method]['count'] += 1
+            # Limit to reasonable batch size
+            if len(date_strings) > SUMMARY_MAX_DAYS:
+                return jsonify({'error': f'Too many dates requested (max {SUMMARY_MAX_DAYS})'}), 400
             
-            # DEBUG: Log final results for September 30th
-            if date_str == '2025-09-30':
-                print(f"  Calculated USD Gross: {gross_balance_usd}")
-                print(f"  Calculated TRY Gross: {gross_balance_tl}")
+            all_dates = []
+            for date_str in date_strings:
+                try:
+                    all_dates.append(datetime.strptime(date_str, '%Y-%m-%d').date())
+                except ValueError:
+                    logger.warning(f"Invalid date format: {date_str}")
+                    continue
             
-            # Store summary for this date
-            summaries[date_str] = {
-                'date': date_str,
-                'transaction_count': len(transactions),
-                'total_deposits_tl': float(total_deposits_tl),
-                'total_withdrawals_tl': float(abs(total_withdrawals_tl)),
-                'total_deposits_usd': float(total_deposits_usd),
-                'total_withdrawals_usd': float(abs(total_withdrawals_usd)),
-                'total_commission_tl': float(total_commission_tl),
-                'total_commission_usd': float(total_commission_usd),
-                'gross_balance_tl': float(gross_balance_tl),
-                'gross_balance_usd': float(gross_balance_usd),
-                'total_net_tl': float(total_net_tl),
-                'total_net_usd': float(total_net_usd),
-                'exchange_rate': float(usd_rate) if usd_rate else None,
-                'payment_method_totals': {
-                    'BANK': {
-                        'amount_tl': float(payment_method_totals['BANK']['amount_tl']),
-                        'amount_usd': float(payment_method_totals['BANK']['amount_usd']),
-                        'count': payment_method_totals['BANK']['count']
-                    },
-                    'CC': {
-                        'amount_tl': float(payment_method_totals['CC']['amount_tl']),
-                        'amount_usd': float(payment_method_totals['CC']['amount_usd']),
-                        'count': payment_method_totals['CC']['count']
-                    },
-                    'TETHER': {
-                        'amount_tl': float(payment_method_totals['TETHER']['amount_tl']),
-                        'amount_usd': float(payment_method_totals['TETHER']['amount_usd']),
-                        'count': payment_method_totals['TETHER']['count']
-                    }
-                }
-            }
+            if not all_dates:
+                return jsonify({'error': 'No valid dates in request'}), 400
+        
+        result = daily_summary_service.summarize(all_dates)
+        
+        if request.args.get('format') == 'columnar':
+            return jsonify({
+                'success': True,
+                'format': 'columnar',
+                'count': len(result['dates']),
+                **daily_summary_service.to_columnar(result)
+            })
         
+        summaries = daily_summary_service.to_summaries(result)
         return jsonify({
             'success': True,
             'summaries': summaries,
@@ -12,6 +12,7 @@ from flask_login import current_user
 from app import db
 from app.models.audit import AuditLog
 from app.models.user import User
+from app.services.audit_writer_service import audit_writer, serialize_audit_values
 
 logger = logging.getLogger(__name__)
 
@@ -62,10 +63,13 @@ class AuditService:
         new_values: Optional[Dict[str, Any]] = None,
         additional_info: Optional[Dict[str, Any]] = None,
         user_id: Optional[int] = None
-    ) -> Optional[AuditLog]:
+    ) -> bool:
         """
         Log an administrative action
         
+        The record is handed to the audit writer and persisted in a batch on
+        its own connection; the caller's session is never committed here.
+        
         Args:
             action: Action type (e.g., 'ADMIN_CREATE', 'USER_PASSWORD_CHANGE')
             table_name: Name of the table/entity being modified
@@ -76,55 +80,45 @@ class AuditService:
             user_id: User performing the action (defaults to current_user)
         
         Returns:
-            AuditLog instance if successful, None otherwise
+            True if the record was queued or written, False otherwise
         """
         try:
             # Get user ID
             if user_id is None:
                 if not current_user.is_authenticated:
                     logger.warning("Cannot log admin action: user not authenticated")
-                    return None
+                    return False
                 # Skip audit logging for special users
                 if hasattr(current_user, 'admin_level') and current_user.admin_level == -1:
-                    return None
+                    return False
                 user_id = current_user.id
             
             # Skip audit logging for special user IDs
             if user_id == -1:
-                return None
-            
-            # Prepare values for JSON storage
-            old_values_json = json.dumps(old_values) if old_values else None
-            new_values_json = json.dumps(new_values) if new_values else None
+                return False
             
             # Add additional info to new_values if provided
             if additional_info:
-                info_dict = new_values.copy() if new_values else {}
-                info_dict['_audit_info'] = additional_info
-                new_values_json = json.dumps(info_dict)
+                new_values = dict(new_values) if new_values else {}
+                new_values['_audit_info'] = additional_info
             
-            # Create audit log entry
-            audit_log = AuditLog(
-                user_id=user_id,
-                action=action,
-                table_name=table_name,
-                record_id=record_id,
-                old_values=old_values_json,
-                new_values=new_values_json,
-                ip_address=AuditService.get_ip_address(),
-                timestamp=datetime.now(timezone.utc)
-            )
+            queued = audit_writer.enqueue({
+                'user_id': user_id,
+                'action': action,
+                'table_name': table_name,
+                'record_id': record_id,
+                'old_values': serialize_audit_values(old_values),
+                'new_values': serialize_audit_values(new_values),
+                'ip_address': AuditService.get_ip_address(),
+                'timestamp': datetime.now(timezone.utc)
+            })
             
-            db.session.add(audit_log)
-            db.session.commit()
-            
-            logger.info(f"Audit log created: {action} on {table_name}:{record_id} by user {user_id}")
-            return audit_log
+            logger.debug(f"Audit log queued: {action} on {table_name}:{record_id} by user {user_id}")
+            return queued
             
         except Exception as e:
             logger.error(f"Failed to log admin action: {str(e)}")
-            db.session.rollback()
-            return None
+            return False
     
     @staticmethod
     def log_user_management_action(
@@ -132,8 +126,9 @@ class AuditService:
         target_user_id: int,
         old_values: Optional[Dict[str, Any]] = None,
         new_values: Optional[Dict[str, Any]] = None
-    ) -> Optional[AuditLog]:
+    ) -> bool:
         """Log user/admin management actions"""
+        target_user = User.query.get(target_user_id)
         return AuditService.log_admin_action(
             action=action,
             table_name='user',
@@ -141,12 +136,12 @@ class AuditService:
             old_values=old_values,
             new_values=new_values,
             additional_info={
-                'target_username': User.query.get(target_user_id).username if User.query.get(target_user_id) else 'Unknown'
+                'target_username': target_user.username if target_user else 'Unknown'
             }
         )
     
     @staticmethod
-    def log_admin_creation(target_admin: User) -> Optional[AuditLog]:
+    def log_admin_creation(target_admin: User) -> bool:
         """Log admin account creation"""
         return AuditService.log_user_management_action(
             action=AuditService.ACTION_ADMIN_CREATE,
@@ -161,7 +156,7 @@ class AuditService:
         )
     
     @staticmethod
-    def log_admin_update(target_admin: User, old_values: Dict[str, Any]) -> Optional[AuditLog]:
+    def log_admin_update(target_admin: User, old_values: Dict[str, Any]) -> bool:
         """Log admin account modification"""
         new_values = {
             'username': target_admin.username,
@@ -178,7 +173,7 @@ class AuditService:
         )
     
     @staticmethod
-    def log_admin_deletion(target_admin: User) -> Optional[AuditLog]:
+    def log_admin_deletion(target_admin: User) -> bool:
         """Log admin account deletion"""
         return AuditService.log_user_management_action(
             action=AuditService.ACTION_ADMIN_DELETE,
@@ -191,7 +186,7 @@ class AuditService:
         )
     
     @staticmethod
-    def log_admin_level_change(target_admin: User, old_level: int, new_level: int) -> Optional[AuditLog]:
+    def log_admin_level_change(target_admin: User, old_level: int, new_level: int) -> bool:
         """Log admin level change"""
         return AuditService.log_user_management_action(
             action=AuditService.ACTION_ADMIN_LEVEL_CHANGE,
@@ -205,7 +200,7 @@ class AuditService:
         )
     
     @staticmethod
-    def log_permission_change(target_admin: User, old_permissions: Dict[str, Any], new_permissions: Dict[str, Any]) -> Optional[AuditLog]:
+    def log_permission_change(target_admin: User, old_permissions: Dict[str, Any], new_permissions: Dict[str, Any]) -> bool:
         """Log admin permission changes"""
         return AuditService.log_user_management_action(
             action=AuditService.ACTION_ADMIN_PERMISSION_CHANGE,
@@ -215,7 +210,7 @@ class AuditService:
         )
     
     @staticmethod
-    def log_admin_status_change(target_admin: User, is_active: bool) -> Optional[AuditLog]:
+    def log_admin_status_change(target_admin: User, is_active: bool) -> bool:
         """Log admin activation/deactivation"""
         action = AuditService.ACTION_ADMIN_ACTIVATE if is_active else AuditService.ACTION_ADMIN_DEACTIVATE
         return AuditService.log_user_management_action(
@@ -226,7 +221,7 @@ class AuditService:
         )
     
     @staticmethod
-    def log_system_config_change(config_key: str, old_value: Any, new_value: Any) -> Optional[AuditLog]:
+    def log_system_config_change(config_key: str, old_value: Any, new_value: Any) -> bool:
         """Log system configuration changes"""
         return AuditService.log_admin_action(
             action=AuditService.ACTION_SYSTEM_CONFIG_CHANGE,
@@ -238,7 +233,7 @@ class AuditService:
         )
     
     @staticmethod
-    def log_backup_operation(action: str, backup_file: str, success: bool) -> Optional[AuditLog]:
+    def log_backup_operation(action: str, backup_file: str, success: bool) -> bool:
         """Log backup/restore operations"""
         return AuditService.log_admin_action(
             action=action,
@@ -251,7 +246,7 @@ class AuditService:
         )
     
     @staticmethod
-    def log_database_operation(operation: str, details: Dict[str, Any]) -> Optional[AuditLog]:
+    def log_database_operation(operation: str, details: Dict[str, Any]) -> bool:
         """Log database operations (migrations, vacuum, etc.)"""
         return AuditService.log_admin_action(
             action=AuditService.ACTION_DATABASE_OPERATION,
@@ -264,7 +259,7 @@ class AuditService:
         )
     
     @staticmethod
-    def log_bulk_operation(action: str, table_name: str, affected_count: int, criteria: Dict[str, Any]) -> Optional[AuditLog]:
+    def log_bulk_operation(action: str, table_name: str, affected_count: int, criteria: Dict[str, Any]) -> bool:
         """Log bulk operations (bulk delete, bulk update, etc.)"""
         return AuditService.log_admin_action(
             action=action,
@@ -0,0 +1,208 @@
+"""
+Audit Writer Service
+Asynchronous, batched persistence of audit log records
+"""
+import atexit
+import json
+import logging
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_SENTINEL = object()
+
+
+def serialize_audit_values(values: Optional[Dict[str, Any]]) -> Optional[str]:
+    """Serialize audit values to JSON (Decimals, dates, etc. fall back to str)"""
+    if not values:
+        return None
+    return json.dumps(values, default=str)
+
+
+class AuditWriter:
+    """Queue audit rows in-process and insert them in batches on a background thread.
+
+    Writers enqueue plain dicts and return immediately; the writer thread
+    inserts them with a single multi-row INSERT on its own connection, so
+    audited requests no longer pay for (or piggyback on) a second commit of
+    the request session. Records still queued at shutdown are flushed.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.enabled = False
+        self.batch_size = 200
+        self.flush_interval = 1.0
+        self._queue: Optional[queue.Queue] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self.stats = {
+            'enqueued': 0,
+            'written': 0,
+            'failed': 0,
+            'batches': 0,
+            'sync_writes': 0,
+            'max_depth': 0,
+            'last_flush': None,
+            'last_batch_ms': None
+        }
+
+    def init_app(self, app):
+        """Configure from app config and start the writer thread"""
+        self.app = app
+        self.enabled = app.config.get('AUDIT_ASYNC_ENABLED', True)
+        self.batch_size = app.config.get('AUDIT_BATCH_SIZE', 200)
+        self.flush_interval = app.config.get('AUDIT_FLUSH_INTERVAL', 1.0)
+        self._queue = queue.Queue(maxsize=app.config.get('AUDIT_QUEUE_MAX_SIZE', 10000))
+
+        if self.enabled:
+            self.start()
+            atexit.register(self.shutdown)
+
+    def start(self):
+        """Start the background writer"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="AuditWriter")
+        self._thread.start()
+        logger.info(f"Audit writer started (batch size {self.batch_size}, interval {self.flush_interval}s)")
+
+    def is_running(self) -> bool:
+        """Check whether the writer thread is alive"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def enqueue(self, record: Dict[str, Any]) -> bool:
+        """Queue one audit row (AuditLog column -> value).
+
+        Falls back to a synchronous insert when the writer is not running or
+        the queue is full, so audit records are never silently dropped.
+        """
+        record.setdefault('timestamp', datetime.now(timezone.utc))
+
+        if not self.is_running() or self._stopping.is_set():
+            return self._write_sync([record])
+
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            logger.warning("Audit queue full, writing record synchronously")
+            return self._write_sync([record])
+
+        self.stats['enqueued'] += 1
+        depth = self._queue.qsize()
+        if depth > self.stats['max_depth']:
+            self.stats['max_depth'] = depth
+        return True
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Block until everything queued so far has been written"""
+        if not self.is_running():
+            return True
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return not self._queue.unfinished_tasks
+
+    def shutdown(self, timeout: float = 10.0):
+        """Stop the writer, persisting every queued record"""
+        if not self.is_running():
+            return
+        self._stopping.set()
+        try:
+            self._queue.put(_SENTINEL, timeout=timeout)
+        except queue.Full:
+            pass
+        self._thread.join(timeout=timeout)
+
+        # Anything left (writer timed out) is written on the calling thread
+        remaining = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _SENTINEL:
+                remaining.append(item)
+        if remaining:
+            self._write_sync(remaining)
+        logger.info("Audit writer stopped")
+
+    def _run(self):
+        """Drain the queue in batches of up to ``batch_size`` rows"""
+        while True:
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+
+            batch: List[Dict[str, Any]] = []
+            stop = first is _SENTINEL
+            if not stop:
+                batch.append(first)
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _SENTINEL:
+                    stop = True
+                    self._queue.task_done()
+                    continue
+                batch.append(item)
+
+            if batch:
+                self._write_batch(batch)
+            for _ in range(len(batch) + (1 if first is _SENTINEL else 0)):
+                self._queue.task_done()
+            if stop:
+                return
+
+    def _write_sync(self, rows: List[Dict[str, Any]]) -> bool:
+        self.stats['sync_writes'] += len(rows)
+        return self._write_batch(rows)
+
+    def _write_batch(self, rows: List[Dict[str, Any]]) -> bool:
+        """Insert rows with one executemany on a dedicated connection"""
+        from app import db
+        from app.models.audit import AuditLog
+
+        started = time.perf_counter()
+        try:
+            if self.app is not None:
+                with self.app.app_context():
+                    with db.engine.begin() as connection:
+                        connection.execute(AuditLog.__table__.insert(), rows)
+            else:
+                with db.engine.begin() as connection:
+                    connection.execute(AuditLog.__table__.insert(), rows)
+        except Exception as e:
+            self.stats['failed'] += len(rows)
+            logger.error(f"Failed to write {len(rows)} audit records: {e}")
+            return False
+
+        self.stats['written'] += len(rows)
+        self.stats['batches'] += 1
+        self.stats['last_batch_ms'] = round((time.perf_counter() - started) * 1000, 2)
+        self.stats['last_flush'] = datetime.now(timezone.utc).isoformat()
+        return True
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get queue depth and throughput metrics"""
+        return {
+            'enabled': self.enabled,
+            'running': self.is_running(),
+            'queue_depth': self._queue.qsize() if self._queue else 0,
+            'queue_capacity': self._queue.maxsize if self._queue else 0,
+            'batch_size': self.batch_size,
+            'flush_interval': self.flush_interval,
+            **self.stats
+        }
+
+
+# Global audit writer instance (initialized in app factory)
+audit_writer = AuditWriter()
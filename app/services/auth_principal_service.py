@@ -0,0 +1,360 @@
+"""
+Auth Principal Service
+Compact, cached request principals so authentication does not load the full User graph
+"""
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, FrozenSet, Optional, Tuple
+
+from flask import g, has_request_context
+
+logger = logging.getLogger(__name__)
+
+PRINCIPAL_KEY = 'auth:principal:{user_id}'
+VERSION_KEY = 'auth:principal_version:{user_id}'
+
+# Permissions denied to secondary admins (mirrors User.has_permission)
+SECONDARY_ADMIN_RESTRICTED = frozenset({'manage_main_admin', 'manage_hard_admin', 'system_config'})
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Immutable authenticated identity used as Flask-Login's ``current_user``.
+
+    Carries only the columns authorization needs. Any other attribute
+    (``email``, ``to_dict()``, ...) is resolved from the ORM ``User``, which
+    is loaded at most once per request and only when actually touched.
+    Writes must go through the ORM user (see ``load_user``).
+    """
+
+    id: int
+    username: str
+    role: Optional[str]
+    admin_level: Optional[int]
+    permissions: FrozenSet[str]
+    organization_id: Optional[int]
+    is_active: bool
+    version: int = 0
+
+    # Flask-Login interface
+    @property
+    def is_authenticated(self) -> bool:
+        return True
+
+    @property
+    def is_anonymous(self) -> bool:
+        return False
+
+    def get_id(self) -> str:
+        return str(self.id)
+
+    # Admin helpers (same semantics as the User model)
+    def is_hard_admin(self) -> bool:
+        return self.admin_level == 0
+
+    def is_main_admin(self) -> bool:
+        return self.admin_level == 1
+
+    def is_secondary_admin(self) -> bool:
+        return self.admin_level == 2
+
+    def is_sub_admin(self) -> bool:
+        return self.admin_level == 3
+
+    def is_any_admin(self) -> bool:
+        return self.admin_level in (0, 1, 2, 3)
+
+    def is_visible_admin(self) -> bool:
+        return self.admin_level in (1, 2, 3)
+
+    def can_manage_admin(self, target_admin_level) -> bool:
+        if self.admin_level == 0:
+            return True
+        elif self.admin_level == 1:
+            return target_admin_level in (1, 2, 3)
+        elif self.admin_level == 2:
+            return target_admin_level == 3
+        return False
+
+    def get_admin_title(self) -> str:
+        return {
+            0: "Hard Administrator",
+            1: "Main Administrator",
+            2: "Secondary Administrator",
+            3: "Sub Administrator",
+        }.get(self.admin_level, "User")
+
+    def get_permissions(self) -> Dict[str, bool]:
+        return {permission: True for permission in self.permissions}
+
+    def has_permission(self, permission: str) -> bool:
+        if self.admin_level in (0, 1):
+            return True
+        elif self.admin_level == 2:
+            return permission not in SECONDARY_ADMIN_RESTRICTED
+        return permission in self.permissions
+
+    def load_user(self):
+        """Load (once per request) the full ORM User behind this principal"""
+        from app.models.user import User
+
+        if not has_request_context():
+            return User.query.get(self.id)
+        loaded = g.get('_principal_users')
+        if loaded is None:
+            loaded = g._principal_users = {}
+        if self.id not in loaded:
+            loaded[self.id] = User.query.get(self.id)
+        return loaded[self.id]
+
+    def __getattr__(self, name: str) -> Any:
+        # Only reached for attributes the principal does not carry
+        if name.startswith('__'):
+            raise AttributeError(name)
+        user = self.load_user()
+        if user is None:
+            raise AttributeError(name)
+        return getattr(user, name)
+
+    def to_cache(self) -> str:
+        data = asdict(self)
+        data['permissions'] = sorted(self.permissions)
+        return json.dumps(data)
+
+    @classmethod
+    def from_cache(cls, raw: str) -> 'Principal':
+        data = json.loads(raw)
+        data['permissions'] = frozenset(data.get('permissions') or ())
+        return cls(**data)
+
+    def __repr__(self):
+        return f'<Principal {self.username}>'
+
+
+def _granted_permissions(admin_permissions: Optional[str]) -> FrozenSet[str]:
+    if not admin_permissions:
+        return frozenset()
+    try:
+        permissions = json.loads(admin_permissions)
+    except (TypeError, ValueError):
+        return frozenset()
+    if not isinstance(permissions, dict):
+        return frozenset()
+    return frozenset(name for name, granted in permissions.items() if granted)
+
+
+class PrincipalService:
+    """Resolve principals through an in-process L1 and a versioned Redis L2.
+
+    Each user has a version counter in Redis; a cached principal is valid
+    only while its version matches. Committing any change to a User row
+    bumps the counter, so every worker drops the stale entry on its next L2
+    check. L1 entries live for ``AUTH_PRINCIPAL_L1_TTL`` seconds, which
+    bounds cross-worker staleness without a Redis round trip per request.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.enabled = True
+        self.l1_ttl = 5.0
+        self.l1_max_size = 10000
+        self.redis_ttl = 3600
+        self._l1: 'OrderedDict[int, Tuple[Principal, float]]' = OrderedDict()
+        self._local_versions: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self._listeners_installed = False
+        self.stats = {
+            'l1_hits': 0,
+            'l2_hits': 0,
+            'db_loads': 0,
+            'invalidations': 0,
+            'errors': 0
+        }
+
+    def init_app(self, app):
+        """Configure cache sizes and register User change listeners"""
+        self.app = app
+        self.enabled = app.config.get('AUTH_PRINCIPAL_CACHE_ENABLED', True)
+        self.l1_ttl = app.config.get('AUTH_PRINCIPAL_L1_TTL', 5.0)
+        self.l1_max_size = app.config.get('AUTH_PRINCIPAL_L1_MAX_SIZE', 10000)
+        self.redis_ttl = app.config.get('AUTH_PRINCIPAL_REDIS_TTL', 3600)
+        self._install_listeners()
+
+    @property
+    def redis_client(self):
+        from app.services.redis_service import redis_service
+        if redis_service.connected and redis_service.redis_client:
+            return redis_service.redis_client
+        return None
+
+    def get(self, user_id) -> Optional[Principal]:
+        """Get the active principal for ``user_id`` (None if missing or inactive)"""
+        try:
+            user_id = int(user_id)
+        except (TypeError, ValueError):
+            return None
+
+        if not self.enabled:
+            return self._load(user_id, 0)
+
+        now = time.monotonic()
+        with self._lock:
+            cached = self._l1.get(user_id)
+            if cached and cached[1] > now:
+                self._l1.move_to_end(user_id)
+                self.stats['l1_hits'] += 1
+                return cached[0] if cached[0].is_active else None
+
+        principal = self._get_from_redis(user_id)
+        if principal is None:
+            return None
+        self._remember(principal)
+        return principal if principal.is_active else None
+
+    def from_user(self, user) -> Principal:
+        """Build (and cache) the principal for an already loaded User"""
+        principal = Principal(
+            id=user.id,
+            username=user.username,
+            role=user.role,
+            admin_level=user.admin_level,
+            permissions=_granted_permissions(user.admin_permissions),
+            organization_id=user.organization_id,
+            is_active=bool(user.is_active),
+            version=self._current_version(user.id)
+        )
+        if self.enabled:
+            self._remember(principal)
+        return principal
+
+    def invalidate(self, user_id: int):
+        """Bump the user's version so every worker reloads the principal"""
+        with self._lock:
+            self._l1.pop(user_id, None)
+            self._local_versions[user_id] = self._local_versions.get(user_id, 0) + 1
+        self.stats['invalidations'] += 1
+
+        client = self.redis_client
+        if client is None:
+            return
+        try:
+            pipe = client.pipeline(transaction=False)
+            pipe.incr(VERSION_KEY.format(user_id=user_id))
+            pipe.delete(PRINCIPAL_KEY.format(user_id=user_id))
+            pipe.execute()
+        except Exception as e:
+            self.stats['errors'] += 1
+            logger.warning(f"Failed to invalidate principal {user_id}: {e}")
+
+    def _get_from_redis(self, user_id: int) -> Optional[Principal]:
+        client = self.redis_client
+        if client is None:
+            return self._load(user_id, self._local_versions.get(user_id, 0))
+
+        try:
+            version, raw = client.mget(VERSION_KEY.format(user_id=user_id),
+                                       PRINCIPAL_KEY.format(user_id=user_id))
+            version = int(version or 0)
+            if raw:
+                principal = Principal.from_cache(raw)
+                if principal.version == version:
+                    self.stats['l2_hits'] += 1
+                    return principal
+        except Exception as e:
+            self.stats['errors'] += 1
+            logger.warning(f"Principal cache read failed for user {user_id}: {e}")
+            return self._load(user_id, 0)
+
+        principal = self._load(user_id, version)
+        if principal is not None:
+            try:
+                client.set(PRINCIPAL_KEY.format(user_id=user_id), principal.to_cache(), ex=self.redis_ttl)
+            except Exception as e:
+                self.stats['errors'] += 1
+                logger.warning(f"Principal cache write failed for user {user_id}: {e}")
+        return principal
+
+    def _load(self, user_id: int, version: int) -> Optional[Principal]:
+        """Load only the principal columns - no ORM identity, no relationships"""
+        from app import db
+        from app.models.user import User
+
+        self.stats['db_loads'] += 1
+        row = db.session.query(
+            User.id, User.username, User.role, User.admin_level,
+            User.admin_permissions, User.organization_id, User.is_active
+        ).filter(User.id == user_id).first()
+        if row is None:
+            return None
+        return Principal(
+            id=row.id,
+            username=row.username,
+            role=row.role,
+            admin_level=row.admin_level,
+            permissions=_granted_permissions(row.admin_permissions),
+            organization_id=row.organization_id,
+            is_active=bool(row.is_active),
+            version=version
+        )
+
+    def _current_version(self, user_id: int) -> int:
+        client = self.redis_client
+        if client is None:
+            return self._local_versions.get(user_id, 0)
+        try:
+            return int(client.get(VERSION_KEY.format(user_id=user_id)) or 0)
+        except Exception:
+            return 0
+
+    def _remember(self, principal: Principal):
+        with self._lock:
+            self._l1[principal.id] = (principal, time.monotonic() + self.l1_ttl)
+            self._l1.move_to_end(principal.id)
+            while len(self._l1) > self.l1_max_size:
+                self._l1.popitem(last=False)
+
+    def _install_listeners(self):
+        """Invalidate principals once changes to User rows are committed"""
+        if self._listeners_installed:
+            return
+        from sqlalchemy import event
+        from sqlalchemy.orm import Session
+        from app.models.user import User
+
+        def collect(session, flush_context):
+            changed = session.info.setdefault('principal_invalidations', set())
+            for obj in list(session.dirty) + list(session.deleted):
+                if isinstance(obj, User) and obj.id is not None:
+                    changed.add(obj.id)
+
+        def apply(session):
+            for user_id in session.info.pop('principal_invalidations', ()):
+                self.invalidate(user_id)
+
+        def discard(session):
+            session.info.pop('principal_invalidations', None)
+
+        event.listen(Session, 'after_flush', collect)
+        event.listen(Session, 'after_commit', apply)
+        event.listen(Session, 'after_rollback', discard)
+        self._listeners_installed = True
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache hit/miss counters"""
+        with self._lock:
+            l1_size = len(self._l1)
+        return {
+            'enabled': self.enabled,
+            'l1_size': l1_size,
+            'l1_ttl': self.l1_ttl,
+            'redis': self.redis_client is not None,
+            **self.stats
+        }
+
+
+# Global principal service instance (initialized in app factory)
+principal_service = PrincipalService()
@@ -95,6 +95,8 @@ class CacheInvalidationService:
         total_invalidated = 0
         for tag in tags:
             total_invalidated += self.invalidate_by_tag(tag)
+        # Keys tagged by other workers live in the shared tag sets
+        total_invalidated += cache_service.invalidate(tags=tags)
         return total_invalidated
     
     def invalidate_key(self, key: str):
@@ -190,7 +192,7 @@ def cached_with_tags(tags: List[str], ttl: int = 300):
             result = func(*args, **kwargs)
             
             # Store in cache with tags
-            cache_service.set(cache_key, result, ttl=ttl)
+            cache_service.set(cache_key, result, ttl=ttl, tags=tags)
             cache_invalidation_service.tag_cache_key(cache_key, tags)
             
             return result
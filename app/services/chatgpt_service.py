@@ -10,11 +10,13 @@ This service handles integration with OpenAI's ChatGPT API for:
 
 import os
 from typing import Optional, Dict, Any, List
-from openai import OpenAI
+from app.utils.lazy_loader import lazy_import
 from app.utils.unified_logger import get_logger
 
 logger = get_logger(__name__)
 
+openai = lazy_import('openai')
+
 
 class ChatGPTService:
     """Service for interacting with ChatGPT API"""
@@ -27,7 +29,7 @@ class ChatGPTService:
         self.temperature = float(os.getenv('CHATGPT_TEMPERATURE', '0.7'))
         
         if self.api_key:
-            self.client = OpenAI(api_key=self.api_key)
+            self.client = openai.OpenAI(api_key=self.api_key)
             logger.info(f"✅ ChatGPT service initialized with model: {self.model}")
         else:
             self.client = None
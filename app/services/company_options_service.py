@@ -6,6 +6,7 @@ from decimal import Decimal
 from typing import List, Dict, Any
 
 from app.models.transaction import Transaction
+from app.services.dimension_service import dimension_service
 from app.models.config import Option
 from app import db
 
@@ -21,13 +22,15 @@ class CompanyOptionsService:
     def get_companies_from_database() -> List[str]:
         """Get all unique companies from transaction database and option table"""
         try:
-            # Get distinct companies from transactions
-            company_results = db.session.query(Transaction.company).distinct().filter(
-                Transaction.company.isnot(None),
-                Transaction.company != ''
-            ).order_by(Transaction.company).all()
-            
-            transaction_companies = [result[0] for result in company_results]
+            # Get companies in use from the dimension table (DISTINCT over transactions until backfilled)
+            transaction_companies = dimension_service.names('company')
+            if transaction_companies is None:
+                company_results = db.session.query(Transaction.company).distinct().filter(
+                    Transaction.company.isnot(None),
+                    Transaction.company != ''
+                ).order_by(Transaction.company).all()
+                
+                transaction_companies = [result[0] for result in company_results]
             
             # Get companies from option table (for historical data)
             option_results = db.session.query(Option.value).filter(
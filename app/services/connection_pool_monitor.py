@@ -147,6 +147,11 @@ class ConnectionPoolMonitor:
                 "uptime_seconds": (datetime.now(timezone.utc) - self.start_time).total_seconds()
             }
             
+            # Checkout wait distribution (instrumented pools only)
+            from app.utils.connection_pool_optimizer import InstrumentedQueuePool, wait_histogram
+            if isinstance(self.pool, InstrumentedQueuePool):
+                stats["checkout_wait"] = wait_histogram(self.pool.histogram_name).snapshot()
+            
             # Add health checks
             stats["health"] = self._check_pool_health()
             
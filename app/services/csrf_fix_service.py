@@ -153,18 +153,8 @@ class CSRFFixService:
     
     def handle_csrf_error(self, error: Exception) -> Dict[str, Any]:
         """Handle CSRF errors gracefully - NEVER disable CSRF protection"""
-        import json
-        from datetime import datetime
-        
         self.error_count += 1
         
-        # #region agent log
-        try:
-            with open(r'c:\PipLinePro\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                f.write(json.dumps({"sessionId":"debug-session","runId":"runtime","hypothesisId":"B","location":"app/services/csrf_fix_service.py:156","message":"CSRF error handled","data":{"error_count":self.error_count,"max_errors":self.max_errors},"timestamp":int(datetime.now().timestamp()*1000)}) + '\n')
-        except: pass
-        # #endregion
-        
         # SECURITY: Never disable CSRF protection, even after many errors
         # Instead, log the issue and generate a new token
         if self.error_count > self.max_errors:
@@ -175,12 +165,6 @@ class CSRFFixService:
             )
             # Reset error count to prevent log spam, but keep CSRF enabled
             self.error_count = 0
-            # #region agent log
-            try:
-                with open(r'c:\PipLinePro\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                    f.write(json.dumps({"sessionId":"debug-session","runId":"runtime","hypothesisId":"B","location":"app/services/csrf_fix_service.py:170","message":"CSRF error count reset but protection remains enabled","data":{"error_count":self.error_count},"timestamp":int(datetime.now().timestamp()*1000)}) + '\n')
-            except: pass
-            # #endregion
         
         logger.warning(f"CSRF error handled: {str(error)}")
         result = {
@@ -188,27 +172,12 @@ class CSRFFixService:
             'token': self.generate_safe_csrf_token(),
             'disabled': False  # CSRF is always enabled
         }
-        # #region agent log
-        try:
-            with open(r'c:\PipLinePro\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                f.write(json.dumps({"sessionId":"debug-session","runId":"runtime","hypothesisId":"B","location":"app/services/csrf_fix_service.py:180","message":"CSRF error response","data":{"disabled":result['disabled']},"timestamp":int(datetime.now().timestamp()*1000)}) + '\n')
-        except: pass
-        # #endregion
         return result
     
     def is_csrf_enabled(self) -> bool:
         """Check if CSRF protection is enabled - always returns True"""
-        import json
-        from datetime import datetime
-        
         # SECURITY: CSRF protection is never disabled
         result = True
-        # #region agent log
-        try:
-            with open(r'c:\PipLinePro\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                f.write(json.dumps({"sessionId":"debug-session","runId":"runtime","hypothesisId":"B","location":"app/services/csrf_fix_service.py:177","message":"CSRF enabled check","data":{"is_enabled":result},"timestamp":int(datetime.now().timestamp()*1000)}) + '\n')
-        except: pass
-        # #endregion
         return result
     
     def reset_error_count(self):
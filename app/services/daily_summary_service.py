@@ -0,0 +1,335 @@
+"""
+Daily Summary Service
+Per-date, per-PSP and per-currency transaction totals computed with grouped SQL
+"""
+import logging
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List
+
+from sqlalchemy import and_, case, func, literal_column
+
+from app import db
+from app.models.config import ExchangeRate, Option
+from app.models.transaction import Transaction
+
+# Decimal/Float type mismatch prevention
+from app.services.decimal_float_fix_service import decimal_float_service
+
+logger = logging.getLogger(__name__)
+
+MAX_DAYS = 100  # Enough for a calendar quarter in one request
+WITHDRAWAL_CATEGORIES = ('WD', 'WITHDRAW', 'WITHDRAWAL')
+PAYMENT_METHOD_GROUPS = ('BANK', 'CC', 'TETHER')
+DEFAULT_USD_RATE = Decimal('42.0')  # Used when no rate is known for a date
+DEFAULT_COMMISSION_RATE = Decimal('0.025')  # DEP commission when the PSP has no rate
+
+SUMMARY_COLUMNS = (
+    'transaction_count',
+    'total_deposits_tl', 'total_withdrawals_tl', 'total_deposits_usd', 'total_withdrawals_usd',
+    'total_commission_tl', 'total_commission_usd', 'gross_balance_tl', 'gross_balance_usd',
+    'total_net_tl', 'total_net_usd', 'exchange_rate'
+)
+
+
+def normalize_payment_method(payment_method):
+    """Normalize payment method to standard categories: BANK, CC, TETHER, or OTHER"""
+    if not payment_method:
+        return 'OTHER'
+
+    pm_str = str(payment_method).strip()
+    if not pm_str:
+        return 'OTHER'
+
+    pm_lower = pm_str.lower()
+
+    # Bank variations (includes IBAN transfers)
+    if any(keyword in pm_lower for keyword in ['bank', 'banka', 'havale', 'eft', 'wire', 'transfer', 'iban']):
+        return 'BANK'
+
+    # Credit card variations
+    if any(keyword in pm_lower for keyword in ['kk', 'credit', 'card', 'kredi', 'visa', 'mastercard', 'amex']):
+        return 'CC'
+
+    # Tether variations
+    if any(keyword in pm_lower for keyword in ['tether', 'usdt', 'crypto', 'kasa']):
+        return 'TETHER'
+
+    return 'OTHER'
+
+
+def _zero():
+    return Decimal('0')
+
+
+class DailySummaryService:
+    """Daily treasury summaries for many dates at once.
+
+    All totals come from one grouped query over (date, PSP, currency,
+    payment method, category kind, sign); the handful of resulting groups
+    are folded into per-date summaries in Python. USD rates for the whole
+    range are resolved up front: the first USD transaction of the day, then
+    the KASA.xlsx daily rates, then the ``exchange_rate`` table.
+    """
+
+    @staticmethod
+    def date_range(start: date, end: date) -> List[date]:
+        return [start + timedelta(days=offset) for offset in range((end - start).days + 1)]
+
+    @staticmethod
+    def _date_filter(column, dates: List[date]):
+        """BETWEEN for a contiguous range, IN for scattered dates"""
+        first, last = min(dates), max(dates)
+        if (last - first).days + 1 == len(set(dates)):
+            return column.between(first, last)
+        return column.in_(dates)
+
+    @classmethod
+    def resolve_usd_rates(cls, dates: List[date]) -> Dict[date, Decimal]:
+        """USD/TRY rate per date, resolved with one query per source"""
+        t = Transaction
+        rates: Dict[date, Decimal] = {}
+
+        # Source 1: the first USD transaction with a valid rate on each date
+        first_usd = db.session.query(
+            t.date.label('date'), func.min(t.id).label('id')
+        ).filter(
+            cls._date_filter(t.date, dates),
+            func.upper(t.currency) == 'USD',
+            t.exchange_rate > 1
+        ).group_by(t.date).subquery()
+        for day, rate in db.session.query(t.date, t.exchange_rate).join(first_usd, t.id == first_usd.c.id):
+            rates[day] = decimal_float_service.safe_decimal(rate)
+
+        # Source 2: the daily KUR rates from KASA.xlsx
+        from app.services.excel_import_service import ExcelImportService
+        for day in dates:
+            if day not in rates:
+                kur_rate = ExcelImportService.DAILY_KUR_RATES.get(day.isoformat())
+                if kur_rate is not None:
+                    rates[day] = kur_rate
+
+        # Source 3: the exchange_rate table
+        missing = [day for day in dates if day not in rates]
+        if missing:
+            for day, usd_to_tl in db.session.query(ExchangeRate.date, ExchangeRate.usd_to_tl).filter(
+                    cls._date_filter(ExchangeRate.date, missing)):
+                if usd_to_tl:
+                    rates.setdefault(day, decimal_float_service.safe_decimal(usd_to_tl))
+
+        for day in dates:
+            rates.setdefault(day, DEFAULT_USD_RATE)
+        return rates
+
+    @staticmethod
+    def _psp_commission_rates() -> Dict[str, Decimal]:
+        rates = {}
+        for value, commission_rate in db.session.query(Option.value, Option.commission_rate).filter(
+                Option.field_name == 'psp', Option.is_active == True).order_by(Option.id):
+            if value not in rates and commission_rate is not None:
+                rates[value] = decimal_float_service.safe_decimal(commission_rate)
+        return rates
+
+    @classmethod
+    def _grouped_totals(cls, dates: List[date]):
+        """One row per (date, psp, currency, payment method, category kind, sign)"""
+        t = Transaction
+        currency = func.upper(func.coalesce(t.currency, ''))
+        category = func.upper(func.coalesce(t.category, ''))
+        # W: withdrawal category, N: no category, D: anything else (deposit)
+        kind = case((category.in_(WITHDRAWAL_CATEGORIES), 'W'), (category == '', 'N'), else_='D')
+        negative = case((t.amount < 0, 1), else_=0)
+        commission = func.coalesce(t.commission, 0)
+        amount_try = func.coalesce(t.amount_try, 0)
+        fx_rate = func.coalesce(t.exchange_rate, 0)
+
+        return db.session.query(
+            t.date.label('date'),
+            t.psp.label('psp'),
+            currency.label('currency'),
+            t.payment_method.label('payment_method'),
+            kind.label('kind'),
+            negative.label('negative'),
+            func.count(t.id).label('count'),
+            func.sum(t.amount).label('amount'),
+            func.sum(func.abs(t.amount)).label('abs_amount'),
+            func.sum(commission).label('commission'),
+            func.sum(func.coalesce(t.net_amount, 0)).label('net_amount'),
+            # Base for commissions that were never filled in
+            func.sum(case((commission == 0, func.abs(t.amount)), else_=0)).label('uncommissioned'),
+            # Gross TL inputs for the payment method totals
+            func.sum(case((amount_try != 0, func.abs(amount_try)), else_=0)).label('amount_try'),
+            func.sum(case((amount_try == 0, t.amount), else_=0)).label('amount_no_try'),
+            func.sum(case((and_(amount_try == 0, fx_rate != 0), t.amount * fx_rate), else_=0)).label('converted_no_try'),
+            func.sum(case((and_(amount_try == 0, fx_rate == 0), t.amount), else_=0)).label('unconverted_no_try'),
+        ).filter(
+            cls._date_filter(t.date, dates)
+        ).group_by(
+            # By position: the CASE expressions carry bound parameters, and
+            # PostgreSQL would not match them against the select list
+            *[literal_column(str(position)) for position in range(1, 7)]
+        ).all()
+
+    @classmethod
+    def summarize(cls, dates: Iterable[date]) -> Dict[str, Any]:
+        """
+        Compute summaries for ``dates``
+
+        Returns:
+            {'dates': [...], 'days': {date: summary}, 'psp': {(date, psp, currency): totals}}
+            with Decimal values
+        """
+        dates = sorted(set(dates))
+        if not dates:
+            return {'dates': [], 'days': {}, 'psp': {}}
+        if len(dates) > MAX_DAYS:
+            raise ValueError(f"Too many dates requested (max {MAX_DAYS})")
+
+        usd_rates = cls.resolve_usd_rates(dates)
+        psp_rates = cls._psp_commission_rates()
+        safe = decimal_float_service.safe_decimal
+
+        days = {}
+        for day in dates:
+            days[day] = {
+                'transaction_count': 0,
+                **{column: _zero() for column in SUMMARY_COLUMNS[1:-1]},
+                'exchange_rate': usd_rates[day],
+                'payment_method_totals': {
+                    method: {'amount_tl': _zero(), 'amount_usd': _zero(), 'count': 0}
+                    for method in PAYMENT_METHOD_GROUPS
+                }
+            }
+        psp_totals = defaultdict(lambda: {'deposits': _zero(), 'withdrawals': _zero(), 'commission': _zero(), 'count': 0})
+
+        for row in cls._grouped_totals(dates):
+            summary = days.get(row.date)
+            if summary is None:
+                continue
+            usd_rate = summary['exchange_rate']
+            is_usd = row.currency == 'USD'
+            is_withdrawal = row.kind == 'W' or bool(row.negative)
+            amount, abs_amount = safe(row.amount), safe(row.abs_amount)
+            net_amount = safe(row.net_amount)
+            commission = safe(row.commission)
+            if row.kind == 'D':
+                commission += safe(row.uncommissioned) * psp_rates.get(row.psp, DEFAULT_COMMISSION_RATE)
+
+            summary['transaction_count'] += row.count
+            if is_usd:
+                if is_withdrawal:
+                    summary['total_withdrawals_usd'] += abs_amount
+                else:
+                    summary['total_deposits_usd'] += amount
+                summary['total_commission_usd'] += commission
+                summary['total_net_usd'] += net_amount
+            else:
+                if is_withdrawal:
+                    summary['total_withdrawals_tl'] += abs_amount
+                    summary['total_net_tl'] -= net_amount
+                else:
+                    summary['total_deposits_tl'] += amount
+                    summary['total_net_tl'] += net_amount
+                summary['total_commission_tl'] += commission
+
+            psp = psp_totals[(row.date, row.psp or '', 'USD' if is_usd else 'TL')]
+            if is_withdrawal:
+                psp['withdrawals'] += abs_amount
+            else:
+                psp['deposits'] += amount
+            psp['commission'] += commission
+            psp['count'] += row.count
+
+            # Payment method totals only count deposits, at GROSS amounts
+            method = normalize_payment_method(row.payment_method)
+            if is_withdrawal or method not in PAYMENT_METHOD_GROUPS:
+                continue
+            totals = summary['payment_method_totals'][method]
+            if method == 'TETHER':
+                # TETHER always uses USD
+                totals['amount_usd'] += abs_amount if is_usd else abs(amount / usd_rate)
+            elif is_usd:
+                totals['amount_tl'] += (safe(row.amount_try) + abs(safe(row.converted_no_try))
+                                        + abs(safe(row.unconverted_no_try) * usd_rate))
+                totals['amount_usd'] += abs_amount
+            else:
+                amount_tl = safe(row.amount_try) + abs(safe(row.amount_no_try))
+                totals['amount_tl'] += amount_tl
+                totals['amount_usd'] += abs(amount_tl / usd_rate)
+            totals['count'] += row.count
+
+        # USD-first gross balance: USD gross = TRY net / rate + USD net; TRY gross = USD gross * rate
+        for summary in days.values():
+            usd_rate = summary['exchange_rate']
+            try_net = summary['total_deposits_tl'] - summary['total_withdrawals_tl']
+            usd_net = summary['total_deposits_usd'] - summary['total_withdrawals_usd']
+            summary['gross_balance_usd'] = decimal_float_service.safe_divide(try_net, usd_rate, 'decimal') + usd_net
+            summary['gross_balance_tl'] = decimal_float_service.safe_multiply(summary['gross_balance_usd'], usd_rate, 'decimal')
+
+        return {'dates': dates, 'days': days, 'psp': dict(psp_totals)}
+
+    @staticmethod
+    def to_summaries(result: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        """Per-date dicts in the shape of /api/summary/<date>"""
+        summaries = {}
+        for day in result['dates']:
+            summary = result['days'][day]
+            date_str = day.isoformat()
+            summaries[date_str] = {
+                'date': date_str,
+                'transaction_count': summary['transaction_count'],
+                **{column: float(summary[column]) for column in SUMMARY_COLUMNS[1:]},
+                'payment_method_totals': {
+                    method: {
+                        'amount_tl': float(totals['amount_tl']),
+                        'amount_usd': float(totals['amount_usd']),
+                        'count': totals['count']
+                    }
+                    for method, totals in summary['payment_method_totals'].items()
+                }
+            }
+        return summaries
+
+    @staticmethod
+    def to_columnar(result: Dict[str, Any], precision: int = 2) -> Dict[str, Any]:
+        """Column arrays indexed by date position; PSP names are dictionary-encoded"""
+        dates = result['dates']
+        days = result['days']
+        index = {day: position for position, day in enumerate(dates)}
+        columns: Dict[str, List[Any]] = {'date': [day.isoformat() for day in dates]}
+        for column in SUMMARY_COLUMNS:
+            values = [days[day][column] for day in dates]
+            columns[column] = values if column == 'transaction_count' else [round(float(v), precision) for v in values]
+        for method in PAYMENT_METHOD_GROUPS:
+            key = method.lower()
+            totals = [days[day]['payment_method_totals'][method] for day in dates]
+            columns[f'{key}_amount_tl'] = [round(float(t['amount_tl']), precision) for t in totals]
+            columns[f'{key}_amount_usd'] = [round(float(t['amount_usd']), precision) for t in totals]
+            columns[f'{key}_count'] = [t['count'] for t in totals]
+
+        psp_names: List[str] = []
+        psp_ids: Dict[str, int] = {}
+        psp_columns: Dict[str, List[Any]] = {
+            'date_index': [], 'psp': [], 'currency': [], 'deposits': [], 'withdrawals': [], 'commission': [], 'count': []
+        }
+        for (day, psp, currency), totals in sorted(result['psp'].items()):
+            if psp not in psp_ids:
+                psp_ids[psp] = len(psp_names)
+                psp_names.append(psp)
+            psp_columns['date_index'].append(index[day])
+            psp_columns['psp'].append(psp_ids[psp])
+            psp_columns['currency'].append(currency)
+            psp_columns['deposits'].append(round(float(totals['deposits']), precision))
+            psp_columns['withdrawals'].append(round(float(totals['withdrawals']), precision))
+            psp_columns['commission'].append(round(float(totals['commission']), precision))
+            psp_columns['count'].append(totals['count'])
+
+        return {
+            'columns': columns,
+            'psp_names': psp_names,
+            'psp': psp_columns
+        }
+
+
+daily_summary_service = DailySummaryService()
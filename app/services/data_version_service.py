@@ -0,0 +1,323 @@
+"""
+Data Version Service
+Monotonic per (organization, domain, month) version counters for conditional responses
+"""
+import hashlib
+import logging
+import threading
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = 'dataver:{domain}:{org}:{scope}'
+LSN_KEY = 'dataver:lsn:{domain}'  # Highest primary WAL position bumped into the domain
+ALL_ORGS = 'all'
+WHOLE_HISTORY = '*'
+RESET = 'reset'  # Bumped by writes whose month is unknown (bulk UPDATE/DELETE, rows without a date)
+
+# Table -> (domain, date column used for the month). Every endpoint that
+# reads one of these tables must list its domain when it uses ETags.
+TABLE_DOMAINS: Dict[str, Tuple[str, Optional[str]]] = {
+    'transactions': ('transactions', 'date'),
+    'psp_allocation': ('allocations', 'date'),
+    'psp_devir': ('devir', 'date'),
+    'psp_kasa_top': ('kasa_top', 'date'),
+    'expenses': ('expenses', 'payment_date'),
+    'expense_budgets': ('expenses', None),
+    'exchange_rate': ('rates', 'date'),
+    'exchange_rates': ('rates', 'date'),
+    'options': ('psp_config', None),
+    'psp_commission_rates': ('psp_config', None),
+}
+
+Change = Tuple[Any, str, Optional[str]]  # (organization id or ALL_ORGS, domain, 'YYYY-MM' or None)
+
+# SET key to ARGV[1] unless it already holds a higher position
+_MAX_LSN_SCRIPT = """
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+if tonumber(ARGV[1]) > current then redis.call('SET', KEYS[1], ARGV[1]) end
+"""
+
+
+def request_version_tag() -> str:
+    """The data-version ETag of the current request ('' when there is none)
+
+    Result caches include it in their keys so a cached result computed
+    before a write is never served under the new version's ETag.
+    """
+    from flask import g, has_request_context
+    if has_request_context():
+        return getattr(g, 'data_version_etag', '')
+    return ''
+
+
+def month_key(value) -> Optional[str]:
+    if isinstance(value, (date, datetime)):
+        return f"{value.year:04d}-{value.month:02d}"
+    return None
+
+
+class DataVersionService:
+    """Track when treasury data changes so unchanged responses can be 304s.
+
+    Committed writes to the tables in ``TABLE_DOMAINS`` bump Redis counters
+    for the row's organization and month, and for the domain as a whole.
+    An endpoint's ETag is derived from the counters it depends on, so it can
+    answer ``If-None-Match`` with a 304 after one MGET and before running
+    any query.
+
+    Counters only live in Redis: per-process counters would let one worker
+    confirm data another worker just changed, so without Redis no ETags are
+    issued.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.enabled = True
+        self.salt = ''
+        self._listeners_installed = False
+        self._lock = threading.Lock()
+        self.stats = {
+            'bumps': 0,
+            'not_modified': 0,
+            'computed': 0,
+            'unversioned': 0,
+            'errors': 0
+        }
+
+    def init_app(self, app):
+        """Read settings and register the write listeners"""
+        self.app = app
+        self.enabled = app.config.get('DATA_VERSION_ETAGS_ENABLED', True)
+        # Changing the salt (e.g. per deploy) invalidates every ETag at once
+        self.salt = str(app.config.get('DATA_VERSION_SALT', ''))
+        if self.enabled:
+            self._install_listeners()
+
+    @property
+    def redis_client(self):
+        from app.services.redis_service import redis_service
+        if redis_service.connected and redis_service.redis_client:
+            return redis_service.redis_client
+        return None
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _keys_for_change(org, domain: str, month: Optional[str]) -> List[str]:
+        keys = {VERSION_KEY.format(domain=domain, org=ALL_ORGS, scope=WHOLE_HISTORY)}
+        if org != ALL_ORGS:
+            keys.add(VERSION_KEY.format(domain=domain, org=org, scope=WHOLE_HISTORY))
+        if month is None:
+            keys.add(VERSION_KEY.format(domain=domain, org=ALL_ORGS, scope=RESET))
+        else:
+            keys.add(VERSION_KEY.format(domain=domain, org=ALL_ORGS, scope=month))
+            if org != ALL_ORGS:
+                keys.add(VERSION_KEY.format(domain=domain, org=org, scope=month))
+        return sorted(keys)
+
+    def queue_bump(self, pipe, changes: Iterable[Change]) -> int:
+        """Add the counter increments for committed changes to a caller's pipeline
+
+        With a read replica, the primary's WAL position is stored per domain
+        too, so replica reads for a versioned response can wait until the
+        replica has the data the new versions describe.
+        """
+        keys = set()
+        domains = set()
+        for org, domain, month in changes:
+            keys.update(self._keys_for_change(org, domain, month))
+            domains.add(domain)
+        if not keys:
+            return 0
+        from app.utils.db_routing import replica_router
+        lsn = replica_router.primary_lsn()
+        if lsn is not None:
+            for domain in domains:
+                pipe.eval(_MAX_LSN_SCRIPT, 1, LSN_KEY.format(domain=domain), lsn)
+        for key in keys:
+            pipe.incr(key)
+        return len(keys)
+
+    def record_bumps(self, count: int = 0, failed: bool = False):
+        with self._lock:
+            self.stats['errors' if failed else 'bumps'] += 1 if failed else count
+
+    def bump(self, changes: Iterable[Change]):
+        """Advance the counters for committed changes"""
+        client = self.redis_client
+        if client is None:
+            return
+        try:
+            pipe = client.pipeline(transaction=False)
+            count = self.queue_bump(pipe, changes)
+            if not count:
+                return
+            pipe.execute()
+            self.record_bumps(count)
+        except Exception as e:
+            self.record_bumps(failed=True)
+            logger.warning(f"Failed to bump data versions: {e}")
+
+    def bump_domain(self, *domains: str):
+        """Mark whole domains as changed (raw SQL writes, imports, restores)"""
+        self.bump((ALL_ORGS, domain, None) for domain in domains)
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def versions(self, org, domains: Iterable[str], months: Optional[Iterable[str]] = None,
+                 whole_history: Iterable[str] = ()) -> Optional[List[int]]:
+        """Current counters for ``domains`` (None when versions are unavailable)
+
+        Domains in ``whole_history`` (or all of them when ``months`` is None)
+        use the domain-wide counter; the rest use one counter per month.
+        Org-scoped reads also include the ``ALL_ORGS`` counters, since
+        writes without an organization (rates, options) only bump those.
+        """
+        result = self._read(org, domains, months, whole_history)
+        return result[0] if result is not None else None
+
+    def _read(self, org, domains: Iterable[str], months: Optional[Iterable[str]] = None,
+              whole_history: Iterable[str] = ()) -> Optional[Tuple[List[int], int]]:
+        """Counters for ``domains`` and the highest WAL position bumped into them"""
+        if not self.enabled:
+            return None
+        client = self.redis_client
+        if client is None:
+            with self._lock:
+                self.stats['unversioned'] += 1
+            return None
+
+        org = org if org is not None else ALL_ORGS
+        orgs = [ALL_ORGS] if org == ALL_ORGS else [org, ALL_ORGS]
+        whole_history = set(whole_history)
+        month_list = sorted(set(months)) if months is not None else None
+        keys = []
+        domain_list = sorted(set(domains))
+        for domain in domain_list:
+            keys.append(VERSION_KEY.format(domain=domain, org=ALL_ORGS, scope=RESET))
+            scopes = [WHOLE_HISTORY] if month_list is None or domain in whole_history else month_list
+            keys.extend(VERSION_KEY.format(domain=domain, org=scope_org, scope=scope)
+                        for scope in scopes for scope_org in orgs)
+        lsn_keys = [LSN_KEY.format(domain=domain) for domain in domain_list]
+        try:
+            values = client.mget(keys + lsn_keys)
+            versions = [int(value or 0) for value in values[:len(keys)]]
+            lsn = max((int(value or 0) for value in values[len(keys):]), default=0)
+            return versions, lsn
+        except Exception as e:
+            with self._lock:
+                self.stats['errors'] += 1
+            logger.warning(f"Failed to read data versions: {e}")
+            return None
+
+    def etag(self, variant: str, org, domains: Iterable[str], months: Optional[Iterable[str]] = None,
+             whole_history: Iterable[str] = ()) -> Optional[str]:
+        """ETag for a response variant (endpoint, arguments, viewer) at the current versions
+
+        In a request, the WAL position behind those versions is kept in
+        ``g.data_version_lsn`` for the replica router.
+        """
+        result = self._read(org, domains, months, whole_history)
+        if result is None:
+            return None
+        versions, lsn = result
+        from flask import g, has_request_context
+        if has_request_context():
+            g.data_version_lsn = lsn
+        digest = hashlib.sha1(f"{self.salt}|{variant}|{versions}".encode('utf-8')).hexdigest()
+        return f"dv-{digest[:24]}"
+
+    def record(self, not_modified: bool):
+        with self._lock:
+            self.stats['not_modified' if not_modified else 'computed'] += 1
+
+    # ------------------------------------------------------------------
+    # Write tracking
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _object_changes(obj, deleted: bool = False) -> Set[Change]:
+        from sqlalchemy import inspect as sa_inspect
+
+        table = getattr(obj, '__tablename__', None)
+        mapping = TABLE_DOMAINS.get(table)
+        if mapping is None:
+            return set()
+        domain, date_column = mapping
+        org = getattr(obj, 'organization_id', None)
+        org = org if org is not None else ALL_ORGS
+        if date_column is None:
+            return {(org, domain, None)}
+
+        months = {month_key(getattr(obj, date_column, None))}
+        if not deleted:
+            # Moving a row to another month changes both months
+            try:
+                history = sa_inspect(obj).attrs[date_column].history
+                months.update(month_key(value) for value in history.deleted or ())
+            except Exception:
+                pass
+        return {(org, domain, month) for month in months}
+
+    def _install_listeners(self):
+        """Bump versions once changes to tracked tables are committed"""
+        if self._listeners_installed:
+            return
+        from sqlalchemy import event
+        from sqlalchemy.orm import Session
+
+        def collect(session, flush_context):
+            changes = session.info.setdefault('data_version_changes', set())
+            for obj in session.new:
+                changes.update(self._object_changes(obj))
+            for obj in session.dirty:
+                if session.is_modified(obj, include_collections=False):
+                    changes.update(self._object_changes(obj))
+            for obj in session.deleted:
+                changes.update(self._object_changes(obj, deleted=True))
+
+        def collect_bulk(orm_execute_state):
+            # Query.update()/delete() and Core inserts bypass the unit of work
+            if not (orm_execute_state.is_update or orm_execute_state.is_delete or
+                    getattr(orm_execute_state, 'is_insert', False)):
+                return
+            table = getattr(orm_execute_state.statement, 'table', None)
+            mapping = TABLE_DOMAINS.get(getattr(table, 'name', None))
+            if mapping is not None:
+                orm_execute_state.session.info.setdefault('data_version_changes', set()).add(
+                    (ALL_ORGS, mapping[0], None))
+
+        def apply(session):
+            changes = session.info.pop('data_version_changes', None)
+            if changes:
+                self.bump(changes)
+
+        def discard(session):
+            session.info.pop('data_version_changes', None)
+
+        event.listen(Session, 'after_flush', collect)
+        event.listen(Session, 'do_orm_execute', collect_bulk)
+        event.listen(Session, 'after_commit', apply)
+        event.listen(Session, 'after_rollback', discard)
+        self._listeners_installed = True
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+        answered = stats['not_modified'] + stats['computed']
+        return {
+            'enabled': self.enabled,
+            'redis': self.redis_client is not None,
+            'not_modified_ratio': round(stats['not_modified'] / answered, 3) if answered else 0.0,
+            **stats
+        }
+
+
+# Global data version service instance (initialized in app factory)
+data_version_service = DataVersionService()
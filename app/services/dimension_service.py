@@ -0,0 +1,328 @@
+"""
+Dimension Service
+Dual-writes dimension keys for transactions and serves dimension-backed dropdowns and aggregates
+"""
+import logging
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Dimension kind -> (model class name, Transaction string column, Transaction key column)
+DIMENSIONS = {
+    'psp': ('PspDimension', 'psp', 'psp_id'),
+    'client': ('ClientDimension', 'client_name', 'client_id'),
+    'company': ('CompanyDimension', 'company', 'company_id'),
+    'payment_method': ('PaymentMethodDimension', 'payment_method', 'payment_method_id'),
+}
+
+
+def _clean(value) -> Optional[str]:
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+class DimensionService:
+    """Keep ``transactions`` dimension keys in step with their string columns.
+
+    Every flushed Transaction gets ``psp_id``, ``client_id``, ``company_id``
+    and ``payment_method_id`` resolved from the dimension tables, inserting
+    unseen names on the way (``INSERT ... ON CONFLICT DO NOTHING``, so
+    concurrent writers agree on one id). The string columns are still
+    written, so readers can move over one query at a time.
+
+    Readers only use the integer keys once a dimension is *ready*: no
+    transaction has a name without its key (run
+    ``scripts/backfill_dimensions.py`` once after the migration).
+    """
+
+    def __init__(self):
+        self.app = None
+        self.enabled = True
+        self.reads_enabled = True
+        self.ready_ttl = 600
+        self._ids: Dict[str, Dict[str, int]] = {kind: {} for kind in DIMENSIONS}
+        self._ready: Dict[str, float] = {}
+        self._listeners_installed = False
+        self._lock = threading.Lock()
+        self.stats = {
+            'resolved': 0,
+            'cache_hits': 0,
+            'inserted': 0,
+            'errors': 0
+        }
+
+    def init_app(self, app):
+        """Read settings and register the dual-write listeners"""
+        self.app = app
+        self.enabled = app.config.get('DIMENSION_DUAL_WRITE_ENABLED', True)
+        self.reads_enabled = app.config.get('DIMENSION_READS_ENABLED', True)
+        self.ready_ttl = app.config.get('DIMENSION_READY_CHECK_TTL', 600)
+        if self.enabled:
+            self._install_listeners()
+
+    @staticmethod
+    def model(kind: str):
+        import app.models.dimension as dimension_models
+        return getattr(dimension_models, DIMENSIONS[kind][0])
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def resolve(self, session, kind: str, names: Iterable[str]) -> Dict[str, int]:
+        """Dimension ids for ``names``, inserting the ones that do not exist yet
+
+        Runs on ``session``'s connection, so new rows commit or roll back
+        with the caller's transaction. Ids only enter the process cache
+        after that commit.
+        """
+        from sqlalchemy import select
+
+        wanted = {name for name in (_clean(n) for n in names) if name}
+        if not wanted:
+            return {}
+        pending = session.info.setdefault('dimension_ids', {}).setdefault(kind, {})
+        known = self._ids[kind]
+        found = {name: known.get(name) or pending.get(name) for name in wanted}
+        missing = sorted(name for name, dim_id in found.items() if dim_id is None)
+        self.stats['cache_hits'] += len(wanted) - len(missing)
+        if not missing:
+            return found
+
+        model = self.model(kind)
+        table = model.__table__
+        rows = session.execute(select(table.c.name, table.c.id).where(table.c.name.in_(missing))).all()
+        existing = {name: dim_id for name, dim_id in rows}
+        new_names = [name for name in missing if name not in existing]
+        if new_names:
+            session.execute(self._insert_ignore(session, table), [{'name': name} for name in new_names])
+            rows = session.execute(select(table.c.name, table.c.id).where(table.c.name.in_(new_names))).all()
+            existing.update({name: dim_id for name, dim_id in rows})
+            self.stats['inserted'] += len(new_names)
+
+        pending.update(existing)
+        found.update(existing)
+        self.stats['resolved'] += len(missing)
+        return found
+
+    @staticmethod
+    def _insert_ignore(session, table):
+        dialect = session.get_bind().dialect.name
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+            return insert(table).on_conflict_do_nothing(index_elements=['name'])
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+            return insert(table).on_conflict_do_nothing(index_elements=['name'])
+        return table.insert().prefix_with('IGNORE')
+
+    def assign(self, session, transactions: Iterable[Any], only_changed: bool = False):
+        """Set the dimension keys of ``transactions`` from their string columns
+
+        Called from the flush listener; bulk paths that bypass the unit of
+        work (``bulk_save_objects``) call it themselves before saving.
+        """
+        from sqlalchemy import inspect as sa_inspect
+
+        transactions = list(transactions)
+        if not transactions:
+            return
+        for kind, (_, column, key_column) in DIMENSIONS.items():
+            targets = []
+            for obj in transactions:
+                if only_changed:
+                    state = sa_inspect(obj)
+                    unkeyed = getattr(obj, key_column) is None and _clean(getattr(obj, column))
+                    if not state.pending and not unkeyed and not state.attrs[column].history.has_changes():
+                        continue
+                targets.append(obj)
+            if not targets:
+                continue
+            ids = self.resolve(session, kind, (getattr(obj, column) for obj in targets))
+            for obj in targets:
+                setattr(obj, key_column, ids.get(_clean(getattr(obj, column))))
+
+    def _install_listeners(self):
+        """Resolve keys before each flush; publish new ids once committed"""
+        if self._listeners_installed:
+            return
+        from sqlalchemy import event
+        from sqlalchemy.orm import Session
+
+        def before_flush(session, flush_context, instances):
+            from app.models.transaction import Transaction
+            changed = [obj for obj in list(session.new) + list(session.dirty) if isinstance(obj, Transaction)]
+            if not changed:
+                return
+            key_columns = [key_column for _, _, key_column in DIMENSIONS.values()]
+            keys_before = [(obj, [getattr(obj, key) for key in key_columns]) for obj in changed]
+            ids_before = {kind: dict(ids) for kind, ids in session.info.get('dimension_ids', {}).items()}
+            # A failed statement aborts a PostgreSQL transaction, so run inside a
+            # savepoint. It is taken on the connection: a Session.begin_nested()
+            # rollback would expire the caller's unflushed changes. pysqlite
+            # has no usable savepoints before the first write, and SQLite
+            # transactions survive a failed statement anyway.
+            connection = session.connection()
+            savepoint = connection.begin_nested() if connection.dialect.name != 'sqlite' else None
+            try:
+                with session.no_autoflush:
+                    self.assign(session, changed, only_changed=True)
+                if savepoint is not None:
+                    savepoint.commit()
+            except Exception as e:
+                # Keys are backfilled later; never fail the caller's write for them
+                if savepoint is not None:
+                    savepoint.rollback()
+                session.info['dimension_ids'] = ids_before
+                for obj, values in keys_before:
+                    for key, value in zip(key_columns, values):
+                        if getattr(obj, key) != value:
+                            setattr(obj, key, value)
+                self.stats['errors'] += 1
+                logger.warning(f"Could not resolve transaction dimensions: {e}")
+
+        def apply(session):
+            resolved = session.info.pop('dimension_ids', None)
+            if resolved:
+                with self._lock:
+                    for kind, ids in resolved.items():
+                        self._ids[kind].update(ids)
+
+        def discard(session):
+            session.info.pop('dimension_ids', None)
+
+        event.listen(Session, 'before_flush', before_flush)
+        event.listen(Session, 'after_commit', apply)
+        event.listen(Session, 'after_rollback', discard)
+        self._listeners_installed = True
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def is_ready(self, kind: str) -> bool:
+        """True when every transaction with a ``kind`` name also has its key"""
+        if not self.reads_enabled:
+            return False
+        checked_at = self._ready.get(kind)
+        if checked_at is not None and time.monotonic() - checked_at < self.ready_ttl:
+            return True
+        try:
+            from sqlalchemy import func, select
+            from app import db
+
+            _, column, key_column = DIMENSIONS[kind]
+            table = db.metadata.tables['transactions']
+            # Own connection: a missing column (migration not applied) must not
+            # abort the request's transaction
+            with db.engine.connect() as conn:
+                unkeyed = conn.execute(select(table.c.id).where(
+                    table.c[column].isnot(None),
+                    # Blank names never get a key (see _clean)
+                    func.trim(table.c[column]) != '',
+                    table.c[key_column].is_(None)
+                ).limit(1)).first()
+        except Exception as e:
+            logger.debug(f"Dimension '{kind}' not available: {e}")
+            return False
+        if unkeyed is not None:
+            logger.info(f"Dimension '{kind}' is not backfilled yet; reading string columns")
+            return False
+        self._ready[kind] = time.monotonic()
+        return True
+
+    def names(self, kind: str) -> Optional[List[str]]:
+        """Sorted names in use by at least one transaction (None when not ready)
+
+        Reads the small dimension table and probes the indexed key column,
+        instead of a DISTINCT over every transaction. Each name is returned
+        as a transaction stores it (dimension names are stripped), so it
+        works with the exact-match filters on the string column.
+        """
+        if not self.is_ready(kind):
+            return None
+        from app import db
+        from app.models.transaction import Transaction
+
+        model = self.model(kind)
+        _, column, key_column = DIMENSIONS[kind]
+        stored = db.session.query(getattr(Transaction, column)).filter(
+            getattr(Transaction, key_column) == model.id
+        ).limit(1).correlate(model).scalar_subquery()
+        values = db.session.query(stored).select_from(model).all()
+        return sorted({value for (value,) in values if value is not None})
+
+    def grouped_query(self, kind: str, *columns):
+        """Aggregate query grouped by a dimension
+
+        Returns ``db.session.query(<name labelled by its string column>,
+        *columns)`` grouped on the integer key when the dimension is ready,
+        otherwise grouped on the string column. Callers add filters as usual.
+        """
+        from app import db
+        from app.models.transaction import Transaction
+
+        _, column, key_column = DIMENSIONS[kind]
+        if not self.is_ready(kind):
+            string_column = getattr(Transaction, column)
+            return db.session.query(string_column, *columns).group_by(string_column)
+        model = self.model(kind)
+        return db.session.query(model.name.label(column), *columns).select_from(Transaction).outerjoin(
+            model, getattr(Transaction, key_column) == model.id
+        ).group_by(getattr(Transaction, key_column), model.name)
+
+    # ------------------------------------------------------------------
+    # Backfill
+    # ------------------------------------------------------------------
+
+    def backfill(self, kind: str, batch_size: int = 5000) -> Dict[str, int]:
+        """Create the dimension rows for existing names and set missing keys
+
+        Works name by name, so it can run while the application writes and
+        can be interrupted and rerun.
+        """
+        from sqlalchemy import update
+        from app import db
+        from app.models.transaction import Transaction
+
+        _, column, key_column = DIMENSIONS[kind]
+        string_column = getattr(Transaction, column)
+        key = getattr(Transaction, key_column)
+        names = [name for (name,) in db.session.query(string_column).filter(
+            string_column.isnot(None), key.is_(None)
+        ).distinct().all()]
+
+        updated = 0
+        for start in range(0, len(names), batch_size):
+            batch = names[start:start + batch_size]
+            ids = self.resolve(db.session, kind, batch)
+            for name in batch:
+                dim_id = ids.get(_clean(name))
+                if dim_id is None:
+                    continue
+                result = db.session.execute(
+                    update(Transaction.__table__)
+                    .where(Transaction.__table__.c[column] == name, Transaction.__table__.c[key_column].is_(None))
+                    .values({key_column: dim_id})
+                )
+                updated += result.rowcount or 0
+            db.session.commit()
+        self._ready.pop(kind, None)
+        return {'names': len(names), 'rows': updated}
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'enabled': self.enabled,
+            'reads_enabled': self.reads_enabled,
+            'ready': sorted(self._ready),
+            'cached_ids': {kind: len(ids) for kind, ids in self._ids.items()},
+            **self.stats
+        }
+
+
+# Global dimension service instance (initialized in app factory)
+dimension_service = DimensionService()
@@ -14,7 +14,6 @@ from typing import Optional, Dict, Any, List, Union
 from datetime import datetime, timedelta, timezone
 from sqlalchemy import func, desc, and_, or_, text
 from sqlalchemy.orm import Session
-from openai import OpenAI
 
 from app import db
 from app.models.transaction import Transaction
@@ -25,6 +24,7 @@ from app.models.audit import AuditLog
 from app.utils.unified_logger import get_logger
 from app.services.chatgpt_service import ChatGPTService
 from app.utils.db_compat import extract_compat
+from app.utils.db_routing import replica_reads
 
 logger = get_logger(__name__)
 
@@ -128,8 +128,9 @@ class EnhancedAIAssistantService:
             return "AI Assistant is not configured. Please contact your administrator."
         
         try:
-            # Gather relevant data based on query analysis
-            relevant_data = await self._gather_relevant_data(query)
+            # Gather relevant data based on query analysis (from the read replica when configured)
+            with replica_reads():
+                relevant_data = await self._gather_relevant_data(query)
             
             # Build comprehensive system context
             system_context = self._build_system_context(relevant_data)
@@ -15,6 +15,25 @@ from app.services.event_service import event_service, EventType
 
 logger = logging.getLogger(__name__)
 
+TAG_KEY = "pipeline:tag:{tag}"
+TAG_SET_TTL = 86400  # Tag sets outlive their members; stale members are harmless
+
+# Tags carried by every cache entry derived from transactions
+TRANSACTION_CACHE_TAGS = ("transaction", "psp", "dashboard", "analytics")
+
+# Deletes every key in the given tag sets, then the sets, in one round trip
+INVALIDATE_TAGS_SCRIPT = """
+local removed = 0
+for _, tag in ipairs(KEYS) do
+    local members = redis.call('SMEMBERS', tag)
+    for i = 1, #members, 500 do
+        removed = removed + redis.call('DEL', unpack(members, i, math.min(i + 499, #members)))
+    end
+    redis.call('DEL', tag)
+end
+return removed
+"""
+
 class CacheKey:
     """Cache key builder with namespacing"""
     
@@ -182,15 +201,29 @@ class EnhancedCacheService:
         self.stats.misses += 1
         return None
     
-    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> bool:
-        """Set value in cache (Redis with memory fallback)"""
+    def set(self, key: str, value: Any, ttl: Optional[int] = None,
+            tags: Optional[List[str]] = None) -> bool:
+        """Set value in cache (Redis with memory fallback)
+        
+        ``tags`` register the key under cache tags so writes can drop it
+        with :meth:`invalidate` instead of scanning key patterns.
+        """
         ttl = ttl or self.default_ttl
         
         # Try Redis first
         if self.redis_client:
             try:
                 serialized_value = json.dumps(value, default=str)
-                result = self.redis_client.setex(key, ttl, serialized_value)
+                if tags:
+                    pipe = self.redis_client.pipeline(transaction=False)
+                    pipe.setex(key, ttl, serialized_value)
+                    for tag in tags:
+                        tag_key = TAG_KEY.format(tag=tag)
+                        pipe.sadd(tag_key, key)
+                        pipe.expire(tag_key, max(ttl, TAG_SET_TTL))
+                    result = pipe.execute()[0]
+                else:
+                    result = self.redis_client.setex(key, ttl, serialized_value)
                 if result:
                     self.stats.sets += 1
                 return result
@@ -201,7 +234,8 @@ class EnhancedCacheService:
         try:
             self._memory_cache[key] = {
                 'value': value,
-                'expires_at': time.time() + ttl
+                'expires_at': time.time() + ttl,
+                'tags': set(tags or ())
             }
             self.stats.sets += 1
             return True
@@ -256,24 +290,49 @@ class EnhancedCacheService:
             logger.error(f"Error invalidating pattern {pattern}: {e}")
             return 0
     
+    def queue_invalidation(self, pipe, tags=(), keys=()) -> int:
+        """Add tag and key invalidation to a caller's Redis pipeline
+        
+        Memory-cache entries are dropped at once. Returns the number of
+        commands queued; their results are the deleted key counts.
+        """
+        tags, keys = set(tags), set(keys)
+        self._invalidate_memory(tags, keys)
+        queued = 0
+        if keys:
+            pipe.delete(*sorted(keys))
+            queued += 1
+        if tags:
+            tag_keys = sorted(TAG_KEY.format(tag=tag) for tag in tags)
+            pipe.eval(INVALIDATE_TAGS_SCRIPT, len(tag_keys), *tag_keys)
+            queued += 1
+        return queued
+    
+    def invalidate(self, tags=(), keys=()) -> int:
+        """Drop every entry carrying one of ``tags`` plus ``keys`` in one round trip"""
+        if not self.redis_client:
+            self._invalidate_memory(set(tags), set(keys))
+            return 0
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            if not self.queue_invalidation(pipe, tags, keys):
+                return 0
+            deleted = sum(int(count or 0) for count in pipe.execute())
+            self.stats.invalidations += deleted
+            return deleted
+        except Exception as e:
+            logger.error(f"Error invalidating cache tags {sorted(tags)}: {e}")
+            return 0
+    
+    def _invalidate_memory(self, tags: set, keys: set):
+        for key in [key for key, data in self._memory_cache.items()
+                    if key in keys or data.get('tags', set()) & tags]:
+            del self._memory_cache[key]
+    
     def invalidate_transaction_cache(self, transaction_id: Optional[int] = None):
         """Invalidate transaction-related cache"""
-        patterns = [
-            "pipeline:transactions:*",
-            "pipeline:psp_summary:*",
-            "pipeline:daily_balance:*",
-            "pipeline:analytics:*"
-        ]
-        
-        if transaction_id:
-            patterns.append(f"pipeline:transaction:{transaction_id}")
-        
-        total_invalidated = 0
-        for pattern in patterns:
-            total_invalidated += self.invalidate_pattern(pattern)
-        
-        # Removed verbose cache invalidation logging - only log if errors occur
-        return total_invalidated
+        keys = [CacheKey.transaction_detail(transaction_id)] if transaction_id else []
+        return self.invalidate(tags=TRANSACTION_CACHE_TAGS, keys=keys)
     
     def warm_cache(self, strategy: str, **kwargs) -> bool:
         """Warm cache using specified strategy"""
@@ -315,7 +374,7 @@ class EnhancedCacheService:
                         per_page=50,
                         filters=filters
                     )
-                    self.set(key, transactions, ttl=1800)  # 30 minutes
+                    self.set(key, transactions, ttl=1800, tags=["transaction"])  # 30 minutes
     
     def _warm_psp_summary(self, **kwargs):
         """Warm PSP summary cache"""
@@ -4,8 +4,6 @@ Provides reliable exchange rate data with fallback mechanisms
 """
 
 import requests
-import yfinance as yf
-import pandas as pd
 from datetime import date, datetime, timedelta, timezone
 from decimal import Decimal
 import logging
@@ -19,6 +17,11 @@ from collections import deque
 from dataclasses import dataclass
 import hashlib
 
+from app.utils.lazy_loader import lazy_import
+
+# yfinance pulls in pandas/numpy; load it on the first provider call
+yf = lazy_import('yfinance')
+
 # Suppress yfinance error logs
 yfinance_logger = logging.getLogger('yfinance')
 yfinance_logger.setLevel(logging.CRITICAL)
@@ -1008,20 +1011,24 @@ class EnhancedExchangeRateService:
             self.update_thread.join(timeout=5)
         logger.info("Stopped automatic exchange rate updates")
     
+    def update_all_rates(self, app=None):
+        """Update USD and EUR rates once"""
+        usd_success = self.update_exchange_rate(app, 'USD')
+        eur_success = self.update_exchange_rate(app, 'EUR')
+        
+        if usd_success and eur_success:
+            logger.debug("Successfully updated both USD and EUR exchange rates")
+        elif usd_success or eur_success:
+            logger.warning("Partially updated exchange rates")
+        else:
+            logger.warning("Failed to update exchange rates")
+        return usd_success and eur_success
+    
     def _auto_update_loop(self):
         """Internal loop for automatic updates"""
         while self.is_running:
             try:
-                # Update USD and EUR rates
-                usd_success = self.update_exchange_rate(self.app, 'USD')
-                eur_success = self.update_exchange_rate(self.app, 'EUR')
-                
-                if usd_success and eur_success:
-                    logger.debug("Successfully updated both USD and EUR exchange rates")
-                elif usd_success or eur_success:
-                    logger.warning("Partially updated exchange rates")
-                else:
-                    logger.warning("Failed to update exchange rates")
+                self.update_all_rates(self.app)
                 
                 # Wait for next update interval
                 time.sleep(self.update_interval)
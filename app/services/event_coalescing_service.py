@@ -0,0 +1,226 @@
+"""
+Event Coalescing Service for PipLinePro
+Buffers real-time events per room and emits one summarized delta per window
+"""
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Event payload keys that are folded into the per-window summary
+SUMMARY_KEYS = {
+    'psp': 'psps',
+    'psp_name': 'psps',
+    'date': 'dates',
+    'currency': 'currencies',
+    'category': 'categories',
+}
+
+
+class _RoomBuffer:
+    """Aggregated state for one (room, event name) window.
+
+    Events are folded in as they arrive, so memory per room is bounded by
+    the summary caps rather than by the number of events in a burst.
+    """
+
+    __slots__ = ('deadline', 'count', 'event_types', 'values', 'ids',
+                 'ids_truncated', 'first_event', 'first_ts', 'last_ts')
+
+    def __init__(self, deadline: float):
+        self.deadline = deadline
+        self.count = 0
+        self.event_types: Dict[str, int] = {}
+        self.values: Dict[str, set] = {}
+        self.ids: list = []
+        self.ids_truncated = False
+        self.first_event: Optional[Dict[str, Any]] = None
+        self.first_ts: Optional[str] = None
+        self.last_ts: Optional[str] = None
+
+    def add(self, payload: Dict[str, Any], max_values: int, max_ids: int):
+        """Fold one emit payload ({'type', 'data', 'timestamp'}) into the window"""
+        self.count += 1
+        if self.first_event is None:
+            self.first_event = payload
+            self.first_ts = payload.get('timestamp')
+        self.last_ts = payload.get('timestamp')
+
+        event_type = payload.get('type', 'unknown')
+        self.event_types[event_type] = self.event_types.get(event_type, 0) + 1
+
+        data = payload.get('data') or {}
+        for key, bucket in SUMMARY_KEYS.items():
+            value = data.get(key)
+            if value in (None, ''):
+                continue
+            values = self.values.setdefault(bucket, set())
+            if len(values) < max_values:
+                values.add(str(value))
+
+        entity_id = data.get('transaction_id', data.get('id'))
+        if entity_id is not None:
+            if len(self.ids) < max_ids:
+                self.ids.append(entity_id)
+            else:
+                self.ids_truncated = True
+
+    def build_message(self, window_ms: int) -> Dict[str, Any]:
+        """Build the message for this window (pass-through for a single event)"""
+        if self.count == 1 and self.first_event is not None:
+            return self.first_event
+
+        return {
+            'type': 'batch',
+            'coalesced': True,
+            'count': self.count,
+            'window_ms': window_ms,
+            'summary': {
+                'event_types': self.event_types,
+                **{bucket: sorted(values) for bucket, values in self.values.items()},
+                'ids': self.ids,
+                'ids_truncated': self.ids_truncated,
+            },
+            'first_timestamp': self.first_ts,
+            'timestamp': self.last_ts or datetime.now(timezone.utc).isoformat()
+        }
+
+
+class EventCoalescer:
+    """Per-room windowed coalescing of real-time emits with backpressure metrics.
+
+    The first event for a room opens a window of ``window_ms``; everything
+    arriving before the window closes is merged, and a single message is
+    emitted when it does. Bursts therefore cost at most one message per room
+    per window regardless of how many events were published.
+    """
+
+    def __init__(self, emit_func: Callable[[str, Dict[str, Any], str], None],
+                 window_ms: int = 250, max_values: int = 100, max_ids: int = 100):
+        self.emit_func = emit_func
+        self.window_ms = window_ms
+        self.max_values = max_values
+        self.max_ids = max_ids
+
+        self._buffers: Dict[Tuple[str, str], _RoomBuffer] = {}
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self.room_metrics: Dict[str, Dict[str, Any]] = {}
+
+    def start(self):
+        """Start the background flusher"""
+        with self._condition:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._flush_loop, daemon=True, name="EventCoalescer")
+        self._thread.start()
+        logger.info(f"Event coalescer started ({self.window_ms}ms window)")
+
+    def stop(self, flush: bool = True):
+        """Stop the flusher, emitting anything still buffered"""
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+        if flush:
+            self.flush_all()
+
+    def submit(self, event_name: str, payload: Dict[str, Any], room: str):
+        """Buffer an emit for ``room``; emits immediately when coalescing is off"""
+        if self.window_ms <= 0 or not self._running:
+            self._record_in(room, 0)
+            self._emit(event_name, payload, room, 1)
+            return
+
+        key = (room, event_name)
+        with self._condition:
+            buffer = self._buffers.get(key)
+            if buffer is None:
+                buffer = _RoomBuffer(time.monotonic() + self.window_ms / 1000.0)
+                self._buffers[key] = buffer
+                self._condition.notify()
+            buffer.add(payload, self.max_values, self.max_ids)
+            self._record_in(room, buffer.count)
+
+    def flush_all(self):
+        """Emit every buffered window now"""
+        with self._condition:
+            due = list(self._buffers.items())
+            self._buffers.clear()
+        for (room, event_name), buffer in due:
+            self._emit(event_name, buffer.build_message(self.window_ms), room, buffer.count)
+
+    def _flush_loop(self):
+        """Wait for the earliest window to close, then emit all due windows"""
+        while True:
+            with self._condition:
+                if not self._running:
+                    return
+                now = time.monotonic()
+                due = [key for key, buffer in self._buffers.items() if buffer.deadline <= now]
+                ready = [(key, self._buffers.pop(key)) for key in due]
+                if not ready:
+                    next_deadline = min((b.deadline for b in self._buffers.values()), default=None)
+                    timeout = None if next_deadline is None else max(next_deadline - now, 0)
+                    self._condition.wait(timeout)
+                    continue
+
+            for (room, event_name), buffer in ready:
+                self._emit(event_name, buffer.build_message(self.window_ms), room, buffer.count)
+
+    def _emit(self, event_name: str, message: Dict[str, Any], room: str, event_count: int):
+        started = time.perf_counter()
+        try:
+            self.emit_func(event_name, message, room)
+        except Exception as e:
+            self._metrics(room)['emit_errors'] += 1
+            logger.error(f"Error emitting coalesced {event_name} to {room}: {e}")
+            return
+        metrics = self._metrics(room)
+        metrics['messages_out'] += 1
+        metrics['pending'] = max(metrics['pending'] - event_count, 0)
+        metrics['last_emit_ms'] = round((time.perf_counter() - started) * 1000, 3)
+        metrics['last_flush'] = datetime.now(timezone.utc).isoformat()
+
+    def _metrics(self, room: str) -> Dict[str, Any]:
+        metrics = self.room_metrics.get(room)
+        if metrics is None:
+            metrics = {
+                'events_in': 0,
+                'messages_out': 0,
+                'pending': 0,
+                'max_pending': 0,
+                'emit_errors': 0,
+                'last_emit_ms': None,
+                'last_flush': None
+            }
+            self.room_metrics[room] = metrics
+        return metrics
+
+    def _record_in(self, room: str, window_depth: int):
+        metrics = self._metrics(room)
+        metrics['events_in'] += 1
+        metrics['pending'] += 1
+        metrics['max_pending'] = max(metrics['max_pending'], window_depth)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get per-room backpressure metrics"""
+        with self._condition:
+            open_windows = len(self._buffers)
+        rooms = {}
+        for room, metrics in list(self.room_metrics.items()):
+            ratio = metrics['events_in'] / metrics['messages_out'] if metrics['messages_out'] else None
+            rooms[room] = {**metrics, 'coalescing_ratio': round(ratio, 2) if ratio else None}
+        return {
+            'window_ms': self.window_ms,
+            'running': self._running,
+            'open_windows': open_windows,
+            'rooms': rooms
+        }
@@ -4,8 +4,10 @@ Handles event-driven architecture with Redis Streams and message queues
 """
 import json
 import logging
+import threading
 import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from typing import Dict, Any, List, Optional, Callable
 from dataclasses import dataclass, asdict
@@ -49,16 +51,29 @@ class Event:
             'metadata': self.metadata or {}
         }
     
+    def to_stream_fields(self) -> Dict[str, str]:
+        """Flatten event for XADD (stream field values must be scalars)"""
+        event_dict = self.to_dict()
+        event_dict['data'] = json.dumps(event_dict['data'], default=str)
+        event_dict['metadata'] = json.dumps(event_dict['metadata'], default=str)
+        return event_dict
+    
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'Event':
-        """Create event from dictionary"""
+        """Create event from dictionary (accepts flattened stream fields)"""
+        payload = data['data']
+        metadata = data.get('metadata') or {}
+        if isinstance(payload, str):
+            payload = json.loads(payload)
+        if isinstance(metadata, str):
+            metadata = json.loads(metadata) if metadata else {}
         return cls(
             id=data['id'],
             type=EventType(data['type']),
             timestamp=datetime.fromisoformat(data['timestamp']),
             source=data['source'],
-            data=data['data'],
-            metadata=data.get('metadata', {})
+            data=payload,
+            metadata=metadata
         )
 
 class EventService:
@@ -71,6 +86,51 @@ class EventService:
         self.stream_name = "pipeline_events"
         self.consumer_group = "pipeline_consumers"
         self.consumer_name = f"consumer_{uuid.uuid4().hex[:8]}"
+        
+        # Stream dispatcher: when running, handlers are driven by the consumer
+        # group instead of inline on the publishing worker, so every event is
+        # handled exactly once across all workers.
+        self._dispatcher_thread: Optional[threading.Thread] = None
+        self._dispatcher_stop = threading.Event()
+        self.dispatcher_stats = {
+            'dispatched': 0,
+            'errors': 0,
+            'last_dispatch': None
+        }
+        
+        # Publishing: events raised during a request are buffered and written
+        # in one pipeline after the response; local handlers run on a bounded
+        # executor so they never sit on the request thread.
+        self.app = None
+        self.batching_enabled = False
+        self.pipeline_chunk_size = 500
+        self._handler_executor: Optional[ThreadPoolExecutor] = None
+        self._handler_slots: Optional[threading.BoundedSemaphore] = None
+        self.publish_stats = {
+            'published': 0,
+            'pipelines': 0,
+            'deferred': 0,
+            'discarded': 0,
+            'handler_errors': 0,
+            'handler_inline_runs': 0
+        }
+    
+    def init_app(self, app):
+        """Configure request-scoped batching and the local handler executor"""
+        self.app = app
+        self.batching_enabled = app.config.get('EVENT_BATCHING_ENABLED', True)
+        self.pipeline_chunk_size = app.config.get('EVENT_PIPELINE_CHUNK_SIZE', 500)
+        
+        workers = app.config.get('EVENT_HANDLER_WORKERS', 2)
+        if workers and workers > 0 and self._handler_executor is None:
+            self._handler_executor = ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix="EventHandler"
+            )
+            self._handler_slots = threading.BoundedSemaphore(
+                app.config.get('EVENT_HANDLER_QUEUE_SIZE', 1000)
+            )
+        
+        app.teardown_request(self._flush_request_events)
     
     @property
     def redis_client(self) -> Optional[redis.Redis]:
@@ -104,24 +164,25 @@ class EventService:
     
     def _init_consumer_group(self):
         """Initialize Redis Stream consumer group"""
-        if not self.redis_client:
+        if not self._redis_client:
             return
             
         try:
-            self.redis_client.xgroup_create(
+            # Start at '$' so a freshly created group does not replay the
+            # retained stream history to connected clients
+            self._redis_client.xgroup_create(
                 self.stream_name, 
                 self.consumer_group, 
-                id='0', 
+                id='$', 
                 mkstream=True
             )
         except redis.exceptions.ResponseError as e:
             if "BUSYGROUP" not in str(e):
                 logger.error(f"Failed to create consumer group: {e}")
     
-    def publish_event(self, event_type: EventType, data: Dict[str, Any], 
-                     source: str = "pipeline", metadata: Optional[Dict[str, Any]] = None) -> str:
-        """Publish an event to the stream"""
-        event = Event(
+    def _build_event(self, event_type: EventType, data: Dict[str, Any], source: str,
+                     metadata: Optional[Dict[str, Any]]) -> Event:
+        return Event(
             id=str(uuid.uuid4()),
             type=event_type,
             timestamp=datetime.now(timezone.utc),
@@ -129,29 +190,141 @@ class EventService:
             data=data,
             metadata=metadata
         )
+    
+    def _request_buffer(self) -> Optional[List[Event]]:
+        """Get the current request's pending events (None outside a request)"""
+        if not self.batching_enabled:
+            return None
+        from flask import has_request_context, g
+        if not has_request_context():
+            return None
+        if not hasattr(g, '_pending_events'):
+            g._pending_events = []
+        return g._pending_events
+    
+    def publish_event(self, event_type: EventType, data: Dict[str, Any], 
+                     source: str = "pipeline", metadata: Optional[Dict[str, Any]] = None) -> str:
+        """Publish an event to the stream.
+        
+        Inside a request the event is buffered and flushed with the rest of the
+        request's events after the response; elsewhere it is written at once.
+        """
+        event = self._build_event(event_type, data, source, metadata)
+        
+        pending = self._request_buffer()
+        if pending is not None:
+            pending.append(event)
+            self.publish_stats['deferred'] += 1
+            return event.id
+        
+        return self._publish_batch([event])[0]
+    
+    def publish_many(self, event_type: EventType, items: List[Dict[str, Any]],
+                     source: str = "pipeline", metadata: Optional[Dict[str, Any]] = None) -> List[str]:
+        """Publish many events of one type in as few round trips as possible"""
+        events = [self._build_event(event_type, data, source, metadata) for data in items]
+        if not events:
+            return []
+        
+        pending = self._request_buffer()
+        if pending is not None:
+            pending.extend(events)
+            self.publish_stats['deferred'] += len(events)
+            return [event.id for event in events]
         
+        return self._publish_batch(events)
+    
+    def flush_pending(self) -> int:
+        """Flush events buffered by the current request now"""
+        from flask import has_request_context, g
+        if not has_request_context():
+            return 0
+        events = g.pop('_pending_events', None) or []
+        if events:
+            self._publish_batch(events)
+        return len(events)
+    
+    def _flush_request_events(self, exc=None):
+        """Teardown hook: publish the request's events, or drop them on error"""
+        try:
+            from flask import g
+            events = g.pop('_pending_events', None)
+            if not events:
+                return
+            if exc is not None:
+                self.publish_stats['discarded'] += len(events)
+                logger.warning(f"Discarded {len(events)} events from failed request: {exc}")
+                return
+            self._publish_batch(events)
+        except Exception as e:
+            logger.error(f"Failed to flush request events: {e}")
+    
+    def _publish_batch(self, events: List[Event]) -> List[str]:
+        """Write events to the stream in pipelined chunks and dispatch handlers"""
         if not self.redis_client:
             logger.warning("Redis not available, event not published")
-            return event.id
+            return [event.id for event in events]
         
+        stream_ids = [event.id for event in events]
         try:
-            # Add event to Redis Stream
-            event_id = self.redis_client.xadd(
+            for start in range(0, len(events), self.pipeline_chunk_size):
+                chunk = events[start:start + self.pipeline_chunk_size]
+                pipe = self.redis_client.pipeline(transaction=False)
+                self.queue_events(pipe, chunk)
+                stream_ids[start:start + len(chunk)] = pipe.execute()
+                self.publish_stats['pipelines'] += 1
+            logger.debug(f"Published {len(events)} events in {self.publish_stats['pipelines']} pipelines")
+        except Exception as e:
+            logger.error(f"Failed to publish event: {e}")
+            return stream_ids
+        
+        self.events_published(events)
+        return stream_ids
+    
+    def queue_events(self, pipe, events: List[Event]) -> int:
+        """Add stream writes for ``events`` to a caller's Redis pipeline
+        
+        Call :meth:`events_published` once the pipeline has executed.
+        """
+        for event in events:
+            pipe.xadd(
                 self.stream_name,
-                event.to_dict(),
-                maxlen=10000  # Keep last 10k events
+                event.to_stream_fields(),
+                maxlen=10000,  # Keep last 10k events
+                approximate=True
             )
-            
-            logger.info(f"Published event {event_type.value} with ID {event_id}")
-            
-            # Also trigger local handlers immediately for real-time processing
+        return len(events)
+    
+    def events_published(self, events: List[Event]):
+        """Count written events and, without a running dispatcher, trigger local handlers"""
+        self.publish_stats['published'] += len(events)
+        if not self.is_dispatcher_running():
+            for event in events:
+                self._dispatch_local(event)
+    
+    def _dispatch_local(self, event: Event):
+        """Run local handlers on the executor; inline when it is saturated"""
+        if self._handler_executor is None or not self._handler_slots.acquire(blocking=False):
+            self.publish_stats['handler_inline_runs'] += 1
+            self._trigger_handlers(event)
+            return
+        
+        def run():
+            try:
+                if self.app is not None:
+                    with self.app.app_context():
+                        self._trigger_handlers(event)
+                else:
+                    self._trigger_handlers(event)
+            finally:
+                self._handler_slots.release()
+        
+        try:
+            self._handler_executor.submit(run)
+        except RuntimeError:
+            # Executor shut down (interpreter exit) - fall back to inline
+            self._handler_slots.release()
             self._trigger_handlers(event)
-            
-            return event_id
-            
-        except Exception as e:
-            logger.error(f"Failed to publish event: {e}")
-            return event.id
     
     def subscribe_to_events(self, event_types: List[EventType], 
                           handler: Callable[[Event], None]):
@@ -169,6 +342,7 @@ class EventService:
             try:
                 handler(event)
             except Exception as e:
+                self.publish_stats['handler_errors'] += 1
                 logger.error(f"Error in event handler for {event.type.value}: {e}")
     
     def consume_events(self, count: int = 10, block: int = 1000) -> List[Event]:
@@ -186,24 +360,76 @@ class EventService:
             )
             
             events = []
+            acked_ids = []
             for stream, msgs in messages:
                 for msg_id, fields in msgs:
                     try:
                         event = Event.from_dict(fields)
                         events.append(event)
-                        
-                        # Acknowledge message
-                        self.redis_client.xack(self.stream_name, self.consumer_group, msg_id)
+                        acked_ids.append(msg_id)
                         
                     except Exception as e:
                         logger.error(f"Error processing message {msg_id}: {e}")
             
+            # Acknowledge the whole batch in one round trip
+            if acked_ids:
+                self.redis_client.xack(self.stream_name, self.consumer_group, *acked_ids)
+            
             return events
             
         except Exception as e:
             logger.error(f"Error consuming events: {e}")
             return []
     
+    def start_stream_dispatcher(self, app, block_ms: int = 2000, batch_size: int = 50) -> bool:
+        """Start the consumer-group reader that drives local handlers.
+        
+        Every worker runs one reader under its own consumer name; Redis hands
+        each stream entry to exactly one of them, so handlers that fan out
+        through the Socket.IO message queue reach all clients once.
+        """
+        if self.is_dispatcher_running():
+            return True
+        
+        with app.app_context():
+            if not self.redis_client:
+                logger.info("Event stream dispatcher not started (Redis unavailable)")
+                return False
+        
+        self._dispatcher_stop.clear()
+        
+        def dispatch_loop():
+            while not self._dispatcher_stop.is_set():
+                try:
+                    events = self.consume_events(count=batch_size, block=block_ms)
+                    for event in events:
+                        self._trigger_handlers(event)
+                    if events:
+                        self.dispatcher_stats['dispatched'] += len(events)
+                        self.dispatcher_stats['last_dispatch'] = datetime.now(timezone.utc).isoformat()
+                except Exception as e:
+                    self.dispatcher_stats['errors'] += 1
+                    logger.error(f"Event stream dispatcher error: {e}")
+                    self._dispatcher_stop.wait(1)
+        
+        self._dispatcher_thread = threading.Thread(
+            target=dispatch_loop, daemon=True, name="EventStreamDispatcher"
+        )
+        self._dispatcher_thread.start()
+        logger.info(f"Event stream dispatcher started as {self.consumer_name}")
+        return True
+    
+    def stop_stream_dispatcher(self, timeout: float = 5.0):
+        """Stop the consumer-group reader"""
+        self._dispatcher_stop.set()
+        if self._dispatcher_thread:
+            self._dispatcher_thread.join(timeout=timeout)
+        self._dispatcher_thread = None
+    
+    def is_dispatcher_running(self) -> bool:
+        """Check whether the stream dispatcher thread is alive"""
+        return self._dispatcher_thread is not None and self._dispatcher_thread.is_alive()
+    
     def get_event_history(self, count: int = 100) -> List[Event]:
         """Get recent event history"""
         if not self.redis_client:
@@ -240,7 +466,11 @@ class EventService:
                 'length': info.get('length', 0),
                 'first_entry': info.get('first-entry'),
                 'last_entry': info.get('last-entry'),
-                'groups': info.get('groups', 0)
+                'groups': info.get('groups', 0),
+                'consumer_name': self.consumer_name,
+                'dispatcher_running': self.is_dispatcher_running(),
+                'dispatcher': dict(self.dispatcher_stats),
+                'publishing': dict(self.publish_stats)
             }
         except Exception as e:
             logger.error(f"Error getting stream info: {e}")
@@ -2,13 +2,15 @@
 Excel Import Service for kasa.xlsx
 Imports transaction data from Excel files
 """
-import pandas as pd
 import logging
 from datetime import datetime, timezone
 from decimal import Decimal, InvalidOperation
 from typing import Dict, List, Tuple, Any, Optional
 from app import db
 from app.models.transaction import Transaction
+from app.utils.lazy_loader import lazy_import
+
+pd = lazy_import('pandas')
 
 logger = logging.getLogger(__name__)
 
@@ -470,7 +472,7 @@ class ExcelImportService:
         
         return transactions
     
-    def _parse_row(self, row: pd.Series, sheet_name: str, row_num: int, cols: Dict[str, int]) -> Optional[Transaction]:
+    def _parse_row(self, row: 'pd.Series', sheet_name: str, row_num: int, cols: Dict[str, int]) -> Optional[Transaction]:
         """Parse a single row and create Transaction object"""
         
         # AD SOYAD
@@ -666,7 +668,14 @@ class ExcelImportService:
         try:
             logger.info(f"Adding {len(transactions)} transactions to database session")
             
-            # Batch insert için
+            # Batch insert için (bulk saves skip the flush listener that sets
+            # dimension keys and the mapper events that set derived columns)
+            from app.services.dimension_service import dimension_service
+            dimension_service.assign(db.session, transactions)
+            for transaction in transactions:
+                transaction.refresh_derived_columns()
+            from app.services.partition_service import transaction_partition_service
+            transaction_partition_service.prepare_bulk_load(db.session, transactions)
             db.session.bulk_save_objects(transactions)
             db.session.commit()
             
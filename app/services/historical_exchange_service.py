@@ -3,14 +3,16 @@ Historical Exchange Rate Service
 Fetches historical USD/TRY exchange rates with enhanced fallback mechanisms
 """
 
-import yfinance as yf
-import pandas as pd
 from datetime import date, datetime, timedelta
 from decimal import Decimal
 import logging
 from typing import Dict, Optional, Tuple
 import time
 
+from app.utils.lazy_loader import lazy_import
+
+yf = lazy_import('yfinance')
+
 # Import enhanced exchange rate service
 from .enhanced_exchange_rate_service import enhanced_exchange_service
 
@@ -0,0 +1,721 @@
+"""
+Index Advisor Service
+Recommends covering and partial indexes from the captured query workload
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CALLS_KEY = 'index_advisor:calls'
+TIME_KEY = 'index_advisor:time'
+SAMPLES_KEY = 'index_advisor:samples'
+
+_QUALIFIED = r'"?(\w+)"?\."?(\w+)"?'
+_PLACEHOLDER = r'(?:%\((\w+)\)s|%s|\?|:(\w+))'
+_PREDICATE_RE = re.compile(
+    _QUALIFIED + r'\s*(=|!=|<>|>=|<=|>|<|\bNOT IN\b|\bIN\b|\bBETWEEN\b|\bIS NOT NULL\b|\bIS NULL\b)\s*(\(?\s*' + _PLACEHOLDER + r')?',
+    re.I
+)
+_NOT_EMPTY_LITERAL_RE = re.compile(_QUALIFIED + r"\s*(?:!=|<>)\s*''")
+_COLUMN_RE = re.compile(_QUALIFIED)
+_PLACEHOLDER_RE = re.compile(_PLACEHOLDER)
+_GROUP_BY_RE = re.compile(r'\bGROUP BY\b(.*?)(?:\bHAVING\b|\bORDER BY\b|\bLIMIT\b|\)|$)', re.I | re.S)
+_FROM_RE = re.compile(r'\b(?:FROM|JOIN)\s+"?(\w+)"?', re.I)
+_SQLITE_PLAN_RE = re.compile(r'^(SCAN|SEARCH)(?: TABLE)? "?(\w+)"?(?: AS \w+)?(.*)$')
+
+RANGE_OPERATORS = {'>', '<', '>=', '<=', 'BETWEEN'}
+EQUALITY_OPERATORS = {'=', 'IN'}
+MAX_INDEX_COLUMNS = 8
+_ISO_DATE_RE = re.compile(r'^\d{4}-\d{2}-\d{2}(?:[ T][\d:.+\-]*)?$')
+REDACTED = '<redacted>'  # Stands in for non-empty strings; never equal to ''
+
+
+def _json_safe(parameters):
+    """Bind parameters in a JSON-storable form (dates and decimals as strings)"""
+    if parameters is None:
+        return None
+    try:
+        return json.loads(json.dumps(parameters, default=str))
+    except (TypeError, ValueError):
+        return None
+
+
+def _redact(parameters):
+    """Bind parameters with every non-empty string that is not a date replaced
+
+    Numbers, booleans, NULLs and dates are enough to reproduce a plan;
+    other strings may be tokens, emails or names and are never stored.
+    They become ``REDACTED`` rather than ``''`` so that ``col <> :p`` is
+    only read as a not-empty predicate when the bind really was empty.
+    """
+    def scrub(value):
+        if isinstance(value, str):
+            return value if not value or _ISO_DATE_RE.match(value) else REDACTED
+        if isinstance(value, list):
+            return [scrub(item) for item in value]
+        if isinstance(value, dict):
+            return {key: scrub(item) for key, item in value.items()}
+        return value
+
+    return scrub(_json_safe(parameters))
+
+
+class TableAccess:
+    """How one statement uses one table: predicates, grouping and read columns"""
+
+    def __init__(self, table: str):
+        self.table = table
+        self.equality: List[str] = []
+        self.ranges: List[str] = []
+        self.group_by: List[str] = []
+        self.columns: List[str] = []
+        self.not_null: List[str] = []
+        self.not_empty: List[str] = []
+
+    @staticmethod
+    def _add(target: List[str], column: str):
+        if column not in target:
+            target.append(column)
+
+
+class IndexAdvisor:
+    """Propose indexes from what the application actually runs.
+
+    Every SELECT the application executes is fingerprinted (the same
+    normalization the SQL profiler uses) and counted; the slowest execution
+    of each fingerprint is kept as a sample with its bind parameters
+    (strings other than dates blanked out). Redis keeps the workload for
+    ``INDEX_ADVISOR_WORKLOAD_TTL`` seconds after the last flush.
+    Workers merge their counts into Redis so the advisor sees the whole
+    cluster.
+
+    ``analyze()`` EXPLAINs the heaviest fingerprints, derives a candidate
+    index for every table the plan scans without a (covering) index - key
+    columns from equality, range and GROUP BY predicates, remaining read
+    columns as INCLUDE, constant ``IS NOT NULL`` / ``<> ''`` predicates as
+    a partial index condition - and estimates the benefit with hypothetical
+    indexes (PostgreSQL with hypopg) or by timing the statements on a
+    scratch copy (SQLite). ``write_migration()`` turns the result into an
+    Alembic revision; nothing is created at runtime.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.enabled = True
+        self.max_fingerprints = 500
+        self.min_calls = 5
+        self.flush_interval = 60.0
+        self.workload_ttl = 7 * 86400
+        self.scratch_max_mb = 2048
+        self._entries: Dict[str, list] = {}
+        self._pending: Dict[str, list] = {}
+        self._next_flush = 0.0
+        self._lock = threading.Lock()
+        self.last_analysis: Optional[Dict[str, Any]] = None
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = app.config.get('INDEX_ADVISOR_ENABLED', True)
+        self.max_fingerprints = app.config.get('INDEX_ADVISOR_MAX_FINGERPRINTS', 500)
+        self.min_calls = app.config.get('INDEX_ADVISOR_MIN_CALLS', 5)
+        self.flush_interval = app.config.get('INDEX_ADVISOR_FLUSH_INTERVAL', 60.0)
+        self.workload_ttl = app.config.get('INDEX_ADVISOR_WORKLOAD_TTL', 7 * 86400)
+        self.scratch_max_mb = app.config.get('INDEX_ADVISOR_SCRATCH_MAX_MB', 2048)
+
+    @property
+    def redis_client(self):
+        from app.services.redis_service import redis_service
+        if redis_service.connected and redis_service.redis_client:
+            return redis_service.redis_client
+        return None
+
+    # ------------------------------------------------------------------
+    # Workload capture
+    # ------------------------------------------------------------------
+
+    def record(self, statement: str, parameters, duration: float):
+        """Count one executed statement (called from the cursor hook)"""
+        head = statement.lstrip()[:6].upper()
+        if head not in ('SELECT', 'WITH'):
+            return
+        from app.utils.query_performance_monitor import fingerprint_statement
+
+        fingerprint = fingerprint_statement(statement)
+        with self._lock:
+            entry = self._entries.get(fingerprint)
+            if entry is None:
+                if len(self._entries) >= self.max_fingerprints:
+                    return
+                # [calls, total_time, max_time, statement, parameters]
+                entry = [0, 0.0, -1.0, None, None]
+                self._entries[fingerprint] = entry
+            entry[0] += 1
+            entry[1] += duration
+            pending = self._pending.setdefault(fingerprint, [0, 0.0, False])
+            pending[0] += 1
+            pending[1] += duration
+            if duration > entry[2]:
+                entry[2] = duration
+                entry[3] = statement
+                entry[4] = _redact(parameters)
+                pending[2] = True
+
+        now = time.monotonic()
+        if now >= self._next_flush:
+            self._next_flush = now + self.flush_interval
+            self.flush()
+
+    def flush(self):
+        """Merge this worker's counts since the last flush into Redis"""
+        client = self.redis_client
+        if client is None:
+            return
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            samples = {
+                fingerprint: json.dumps({
+                    'statement': self._entries[fingerprint][3],
+                    'parameters': self._entries[fingerprint][4],
+                    'max_time': self._entries[fingerprint][2]
+                })
+                for fingerprint, delta in pending.items() if delta[2]
+            }
+        if not pending:
+            return
+        try:
+            pipe = client.pipeline(transaction=False)
+            for fingerprint, (calls, total, _) in pending.items():
+                pipe.hincrby(CALLS_KEY, fingerprint, calls)
+                pipe.hincrbyfloat(TIME_KEY, fingerprint, total)
+            if samples:
+                pipe.hset(SAMPLES_KEY, mapping=samples)
+            for key in (CALLS_KEY, TIME_KEY, SAMPLES_KEY):
+                pipe.expire(key, self.workload_ttl)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Failed to flush index advisor workload: {e}")
+
+    def workload(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """Fingerprints ordered by total time (cluster-wide when Redis is up)"""
+        entries: Dict[str, Dict[str, Any]] = {}
+        client = self.redis_client
+        if client is not None:
+            self.flush()
+            try:
+                calls = client.hgetall(CALLS_KEY)
+                times = client.hgetall(TIME_KEY)
+                samples = client.hgetall(SAMPLES_KEY)
+                for fingerprint, count in calls.items():
+                    fingerprint = fingerprint.decode() if isinstance(fingerprint, bytes) else fingerprint
+                    raw = samples.get(fingerprint) or samples.get(fingerprint.encode())
+                    sample = json.loads(raw) if raw else {}
+                    total = times.get(fingerprint) or times.get(fingerprint.encode()) or 0
+                    entries[fingerprint] = {
+                        'fingerprint': fingerprint,
+                        'calls': int(count),
+                        'total_time': float(total),
+                        'max_time': sample.get('max_time', 0.0),
+                        'statement': sample.get('statement'),
+                        'parameters': sample.get('parameters')
+                    }
+            except Exception as e:
+                logger.warning(f"Failed to read index advisor workload: {e}")
+                entries = {}
+        if not entries:
+            with self._lock:
+                for fingerprint, (calls, total, max_time, statement, parameters) in self._entries.items():
+                    entries[fingerprint] = {
+                        'fingerprint': fingerprint,
+                        'calls': calls,
+                        'total_time': total,
+                        'max_time': max_time,
+                        'statement': statement,
+                        'parameters': parameters
+                    }
+        ranked = sorted(entries.values(), key=lambda item: item['total_time'], reverse=True)
+        return [item for item in ranked if item['statement']][:limit]
+
+    def reset(self):
+        """Forget the captured workload (e.g. after applying recommendations)"""
+        with self._lock:
+            self._entries = {}
+            self._pending = {}
+        client = self.redis_client
+        if client is not None:
+            try:
+                client.delete(CALLS_KEY, TIME_KEY, SAMPLES_KEY)
+            except Exception as e:
+                logger.warning(f"Failed to reset index advisor workload: {e}")
+
+    # ------------------------------------------------------------------
+    # Plans
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _bind(parameters):
+        if parameters is None:
+            return ()
+        if isinstance(parameters, list):
+            return tuple(parameters)
+        return parameters
+
+    def explain(self, connection, statement: str, parameters) -> Dict[str, Any]:
+        """Plan summary: total cost and the tables read without a covering index"""
+        dialect = connection.dialect.name
+        cursor = connection.connection.cursor()
+        try:
+            if dialect == 'postgresql':
+                cursor.execute(f"EXPLAIN (FORMAT JSON) {statement}", self._bind(parameters))
+                raw = cursor.fetchone()[0]
+                plan = (json.loads(raw) if isinstance(raw, str) else raw)[0]['Plan']
+                return self._summarize_pg_plan(plan)
+            if dialect == 'sqlite':
+                cursor.execute(f"EXPLAIN QUERY PLAN {statement}", self._bind(parameters))
+                return self._summarize_sqlite_plan([row[-1] for row in cursor.fetchall()])
+        finally:
+            cursor.close()
+        return {'cost': None, 'scans': {}, 'details': []}
+
+    @staticmethod
+    def _summarize_pg_plan(plan: Dict[str, Any]) -> Dict[str, Any]:
+        scans: Dict[str, str] = {}
+        details = []
+
+        def walk(node):
+            node_type = node.get('Node Type', '')
+            relation = node.get('Relation Name')
+            if relation:
+                details.append(f"{node_type} on {relation} (cost {node.get('Total Cost')})")
+                if node_type in ('Seq Scan', 'Bitmap Heap Scan'):
+                    scans[relation] = 'scan'
+                elif node_type == 'Index Scan':
+                    scans.setdefault(relation, 'lookup')
+            for child in node.get('Plans', []):
+                walk(child)
+
+        walk(plan)
+        return {'cost': plan.get('Total Cost'), 'scans': scans, 'details': details}
+
+    @staticmethod
+    def _summarize_sqlite_plan(rows: List[str]) -> Dict[str, Any]:
+        scans: Dict[str, str] = {}
+        for detail in rows:
+            match = _SQLITE_PLAN_RE.match(detail)
+            if not match:
+                continue
+            kind, table, rest = match.groups()
+            if kind == 'SCAN' and 'COVERING INDEX' not in rest:
+                scans[table] = 'scan'
+            elif 'COVERING INDEX' not in rest and 'INTEGER PRIMARY KEY' not in rest:
+                scans.setdefault(table, 'lookup')
+        return {'cost': None, 'scans': scans, 'details': rows}
+
+    # ------------------------------------------------------------------
+    # Candidates
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _bound_values(statement: str, parameters) -> Dict[int, Any]:
+        """Bound value for each placeholder, by its offset in the statement"""
+        values: Dict[int, Any] = {}
+        position = 0
+        for match in _PLACEHOLDER_RE.finditer(statement):
+            name = match.group(1) or match.group(2)
+            if isinstance(parameters, dict) and name:
+                values[match.start()] = parameters.get(name)
+            elif isinstance(parameters, (list, tuple)) and position < len(parameters):
+                values[match.start()] = parameters[position]
+            position += 1
+        return values
+
+    def table_access(self, statement: str, parameters) -> Dict[str, TableAccess]:
+        """Columns each table is filtered, grouped and read by in ``statement``"""
+        tables = {name.lower() for name in _FROM_RE.findall(statement)}
+        access = {table: TableAccess(table) for table in tables}
+        bound = self._bound_values(statement, parameters)
+
+        for match in _COLUMN_RE.finditer(statement):
+            table, column = match.group(1).lower(), match.group(2).lower()
+            if table in access:
+                TableAccess._add(access[table].columns, column)
+
+        for match in _PREDICATE_RE.finditer(statement):
+            table, column = match.group(1).lower(), match.group(2).lower()
+            operator = ' '.join(match.group(3).upper().split())
+            if table not in access:
+                continue
+            entry = access[table]
+            placeholder = match.group(4)
+            value = bound.get(match.start(4) + placeholder.index(placeholder.lstrip('( '))) if placeholder else None
+            if operator in EQUALITY_OPERATORS and placeholder:
+                TableAccess._add(entry.equality, column)
+            elif operator in RANGE_OPERATORS:
+                TableAccess._add(entry.ranges, column)
+            elif operator == 'IS NOT NULL':
+                TableAccess._add(entry.not_null, column)
+            elif operator in ('!=', '<>') and placeholder and value == '':
+                TableAccess._add(entry.not_empty, column)
+
+        for match in _NOT_EMPTY_LITERAL_RE.finditer(statement):
+            table, column = match.group(1).lower(), match.group(2).lower()
+            if table in access:
+                TableAccess._add(access[table].not_empty, column)
+
+        for group in _GROUP_BY_RE.findall(statement):
+            for match in _COLUMN_RE.finditer(group):
+                table, column = match.group(1).lower(), match.group(2).lower()
+                if table in access:
+                    TableAccess._add(access[table].group_by, column)
+        return access
+
+    @staticmethod
+    def _index_name(table: str, key: List[str], where: Optional[str]) -> str:
+        name = f"idx_adv_{table}_{'_'.join(key)}"
+        if where:
+            name += '_partial'
+        if len(name) > 60:
+            digest = hashlib.sha1(name.encode()).hexdigest()[:8]
+            name = f"{name[:51]}_{digest}"
+        return name
+
+    def candidate(self, access: TableAccess, existing: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """The index that would serve ``access`` (None when one already does)"""
+        key = sorted(access.equality)
+        if access.ranges:
+            key.append(access.ranges[0])
+        key += [column for column in access.group_by if column not in key]
+        if not key:
+            return None
+        key = key[:MAX_INDEX_COLUMNS]
+
+        include = [column for column in access.columns if column not in key and column != 'id']
+        if len(key) + len(include) > MAX_INDEX_COLUMNS:
+            include = []  # Too wide to cover; settle for the key
+
+        conditions = []
+        for column in access.not_null:
+            conditions.append(f"{column} IS NOT NULL")
+        for column in access.not_empty:
+            if column not in access.not_null:
+                conditions.append(f"{column} IS NOT NULL")
+            conditions.append(f"{column} <> ''")
+        where = ' AND '.join(conditions) or None
+
+        for index in existing:
+            columns = [column.lower() for column in index['columns'] if column]
+            if columns[:len(key)] == key and all(column in columns for column in include):
+                return None
+
+        return {
+            'table': access.table,
+            'name': self._index_name(access.table, key, where),
+            'columns': key,
+            'include': include,
+            'where': where
+        }
+
+    @staticmethod
+    def _existing_indexes(connection) -> Dict[str, List[Dict[str, Any]]]:
+        from sqlalchemy import inspect as sa_inspect
+
+        inspector = sa_inspect(connection)
+        existing = {}
+        for table in inspector.get_table_names():
+            indexes = [
+                {'name': index['name'], 'columns': list(index['column_names'])}
+                for index in inspector.get_indexes(table)
+            ]
+            primary_key = inspector.get_pk_constraint(table).get('constrained_columns') or []
+            if primary_key:
+                indexes.append({'name': 'PRIMARY KEY', 'columns': primary_key})
+            existing[table.lower()] = indexes
+        return existing
+
+    # ------------------------------------------------------------------
+    # Analysis
+    # ------------------------------------------------------------------
+
+    def analyze(self, limit: int = 20, evaluate: bool = True) -> Dict[str, Any]:
+        """Recommend indexes for the heaviest captured statements"""
+        from app import db
+
+        started = time.perf_counter()
+        workload = [entry for entry in self.workload(limit * 3) if entry['calls'] >= self.min_calls][:limit]
+        candidates: Dict[Tuple, Dict[str, Any]] = {}
+        statements = []
+
+        with db.engine.connect() as connection:
+            dialect = connection.dialect.name
+            existing = self._existing_indexes(connection)
+            for entry in workload:
+                try:
+                    plan = self.explain(connection, entry['statement'], entry['parameters'])
+                except Exception as e:
+                    logger.debug(f"Could not EXPLAIN {entry['fingerprint'][:120]}: {e}")
+                    connection.rollback()
+                    continue
+                entry = dict(entry, plan=plan)
+                statements.append(entry)
+                access = self.table_access(entry['statement'], entry['parameters'])
+                for table in plan['scans']:
+                    table_access = access.get(table.lower())
+                    if table_access is None:
+                        continue
+                    candidate = self.candidate(table_access, existing.get(table.lower(), []))
+                    if candidate is None:
+                        continue
+                    identity = (candidate['table'], tuple(candidate['columns']),
+                                tuple(candidate['include']), candidate['where'])
+                    merged = candidates.setdefault(identity, dict(candidate, fingerprints=[], calls=0, workload_time=0.0))
+                    merged['fingerprints'].append(entry['fingerprint'])
+                    merged['calls'] += entry['calls']
+                    merged['workload_time'] += entry['total_time']
+
+            recommendations = list(candidates.values())
+            method = 'none'
+            if evaluate and recommendations:
+                if dialect == 'postgresql':
+                    method = self._evaluate_pg(connection, recommendations, statements)
+                elif dialect == 'sqlite':
+                    method = self._evaluate_sqlite(recommendations, statements)
+
+        for recommendation in recommendations:
+            recommendation.setdefault('estimated_saving_ms', None)
+            recommendation['ddl'] = self.ddl(recommendation, dialect)
+        recommendations.sort(key=lambda item: (item['estimated_saving_ms'] is not None,
+                                               item['estimated_saving_ms'] or item['workload_time']), reverse=True)
+        self.last_analysis = {
+            'analyzed_at': datetime.now().isoformat(),
+            'dialect': dialect,
+            'statements': len(statements),
+            'evaluation': method,
+            'duration_seconds': round(time.perf_counter() - started, 2),
+            'recommendations': recommendations
+        }
+        return self.last_analysis
+
+    def _evaluate_pg(self, connection, recommendations, statements) -> str:
+        """Estimate with hypopg hypothetical indexes; plan cost deltas otherwise unknown"""
+        try:
+            available = connection.exec_driver_sql(
+                "SELECT 1 FROM pg_extension WHERE extname = 'hypopg'").first() is not None
+        except Exception:
+            available = False
+        if not available:
+            logger.info("hypopg is not installed; recommendations are ranked by workload time only")
+            return 'workload-only'
+
+        by_fingerprint = {entry['fingerprint']: entry for entry in statements}
+        for recommendation in recommendations:
+            saving = 0.0
+            try:
+                connection.exec_driver_sql(
+                    "SELECT * FROM hypopg_create_index(%s)", (self.ddl(recommendation, 'postgresql', concurrently=False),))
+                for fingerprint in recommendation['fingerprints']:
+                    entry = by_fingerprint[fingerprint]
+                    before = entry['plan']['cost']
+                    after = self.explain(connection, entry['statement'], entry['parameters'])['cost']
+                    if before and after is not None and after < before:
+                        # Scale the measured time by the planner's relative cost reduction
+                        saving += entry['total_time'] * 1000 * (before - after) / before
+            except Exception as e:
+                logger.warning(f"Hypothetical evaluation of {recommendation['name']} failed: {e}")
+                connection.rollback()
+                continue
+            finally:
+                try:
+                    connection.exec_driver_sql("SELECT hypopg_reset()")
+                except Exception:
+                    pass
+            recommendation['estimated_saving_ms'] = round(saving, 1)
+        return 'hypopg'
+
+    def _evaluate_sqlite(self, recommendations, statements) -> str:
+        """Time the affected statements on a scratch copy, before and after each index"""
+        from app import db
+
+        source = db.engine.url.database
+        if not source or source == ':memory:' or not os.path.exists(source):
+            return 'workload-only'
+        if os.path.getsize(source) > self.scratch_max_mb * 1024 * 1024:
+            logger.info("Database is larger than INDEX_ADVISOR_SCRATCH_MAX_MB; skipping scratch benchmarks")
+            return 'workload-only'
+
+        scratch_dir = Path(tempfile.mkdtemp(prefix='index_advisor_'))
+        by_fingerprint = {entry['fingerprint']: entry for entry in statements}
+        try:
+            scratch_path = scratch_dir / 'scratch.db'
+            with sqlite3.connect(source) as live, sqlite3.connect(scratch_path) as scratch:
+                live.backup(scratch)
+            for recommendation in recommendations:
+                with sqlite3.connect(scratch_path) as scratch:
+                    affected = [by_fingerprint[fingerprint] for fingerprint in recommendation['fingerprints']]
+                    before = [self._time_statement(scratch, entry) for entry in affected]
+                    scratch.execute(self.ddl(recommendation, 'sqlite'))
+                    after = [self._time_statement(scratch, entry) for entry in affected]
+                    scratch.execute(f'DROP INDEX "{recommendation["name"]}"')
+                saving = sum(
+                    entry['calls'] * max(b - a, 0.0) * 1000
+                    for entry, b, a in zip(affected, before, after)
+                )
+                recommendation['estimated_saving_ms'] = round(saving, 1)
+                recommendation['measured'] = [
+                    {'fingerprint': entry['fingerprint'][:120], 'before_ms': round(b * 1000, 2), 'after_ms': round(a * 1000, 2)}
+                    for entry, b, a in zip(affected, before, after)
+                ]
+        except Exception as e:
+            logger.warning(f"Scratch-copy evaluation failed: {e}")
+            return 'workload-only'
+        finally:
+            shutil.rmtree(scratch_dir, ignore_errors=True)
+        return 'scratch-copy'
+
+    def _time_statement(self, connection, entry, runs: int = 3) -> float:
+        best = None
+        for _ in range(runs):
+            started = time.perf_counter()
+            connection.execute(entry['statement'], self._bind(entry['parameters'])).fetchall()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best or 0.0
+
+    # ------------------------------------------------------------------
+    # Output
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def ddl(recommendation: Dict[str, Any], dialect: str, concurrently: bool = True) -> str:
+        """CREATE INDEX statement for ``dialect``"""
+        table = recommendation['table']
+        columns = list(recommendation['columns'])
+        include = list(recommendation['include'])
+        if dialect == 'postgresql':
+            sql = f"CREATE INDEX {'CONCURRENTLY ' if concurrently else ''}{recommendation['name']} ON {table} ({', '.join(columns)})"
+            if include:
+                sql += f" INCLUDE ({', '.join(include)})"
+        else:
+            # SQLite has no INCLUDE: covering columns go at the end of the key
+            sql = f'CREATE INDEX "{recommendation["name"]}" ON "{table}" ({", ".join(columns + include)})'
+        if recommendation.get('where'):
+            sql += f" WHERE {recommendation['where']}"
+        return sql
+
+    @staticmethod
+    def _alembic_head(versions_dir: Path) -> Optional[str]:
+        revisions, parents = set(), set()
+        for path in versions_dir.glob('*.py'):
+            text = path.read_text(encoding='utf-8')
+            revision = re.search(r"^revision\s*=\s*['\"](\w+)['\"]", text, re.M)
+            parent = re.search(r"^down_revision\s*=\s*['\"](\w+)['\"]", text, re.M)
+            if revision:
+                revisions.add(revision.group(1))
+            if parent:
+                parents.add(parent.group(1))
+        heads = revisions - parents
+        if len(heads) > 1:
+            raise RuntimeError(f"Multiple Alembic heads ({', '.join(sorted(heads))}); merge them first")
+        return next(iter(heads), None)
+
+    def write_migration(self, recommendations: List[Dict[str, Any]], versions_dir: Optional[str] = None,
+                        message: str = 'Add indexes recommended by the index advisor') -> Path:
+        """Write an Alembic revision creating ``recommendations``"""
+        versions = Path(versions_dir) if versions_dir else Path(self.app.root_path).parent / 'migrations' / 'versions'
+        head = self._alembic_head(versions)
+        revision = uuid.uuid4().hex[:12]
+        now = datetime.now()
+        slug = re.sub(r'\W+', '_', message.lower()).strip('_')[:40]
+        path = versions / f"{now:%Y_%m_%d_%H%M}-{revision}_{slug}.py"
+
+        notes, upgrades_pg, upgrades_other, downgrades = [], [], [], []
+        for recommendation in recommendations:
+            saving = recommendation.get('estimated_saving_ms')
+            notes.append(
+                f"{recommendation['name']}: {recommendation['calls']} calls, "
+                f"{recommendation['workload_time'] * 1000:.0f}ms captured"
+                + (f", ~{saving:.0f}ms saved" if saving is not None else '')
+            )
+            where = recommendation.get('where')
+            pg_options = ['postgresql_concurrently=True']
+            if recommendation['include']:
+                pg_options.append(f"postgresql_include={recommendation['include']!r}")
+            if where:
+                pg_options.append(f"postgresql_where=sa.text({where!r})")
+            upgrades_pg.append(
+                f"            op.create_index({recommendation['name']!r}, {recommendation['table']!r}, "
+                f"{recommendation['columns']!r}, unique=False, {', '.join(pg_options)})"
+            )
+            other_options = f", sqlite_where=sa.text({where!r})" if where else ''
+            upgrades_other.append(
+                f"        op.create_index({recommendation['name']!r}, {recommendation['table']!r}, "
+                f"{recommendation['columns'] + recommendation['include']!r}, unique=False{other_options})"
+            )
+            downgrades.append(
+                f"    op.drop_index({recommendation['name']!r}, table_name={recommendation['table']!r})"
+            )
+
+        body = f'''"""{message}
+
+Revision ID: {revision}
+Revises: {head or ''}
+Create Date: {now}
+
+Generated by the index advisor from the captured query workload:
+{chr(10).join('  ' + note for note in notes)}
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = {revision!r}
+down_revision = {head!r}
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+        with op.get_context().autocommit_block():
+{chr(10).join(upgrades_pg)}
+    else:
+        # No INCLUDE outside PostgreSQL: covering columns extend the key
+{chr(10).join(upgrades_other)}
+
+
+def downgrade() -> None:
+{chr(10).join(reversed(downgrades))}
+'''
+        path.write_text(body, encoding='utf-8')
+        logger.info(f"Wrote index migration {path.name} ({len(recommendations)} indexes)")
+        return path
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            fingerprints = len(self._entries)
+            calls = sum(entry[0] for entry in self._entries.values())
+        last = self.last_analysis or {}
+        return {
+            'enabled': self.enabled,
+            'fingerprints': fingerprints,
+            'calls': calls,
+            'last_analysis': last.get('analyzed_at'),
+            'recommendations': [item['name'] for item in last.get('recommendations', [])]
+        }
+
+
+# Global index advisor instance (initialized with the query performance monitor)
+index_advisor = IndexAdvisor()
@@ -170,6 +170,25 @@ class IndexOptimizationService:
             except Exception as e:
                 logger.warning(f"Could not check indexes for {table_name}: {e}")
         
+        # Workload-driven covering/partial indexes from the last advisor run
+        from app.services.index_advisor_service import index_advisor
+        analysis = index_advisor.last_analysis or {}
+        for advice in analysis.get('recommendations', []):
+            recommendations['missing_indexes'].append({
+                'table': advice['table'],
+                'index': advice['name'],
+                'columns': advice['columns'],
+                'include': advice['include'],
+                'where': advice['where'],
+                'ddl': advice['ddl'],
+                'estimated_saving_ms': advice['estimated_saving_ms'],
+                'priority': 'high' if advice['estimated_saving_ms'] else 'medium'
+            })
+        if analysis:
+            recommendations['suggestions'].append(
+                "Workload-driven indexes ship as migrations: flask database advise-indexes --write-migration"
+            )
+        
         return recommendations
     
     def create_missing_indexes(self) -> Dict[str, Any]:
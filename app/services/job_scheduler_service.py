@@ -0,0 +1,391 @@
+"""
+Job Scheduler Service
+Cluster-wide singleton scheduler for periodic background jobs
+"""
+import json
+import logging
+import os
+import random
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# Extend the lease only if we still own it
+_RENEW_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+# Release the lease only if we still own it
+_RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class Job:
+    """A registered periodic job and its run state"""
+
+    def __init__(self, name: str, func: Callable[[], Any], interval: float,
+                 jitter: float = 0.1, daily_at: Optional[str] = None, leader_only: bool = True):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.jitter = jitter
+        self.daily_at = daily_at
+        self.leader_only = leader_only
+        self.enabled = True
+        self.running = False
+        self.next_run: Optional[float] = None
+        self.last_run: Optional[float] = None
+        self.last_duration_ms: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.runs = 0
+        self.failures = 0
+
+    def schedule_next(self, now: float):
+        """Compute the next run time from the last run (or now)"""
+        if self.daily_at:
+            hour, minute = (int(part) for part in self.daily_at.split(':'))
+            after = datetime.fromtimestamp(max(now, self.last_run or 0))
+            candidate = after.replace(hour=hour, minute=minute, second=0, microsecond=0)
+            if candidate <= after:
+                candidate += timedelta(days=1)
+            self.next_run = candidate.timestamp()
+            return
+
+        spread = random.uniform(0, self.interval * self.jitter) if self.jitter else 0
+        if self.last_run is None:
+            # First run: start soon, spread out so jobs do not all fire at once
+            self.next_run = now + spread
+        else:
+            self.next_run = max(self.last_run + self.interval + spread, now)
+
+    def to_dict(self) -> Dict[str, Any]:
+        def iso(ts):
+            return datetime.fromtimestamp(ts, timezone.utc).isoformat() if ts else None
+
+        return {
+            'name': self.name,
+            'interval': self.interval,
+            'daily_at': self.daily_at,
+            'leader_only': self.leader_only,
+            'enabled': self.enabled,
+            'running': self.running,
+            'next_run': iso(self.next_run),
+            'last_run': iso(self.last_run),
+            'last_duration_ms': self.last_duration_ms,
+            'last_error': self.last_error,
+            'runs': self.runs,
+            'failures': self.failures
+        }
+
+
+class JobScheduler:
+    """Run each registered job exactly once per cluster.
+
+    Every worker starts the scheduler, but only the holder of the leader
+    lease (a Redis key with a TTL, or an exclusive lock file when Redis is
+    unavailable) dispatches jobs. Followers only wake up to retry the lease
+    every ``leader_ttl / 3`` seconds. Last-run times are persisted in Redis
+    so a newly elected leader continues the schedule instead of restarting it.
+
+    Jobs registered with ``leader_only=False`` sample process-local state
+    (psutil gauges, the SQLAlchemy pool) and run in every worker instead;
+    their schedule is kept per process and never persisted.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.enabled = True
+        self.instance_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.lock_key = 'pipeline:scheduler:leader'
+        self.state_key = 'pipeline:scheduler:jobs'
+        self.lock_file = None
+        self.leader_ttl = 30
+        self.tick_interval = 1.0
+        self.max_workers = 2
+        self.jobs: Dict[str, Job] = {}
+        self.is_leader = False
+        self._lease_checked_at = 0.0
+        self._lock_handle = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+        self.stats = {
+            'elections_won': 0,
+            'leadership_lost': 0,
+            'dispatched': 0,
+            'skipped_overlap': 0
+        }
+
+    def init_app(self, app):
+        """Configure from app config"""
+        self.app = app
+        self.enabled = app.config.get('SCHEDULER_ENABLED', True)
+        self.lock_key = app.config.get('SCHEDULER_LOCK_KEY', self.lock_key)
+        self.state_key = app.config.get('SCHEDULER_STATE_KEY', self.state_key)
+        self.leader_ttl = app.config.get('SCHEDULER_LEADER_TTL', 30)
+        self.tick_interval = app.config.get('SCHEDULER_TICK_INTERVAL', 1.0)
+        self.max_workers = app.config.get('SCHEDULER_MAX_WORKERS', 2)
+        self.lock_file = app.config.get('SCHEDULER_LOCK_FILE') or os.path.join(
+            app.instance_path, 'scheduler.lock')
+
+    def register(self, name: str, func: Callable[[], Any], interval: float = 60,
+                 jitter: float = 0.1, daily_at: Optional[str] = None, leader_only: bool = True) -> Job:
+        """Register (or replace) a periodic job; ``daily_at`` is local 'HH:MM'
+
+        ``leader_only=False`` runs the job in every process, for jobs that
+        measure the process they run in.
+        """
+        job = Job(name, func, interval, jitter=jitter, daily_at=daily_at, leader_only=leader_only)
+        with self._lock:
+            previous = self.jobs.get(name)
+            if previous:
+                job.last_run = previous.last_run
+            if self.is_leader or not leader_only:
+                job.schedule_next(time.time())
+            self.jobs[name] = job
+        return job
+
+    def unregister(self, name: str):
+        with self._lock:
+            self.jobs.pop(name, None)
+
+    def start(self):
+        """Start the election/dispatch loop"""
+        if not self.enabled:
+            logger.info("Job scheduler disabled in configuration")
+            return
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="ScheduledJob")
+        self._thread = threading.Thread(target=self._run, daemon=True, name="JobScheduler")
+        self._thread.start()
+        logger.info(f"Job scheduler started ({len(self.jobs)} jobs, instance {self.instance_id})")
+
+    def stop(self, timeout: float = 5.0):
+        """Stop dispatching and give up leadership"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+        if self._executor:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        self._release()
+        logger.info("Job scheduler stopped")
+
+    def run_now(self, name: str) -> bool:
+        """Dispatch a job immediately (only on the leader, unless it runs per process)"""
+        job = self.jobs.get(name)
+        if not job or (job.leader_only and not self.is_leader) or not self._executor:
+            return False
+        return self._dispatch(job)
+
+    # ------------------------------------------------------------------
+    # Loop
+    # ------------------------------------------------------------------
+
+    def _run(self):
+        renew_every = max(self.leader_ttl / 3.0, self.tick_interval)
+        while not self._stop_event.is_set():
+            now = time.time()
+            if now - self._lease_checked_at >= renew_every:
+                self._lease_checked_at = now
+                self._update_leadership()
+
+            local_jobs = False
+            for job in list(self.jobs.values()):
+                if job.leader_only and not self.is_leader:
+                    continue
+                local_jobs = local_jobs or not job.leader_only
+                if job.enabled and job.next_run is not None and job.next_run <= now:
+                    self._dispatch(job)
+            wait = self.tick_interval if self.is_leader or local_jobs else renew_every
+            self._stop_event.wait(wait)
+
+    def _update_leadership(self):
+        was_leader = self.is_leader
+        try:
+            self.is_leader = self._renew() if was_leader else self._acquire()
+        except Exception as e:
+            logger.warning(f"Scheduler leader election failed: {e}")
+            self.is_leader = False
+
+        if self.is_leader and not was_leader:
+            self.stats['elections_won'] += 1
+            logger.info(f"Scheduler leadership acquired by {self.instance_id}")
+            self._load_state()
+            now = time.time()
+            for job in self.jobs.values():
+                if job.leader_only:
+                    job.schedule_next(now)
+        elif was_leader and not self.is_leader:
+            self.stats['leadership_lost'] += 1
+            logger.warning(f"Scheduler leadership lost by {self.instance_id}")
+
+    def _dispatch(self, job: Job) -> bool:
+        if job.running:
+            self.stats['skipped_overlap'] += 1
+            job.schedule_next(time.time())
+            return False
+        job.running = True
+        job.next_run = None
+        self.stats['dispatched'] += 1
+        self._executor.submit(self._execute, job)
+        return True
+
+    def _execute(self, job: Job):
+        started = time.perf_counter()
+        job.last_run = time.time()
+        try:
+            if self.app is not None:
+                with self.app.app_context():
+                    job.func()
+            else:
+                job.func()
+            job.last_error = None
+        except Exception as e:
+            job.failures += 1
+            job.last_error = str(e)
+            logger.error(f"Scheduled job {job.name} failed: {e}")
+        finally:
+            job.runs += 1
+            job.last_duration_ms = round((time.perf_counter() - started) * 1000, 2)
+            job.running = False
+            job.schedule_next(time.time())
+            self._save_state(job)
+
+    # ------------------------------------------------------------------
+    # Leader lease
+    # ------------------------------------------------------------------
+
+    @property
+    def redis_client(self):
+        from app.services.redis_service import redis_service
+        if redis_service.connected and redis_service.redis_client:
+            return redis_service.redis_client
+        return None
+
+    def _acquire(self) -> bool:
+        client = self.redis_client
+        if client is not None:
+            return bool(client.set(self.lock_key, self.instance_id, nx=True,
+                                   px=int(self.leader_ttl * 1000)))
+        return self._acquire_file_lock()
+
+    def _renew(self) -> bool:
+        client = self.redis_client
+        if client is not None:
+            return bool(client.eval(_RENEW_SCRIPT, 1, self.lock_key, self.instance_id,
+                                    int(self.leader_ttl * 1000)))
+        return self._lock_handle is not None
+
+    def _release(self):
+        if not self.is_leader:
+            return
+        self.is_leader = False
+        client = self.redis_client
+        try:
+            if client is not None:
+                client.eval(_RELEASE_SCRIPT, 1, self.lock_key, self.instance_id)
+            if self._lock_handle is not None:
+                self._lock_handle.close()
+                self._lock_handle = None
+        except Exception as e:
+            logger.warning(f"Failed to release scheduler leadership: {e}")
+
+    def _acquire_file_lock(self) -> bool:
+        """Single-host fallback: an exclusive, non-blocking lock on a file"""
+        if self._lock_handle is not None:
+            return True
+        if fcntl is None:
+            # No cross-process lock available; behave as a single instance
+            return True
+        os.makedirs(os.path.dirname(self.lock_file), exist_ok=True)
+        handle = open(self.lock_file, 'a')
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            handle.close()
+            return False
+        self._lock_handle = handle
+        return True
+
+    # ------------------------------------------------------------------
+    # Persisted job state
+    # ------------------------------------------------------------------
+
+    def _load_state(self):
+        client = self.redis_client
+        if client is None:
+            return
+        try:
+            state = client.hgetall(self.state_key)
+        except Exception as e:
+            logger.warning(f"Could not load scheduler state: {e}")
+            return
+        for name, raw in state.items():
+            job = self.jobs.get(name)
+            if job is None or not job.leader_only:
+                continue
+            try:
+                job.last_run = json.loads(raw).get('last_run')
+            except (TypeError, ValueError):
+                continue
+
+    def _save_state(self, job: Job):
+        client = self.redis_client
+        if client is None or not job.leader_only:
+            return
+        try:
+            client.hset(self.state_key, job.name, json.dumps({
+                'last_run': job.last_run,
+                'last_duration_ms': job.last_duration_ms,
+                'last_error': job.last_error,
+                'instance': self.instance_id
+            }))
+        except Exception as e:
+            logger.warning(f"Could not save scheduler state for {job.name}: {e}")
+
+    def get_status(self) -> Dict[str, Any]:
+        """Get leadership, job registry and dispatch metrics"""
+        leader = None
+        client = self.redis_client
+        if client is not None:
+            try:
+                leader = client.get(self.lock_key)
+            except Exception:
+                leader = None
+        return {
+            'enabled': self.enabled,
+            'running': self._thread is not None and self._thread.is_alive(),
+            'instance_id': self.instance_id,
+            'is_leader': self.is_leader,
+            'leader': leader or (self.instance_id if self.is_leader else None),
+            'backend': 'redis' if client is not None else 'file_lock',
+            'jobs': {name: job.to_dict() for name, job in self.jobs.items()},
+            **self.stats
+        }
+
+
+# Global job scheduler instance (initialized in app factory)
+job_scheduler = JobScheduler()
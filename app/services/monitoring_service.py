@@ -145,13 +145,17 @@ class MonitoringService:
         """Background monitoring loop"""
         while self.monitoring_active:
             try:
-                self._collect_system_metrics()
-                self._check_thresholds()
+                self.collect_once()
                 time.sleep(interval)
             except Exception as e:
                 logger.error(f"Error in monitoring loop: {e}")
                 time.sleep(interval)
     
+    def collect_once(self):
+        """Collect one round of system metrics and evaluate alert thresholds"""
+        self._collect_system_metrics()
+        self._check_thresholds()
+    
     def _collect_system_metrics(self):
         """Collect system metrics"""
         try:
@@ -18,6 +18,7 @@ from app.models.user import User
 from app.models.config import Option, UserSettings, ExchangeRate
 from app.models.financial import PspTrack, DailyBalance
 from app.services.monitoring_service import get_monitoring_service
+from app.services.dimension_service import dimension_service
 
 logger = logging.getLogger(__name__)
 
@@ -177,8 +178,8 @@ class OptimizedQueryService:
             ).group_by(Transaction.date).order_by(Transaction.date).all()
             
             # Single optimized query for PSP breakdown
-            psp_breakdown = db.session.query(
-                Transaction.psp,
+            psp_breakdown = dimension_service.grouped_query(
+                'psp',
                 func.count(Transaction.id).label('transaction_count'),
                 func.sum(Transaction.amount).label('total_amount'),
                 func.sum(Transaction.commission).label('total_commission'),
@@ -186,7 +187,7 @@ class OptimizedQueryService:
             ).filter(
                 Transaction.date >= start_date,
                 Transaction.date <= end_date
-            ).group_by(Transaction.psp).order_by(desc(func.sum(Transaction.amount))).all()
+            ).order_by(desc(func.sum(Transaction.amount))).all()
             
             # Calculate derived metrics
             total_revenue = business_metrics.total_revenue or Decimal('0')
@@ -273,8 +274,8 @@ class OptimizedQueryService:
             start_date = end_date - timedelta(days=days)
             
             # Single optimized query for PSP track summary
-            psp_summary = db.session.query(
-                Transaction.psp,
+            psp_summary = dimension_service.grouped_query(
+                'psp',
                 func.count(Transaction.id).label('transaction_count'),
                 func.sum(Transaction.amount).label('total_amount'),
                 func.sum(Transaction.commission).label('total_commission'),
@@ -285,7 +286,7 @@ class OptimizedQueryService:
             ).filter(
                 Transaction.date >= start_date,
                 Transaction.date <= end_date
-            ).group_by(Transaction.psp).order_by(desc(func.sum(Transaction.amount))).all()
+            ).order_by(desc(func.sum(Transaction.amount))).all()
             
             # Single optimized query for daily PSP data
             daily_psp_data = db.session.query(
@@ -413,15 +414,15 @@ class OptimizedQueryService:
             ).group_by(Transaction.currency).all()
             
             # Single optimized query for PSP breakdown
-            psp_stats = db.session.query(
-                Transaction.psp,
+            psp_stats = dimension_service.grouped_query(
+                'psp',
                 func.count(Transaction.id).label('count'),
                 func.sum(Transaction.amount).label('total_amount'),
                 func.avg(Transaction.amount).label('avg_amount')
             ).filter(
                 Transaction.date >= start_date,
                 Transaction.date <= end_date
-            ).group_by(Transaction.psp).all()
+            ).all()
             
             # Single optimized query for daily trends
             daily_trends = db.session.query(
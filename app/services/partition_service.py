@@ -0,0 +1,373 @@
+"""
+Transaction Partition Service
+Monthly range partitions of the transactions table on PostgreSQL
+"""
+import logging
+import re
+import time
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+PARENT = 'transactions'
+LEGACY = 'transactions_legacy'
+DEFAULT_PARTITION = 'transactions_default'
+_PARTITION_RE = re.compile(r'^transactions_y(\d{4})m(\d{2})$')
+
+
+def month_start(value) -> date:
+    if isinstance(value, datetime):
+        value = value.date()
+    return value.replace(day=1)
+
+
+def add_months(value: date, months: int) -> date:
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARENT}_y{month.year:04d}m{month.month:02d}"
+
+
+class TransactionPartitionService:
+    """Keep ``transactions`` range-partitioned by month on PostgreSQL.
+
+    Partitioning is opt-in: ``scripts/partition_transactions.py convert``
+    rebuilds the table as ``PARTITION BY RANGE (date)`` with one partition
+    per month plus a DEFAULT partition. Queries are unchanged; every
+    month-scoped filter on ``date`` is pruned to its partitions by the
+    planner.
+
+    Once partitioned, the scheduler creates upcoming months ahead of time
+    and, when ``TRANSACTION_PARTITION_ARCHIVE_AFTER_MONTHS`` is set, detaches
+    old months and streams them to compressed CSV (and S3) before dropping
+    them. On SQLite, or while the table is not partitioned, every method is
+    a no-op and the single-table layout stays as it is.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.premake_months = 3
+        self.archive_after_months = 0
+        self.archive_dir = 'archives'
+        self._partitioned: Optional[bool] = None
+        self._checked_at = 0.0
+        self.stats = {
+            'partitions_created': 0,
+            'partitions_archived': 0,
+            'rows_archived': 0,
+            'last_maintenance': None
+        }
+
+    def init_app(self, app):
+        self.app = app
+        self.premake_months = app.config.get('TRANSACTION_PARTITION_PREMAKE_MONTHS', 3)
+        self.archive_after_months = app.config.get('TRANSACTION_PARTITION_ARCHIVE_AFTER_MONTHS', 0)
+        self.archive_dir = app.config.get('TRANSACTION_PARTITION_ARCHIVE_DIR', 'archives')
+
+    # ------------------------------------------------------------------
+    # Catalog
+    # ------------------------------------------------------------------
+
+    def is_partitioned(self, connection=None) -> bool:
+        """True when ``transactions`` is a partitioned PostgreSQL table (cached 10 minutes)"""
+        if self._partitioned is not None and time.monotonic() - self._checked_at < 600:
+            return self._partitioned
+        from app import db
+
+        if db.engine.dialect.name != 'postgresql':
+            self._partitioned = False
+        elif connection is not None:
+            self._partitioned = self._check_partitioned(connection)
+        else:
+            with db.engine.connect() as conn:
+                self._partitioned = self._check_partitioned(conn)
+        self._checked_at = time.monotonic()
+        return self._partitioned
+
+    @staticmethod
+    def _check_partitioned(connection) -> bool:
+        return connection.exec_driver_sql(
+            "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+            "WHERE c.relname = %s AND pg_table_is_visible(c.oid)", (PARENT,)
+        ).first() is not None
+
+    @staticmethod
+    def partitions(connection) -> Dict[str, Optional[date]]:
+        """Attached partitions: name -> month (None for the DEFAULT partition)"""
+        rows = connection.exec_driver_sql(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = %s::regclass", (PARENT,)
+        ).all()
+        result = {}
+        for (name,) in rows:
+            match = _PARTITION_RE.match(name)
+            result[name] = date(int(match.group(1)), int(match.group(2)), 1) if match else None
+        return result
+
+    # ------------------------------------------------------------------
+    # Partition creation
+    # ------------------------------------------------------------------
+
+    def ensure_months(self, connection, months: Iterable[date]) -> List[str]:
+        """Create the monthly partitions for ``months`` that do not exist yet
+
+        Rows for a new month that already landed in the DEFAULT partition
+        are moved into the new partition before it is attached.
+        """
+        existing = set(self.partitions(connection))
+        created = []
+        for month in sorted({month_start(m) for m in months}):
+            name = partition_name(month)
+            if name in existing:
+                continue
+            start, end = month.isoformat(), add_months(month, 1).isoformat()
+            bounds = f"FOR VALUES FROM ('{start}') TO ('{end}')"
+            stray = DEFAULT_PARTITION in existing and connection.exec_driver_sql(
+                f"SELECT 1 FROM {DEFAULT_PARTITION} WHERE date >= %s AND date < %s LIMIT 1", (start, end)
+            ).first() is not None
+            if stray:
+                connection.exec_driver_sql(
+                    f"CREATE TABLE {name} (LIKE {PARENT} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+                connection.exec_driver_sql(
+                    f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE date >= %s AND date < %s RETURNING *) "
+                    f"INSERT INTO {name} SELECT * FROM moved", (start, end))
+                connection.exec_driver_sql(f"ALTER TABLE {PARENT} ATTACH PARTITION {name} {bounds}")
+            else:
+                connection.exec_driver_sql(f"CREATE TABLE {name} PARTITION OF {PARENT} {bounds}")
+            existing.add(name)
+            created.append(name)
+        self.stats['partitions_created'] += len(created)
+        return created
+
+    def ensure_partitions(self, through: Optional[date] = None) -> List[str]:
+        """Create partitions from this month through ``premake_months`` ahead"""
+        from app import db
+
+        if not self.is_partitioned():
+            return []
+        first = month_start(date.today())
+        last = month_start(through) if through else add_months(first, self.premake_months)
+        months = []
+        while first <= last:
+            months.append(first)
+            first = add_months(first, 1)
+        with db.engine.begin() as conn:
+            created = self.ensure_months(conn, months)
+        if created:
+            logger.info(f"Created transaction partitions: {', '.join(created)}")
+        return created
+
+    def prepare_bulk_load(self, session, transactions: List[Any]):
+        """Create partitions for a batch about to be inserted and order it by date
+
+        Runs on the session's connection, so the partitions commit with the
+        import. Sorting keeps consecutive inserts in the same partition.
+        """
+        if not transactions:
+            return
+        transactions.sort(key=lambda obj: obj.date)
+        connection = session.connection()
+        if not self.is_partitioned(connection):
+            return
+        created = self.ensure_months(connection, {obj.date for obj in transactions})
+        if created:
+            logger.info(f"Created transaction partitions for import: {', '.join(created)}")
+
+    # ------------------------------------------------------------------
+    # Conversion
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _legacy_name(name: str) -> str:
+        return (name.rsplit('.', 1)[-1][:63 - len('_legacy')]) + '_legacy'
+
+    def convert(self, drop_legacy: bool = False) -> Dict[str, Any]:
+        """Rebuild ``transactions`` as a monthly range-partitioned table
+
+        One transaction holding an exclusive lock on the table: the old
+        table is renamed to ``transactions_legacy`` (indexes suffixed
+        ``_legacy``), the partitioned table is created with the same
+        columns, defaults, id sequence, foreign keys and indexes, and the
+        rows are copied over. The primary key becomes ``(id, date)``, as
+        PostgreSQL requires the partition key in unique constraints.
+        """
+        from app import db
+
+        if db.engine.dialect.name != 'postgresql':
+            raise RuntimeError("Partitioning is only available on PostgreSQL")
+        started = time.perf_counter()
+        with db.engine.begin() as conn:
+            if self._check_partitioned(conn):
+                return {'converted': False, 'reason': 'already partitioned'}
+            conn.exec_driver_sql(f"LOCK TABLE {PARENT} IN ACCESS EXCLUSIVE MODE")
+
+            unique = conn.exec_driver_sql(
+                "SELECT indexrelid::regclass::text FROM pg_index "
+                "WHERE indrelid = %s::regclass AND indisunique AND NOT indisprimary", (PARENT,)
+            ).scalars().all()
+            if unique:
+                raise RuntimeError(f"Unique indexes without the partition key: {', '.join(unique)}")
+            indexes = conn.exec_driver_sql(
+                "SELECT indexrelid::regclass::text, indisprimary, pg_get_indexdef(indexrelid) "
+                "FROM pg_index WHERE indrelid = %s::regclass", (PARENT,)
+            ).all()
+            foreign_keys = conn.exec_driver_sql(
+                "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+                "WHERE conrelid = %s::regclass AND contype = 'f'", (PARENT,)
+            ).all()
+            sequence = conn.exec_driver_sql("SELECT pg_get_serial_sequence(%s, 'id')", (PARENT,)).scalar()
+
+            conn.exec_driver_sql(f"ALTER TABLE {PARENT} RENAME TO {LEGACY}")
+            for name, _, _ in indexes:
+                conn.exec_driver_sql(f'ALTER INDEX {name} RENAME TO "{self._legacy_name(name)}"')
+
+            conn.exec_driver_sql(
+                f"CREATE TABLE {PARENT} (LIKE {LEGACY} INCLUDING DEFAULTS INCLUDING CONSTRAINTS "
+                f"INCLUDING STORAGE INCLUDING COMMENTS) PARTITION BY RANGE (date)")
+            conn.exec_driver_sql(f"ALTER TABLE {PARENT} ADD CONSTRAINT {PARENT}_pkey PRIMARY KEY (id, date)")
+            if sequence:
+                # The sequence must outlive transactions_legacy
+                conn.exec_driver_sql(f"ALTER SEQUENCE {sequence} OWNED BY {PARENT}.id")
+
+            low, high = conn.exec_driver_sql(f"SELECT MIN(date), MAX(date) FROM {LEGACY}").first()
+            first = month_start(low or date.today())
+            last = max(month_start(high or date.today()), add_months(month_start(date.today()), self.premake_months))
+            months = []
+            while first <= last:
+                months.append(first)
+                first = add_months(first, 1)
+            self.ensure_months(conn, months)
+            conn.exec_driver_sql(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {PARENT} DEFAULT")
+
+            rows = conn.exec_driver_sql(f"INSERT INTO {PARENT} SELECT * FROM {LEGACY}").rowcount
+
+            # Index definitions still read "ON <schema>.transactions", now the partitioned table
+            for _, primary, definition in indexes:
+                if not primary:
+                    conn.exec_driver_sql(definition)
+            for name, definition in foreign_keys:
+                conn.exec_driver_sql(f'ALTER TABLE {PARENT} ADD CONSTRAINT "{name}" {definition}')
+
+            if drop_legacy:
+                conn.exec_driver_sql(f"DROP TABLE {LEGACY}")
+            conn.exec_driver_sql(f"ANALYZE {PARENT}")
+
+        self._partitioned = None
+        return {
+            'converted': True,
+            'rows': rows,
+            'partitions': len(months) + 1,
+            'legacy_table': None if drop_legacy else LEGACY,
+            'duration_seconds': round(time.perf_counter() - started, 2)
+        }
+
+    # ------------------------------------------------------------------
+    # Archiving
+    # ------------------------------------------------------------------
+
+    def archive(self, before: date, drop: bool = True) -> List[Dict[str, Any]]:
+        """Detach every monthly partition older than ``before`` and archive it
+
+        Each partition is streamed with ``COPY ... TO STDOUT (FORMAT csv,
+        HEADER)`` through the backup compressor (and S3 uploader, when
+        configured) into ``TRANSACTION_PARTITION_ARCHIVE_DIR``, next to a
+        JSON manifest. Load an archive back with ``COPY transactions FROM
+        STDIN (FORMAT csv, HEADER)``.
+        """
+        from app import db
+        from app.services.backup_service import BackupService
+
+        if not self.is_partitioned():
+            return []
+        cutoff = month_start(before)
+        with db.engine.connect() as conn:
+            old = sorted(
+                (month, name) for name, month in self.partitions(conn).items()
+                if month is not None and add_months(month, 1) <= cutoff
+            )
+        if not old:
+            return []
+
+        archive_dir = Path(self.archive_dir)
+        archive_dir.mkdir(parents=True, exist_ok=True)
+        backup = BackupService({**self.app.config, 'BACKUP_DIR': str(archive_dir)})
+        archived = []
+        detached = False
+        try:
+            for month, name in old:
+                with db.engine.begin() as conn:
+                    conn.exec_driver_sql(f"ALTER TABLE {PARENT} DETACH PARTITION {name}")
+                sink = backup._open_sink(name)
+                raw = db.engine.raw_connection()
+                try:
+                    cursor = raw.cursor()
+                    cursor.execute(f"SELECT COUNT(*) FROM {name}")
+                    rows = cursor.fetchone()[0]
+                    cursor.copy_expert(f"COPY {name} TO STDOUT WITH (FORMAT csv, HEADER)", sink)
+                    cursor.close()
+                    raw.commit()
+                    sink.close()
+                except Exception:
+                    sink.abort()
+                    raw.close()
+                    # Put the partition back; nothing was lost
+                    with db.engine.begin() as conn:
+                        conn.exec_driver_sql(
+                            f"ALTER TABLE {PARENT} ATTACH PARTITION {name} FOR VALUES FROM "
+                            f"('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')")
+                    raise
+                raw.close()
+                detached = True
+
+                manifest = {
+                    'table': PARENT,
+                    'partition': name,
+                    'month': month.isoformat(),
+                    'rows': rows,
+                    'format': 'csv',
+                    'file': sink.path.name,
+                    'created_at': datetime.now().isoformat(),
+                    **sink.summary()
+                }
+                backup._write_manifest(sink.path, manifest)
+                if sink.s3_error:
+                    logger.error(f"Archive of {name} kept locally only: {sink.s3_error}")
+                if drop:
+                    with db.engine.begin() as conn:
+                        conn.exec_driver_sql(f"DROP TABLE {name}")
+                archived.append(manifest)
+                self.stats['partitions_archived'] += 1
+                self.stats['rows_archived'] += rows
+                logger.info(f"Archived transaction partition {name}: {rows} rows -> {sink.path}")
+        finally:
+            # Detached months no longer count towards totals, so versioned
+            # responses that included them must be recomputed
+            if detached:
+                from app.services.data_version_service import data_version_service
+                data_version_service.bump_domain('transactions')
+        return archived
+
+    def maintain(self):
+        """Scheduler job: create upcoming partitions, archive expired ones"""
+        if not self.is_partitioned():
+            return
+        self.ensure_partitions()
+        if self.archive_after_months:
+            self.archive(add_months(month_start(date.today()), -self.archive_after_months))
+        self.stats['last_maintenance'] = datetime.now().isoformat()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'partitioned': bool(self._partitioned),
+            'premake_months': self.premake_months,
+            'archive_after_months': self.archive_after_months,
+            **self.stats
+        }
+
+
+# Global transaction partition service instance (initialized in app factory)
+transaction_partition_service = TransactionPartitionService()
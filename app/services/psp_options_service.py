@@ -8,6 +8,7 @@ from decimal import Decimal
 from app import db
 from app.models.config import Option
 from app.models.transaction import Transaction
+from app.services.dimension_service import dimension_service
 
 logger = logging.getLogger(__name__)
 
@@ -21,13 +22,15 @@ class PspOptionsService:
     def get_psps_from_database() -> List[str]:
         """Get all unique PSPs from transaction database and option table"""
         try:
-            # Get distinct PSPs from transactions
-            psp_results = db.session.query(Transaction.psp).distinct().filter(
-                Transaction.psp.isnot(None),
-                Transaction.psp != ''
-            ).order_by(Transaction.psp).all()
-            
-            transaction_psps = [result[0] for result in psp_results]
+            # Get PSPs in use from the dimension table (DISTINCT over transactions until backfilled)
+            transaction_psps = dimension_service.names('psp')
+            if transaction_psps is None:
+                psp_results = db.session.query(Transaction.psp).distinct().filter(
+                    Transaction.psp.isnot(None),
+                    Transaction.psp != ''
+                ).order_by(Transaction.psp).all()
+                
+                transaction_psps = [result[0] for result in psp_results]
             
             # Get PSPs from option table (for historical data)
             option_results = db.session.query(Option.value).filter(
@@ -12,7 +12,7 @@ from app import db
 from app.models.transaction import Transaction
 from app.models.user import User
 from app.models.config import Option, UserSettings, ExchangeRate
-from app.services.enhanced_cache_service import cache_service
+from app.services.enhanced_cache_service import cache_service, TRANSACTION_CACHE_TAGS
 from app.utils.db_compat import ilike_compat
 
 # cache_invalidate helper function
@@ -241,17 +241,12 @@ class QueryService:
     
     @staticmethod
     def invalidate_transaction_cache():
-        """Invalidate all transaction-related cache entries"""
-        patterns = [
-            "transactions_by_date_range",
-            "daily_summary", 
-            "psp_summary",
-            "recent_transactions",
-            "transaction_stats"
-        ]
+        """Invalidate all transaction-related cache entries
         
-        for pattern in patterns:
-            cache_invalidate(pattern)
-        
-        logger.info(f"Invalidated transaction cache entries for patterns: {patterns}")
-        return len(patterns) 
\ No newline at end of file
+        Drops every entry tagged with a transaction cache tag in one Redis
+        round trip. Write paths that commit through a session should use
+        ``unit_of_work.invalidate`` instead, so this happens with the commit.
+        """
+        invalidated = cache_service.invalidate_transaction_cache()
+        logger.debug(f"Invalidated {invalidated} cache entries tagged {TRANSACTION_CACHE_TAGS}")
+        return invalidated
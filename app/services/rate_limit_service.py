@@ -2,10 +2,11 @@
 Enhanced Rate Limiting Service with Monitoring and Analytics
 Provides comprehensive rate limiting with detailed tracking and alerting
 """
+import json
 import time
 from typing import Dict, Any, Optional, List
 from datetime import datetime, timezone, timedelta
-from collections import defaultdict, deque
+from collections import defaultdict, deque, OrderedDict
 from flask import request, current_app
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
@@ -17,9 +18,10 @@ logger = get_logger("RateLimitService")
 
 
 class RateLimitTracker:
-    """Track rate limit events and violations"""
+    """Track rate limit events and violations (per-process fallback)"""
     
-    def __init__(self, max_events: int = 10000):
+    def __init__(self, max_events: int = 10000, max_ips: int = 10000):
+        self.max_ips = max_ips
         self.events: deque = deque(maxlen=max_events)
         self.violations: deque = deque(maxlen=1000)
         self.endpoint_stats: Dict[str, Dict[str, Any]] = defaultdict(lambda: {
@@ -29,13 +31,27 @@ class RateLimitTracker:
             'violations': 0,
             'last_reset': datetime.now(timezone.utc)
         })
-        self.ip_stats: Dict[str, Dict[str, Any]] = defaultdict(lambda: {
-            'total_requests': 0,
-            'violations': 0,
-            'first_seen': datetime.now(timezone.utc),
-            'last_seen': datetime.now(timezone.utc),
-            'endpoints': defaultdict(int)
-        })
+        # LRU-bounded so a scan from many addresses cannot grow memory without limit
+        self.ip_stats: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+    
+    def _ip_entry(self, ip: str) -> Dict[str, Any]:
+        """Get (or create) the stats entry for an IP, evicting the least recent"""
+        entry = self.ip_stats.get(ip)
+        if entry is None:
+            now = datetime.now(timezone.utc)
+            entry = {
+                'total_requests': 0,
+                'violations': 0,
+                'first_seen': now,
+                'last_seen': now,
+                'endpoints': defaultdict(int)
+            }
+            self.ip_stats[ip] = entry
+            while len(self.ip_stats) > self.max_ips:
+                self.ip_stats.popitem(last=False)
+        else:
+            self.ip_stats.move_to_end(ip)
+        return entry
     
     def record_request(self, endpoint: str, ip: str, allowed: bool, limit: Optional[str] = None):
         """Record a rate limit event"""
@@ -67,11 +83,12 @@ class RateLimitTracker:
             })
         
         # Update IP stats
-        self.ip_stats[ip]['total_requests'] += 1
-        self.ip_stats[ip]['last_seen'] = timestamp
-        self.ip_stats[ip]['endpoints'][endpoint] += 1
+        ip_entry = self._ip_entry(ip)
+        ip_entry['total_requests'] += 1
+        ip_entry['last_seen'] = timestamp
+        ip_entry['endpoints'][endpoint] += 1
         if not allowed:
-            self.ip_stats[ip]['violations'] += 1
+            ip_entry['violations'] += 1
         
         # Log violations
         if not allowed:
@@ -148,13 +165,226 @@ class RateLimitTracker:
         }
 
 
+class RedisRateLimitTracker:
+    """Cluster-wide rate limit telemetry in Redis using bucketed sliding windows.
+    
+    Counters are written into per-minute buckets that expire after the
+    window, so every worker contributes to (and reads) the same numbers.
+    Per-IP sorted sets are trimmed to ``max_ips_per_bucket`` heavy hitters,
+    keeping memory bounded no matter how many addresses are seen.
+    """
+    
+    KEY_PREFIX = "pipeline_ratelimit:telemetry"
+    
+    def __init__(self, redis_client, bucket_seconds: int = 60, window_buckets: int = 60,
+                 max_ips_per_bucket: int = 1000, max_violations: int = 1000):
+        self.redis = redis_client
+        self.bucket_seconds = bucket_seconds
+        self.window_buckets = window_buckets
+        self.max_ips_per_bucket = max_ips_per_bucket
+        self.max_violations = max_violations
+        self.ttl = bucket_seconds * (window_buckets + 1)
+    
+    def _bucket(self, ts: Optional[float] = None) -> int:
+        return int((ts or time.time()) // self.bucket_seconds)
+    
+    def _window(self) -> List[int]:
+        current = self._bucket()
+        return list(range(current - self.window_buckets + 1, current + 1))
+    
+    def _key(self, kind: str, bucket: int) -> str:
+        return f"{self.KEY_PREFIX}:{kind}:{bucket}"
+    
+    def record_request(self, endpoint: str, ip: str, allowed: bool, limit: Optional[str] = None):
+        """Record a rate limit event in the current bucket (one round trip)"""
+        bucket = self._bucket()
+        endpoints_key = self._key('endpoints', bucket)
+        ips_key = self._key('ips', bucket)
+        
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.hincrby(endpoints_key, f"{endpoint}|{'allowed' if allowed else 'blocked'}", 1)
+        pipe.expire(endpoints_key, self.ttl)
+        pipe.zincrby(ips_key, 1, ip)
+        pipe.zremrangebyrank(ips_key, 0, -(self.max_ips_per_bucket + 1))
+        pipe.expire(ips_key, self.ttl)
+        
+        if not allowed:
+            violators_key = self._key('violators', bucket)
+            pipe.zincrby(violators_key, 1, ip)
+            pipe.zremrangebyrank(violators_key, 0, -(self.max_ips_per_bucket + 1))
+            pipe.expire(violators_key, self.ttl)
+            pipe.lpush(f"{self.KEY_PREFIX}:violations", json.dumps({
+                'timestamp': datetime.now(timezone.utc).isoformat(),
+                'endpoint': endpoint,
+                'ip': ip,
+                'limit': limit
+            }))
+            pipe.ltrim(f"{self.KEY_PREFIX}:violations", 0, self.max_violations - 1)
+        
+        pipe.execute()
+        
+        if not allowed:
+            logger.warning(
+                f"Rate limit exceeded: {endpoint} from {ip}",
+                extra={
+                    'rate_limit': True,
+                    'endpoint': endpoint,
+                    'ip': ip,
+                    'limit': limit
+                }
+            )
+    
+    def _aggregate_endpoints(self) -> Dict[str, Dict[str, Any]]:
+        pipe = self.redis.pipeline(transaction=False)
+        for bucket in self._window():
+            pipe.hgetall(self._key('endpoints', bucket))
+        
+        stats: Dict[str, Dict[str, Any]] = {}
+        for counters in pipe.execute():
+            for field, count in counters.items():
+                endpoint, _, outcome = field.rpartition('|')
+                entry = stats.setdefault(endpoint, {
+                    'total_requests': 0, 'allowed': 0, 'blocked': 0, 'violations': 0
+                })
+                entry['total_requests'] += int(count)
+                entry[outcome] += int(count)
+                if outcome == 'blocked':
+                    entry['violations'] += int(count)
+        return stats
+    
+    def _aggregate_ips(self, kind: str, limit: int) -> tuple:
+        """Sum a per-bucket sorted set over the window: (top members, cardinality)"""
+        keys = [self._key(kind, bucket) for bucket in self._window()]
+        dest = f"{self.KEY_PREFIX}:agg:{kind}"
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.zunionstore(dest, keys)
+        pipe.expire(dest, 5)
+        pipe.zrevrange(dest, 0, limit - 1, withscores=True)
+        pipe.zcard(dest)
+        results = pipe.execute()
+        return results[2], results[3]
+    
+    def get_endpoint_stats(self, endpoint: Optional[str] = None) -> Dict[str, Any]:
+        """Get statistics for endpoint(s) over the sliding window"""
+        stats = self._aggregate_endpoints()
+        if endpoint:
+            return stats.get(endpoint, {})
+        return stats
+    
+    def get_ip_stats(self, ip: Optional[str] = None) -> Dict[str, Any]:
+        """Get statistics for IP(s) over the sliding window"""
+        keys_requests = [self._key('ips', bucket) for bucket in self._window()]
+        keys_violations = [self._key('violators', bucket) for bucket in self._window()]
+        if ip:
+            pipe = self.redis.pipeline(transaction=False)
+            for key in keys_requests + keys_violations:
+                pipe.zscore(key, ip)
+            scores = pipe.execute()
+            half = len(keys_requests)
+            return {
+                'total_requests': int(sum(score or 0 for score in scores[:half])),
+                'violations': int(sum(score or 0 for score in scores[half:]))
+            }
+        
+        top_ips, _ = self._aggregate_ips('ips', self.max_ips_per_bucket)
+        return {member: {'total_requests': int(score)} for member, score in top_ips}
+    
+    def get_recent_violations(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """Get recent rate limit violations (oldest first)"""
+        raw = self.redis.lrange(f"{self.KEY_PREFIX}:violations", 0, limit - 1)
+        return [json.loads(item) for item in reversed(raw)]
+    
+    def get_top_violators(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """Get top IPs by violation count over the sliding window"""
+        violators, _ = self._aggregate_ips('violators', limit)
+        recent = self.get_recent_violations(self.max_violations)
+        
+        result = []
+        for ip, violations in violators:
+            totals = self.get_ip_stats(ip)
+            endpoints: Dict[str, int] = defaultdict(int)
+            seen = []
+            for violation in recent:
+                if violation.get('ip') == ip:
+                    endpoints[violation.get('endpoint')] += 1
+                    seen.append(violation['timestamp'])
+            result.append({
+                'ip': ip,
+                'violations': int(violations),
+                'total_requests': totals['total_requests'],
+                'violation_rate': int(violations) / max(totals['total_requests'], 1) * 100,
+                'first_seen': min(seen) if seen else None,
+                'last_seen': max(seen) if seen else None,
+                'top_endpoints': dict(sorted(endpoints.items(), key=lambda x: x[1], reverse=True)[:5])
+            })
+        return result
+    
+    def get_summary(self) -> Dict[str, Any]:
+        """Get comprehensive rate limiting summary over the sliding window"""
+        endpoint_stats = self._aggregate_endpoints()
+        total_requests = sum(entry['total_requests'] for entry in endpoint_stats.values())
+        total_violations = sum(entry['violations'] for entry in endpoint_stats.values())
+        _, unique_ips = self._aggregate_ips('ips', 1)
+        
+        return {
+            'scope': 'cluster',
+            'window_seconds': self.bucket_seconds * self.window_buckets,
+            'total_requests': total_requests,
+            'total_violations': total_violations,
+            'violation_rate_percent': round(total_violations / max(total_requests, 1) * 100, 2),
+            'endpoints_tracked': len(endpoint_stats),
+            'unique_ips': unique_ips,
+            'top_violators': self.get_top_violators(5),
+            'recent_violations': self.get_recent_violations(20),
+            'timestamp': datetime.now(timezone.utc).isoformat()
+        }
+
+
 class EnhancedRateLimitService:
     """Enhanced rate limiting service with monitoring"""
     
-    def __init__(self, limiter: Limiter):
+    def __init__(self, limiter: Limiter, app=None):
         self.limiter = limiter
-        self.tracker = RateLimitTracker()
+        self.tracker = self._create_tracker(app)
         self._setup_hooks()
+        if app is not None:
+            app.after_request(self._record_response)
+    
+    def _create_tracker(self, app=None):
+        """Use shared Redis telemetry when Redis is connected, else per-process"""
+        try:
+            from app.services.redis_service import redis_service
+            if redis_service.connected and redis_service.redis_client:
+                config = app.config if app is not None else {}
+                logger.info("Rate limit telemetry stored in Redis (cluster-wide)")
+                return RedisRateLimitTracker(
+                    redis_service.redis_client,
+                    bucket_seconds=config.get('RATELIMIT_TELEMETRY_BUCKET_SECONDS', 60),
+                    window_buckets=config.get('RATELIMIT_TELEMETRY_WINDOW_BUCKETS', 60),
+                    max_ips_per_bucket=config.get('RATELIMIT_TELEMETRY_MAX_IPS', 1000)
+                )
+        except Exception as e:
+            logger.warning(f"Redis rate limit telemetry unavailable, using in-process tracker: {e}")
+        return RateLimitTracker()
+    
+    def _record_response(self, response):
+        """Record every limited request; 429 responses count as violations"""
+        try:
+            if request.method in ('OPTIONS', 'HEAD') or request.path.startswith('/static/'):
+                return response
+            limit = None
+            current_limit = getattr(self.limiter, 'current_limit', None)
+            if current_limit is not None:
+                limit = str(current_limit.limit)
+            self.tracker.record_request(
+                request.endpoint or request.path,
+                get_remote_address(),
+                allowed=response.status_code != 429,
+                limit=limit
+            )
+        except Exception as e:
+            logger.debug(f"Failed to record rate limit telemetry: {e}")
+        return response
     
     def _setup_hooks(self):
         """Setup rate limit hooks for tracking"""
@@ -222,17 +452,17 @@ class EnhancedRateLimitService:
 _rate_limit_service: Optional[EnhancedRateLimitService] = None
 
 
-def get_rate_limit_service(limiter: Optional[Limiter] = None) -> Optional[EnhancedRateLimitService]:
+def get_rate_limit_service(limiter: Optional[Limiter] = None, app=None) -> Optional[EnhancedRateLimitService]:
     """Get or create rate limit service instance"""
     global _rate_limit_service
     
     if _rate_limit_service is None and limiter:
-        _rate_limit_service = EnhancedRateLimitService(limiter)
+        _rate_limit_service = EnhancedRateLimitService(limiter, app=app)
     
     return _rate_limit_service
 
 
-def init_rate_limit_service(limiter: Limiter):
+def init_rate_limit_service(limiter: Limiter, app=None):
     """Initialize rate limit service"""
-    return get_rate_limit_service(limiter)
+    return get_rate_limit_service(limiter, app=app)
 
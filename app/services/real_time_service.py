@@ -10,17 +10,151 @@ from typing import Dict, Any, List, Optional, Set
 from flask import current_app
 from flask_socketio import SocketIO, emit, join_room, leave_room
 from app.services.event_service import EventService, Event, EventType
+from app.services.event_coalescing_service import EventCoalescer
 
 logger = logging.getLogger(__name__)
 
+
+class RoomRegistry:
+    """Cluster-wide connection and room membership tracking.
+    
+    Membership lives in Redis so every gunicorn worker reports the same
+    picture; falls back to per-process sets when Redis is unavailable.
+    """
+    
+    KEY_PREFIX = "realtime"
+    MEMBERSHIP_TTL = 86400  # Stale entries from crashed workers expire after a day
+    
+    def __init__(self):
+        self._local_connections: Dict[str, int] = {}
+        self._local_rooms: Dict[str, Set[str]] = {}
+    
+    def _client(self):
+        """Get Redis client if the shared Redis service is connected"""
+        try:
+            from app.services.redis_service import redis_service
+            if redis_service.connected and redis_service.redis_client:
+                return redis_service.redis_client
+        except Exception:
+            pass
+        return None
+    
+    def _connections_key(self) -> str:
+        return f"{self.KEY_PREFIX}:connections"
+    
+    def _rooms_key(self, user_id: str) -> str:
+        return f"{self.KEY_PREFIX}:rooms:{user_id}"
+    
+    def _room_index_key(self) -> str:
+        return f"{self.KEY_PREFIX}:room_index"
+    
+    def user_connected(self, user_id: str):
+        """Record a new socket for a user (users may hold several tabs)"""
+        self._local_connections[user_id] = self._local_connections.get(user_id, 0) + 1
+        client = self._client()
+        if client:
+            try:
+                pipe = client.pipeline(transaction=False)
+                pipe.hincrby(self._connections_key(), user_id, 1)
+                pipe.expire(self._connections_key(), self.MEMBERSHIP_TTL)
+                pipe.execute()
+            except Exception as e:
+                logger.warning(f"Failed to record connection for user {user_id}: {e}")
+    
+    def user_disconnected(self, user_id: str):
+        """Drop one socket for a user, clearing membership on the last one"""
+        remaining = self._local_connections.get(user_id, 0) - 1
+        if remaining > 0:
+            self._local_connections[user_id] = remaining
+        else:
+            self._local_connections.pop(user_id, None)
+            self._local_rooms.pop(user_id, None)
+        
+        client = self._client()
+        if client:
+            try:
+                count = client.hincrby(self._connections_key(), user_id, -1)
+                if count <= 0:
+                    pipe = client.pipeline(transaction=False)
+                    pipe.hdel(self._connections_key(), user_id)
+                    pipe.delete(self._rooms_key(user_id))
+                    pipe.srem(self._room_index_key(), user_id)
+                    pipe.execute()
+            except Exception as e:
+                logger.warning(f"Failed to record disconnect for user {user_id}: {e}")
+    
+    def join(self, user_id: str, room: str):
+        """Record that a user joined a room"""
+        self._local_rooms.setdefault(user_id, set()).add(room)
+        client = self._client()
+        if client:
+            try:
+                pipe = client.pipeline(transaction=False)
+                pipe.sadd(self._rooms_key(user_id), room)
+                pipe.expire(self._rooms_key(user_id), self.MEMBERSHIP_TTL)
+                pipe.sadd(self._room_index_key(), user_id)
+                pipe.execute()
+            except Exception as e:
+                logger.warning(f"Failed to record room join for user {user_id}: {e}")
+    
+    def leave(self, user_id: str, room: str):
+        """Record that a user left a room"""
+        if user_id in self._local_rooms:
+            self._local_rooms[user_id].discard(room)
+        client = self._client()
+        if client:
+            try:
+                client.srem(self._rooms_key(user_id), room)
+            except Exception as e:
+                logger.warning(f"Failed to record room leave for user {user_id}: {e}")
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get membership statistics (cluster-wide when Redis is available)"""
+        client = self._client()
+        if client:
+            try:
+                connections = client.hgetall(self._connections_key())
+                user_ids = sorted(client.smembers(self._room_index_key()))
+                pipe = client.pipeline(transaction=False)
+                for user_id in user_ids:
+                    pipe.smembers(self._rooms_key(user_id))
+                user_rooms = {
+                    user_id: sorted(rooms)
+                    for user_id, rooms in zip(user_ids, pipe.execute()) if rooms
+                }
+                return {
+                    'scope': 'cluster',
+                    'connected_users': sum(1 for count in connections.values() if int(count) > 0),
+                    'total_connections': sum(max(int(count), 0) for count in connections.values()),
+                    'total_rooms': len(set().union(*user_rooms.values())) if user_rooms else 0,
+                    'user_rooms': user_rooms
+                }
+            except Exception as e:
+                logger.warning(f"Failed to read cluster room membership, using local view: {e}")
+        
+        return {
+            'scope': 'worker',
+            'connected_users': len(self._local_connections),
+            'total_connections': sum(self._local_connections.values()),
+            'total_rooms': len(set().union(*self._local_rooms.values())) if self._local_rooms else 0,
+            'user_rooms': {user_id: sorted(rooms) for user_id, rooms in self._local_rooms.items()}
+        }
+
+
 class RealTimeService:
     """Service for managing real-time connections and data streaming"""
     
-    def __init__(self, socketio: SocketIO, event_service: EventService):
+    def __init__(self, socketio: SocketIO, event_service: EventService, coalesce_window_ms: int = 250):
         self.socketio = socketio
         self.event_service = event_service
         self.connected_users: Set[str] = set()
         self.user_rooms: Dict[str, Set[str]] = {}
+        self.room_registry = RoomRegistry()
+        
+        # High-volume data events are merged per room per window so bursts
+        # (bulk imports, bulk rate updates) produce bounded client traffic
+        self.coalescer = EventCoalescer(self._emit_to_room, window_ms=coalesce_window_ms)
+        self.coalescer.start()
         
         # Register event handlers
         self._register_event_handlers()
@@ -54,6 +188,7 @@ class RealTimeService:
                 self.connected_users.add(user_id)
                 join_room(f"user_{user_id}")
                 join_room("global")
+                self.room_registry.user_connected(user_id)
                 
                 logger.info(f"User {user_id} connected to real-time service")
                 emit('connected', {'status': 'success', 'user_id': user_id})
@@ -68,6 +203,7 @@ class RealTimeService:
                 self.connected_users.discard(user_id)
                 leave_room(f"user_{user_id}")
                 leave_room("global")
+                self.room_registry.user_disconnected(user_id)
                 
                 logger.info(f"User {user_id} disconnected from real-time service")
         
@@ -82,6 +218,7 @@ class RealTimeService:
                 if user_id not in self.user_rooms:
                     self.user_rooms[user_id] = set()
                 self.user_rooms[user_id].add(room)
+                self.room_registry.join(user_id, room)
                 
                 emit('joined_room', {'room': room})
                 logger.info(f"User {user_id} joined room {room}")
@@ -96,6 +233,7 @@ class RealTimeService:
                 leave_room(room)
                 if user_id in self.user_rooms:
                     self.user_rooms[user_id].discard(room)
+                self.room_registry.leave(user_id, room)
                 
                 emit('left_room', {'room': room})
                 logger.info(f"User {user_id} left room {room}")
@@ -134,24 +272,24 @@ class RealTimeService:
             logger.error(f"Error getting user ID from session: {e}")
         return None
     
+    def _emit_to_room(self, event_name: str, message: Dict[str, Any], room: str):
+        """Emit a (possibly coalesced) message to a room"""
+        self.socketio.emit(event_name, message, room=room)
+    
+    @staticmethod
+    def _event_payload(event: Event) -> Dict[str, Any]:
+        return {
+            'type': event.type.value,
+            'data': event.data,
+            'timestamp': event.timestamp.isoformat()
+        }
+    
     def _handle_transaction_events(self, event: Event):
         """Handle transaction-related events"""
         try:
-            # Broadcast to all users subscribed to transactions
-            self.socketio.emit('transaction_update', {
-                'type': event.type.value,
-                'data': event.data,
-                'timestamp': event.timestamp.isoformat()
-            }, room='global')
-            
-            # Send to specific user if transaction belongs to them
-            user_id = event.data.get('user_id')
-            if user_id:
-                self.socketio.emit('transaction_update', {
-                    'type': event.type.value,
-                    'data': event.data,
-                    'timestamp': event.timestamp.isoformat()
-                }, room=f"transactions_{user_id}")
+            # Every authenticated socket is in 'global', so a single broadcast
+            # covers the owner as well (no duplicate per-user emit)
+            self.coalescer.submit('transaction_update', self._event_payload(event), 'global')
                 
         except Exception as e:
             logger.error(f"Error handling transaction event: {e}")
@@ -159,22 +297,15 @@ class RealTimeService:
     def _handle_financial_events(self, event: Event):
         """Handle financial-related events"""
         try:
+            payload = self._event_payload(event)
             # Broadcast to all users subscribed to analytics
-            self.socketio.emit('financial_update', {
-                'type': event.type.value,
-                'data': event.data,
-                'timestamp': event.timestamp.isoformat()
-            }, room='global')
+            self.coalescer.submit('financial_update', payload, 'global')
             
             # Send to PSP track subscribers
             if event.type == EventType.PSP_TRACK_UPDATED:
                 psp_name = event.data.get('psp_name')
                 if psp_name:
-                    self.socketio.emit('psp_track_update', {
-                        'type': event.type.value,
-                        'data': event.data,
-                        'timestamp': event.timestamp.isoformat()
-                    }, room=f"psp_{psp_name}")
+                    self.coalescer.submit('psp_track_update', payload, f"psp_{psp_name}")
                 
         except Exception as e:
             logger.error(f"Error handling financial event: {e}")
@@ -216,17 +347,18 @@ class RealTimeService:
     
     def get_connection_stats(self) -> Dict[str, Any]:
         """Get real-time connection statistics"""
-        return {
-            'connected_users': len(self.connected_users),
-            'total_rooms': len(set().union(*self.user_rooms.values())) if self.user_rooms else 0,
-            'user_rooms': {user_id: list(rooms) for user_id, rooms in self.user_rooms.items()}
-        }
+        stats = self.room_registry.get_stats()
+        from flask import has_app_context
+        stats['message_queue'] = bool(has_app_context() and current_app.config.get('SOCKETIO_MESSAGE_QUEUE'))
+        stats['event_dispatcher'] = self.event_service.is_dispatcher_running()
+        stats['coalescing'] = self.coalescer.get_metrics()
+        return stats
 
 # Global real-time service instance (will be initialized in app factory)
 real_time_service = None
 
-def init_real_time_service(socketio: SocketIO, event_service: EventService):
+def init_real_time_service(socketio: SocketIO, event_service: EventService, coalesce_window_ms: int = 250):
     """Initialize the global real-time service"""
     global real_time_service
-    real_time_service = RealTimeService(socketio, event_service)
+    real_time_service = RealTimeService(socketio, event_service, coalesce_window_ms=coalesce_window_ms)
     return real_time_service
@@ -273,6 +273,10 @@ class ScalabilityService:
         self.auto_scaler.start_auto_scaling()
         logger.info("Scalability services started")
     
+    def check_scaling(self):
+        """Evaluate scaling conditions once"""
+        self.auto_scaler._check_scaling_conditions()
+    
     def stop_services(self):
         """Stop all scalability services"""
         self.auto_scaler.stop_auto_scaling()
@@ -115,6 +115,10 @@ class ScheduledBackupService:
                 logger.error(f"Error in scheduler loop: {e}", exc_info=True)
                 time.sleep(60)  # Fallback to 1 minute on error
     
+    def run_scheduled_backup(self):
+        """Run the daily backup (dispatched once per cluster by the job scheduler)"""
+        self._run_backup()
+    
     def trigger_backup_now(self):
         """Manually trigger a backup (for testing)"""
         logger.info("Manual backup triggered")
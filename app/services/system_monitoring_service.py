@@ -117,28 +117,32 @@ class SystemMonitoringService:
         """Main monitoring loop"""
         while self.monitoring_active:
             try:
-                # Collect system metrics
-                system_metrics = self._collect_system_metrics()
-                self.system_metrics_history.append(system_metrics)
-                
-                # Collect application metrics
-                app_metrics = self._collect_application_metrics()
-                self.application_metrics_history.append(app_metrics)
-                
-                # Update health status
-                self._update_health_status(system_metrics, app_metrics)
-                
+                self.collect_once()
                 time.sleep(interval)
                 
             except Exception as e:
                 logger.error(f"Error in monitoring loop: {e}")
                 time.sleep(interval)
     
+    def collect_once(self):
+        """Collect one sample of system/application metrics and update health"""
+        # Collect system metrics
+        system_metrics = self._collect_system_metrics()
+        self.system_metrics_history.append(system_metrics)
+        
+        # Collect application metrics
+        app_metrics = self._collect_application_metrics()
+        self.application_metrics_history.append(app_metrics)
+        
+        # Update health status
+        self._update_health_status(system_metrics, app_metrics)
+    
     def _collect_system_metrics(self) -> SystemMetrics:
         """Collect system-level metrics"""
         try:
             # CPU metrics
-            cpu_percent = psutil.cpu_percent(interval=1)
+            # Non-blocking: utilisation since the previous sample
+            cpu_percent = psutil.cpu_percent(interval=None)
             load_avg = psutil.getloadavg() if hasattr(psutil, 'getloadavg') else [0, 0, 0]
             
             # Memory metrics
@@ -0,0 +1,287 @@
+"""
+Translation Catalog
+Precompiled, per-language translation lookups shared by every request in a worker
+"""
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Dict, Iterator, Mapping, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = 'translations:catalog_version'
+
+_PARAMETER = re.compile(r'\{(\w+)\}')
+
+
+class Message(NamedTuple):
+    """A compiled translation.
+
+    ``parts`` alternates literal text and parameter names
+    (``literal, name, literal, ...``) and is None when the text has no
+    placeholders, so rendering never runs a regex.
+    """
+    text: str
+    parts: Optional[Tuple[str, ...]]
+
+    @classmethod
+    def compile(cls, text: str) -> 'Message':
+        parts = tuple(_PARAMETER.split(text))
+        return cls(text, parts if len(parts) > 1 else None)
+
+    def render(self, params: Optional[Mapping[str, Any]]) -> str:
+        if not params or self.parts is None:
+            return self.text
+        out = []
+        for index, part in enumerate(self.parts):
+            if index % 2 == 0:
+                out.append(part)
+            elif part in params:
+                out.append(str(params[part]))
+            else:
+                out.append('{' + part + '}')
+        return ''.join(out)
+
+
+class CompiledCatalog(NamedTuple):
+    """Frozen messages of one language plus the serialized catalog for clients"""
+    language: str
+    version: int
+    messages: Mapping[str, Message]
+    etag: str
+    payload: bytes
+    compiled_at: float
+
+
+def _flatten(data: Dict[str, Any], prefix: str = '') -> Iterator[Tuple[str, str]]:
+    for key, value in data.items():
+        path = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            yield from _flatten(value, path)
+        elif value is not None and value != '':
+            yield path, str(value)
+
+
+class TranslationCatalog:
+    """Compile translations once per language and serve lookups from a dict.
+
+    A language is compiled on its first lookup from, in increasing
+    precedence, ``app/translations/<lang>.json``,
+    ``frontend/src/locales/<lang>.json`` and the ``translations`` table;
+    custom dictionary substitutions are applied during compilation.
+
+    Edits bump a version counter in Redis. Workers check it at most every
+    ``TRANSLATION_VERSION_CHECK_INTERVAL`` seconds and recompile on the
+    next lookup when it moved, so an edit made through one worker reaches
+    all of them without a Redis round trip per lookup.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.default_language = 'en'
+        self.check_interval = 2.0
+        self.json_dirs = self._default_json_dirs(Path(__file__).resolve().parents[2])
+        self._catalogs: Dict[str, CompiledCatalog] = {}
+        self._version = 0
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+        self.stats = {
+            'lookups': 0,
+            'misses': 0,
+            'compilations': 0,
+            'reloads': 0,
+            'errors': 0
+        }
+
+    @staticmethod
+    def _default_json_dirs(project_root: Path):
+        return [project_root / 'app' / 'translations', project_root / 'frontend' / 'src' / 'locales']
+
+    def init_app(self, app):
+        """Read catalog settings; languages are compiled lazily on first use"""
+        self.app = app
+        self.check_interval = app.config.get('TRANSLATION_VERSION_CHECK_INTERVAL', 2.0)
+        self.json_dirs = self._default_json_dirs(Path(app.root_path).parent)
+
+    @property
+    def redis_client(self):
+        from app.services.redis_service import redis_service
+        if redis_service.connected and redis_service.redis_client:
+            return redis_service.redis_client
+        return None
+
+    # ------------------------------------------------------------------
+    # Lookup
+    # ------------------------------------------------------------------
+
+    def get(self, key_path: str, language: str, params: Optional[Mapping[str, Any]] = None) -> str:
+        """Translated text for ``key_path`` (the key itself when missing)"""
+        self.stats['lookups'] += 1
+        message = self.catalog(language).messages.get(key_path)
+        if message is None:
+            self.stats['misses'] += 1
+            return key_path
+        return message.render(params)
+
+    def translate(self, key_path: str, **params) -> str:
+        """Template helper: translate into the current request's locale"""
+        try:
+            from flask_babel import get_locale
+            language = str(get_locale() or self.default_language)
+        except Exception:
+            language = self.default_language
+        return self.get(key_path, language, params)
+
+    def catalog(self, language: str) -> CompiledCatalog:
+        """The compiled catalog for ``language``, compiling it if needed"""
+        self._check_version()
+        compiled = self._catalogs.get(language)
+        if compiled is not None:
+            return compiled
+        with self._lock:
+            compiled = self._catalogs.get(language)
+            if compiled is None:
+                compiled = self._compile(language, self._version)
+                self._catalogs[language] = compiled
+            return compiled
+
+    # ------------------------------------------------------------------
+    # Versioning
+    # ------------------------------------------------------------------
+
+    def invalidate(self):
+        """Drop compiled catalogs here and tell other workers to recompile"""
+        client = self.redis_client
+        version = self._version + 1
+        if client is not None:
+            try:
+                version = int(client.incr(VERSION_KEY))
+            except Exception as e:
+                self.stats['errors'] += 1
+                logger.warning(f"Failed to bump translation catalog version: {e}")
+        with self._lock:
+            self._version = max(version, self._version + 1)
+            self._catalogs = {}
+        self.stats['reloads'] += 1
+
+    def _check_version(self):
+        now = time.monotonic()
+        if now < self._next_check:
+            return
+        self._next_check = now + self.check_interval
+        client = self.redis_client
+        if client is None:
+            return
+        try:
+            version = int(client.get(VERSION_KEY) or 0)
+        except Exception as e:
+            self.stats['errors'] += 1
+            logger.warning(f"Failed to read translation catalog version: {e}")
+            return
+        if version != self._version:
+            with self._lock:
+                self._version = version
+                self._catalogs = {}
+            self.stats['reloads'] += 1
+            logger.info(f"Translation catalog version {version}; recompiling on next lookup")
+
+    # ------------------------------------------------------------------
+    # Compilation
+    # ------------------------------------------------------------------
+
+    def _compile(self, language: str, version: int) -> CompiledCatalog:
+        started = time.perf_counter()
+        texts: Dict[str, str] = {}
+        for directory in self.json_dirs:
+            texts.update(self._load_json(directory / f"{language}.json"))
+        texts.update(self._load_database(language))
+        texts = self._apply_custom_dictionary(texts, language)
+
+        payload = json.dumps(texts, ensure_ascii=False, sort_keys=True, separators=(',', ':')).encode('utf-8')
+        compiled = CompiledCatalog(
+            language=language,
+            version=version,
+            messages=MappingProxyType({key: Message.compile(text) for key, text in texts.items()}),
+            etag=f'"{language}-{hashlib.sha1(payload).hexdigest()[:20]}"',
+            payload=payload,
+            compiled_at=time.time()
+        )
+        self.stats['compilations'] += 1
+        logger.debug(f"Compiled {len(texts)} '{language}' translations in "
+                     f"{(time.perf_counter() - started) * 1000:.1f}ms")
+        return compiled
+
+    def _load_json(self, path: Path) -> Dict[str, str]:
+        if not path.exists():
+            return {}
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return dict(_flatten(json.load(f)))
+        except Exception as e:
+            self.stats['errors'] += 1
+            logger.error(f"Error reading translation file {path}: {e}")
+            return {}
+
+    def _load_database(self, language: str) -> Dict[str, str]:
+        try:
+            from app import db
+            from app.models.translation import Translation, TranslationKey
+
+            rows = db.session.query(TranslationKey.key_path, Translation.translation_text).join(
+                Translation, Translation.key_id == TranslationKey.id
+            ).filter(
+                Translation.language_code == language,
+                TranslationKey.is_active == True
+            ).all()
+            return {key_path: text for key_path, text in rows if text}
+        except Exception as e:
+            self.stats['errors'] += 1
+            logger.error(f"Error loading '{language}' translations from database: {e}")
+            return {}
+
+    def _apply_custom_dictionary(self, texts: Dict[str, str], language: str) -> Dict[str, str]:
+        if language == self.default_language or not texts:
+            return texts
+        try:
+            from app.models.translation import CustomDictionary
+
+            entries = CustomDictionary.query.filter_by(
+                source_language=self.default_language,
+                target_language=language,
+                is_active=True
+            ).all()
+        except Exception as e:
+            self.stats['errors'] += 1
+            logger.error(f"Error loading custom dictionary for '{language}': {e}")
+            return texts
+
+        patterns = [
+            (re.compile(r'\b' + re.escape(entry.source_term) + r'\b', re.IGNORECASE), entry.target_term)
+            for entry in entries
+        ]
+        if not patterns:
+            return texts
+        compiled = {}
+        for key, text in texts.items():
+            for pattern, replacement in patterns:
+                text = pattern.sub(lambda match, value=replacement: value, text)
+            compiled[key] = text
+        return compiled
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            'version': self._version,
+            'languages': {
+                language: {'keys': len(compiled.messages), 'etag': compiled.etag}
+                for language, compiled in self._catalogs.items()
+            }
+        }
+
+
+translation_catalog = TranslationCatalog()
@@ -9,6 +9,7 @@ from app.models.translation import (
     TranslationKey, Translation, CustomDictionary, 
     TranslationMemory, TranslationLog, TranslationSettings
 )
+from app.services.translation_catalog import translation_catalog
 from app.utils.unified_logger import get_logger
 
 logger = get_logger(__name__)
@@ -39,6 +40,7 @@ class TranslationService:
                             self.supported_languages = setting.setting_value
                         elif setting.setting_key == 'default_language':
                             self.default_language = setting.setting_value
+                            translation_catalog.default_language = setting.setting_value
                     self._settings_loaded = True
             except RuntimeError:
                 # No app context available, use defaults
@@ -52,65 +54,15 @@ class TranslationService:
             self._load_settings()
     
     def get_translation(self, key_path: str, language: str, params: Optional[Dict] = None) -> str:
-        """Get translation for a specific key and language"""
+        """Get translation for a specific key and language (a lookup in the compiled catalog)"""
         try:
             self._ensure_settings_loaded()
-            # First check database
-            translation = self._get_from_database(key_path, language)
-            if translation:
-                text = translation.translation_text
-            else:
-                # Fallback to JSON files
-                text = self._get_from_json_files(key_path, language)
-            
-            # Apply custom dictionary substitutions
-            text = self._apply_custom_dictionary(text, language)
-            
-            # Replace parameters
-            if params:
-                text = self._replace_parameters(text, params)
-            
-            return text or key_path
+            return translation_catalog.get(key_path, language, params)
             
         except Exception as e:
             logger.error(f"Error getting translation for {key_path} in {language}: {e}")
             return key_path
     
-    def _get_from_database(self, key_path: str, language: str) -> Optional[Translation]:
-        """Get translation from database"""
-        try:
-            key = TranslationKey.query.filter_by(key_path=key_path, is_active=True).first()
-            if key:
-                return Translation.query.filter_by(
-                    key_id=key.id, 
-                    language_code=language
-                ).first()
-        except Exception as e:
-            logger.error(f"Database error getting translation: {e}")
-        return None
-    
-    def _get_from_json_files(self, key_path: str, language: str) -> str:
-        """Get translation from JSON files (fallback)"""
-        try:
-            json_path = f"frontend/src/locales/{language}.json"
-            if os.path.exists(json_path):
-                with open(json_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                
-                # Navigate through nested keys
-                keys = key_path.split('.')
-                value = data
-                for key in keys:
-                    if isinstance(value, dict) and key in value:
-                        value = value[key]
-                    else:
-                        return ""
-                
-                return str(value) if value else ""
-        except Exception as e:
-            logger.error(f"Error reading JSON file for {language}: {e}")
-        return ""
-    
     def _apply_custom_dictionary(self, text: str, language: str) -> str:
         """Apply custom dictionary substitutions"""
         try:
@@ -141,15 +93,6 @@ class TranslationService:
             logger.error(f"Error applying custom dictionary: {e}")
             return text
     
-    def _replace_parameters(self, text: str, params: Dict) -> str:
-        """Replace parameters in translation text"""
-        try:
-            import re
-            return re.sub(r'\{(\w+)\}', lambda match: str(params.get(match.group(1), match.group(0))), text)
-        except Exception as e:
-            logger.error(f"Error replacing parameters: {e}")
-            return text
-    
     def add_translation_key(self, key_path: str, description: str = None, context: str = None) -> TranslationKey:
         """Add a new translation key"""
         try:
@@ -210,6 +153,7 @@ class TranslationService:
                 db.session.add(translation)
             
             db.session.commit()
+            translation_catalog.invalidate()
             
             # Add to translation memory
             self._add_to_translation_memory(key_path, language, text)
@@ -351,6 +295,7 @@ class TranslationService:
                 existing.context = context
                 existing.updated_at = datetime.now(timezone.utc)
                 db.session.commit()
+                translation_catalog.invalidate()
                 return existing
             
             entry = CustomDictionary(
@@ -362,6 +307,7 @@ class TranslationService:
             )
             db.session.add(entry)
             db.session.commit()
+            translation_catalog.invalidate()
             
             return entry
             
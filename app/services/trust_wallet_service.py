@@ -10,7 +10,7 @@ from sqlalchemy import and_, or_, desc, asc
 from sqlalchemy.orm import Session
 
 from app import db
-from app.models.trust_wallet import TrustWallet, TrustWalletTransaction
+from app.models.trust_wallet import TrustWallet, TrustWalletTransaction, trust_wallet_transaction_encoder
 from app.services.blockchain_api_service import BlockchainAPIService, BlockchainTransaction
 # Use enhanced exchange rate service (legacy service deprecated)
 from app.services.enhanced_exchange_rate_service import EnhancedExchangeRateService as ExchangeRateService
@@ -472,8 +472,9 @@ class TrustWalletService:
             total_count = query.count()
             logger.info(f"Found {total_count} total transactions for wallet_id={wallet_id}")
             
-            # Apply pagination
-            transactions = query.order_by(desc(TrustWalletTransaction.block_timestamp))\
+            # Apply pagination; plain column rows encoded like to_dict()
+            transactions = query.with_entities(*trust_wallet_transaction_encoder.columns)\
+                              .order_by(desc(TrustWalletTransaction.block_timestamp))\
                               .offset((page - 1) * per_page)\
                               .limit(per_page)\
                               .all()
@@ -481,7 +482,7 @@ class TrustWalletService:
             logger.info(f"Returning {len(transactions)} transactions for wallet_id={wallet_id}, page={page}")
             
             return {
-                'transactions': [tx.to_dict() for tx in transactions],
+                'transactions': trust_wallet_transaction_encoder.encode_rows(transactions),
                 'pagination': {
                     'page': page,
                     'per_page': per_page,
@@ -3,26 +3,42 @@ Trust Wallet Sync Scheduler
 Handles automatic syncing of Trust wallet transactions every 15 minutes
 """
 import logging
-import schedule
-import time
-import threading
 from datetime import datetime, timezone
 from typing import Dict, List
 
-from app import create_app
+from flask import current_app, has_app_context
+
+from app.services.job_scheduler_service import job_scheduler
 from app.services.trust_wallet_service import TrustWalletService
 from app.models.trust_wallet import TrustWallet
 
 logger = logging.getLogger(__name__)
 
 class TrustWalletSyncScheduler:
-    """Scheduler for automatic Trust wallet transaction syncing"""
+    """Scheduler for automatic Trust wallet transaction syncing
+    
+    The periodic sync is a job on the cluster job scheduler, so it runs once
+    per deployment rather than once per worker.
+    """
+    
+    JOB_NAME = 'trust_wallet_sync'
+    SYNC_INTERVAL = 15 * 60
     
-    def __init__(self):
-        self.app = create_app()
+    def __init__(self, app=None):
+        self._app = app
         self.trust_wallet_service = TrustWalletService()
         self.is_running = False
-        self.sync_thread = None
+    
+    @property
+    def app(self):
+        """The Flask app (the current one unless explicitly provided)"""
+        if self._app is None:
+            if has_app_context():
+                self._app = current_app._get_current_object()
+            else:
+                from app import create_app
+                self._app = create_app()
+        return self._app
         
     def start_scheduler(self):
         """Start the sync scheduler"""
@@ -33,11 +49,7 @@ class TrustWalletSyncScheduler:
         self.is_running = True
         
         # Schedule sync every 15 minutes
-        schedule.every(15).minutes.do(self._sync_all_wallets_job)
-        
-        # Start the scheduler in a separate thread
-        self.sync_thread = threading.Thread(target=self._run_scheduler, daemon=True)
-        self.sync_thread.start()
+        job_scheduler.register(self.JOB_NAME, self._sync_all_wallets_job, interval=self.SYNC_INTERVAL)
         
         logger.info("Trust wallet sync scheduler started (15-minute intervals)")
     
@@ -48,23 +60,10 @@ class TrustWalletSyncScheduler:
             return
         
         self.is_running = False
-        schedule.clear()
-        
-        if self.sync_thread and self.sync_thread.is_alive():
-            self.sync_thread.join(timeout=5)
+        job_scheduler.unregister(self.JOB_NAME)
         
         logger.info("Trust wallet sync scheduler stopped")
     
-    def _run_scheduler(self):
-        """Run the scheduler loop"""
-        while self.is_running:
-            try:
-                schedule.run_pending()
-                time.sleep(60)  # Check every minute
-            except Exception as e:
-                logger.error(f"Error in scheduler loop: {e}")
-                time.sleep(60)
-    
     def _sync_all_wallets_job(self):
         """Job to sync all active wallets"""
         with self.app.app_context():
@@ -147,9 +146,9 @@ class TrustWalletSyncScheduler:
                     })
                 
                 # Get next scheduled sync time
-                if schedule.jobs:
-                    next_job = min(schedule.jobs, key=lambda x: x.next_run)
-                    status['next_scheduled_sync'] = next_job.next_run.isoformat()
+                job = job_scheduler.jobs.get(self.JOB_NAME)
+                if job:
+                    status['next_scheduled_sync'] = job.to_dict()['next_run']
                 
                 return status
                 
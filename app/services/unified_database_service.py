@@ -539,22 +539,17 @@ class UnifiedDatabaseService:
         return patterns
     
     def _generate_index_recommendations_from_slow_queries(self) -> List[str]:
-        """Generate index recommendations based on slow queries"""
-        recommendations = []
+        """Index recommendations from the index advisor's last workload analysis"""
+        from app.services.index_advisor_service import index_advisor
         
-        # Check for common slow query patterns
-        for slow_query in self._slow_queries[-20:]:  # Check last 20 slow queries
-            query_str = slow_query.get('query_string', '').lower()
-            
-            # Pattern: Date filtering without index
-            if 'where date' in query_str and 'idx_transaction_date' not in ' '.join(recommendations):
-                recommendations.append('Consider verifying idx_transaction_date exists for date-range queries')
-            
-            # Pattern: PSP + Date queries
-            if 'psp' in query_str and 'date' in query_str and 'idx_transaction_date_psp' not in ' '.join(recommendations):
-                recommendations.append('Consider verifying idx_transaction_date_psp exists for PSP + date queries')
-        
-        return list(set(recommendations))  # Remove duplicates
+        analysis = index_advisor.last_analysis
+        if not analysis:
+            return ['Run `flask database advise-indexes` to analyze the captured query workload']
+        return [
+            f"{advice['ddl']} ({advice['calls']} calls"
+            + (f", ~{advice['estimated_saving_ms']:.0f}ms saved)" if advice['estimated_saving_ms'] is not None else ')')
+            for advice in analysis['recommendations']
+        ]
     
     # ========================================================================
     # DATABASE OPTIMIZATION
@@ -0,0 +1,187 @@
+"""
+Unit of Work
+Collects the side effects of a write and applies them once after its commit
+"""
+import logging
+import threading
+from typing import Any, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+PENDING_KEY = 'unit_of_work'
+
+
+class UnitOfWork:
+    """Defer a session's write side effects to a single post-commit flush.
+
+    Write paths register what their change affects while the session is
+    still open:
+
+    - cache tags and keys to invalidate
+    - events to publish
+    - audit rows to record
+
+    These accumulate in ``session.info`` next to the data-version changes
+    (the per-month rollup deltas) that the flush listeners already collect.
+    After the commit, one Redis pipeline carries the cache invalidation,
+    the data-version increments and the stream writes. Audit rows go to the
+    batched audit writer. A rollback discards everything, so a failed write
+    never publishes an event or drops a cache entry.
+
+    With ``UNIT_OF_WORK_ENABLED`` off, each side effect is applied as soon
+    as it is registered.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.enabled = True
+        self._listeners_installed = False
+        self._lock = threading.Lock()
+        self.stats = {
+            'commits': 0,
+            'pipelines': 0,
+            'tags': 0,
+            'keys': 0,
+            'events': 0,
+            'audit_rows': 0,
+            'version_bumps': 0,
+            'discarded': 0,
+            'errors': 0
+        }
+
+    def init_app(self, app):
+        """Read settings and register the commit listeners"""
+        self.app = app
+        self.enabled = app.config.get('UNIT_OF_WORK_ENABLED', True)
+        if self.enabled:
+            self._install_listeners()
+
+    @property
+    def redis_client(self):
+        from app.services.redis_service import redis_service
+        if redis_service.connected and redis_service.redis_client:
+            return redis_service.redis_client
+        return None
+
+    # ------------------------------------------------------------------
+    # Registration
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _pending(session=None) -> Dict[str, Any]:
+        if session is None:
+            from app import db
+            session = db.session
+        return session.info.setdefault(PENDING_KEY, {'tags': set(), 'keys': set(), 'events': [], 'audit': []})
+
+    def invalidate(self, tags: Iterable[str] = (), keys: Iterable[str] = (), session=None):
+        """Drop cache entries tagged with ``tags`` and ``keys`` once the session commits"""
+        if not self.enabled:
+            from app.services.enhanced_cache_service import cache_service
+            cache_service.invalidate(tags=tags, keys=keys)
+            return
+        pending = self._pending(session)
+        pending['tags'].update(tags)
+        pending['keys'].update(keys)
+
+    def publish(self, event_type, data: Dict[str, Any], source: str = 'pipeline',
+                metadata: Optional[Dict[str, Any]] = None, session=None):
+        """Publish an event once the session commits"""
+        from app.services.event_service import event_service
+        if not self.enabled:
+            event_service.publish_event(event_type, data, source=source, metadata=metadata)
+            return
+        self._pending(session)['events'].append(event_service._build_event(event_type, data, source, metadata))
+
+    def audit(self, record: Dict[str, Any], session=None):
+        """Queue an audit row (AuditLog column -> value) once the session commits"""
+        if not self.enabled:
+            from app.services.audit_writer_service import audit_writer
+            audit_writer.enqueue(record)
+            return
+        self._pending(session)['audit'].append(record)
+
+    # ------------------------------------------------------------------
+    # Commit handling
+    # ------------------------------------------------------------------
+
+    def _install_listeners(self):
+        if self._listeners_installed:
+            return
+        from sqlalchemy import event
+        from sqlalchemy.orm import Session
+
+        # insert=True: run ahead of the data-version listener so its
+        # increments join this pipeline instead of taking their own
+        event.listen(Session, 'after_commit', self._apply, insert=True)
+        event.listen(Session, 'after_rollback', self._discard)
+        self._listeners_installed = True
+
+    def _apply(self, session):
+        pending = session.info.pop(PENDING_KEY, None)
+        if pending is None:
+            return
+        versions = session.info.pop('data_version_changes', None) or ()
+        try:
+            self.flush(pending, versions)
+        except Exception as e:
+            with self._lock:
+                self.stats['errors'] += 1
+            logger.warning(f"Failed to apply post-commit side effects: {e}")
+
+    def _discard(self, session):
+        pending = session.info.pop(PENDING_KEY, None)
+        if pending and (pending['events'] or pending['audit']):
+            with self._lock:
+                self.stats['discarded'] += len(pending['events']) + len(pending['audit'])
+
+    def flush(self, pending: Dict[str, Any], versions: Iterable = ()):
+        """Apply collected side effects: one Redis pipeline, then the audit queue"""
+        from app.services.audit_writer_service import audit_writer
+        from app.services.data_version_service import data_version_service
+        from app.services.enhanced_cache_service import cache_service
+        from app.services.event_service import event_service
+
+        events = pending['events']
+        version_count = 0
+        client = self.redis_client
+        if client is not None:
+            pipe = client.pipeline(transaction=False)
+            cache_service.queue_invalidation(pipe, pending['tags'], pending['keys'])
+            version_count = data_version_service.queue_bump(pipe, versions)
+            event_service.queue_events(pipe, events)
+            try:
+                if len(pipe):
+                    pipe.execute()
+            except Exception:
+                data_version_service.record_bumps(failed=True)
+                raise
+            data_version_service.record_bumps(version_count)
+            if events:
+                event_service.events_published(events)
+        else:
+            cache_service.invalidate(tags=pending['tags'], keys=pending['keys'])
+            data_version_service.bump(versions)
+            if events:
+                event_service._publish_batch(events)
+
+        for record in pending['audit']:
+            audit_writer.enqueue(record)
+
+        with self._lock:
+            self.stats['commits'] += 1
+            self.stats['pipelines'] += 1 if client is not None else 0
+            self.stats['tags'] += len(pending['tags'])
+            self.stats['keys'] += len(pending['keys'])
+            self.stats['events'] += len(events)
+            self.stats['audit_rows'] += len(pending['audit'])
+            self.stats['version_bumps'] += version_count
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+        return {'enabled': self.enabled, **stats}
+
+
+# Global unit of work instance (initialized in app factory)
+unit_of_work = UnitOfWork()
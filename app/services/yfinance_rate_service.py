@@ -5,12 +5,14 @@ Fetches USD/TRY exchange rates from Yahoo Finance
 import logging
 from datetime import datetime, date, timedelta
 from decimal import Decimal
-import yfinance as yf
 from app import db
+from app.utils.lazy_loader import lazy_import
 from app.models.config import ExchangeRate
 
 logger = logging.getLogger(__name__)
 
+yf = lazy_import('yfinance')
+
 
 class YFinanceRateService:
     """Service for fetching exchange rates from Yahoo Finance"""
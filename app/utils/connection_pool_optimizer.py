@@ -1,143 +1,304 @@
 """
 Connection Pool Optimization
-Optimizes database connection pooling for better performance
+Sizes database connection pools from the server's concurrency and instruments checkout waits
 """
 import logging
-from typing import Dict, Any, Optional
-from flask import current_app
-from sqlalchemy import event, pool
-from sqlalchemy.engine import Engine
-from app import db
+import os
+import threading
+import time
+from typing import Dict, Any, List, Optional
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import QueuePool
 
 logger = logging.getLogger(__name__)
 
+# Checkout wait histogram bucket upper bounds (milliseconds)
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class PoolWaitHistogram:
+    """Distribution of the time callers waited to check out a connection"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.counts = [0] * (len(WAIT_BUCKETS_MS) + 1)
+        self.total = 0.0
+        self.max = 0.0
+        self.timeouts = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float):
+        ms = seconds * 1000
+        index = next((i for i, bound in enumerate(WAIT_BUCKETS_MS) if ms <= bound), len(WAIT_BUCKETS_MS))
+        with self._lock:
+            self.counts[index] += 1
+            self.total += seconds
+            if seconds > self.max:
+                self.max = seconds
+        if pool_checkout_wait is not None:
+            pool_checkout_wait.labels(pool=self.name).observe(seconds)
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Upper bucket bound (ms) below which ``fraction`` of the waits fall"""
+        count = sum(self.counts)
+        if not count:
+            return None
+        threshold = fraction * count
+        running = 0
+        for bound, bucket in zip(WAIT_BUCKETS_MS + (None,), self.counts):
+            running += bucket
+            if running >= threshold:
+                return bound if bound is not None else round(self.max * 1000, 1)
+        return None
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = list(self.counts)
+            total, maximum, timeouts = self.total, self.max, self.timeouts
+        count = sum(counts)
+        labels = [f"<={bound}ms" for bound in WAIT_BUCKETS_MS] + [f">{WAIT_BUCKETS_MS[-1]}ms"]
+        return {
+            'checkouts': count,
+            'avg_wait_ms': round(total / count * 1000, 2) if count else 0,
+            'max_wait_ms': round(maximum * 1000, 2),
+            'p95_wait_ms': self.percentile(0.95),
+            'p99_wait_ms': self.percentile(0.99),
+            'timeouts': timeouts,
+            'buckets': dict(zip(labels, counts))
+        }
+
+
+try:
+    from prometheus_client import Histogram
+    pool_checkout_wait = Histogram(
+        'db_pool_checkout_wait_seconds',
+        'Time spent waiting to check out a database connection',
+        ['pool'],
+        buckets=[bound / 1000 for bound in WAIT_BUCKETS_MS]
+    )
+except (ImportError, ValueError):
+    pool_checkout_wait = None
+
+_histograms: Dict[str, PoolWaitHistogram] = {}
+
+
+def wait_histogram(name: str) -> PoolWaitHistogram:
+    histogram = _histograms.get(name)
+    if histogram is None:
+        histogram = _histograms.setdefault(name, PoolWaitHistogram(name))
+    return histogram
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long every checkout waited
+
+    The wait covers queueing for a free connection and, below
+    ``pool_size + max_overflow``, opening a new one.
+    """
+    histogram_name = 'primary'
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            wait_histogram(self.histogram_name).timeouts += 1
+            raise
+        finally:
+            wait_histogram(self.histogram_name).observe(time.perf_counter() - started)
+
+
+_pool_classes: Dict[str, type] = {'primary': InstrumentedQueuePool}
+
+
+def instrumented_pool_class(name: str):
+    """Instrumented pool class reporting under ``name`` (one per engine)"""
+    if name not in _pool_classes:
+        _pool_classes[name] = type(f"{name.title()}InstrumentedQueuePool", (InstrumentedQueuePool,),
+                                   {'histogram_name': name})
+    return _pool_classes[name]
+
 
 class ConnectionPoolOptimizer:
-    """Optimize database connection pool settings"""
-    
+    """Derive pool settings from server concurrency and watch the pool at runtime"""
+
     @staticmethod
-    def configure_pool(engine: Engine, config: Optional[Dict[str, Any]] = None):
+    def pool_plan(config, threads_only: bool = False, max_connections_key: str = 'DB_MAX_CONNECTIONS') -> Dict[str, int]:
         """
-        Configure connection pool with optimal settings
-        
+        Pool size and overflow for one worker process
+
+        Every request thread and background thread can hold one connection
+        at a time, so that is the steady-state size. Overflow absorbs bursts
+        up to this worker's share of the database's ``max_connections``
+        (minus reserved admin/replication slots), split across all workers
+        of all app instances, so the fleet can never exceed it.
+
         Args:
-            engine: SQLAlchemy Engine
-            config: Optional configuration overrides
+            config: Flask app config
+            threads_only: Size for request threads only (replica pools)
+            max_connections_key: Config key holding the server's connection limit
         """
-        if config is None:
-            config = {}
-        
-        # Get pool settings from config or use defaults
-        pool_size = config.get('pool_size', 10)
-        max_overflow = config.get('max_overflow', 20)
-        pool_timeout = config.get('pool_timeout', 30)
-        pool_recycle = config.get('pool_recycle', 3600)
-        pool_pre_ping = config.get('pool_pre_ping', True)
-        
-        # Update pool settings
-        if hasattr(engine.pool, 'size'):
-            engine.pool.size = pool_size
-        if hasattr(engine.pool, '_max_overflow'):
-            engine.pool._max_overflow = max_overflow
-        if hasattr(engine.pool, '_timeout'):
-            engine.pool._timeout = pool_timeout
-        if hasattr(engine.pool, '_recycle'):
-            engine.pool._recycle = pool_recycle
-        if hasattr(engine.pool, '_pre_ping'):
-            engine.pool._pre_ping = pool_pre_ping
-        
+        workers = config.get('DB_POOL_WORKERS') or int(os.environ.get('WEB_CONCURRENCY', '4'))
+        threads = config.get('DB_POOL_THREADS') or int(os.environ.get('GUNICORN_THREADS', '2'))
+        background = 0 if threads_only else config.get('DB_POOL_BACKGROUND_THREADS', 3)
+        instances = config.get('DB_POOL_INSTANCES', 1)
+        max_connections = config.get(max_connections_key) or config.get('DB_MAX_CONNECTIONS', 100)
+        reserved = config.get('DB_RESERVED_CONNECTIONS', 10)
+
+        budget = max(1, (max_connections - reserved) // max(1, workers * instances))
+        pool_size = max(1, min(threads + background, budget))
+        return {
+            'workers': workers,
+            'threads': threads,
+            'background_threads': background,
+            'per_worker_budget': budget,
+            'pool_size': pool_size,
+            'max_overflow': max(0, budget - pool_size)
+        }
+
+    @staticmethod
+    def _engine_options(uri: str, options: Dict[str, Any], plan: Dict[str, int], config, pool_name: str) -> Dict[str, Any]:
+        options = dict(options)
+        options.setdefault('pool_size', plan['pool_size'])
+        options.setdefault('max_overflow', plan['max_overflow'])
+        options['pool_timeout'] = config.get('DB_POOL_TIMEOUT', options.get('pool_timeout', 30))
+        options['pool_recycle'] = config.get('DB_POOL_RECYCLE', 1800)
+        # Dead connections are detected by the idle check and by errors (see setup_pool_events)
+        options['pool_pre_ping'] = False
+        options['poolclass'] = instrumented_pool_class(pool_name)
+
+        if config.get('DB_PGBOUNCER_MODE') == 'transaction':
+            # Server connections change between transactions: no startup
+            # options, session settings or server-side prepared statements
+            connect_args = dict(options.get('connect_args') or {})
+            startup_options = connect_args.pop('options', None)
+            if startup_options:
+                logger.warning(
+                    f"Dropped connection startup options '{startup_options}' for PgBouncer transaction "
+                    f"pooling; set them on the database role instead (ALTER ROLE ... SET ...)"
+                )
+            driver = make_url(uri).get_driver_name()
+            if driver == 'psycopg':
+                connect_args['prepare_threshold'] = None
+            elif driver == 'asyncpg':
+                connect_args['statement_cache_size'] = 0
+            options['connect_args'] = connect_args
+        return options
+
+    @staticmethod
+    def size_engine_options(app):
+        """
+        Rewrite SQLALCHEMY_ENGINE_OPTIONS (and the replica bind) before the engines are created
+
+        SQLite keeps its own pool; with DB_POOL_AUTOSIZE off the configured
+        options are used unchanged.
+        """
+        uri = app.config.get('SQLALCHEMY_DATABASE_URI') or ''
+        if not app.config.get('DB_POOL_AUTOSIZE', True) or uri.startswith('sqlite'):
+            return None
+
+        plan = ConnectionPoolOptimizer.pool_plan(app.config)
+        options = {
+            key: value for key, value in (app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {}).items()
+            if key not in ('pool_size', 'max_overflow')
+        }
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = ConnectionPoolOptimizer._engine_options(
+            uri, options, plan, app.config, 'primary')
+
+        binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+        replica = binds.get('replica')
+        if isinstance(replica, dict) and not str(replica.get('url', '')).startswith('sqlite'):
+            replica_plan = ConnectionPoolOptimizer.pool_plan(
+                app.config, threads_only=True, max_connections_key='DB_REPLICA_MAX_CONNECTIONS')
+            inherited = {key: value for key, value in options.items() if key != 'poolclass'}
+            binds['replica'] = ConnectionPoolOptimizer._engine_options(
+                str(replica['url']), {**inherited, **replica}, replica_plan, app.config, 'replica')
+            app.config['SQLALCHEMY_BINDS'] = binds
+
         logger.info(
-            f"Connection pool configured: size={pool_size}, "
-            f"overflow={max_overflow}, timeout={pool_timeout}s, "
-            f"recycle={pool_recycle}s, pre_ping={pool_pre_ping}"
+            f"Connection pool sized for {plan['workers']} workers x {plan['threads']} threads "
+            f"(+{plan['background_threads']} background): pool_size={plan['pool_size']}, "
+            f"max_overflow={plan['max_overflow']}"
         )
-    
+        return plan
+
     @staticmethod
-    def setup_pool_events(engine: Engine):
-        """Setup event listeners for connection pool monitoring"""
-        
-        @event.listens_for(engine, "connect")
-        def receive_connect(dbapi_conn, connection_record):
-            """Log new connection"""
-            logger.debug("New database connection established")
-        
-        @event.listens_for(engine, "checkout")
-        def receive_checkout(dbapi_conn, connection_record, connection_proxy):
-            """Log connection checkout"""
-            logger.debug("Connection checked out from pool")
-        
+    def setup_pool_events(engine: Engine, idle_check_seconds: float = 300):
+        """Check long-idle connections on checkout and count error-driven reconnects
+
+        Connections used within ``idle_check_seconds`` are handed out
+        without a round trip. A connection that turns out dead mid-query is
+        invalidated by SQLAlchemy together with the rest of the pool, so
+        the next checkouts reconnect.
+        """
+        stats = engine.pool_event_stats = {'idle_checks': 0, 'dead_on_checkout': 0, 'disconnects': 0}
+
         @event.listens_for(engine, "checkin")
         def receive_checkin(dbapi_conn, connection_record):
-            """Log connection checkin"""
-            logger.debug("Connection returned to pool")
-        
+            connection_record.info['checked_in_at'] = time.monotonic()
+
+        @event.listens_for(engine, "checkout")
+        def receive_checkout(dbapi_conn, connection_record, connection_proxy):
+            """Ping only connections that sat idle long enough to have been dropped"""
+            checked_in_at = connection_record.info.get('checked_in_at')
+            if checked_in_at is None or time.monotonic() - checked_in_at < idle_check_seconds:
+                return
+            stats['idle_checks'] += 1
+            cursor = dbapi_conn.cursor()
+            try:
+                cursor.execute("SELECT 1")
+                cursor.close()
+                dbapi_conn.rollback()  # Do not hold a server connection (PgBouncer) between requests
+            except Exception as e:
+                stats['dead_on_checkout'] += 1
+                # The pool discards this connection and retries with a fresh one
+                raise exc.DisconnectionError(f"Idle connection failed its check: {e}") from e
+
+        @event.listens_for(engine, "handle_error")
+        def receive_error(context):
+            if context.is_disconnect:
+                stats['disconnects'] += 1
+                logger.warning(f"Database connection lost, reconnecting on next checkout: {context.original_exception}")
+
         @event.listens_for(engine, "invalidate")
         def receive_invalidate(dbapi_conn, connection_record, exception):
             """Log connection invalidation"""
             logger.warning(f"Connection invalidated: {exception}")
-        
+
         logger.info("Connection pool event listeners configured")
-    
+
     @staticmethod
     def get_pool_stats(engine: Engine) -> Dict[str, Any]:
         """
         Get connection pool statistics
-        
+
         Args:
             engine: SQLAlchemy Engine
-        
+
         Returns:
-            Dictionary with pool statistics
+            Dictionary with pool statistics and checkout wait distribution
         """
         pool = engine.pool
-        
+        if not isinstance(pool, QueuePool):
+            return {'pool_class': type(pool).__name__, 'utilization': 0}
+
         stats = {
-            'size': getattr(pool, 'size', None),
-            'checked_in': getattr(pool, '_checked_in', None),
-            'checked_out': getattr(pool, '_checked_out', None),
-            'overflow': getattr(pool, '_overflow', None),
-            'invalid': getattr(pool, '_invalid', None),
+            'size': pool.size(),
+            'max_overflow': pool._max_overflow,
+            'checked_in': pool.checkedin(),
+            'checked_out': pool.checkedout(),
+            'overflow': max(0, pool.overflow()),
+            'timeout': pool.timeout(),
         }
-        
-        # Calculate utilization
-        if stats['size'] and stats['checked_out']:
-            stats['utilization'] = (stats['checked_out'] / stats['size']) * 100
-        else:
-            stats['utilization'] = 0
-        
+        capacity = stats['size'] + stats['max_overflow']
+        stats['utilization'] = (stats['checked_out'] / capacity) * 100 if capacity else 0
+        if isinstance(pool, InstrumentedQueuePool):
+            stats['checkout_wait'] = wait_histogram(pool.histogram_name).snapshot()
+        stats.update(getattr(engine, 'pool_event_stats', {}))
         return stats
-    
-    @staticmethod
-    def optimize_for_workload(engine: Engine, workload_type: str = 'mixed'):
-        """
-        Optimize pool settings based on workload type
-        
-        Args:
-            engine: SQLAlchemy Engine
-            workload_type: 'read_heavy', 'write_heavy', or 'mixed'
-        """
-        if workload_type == 'read_heavy':
-            # More connections for read-heavy workloads
-            config = {
-                'pool_size': 20,
-                'max_overflow': 30,
-                'pool_timeout': 30,
-            }
-        elif workload_type == 'write_heavy':
-            # Fewer connections but more overflow for write-heavy
-            config = {
-                'pool_size': 10,
-                'max_overflow': 25,
-                'pool_timeout': 20,
-            }
-        else:  # mixed
-            # Balanced settings
-            config = {
-                'pool_size': 15,
-                'max_overflow': 25,
-                'pool_timeout': 30,
-            }
-        
-        ConnectionPoolOptimizer.configure_pool(engine, config)
-        logger.info(f"Pool optimized for {workload_type} workload")
 
+    @staticmethod
+    def wait_histograms() -> List[Dict[str, Any]]:
+        """Checkout wait distributions of every instrumented pool in this process"""
+        return [{'pool': name, **histogram.snapshot()} for name, histogram in sorted(_histograms.items())]
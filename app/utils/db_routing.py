@@ -0,0 +1,381 @@
+"""
+Read Replica Routing
+Sends read-only endpoint queries to a replica engine with its own pool
+"""
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Dict, Optional
+
+from flask import g, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.sql import CompoundSelect, Select, TextClause
+
+logger = logging.getLogger(__name__)
+
+REPLICA_BIND = 'replica'
+STICKY_KEY = 'replica:sticky:'
+
+_route: ContextVar[Optional[str]] = ContextVar('db_route', default=None)
+
+LAG_QUERY = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+# WAL positions as byte offsets so they compare as integers (NULL: not a standby)
+PRIMARY_LSN_QUERY = "SELECT pg_current_wal_lsn() - '0/0'"
+REPLAY_LSN_QUERY = """
+    SELECT CASE WHEN pg_is_in_recovery() THEN pg_last_wal_replay_lsn() - '0/0' END
+"""
+
+
+class RoutingSession(Session):
+    """Flask-SQLAlchemy session that sends eligible reads to the replica"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and replica_router.wants_replica(self, clause):
+            engine = replica_router.engine
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+class ReplicaRouter:
+    """Route read-only work to ``SQLALCHEMY_BINDS['replica']``.
+
+    A statement goes to the replica only when all of these hold:
+
+    - it runs inside :func:`read_replica` / :func:`replica_reads` (or a
+      GET/HEAD request to a blueprint in ``DATABASE_REPLICA_BLUEPRINTS``)
+    - it is a plain SELECT (no ``FOR UPDATE``)
+    - the session has not written anything
+    - the current user has not committed a write within
+      ``DATABASE_REPLICA_STICKY_SECONDS`` (read-your-writes; tracked in
+      Redis so it holds across workers)
+    - the replica answered its last lag check within
+      ``DATABASE_REPLICA_MAX_LAG`` seconds and has not failed recently
+    - when the request carries a data-version ETag, the replica has replayed
+      the WAL position recorded with the latest bump of those versions, so
+      a new ETag is never paired with data from before the write
+
+    Everything else - writes, flushes, ``session.connection()``, code
+    outside a replica scope - uses the primary engine as before.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.enabled = False
+        self.max_lag = 5.0
+        self.sticky_seconds = 5.0
+        self.check_interval = 5.0
+        self.retry_after = 30.0
+        self._engine = None
+        self._checked_at = 0.0
+        self._lag: Optional[float] = None
+        self._lag_ok = False
+        self._down_until = 0.0
+        self._replay_lsn = 0
+        self._local_sticky: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self.stats = {
+            'replica_reads': 0,
+            'primary_fallbacks': 0,
+            'sticky_reads': 0,
+            'behind_version_reads': 0,
+            'failures': 0,
+            'retried_on_primary': 0
+        }
+
+    def init_app(self, app):
+        """Wrap replica-scoped blueprints and install the write tracking listeners
+
+        Call after blueprints are registered.
+        """
+        self.app = app
+        self.enabled = REPLICA_BIND in (app.config.get('SQLALCHEMY_BINDS') or {})
+        self.max_lag = app.config.get('DATABASE_REPLICA_MAX_LAG', 5.0)
+        self.sticky_seconds = app.config.get('DATABASE_REPLICA_STICKY_SECONDS', 5.0)
+        self.check_interval = app.config.get('DATABASE_REPLICA_CHECK_INTERVAL', 5.0)
+        self.retry_after = app.config.get('DATABASE_REPLICA_RETRY_AFTER', 30.0)
+        if not self.enabled:
+            return
+
+        blueprints = set(app.config.get('DATABASE_REPLICA_BLUEPRINTS', ()))
+        for endpoint, view in list(app.view_functions.items()):
+            # Nested blueprints have dotted names (api_v1.analytics_api.dashboard)
+            if set(endpoint.split('.')[:-1]) & blueprints:
+                app.view_functions[endpoint] = read_replica(view)
+
+        event.listen(RoutingSession, 'after_flush', self._after_flush)
+        event.listen(RoutingSession, 'after_commit', self._after_commit)
+        event.listen(RoutingSession, 'after_rollback', self._after_rollback)
+        app.read_replica_router = self
+        logger.info(f"Read replica routing enabled (max lag {self.max_lag}s, sticky {self.sticky_seconds}s)")
+
+    @property
+    def engine(self):
+        if not self.enabled:
+            return None
+        if self._engine is None:
+            from app import db
+            self._engine = db.engines[REPLICA_BIND]
+            event.listen(self._engine, 'handle_error', self._handle_error)
+        return self._engine
+
+    # ------------------------------------------------------------------
+    # Routing decision
+    # ------------------------------------------------------------------
+
+    def wants_replica(self, session, clause) -> bool:
+        if not self.enabled or _route.get() != REPLICA_BIND:
+            return False
+        if not self._is_read(clause):
+            return False
+        if session.new or session.dirty or session.deleted or session.info.get('replica_wrote'):
+            return False
+        if self._is_sticky():
+            self.stats['sticky_reads'] += 1
+            return False
+        if not self.healthy():
+            self.stats['primary_fallbacks'] += 1
+            return False
+        if not self._has_versioned_data():
+            self.stats['behind_version_reads'] += 1
+            return False
+        self.stats['replica_reads'] += 1
+        return True
+
+    @staticmethod
+    def _is_read(clause) -> bool:
+        if isinstance(clause, Select):
+            return clause._for_update_arg is None
+        if isinstance(clause, CompoundSelect):
+            return True
+        if isinstance(clause, TextClause):
+            sql = clause.text.lstrip().upper()
+            return sql.startswith(('SELECT', 'WITH')) and 'FOR UPDATE' not in sql
+        return False
+
+    # ------------------------------------------------------------------
+    # Read-your-writes
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _user_key() -> Optional[str]:
+        if not has_request_context():
+            return None
+        from flask_login import current_user
+        if getattr(current_user, 'is_authenticated', False):
+            return str(current_user.get_id())
+        return None
+
+    @property
+    def redis_client(self):
+        from app.services.redis_service import redis_service
+        if redis_service.connected and redis_service.redis_client:
+            return redis_service.redis_client
+        return None
+
+    def _is_sticky(self) -> bool:
+        if not has_request_context():
+            return False
+        sticky = g.get('_replica_sticky')
+        if sticky is None:
+            user = self._user_key()
+            sticky = False
+            if user is not None:
+                client = self.redis_client
+                try:
+                    sticky = bool(client.exists(STICKY_KEY + user)) if client else \
+                        self._local_sticky.get(user, 0) > time.monotonic()
+                except Exception:
+                    sticky = True  # Cannot tell: stay on the primary
+            g._replica_sticky = sticky
+        return sticky
+
+    def mark_sticky(self, user: str):
+        """Pin ``user``'s reads to the primary for the stickiness window"""
+        if has_request_context():
+            g._replica_sticky = True
+        client = self.redis_client
+        if client is not None:
+            try:
+                client.set(STICKY_KEY + user, 1, px=int(self.sticky_seconds * 1000))
+                return
+            except Exception as e:
+                logger.debug(f"Could not record replica stickiness in Redis: {e}")
+        with self._lock:
+            now = time.monotonic()
+            self._local_sticky = {key: until for key, until in self._local_sticky.items() if until > now}
+            self._local_sticky[user] = now + self.sticky_seconds
+
+    def _after_flush(self, session, flush_context):
+        session.info['replica_wrote'] = True
+
+    def _after_commit(self, session):
+        if session.info.pop('replica_wrote', False):
+            user = self._user_key()
+            if user is not None:
+                self.mark_sticky(user)
+
+    def _after_rollback(self, session):
+        session.info.pop('replica_wrote', None)
+
+    # ------------------------------------------------------------------
+    # Data versions
+    # ------------------------------------------------------------------
+
+    def primary_lsn(self) -> Optional[int]:
+        """Current WAL position of the primary (None without a PostgreSQL replica)
+
+        Recorded with each data-version bump, right after the write commits.
+        """
+        if not self.enabled:
+            return None
+        from app import db
+        try:
+            with db.engine.connect() as conn:
+                if conn.dialect.name != 'postgresql':
+                    return None
+                return int(conn.exec_driver_sql(PRIMARY_LSN_QUERY).scalar())
+        except Exception as e:
+            logger.debug(f"Could not read the primary WAL position: {e}")
+            return None
+
+    def _has_versioned_data(self) -> bool:
+        """Whether the replica has replayed the writes behind this request's ETag"""
+        if not has_request_context():
+            return True
+        caught_up = g.get('_replica_caught_up')
+        if caught_up is None:
+            required = g.get('data_version_lsn')
+            caught_up = not required or self.replayed(required)
+            g._replica_caught_up = caught_up
+        return caught_up
+
+    def replayed(self, lsn: int) -> bool:
+        """Whether the replica has replayed the primary's WAL up to ``lsn``"""
+        if self._replay_lsn >= lsn:
+            return True
+        try:
+            with self.engine.connect() as conn:
+                if conn.dialect.name != 'postgresql':
+                    return True
+                position = conn.exec_driver_sql(REPLAY_LSN_QUERY).scalar()
+        except Exception as e:
+            self.mark_down(e)
+            return False
+        if position is None:
+            return True  # Not a standby: it sees every write
+        self._replay_lsn = max(self._replay_lsn, int(position))
+        return self._replay_lsn >= lsn
+
+    # ------------------------------------------------------------------
+    # Health
+    # ------------------------------------------------------------------
+
+    def healthy(self) -> bool:
+        """Replica reachable and within the lag budget (checked every few seconds)"""
+        now = time.monotonic()
+        if now < self._down_until:
+            return False
+        if now - self._checked_at < self.check_interval:
+            return self._lag_ok
+        if not self._lock.acquire(blocking=False):
+            return self._lag_ok  # Another thread is checking
+        try:
+            self._lag = self.measure_lag()
+            self._lag_ok = self._lag <= self.max_lag
+            if not self._lag_ok:
+                logger.warning(f"Read replica lags {self._lag:.1f}s; reading from primary")
+        except Exception as e:
+            self.mark_down(e)
+            return False
+        finally:
+            self._checked_at = time.monotonic()
+            self._lock.release()
+        return self._lag_ok
+
+    def measure_lag(self) -> float:
+        with self.engine.connect() as conn:
+            if conn.dialect.name == 'postgresql':
+                return float(conn.exec_driver_sql(LAG_QUERY).scalar() or 0)
+            conn.exec_driver_sql("SELECT 1")
+            return 0.0
+
+    def mark_down(self, error):
+        self.stats['failures'] += 1
+        self._down_until = time.monotonic() + self.retry_after
+        self._lag_ok = False
+        logger.warning(f"Read replica unavailable, using primary for {self.retry_after:.0f}s: {error}")
+
+    def _handle_error(self, context):
+        # Connection-level failures only; a bad statement would fail on the primary too
+        if context.is_disconnect or isinstance(context.sqlalchemy_exception, OperationalError):
+            self.mark_down(context.original_exception)
+            if has_request_context():
+                g._replica_failed = True
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'enabled': self.enabled,
+            'healthy': self.enabled and time.monotonic() >= self._down_until and self._lag_ok,
+            'lag_seconds': self._lag,
+            'max_lag': self.max_lag,
+            **self.stats
+        }
+
+
+replica_router = ReplicaRouter()
+
+
+@contextmanager
+def replica_reads():
+    """Route eligible reads in this block to the replica"""
+    token = _route.set(REPLICA_BIND)
+    try:
+        yield
+    finally:
+        _route.reset(token)
+
+
+def read_replica(view):
+    """Serve a read-only (GET/HEAD) endpoint from the replica
+
+    If the replica fails during the request and the view ends in an error,
+    the view is run once more against the primary.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not replica_router.enabled or request.method not in ('GET', 'HEAD'):
+            return view(*args, **kwargs)
+        g._replica_failed = False
+        try:
+            with replica_reads():
+                result = view(*args, **kwargs)
+        except Exception:
+            if not g.get('_replica_failed'):
+                raise
+            result = None
+        if g.get('_replica_failed') and (result is None or _status_code(result) >= 500):
+            from app import db
+            db.session.rollback()
+            replica_router.stats['retried_on_primary'] += 1
+            return view(*args, **kwargs)
+        return result
+    return wrapper
+
+
+def _status_code(result) -> int:
+    if isinstance(result, tuple) and len(result) > 1 and isinstance(result[1], int):
+        return result[1]
+    return getattr(result, 'status_code', 200)
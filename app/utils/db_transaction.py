@@ -48,9 +48,10 @@ def db_transaction(retries: int = MAX_RETRIES, query_timeout: int = QUERY_TIMEOU
                 db_type = current_app.config.get('DATABASE_TYPE', 'sqlite').lower()
                 
                 if db_type in ['postgresql', 'postgres']:
-                    # PostgreSQL query timeout
+                    # PostgreSQL query timeout, scoped to this transaction so it never
+                    # leaks to the next user of a pooled (or PgBouncer) connection
                     db.session.execute(
-                        db.text(f"SET statement_timeout = {query_timeout * 1000}")  # milliseconds
+                        db.text(f"SET LOCAL statement_timeout = {query_timeout * 1000}")  # milliseconds
                     )
                 elif db_type in ['mssql', 'sqlserver']:
                     # MSSQL query timeout
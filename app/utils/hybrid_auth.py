@@ -6,7 +6,7 @@ This provides a fallback when session cookies fail due to CORS or domain issues
 from functools import wraps
 from flask import request, jsonify, current_app
 from flask_login import current_user, login_user
-from app.models.user import User
+from app.services.auth_principal_service import principal_service
 from app.utils.unified_logger import get_logger
 
 logger = get_logger(__name__)
@@ -33,8 +33,8 @@ def hybrid_auth_required(f):
                     verify_jwt_in_request(optional=True)  # Optional - don't fail if no JWT
                     user_id = get_jwt_identity()
                     if user_id:
-                        jwt_user = User.query.get(user_id)
-                        if jwt_user and jwt_user.is_active:
+                        jwt_user = principal_service.get(user_id)
+                        if jwt_user:
                             logger.info(f"JWT authentication successful for user {jwt_user.username} on {request.path}")
                             # Set as current_user for Flask-Login compatibility
                             login_user(jwt_user, remember=False)
@@ -0,0 +1,301 @@
+"""
+Request Instrumentation
+Single low-overhead timing/metrics hook with ring-buffered spans and queued logging
+"""
+import itertools
+import logging
+import logging.handlers
+import queue
+import random
+import time
+from array import array
+from typing import Any, Dict, List, Optional
+
+from flask import g, has_request_context, request
+
+logger = logging.getLogger(__name__)
+
+
+class RingBuffer:
+    """Preallocated circular buffer of (endpoint, method, status, duration) samples.
+
+    All storage is allocated up front; ``record`` overwrites the oldest slot
+    and never grows memory. Slot allocation uses ``itertools.count`` (atomic
+    under the GIL), so writers do not take a lock.
+    """
+
+    __slots__ = ('capacity', '_endpoints', '_methods', '_statuses', '_durations',
+                 '_timestamps', '_counter', '_written')
+
+    def __init__(self, capacity: int = 4096):
+        self.capacity = capacity
+        self._endpoints: List[Optional[str]] = [None] * capacity
+        self._methods: List[Optional[str]] = [None] * capacity
+        self._statuses = array('H', [0]) * capacity
+        self._durations = array('d', [0.0]) * capacity
+        self._timestamps = array('d', [0.0]) * capacity
+        self._counter = itertools.count()
+        self._written = 0
+
+    def record(self, endpoint: str, method: str, status: int, duration: float):
+        index = next(self._counter)
+        slot = index % self.capacity
+        self._endpoints[slot] = endpoint
+        self._methods[slot] = method
+        self._statuses[slot] = status
+        self._durations[slot] = duration
+        self._timestamps[slot] = time.time()
+        self._written = index + 1
+
+    def __len__(self):
+        return min(self._written, self.capacity)
+
+    def durations(self, endpoint: Optional[str] = None) -> List[float]:
+        size = len(self)
+        if endpoint is None:
+            return list(self._durations[:size])
+        return [self._durations[i] for i in range(size) if self._endpoints[i] == endpoint]
+
+    def summary(self, top: int = 20) -> Dict[str, Any]:
+        """Per-endpoint count and latency percentiles over the buffered window"""
+        size = len(self)
+        by_endpoint: Dict[str, List[float]] = {}
+        errors: Dict[str, int] = {}
+        for i in range(size):
+            endpoint = self._endpoints[i]
+            by_endpoint.setdefault(endpoint, []).append(self._durations[i])
+            if self._statuses[i] >= 500:
+                errors[endpoint] = errors.get(endpoint, 0) + 1
+
+        endpoints = {}
+        for endpoint, values in by_endpoint.items():
+            values.sort()
+            endpoints[endpoint] = {
+                'count': len(values),
+                'errors': errors.get(endpoint, 0),
+                'p50_ms': round(_percentile(values, 50) * 1000, 2),
+                'p95_ms': round(_percentile(values, 95) * 1000, 2),
+                'p99_ms': round(_percentile(values, 99) * 1000, 2),
+                'max_ms': round(values[-1] * 1000, 2)
+            }
+        slowest = sorted(endpoints.items(), key=lambda item: item[1]['p95_ms'], reverse=True)[:top]
+        return {
+            'window_size': size,
+            'total_recorded': self._written,
+            'endpoints': dict(slowest)
+        }
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(int(round(pct / 100.0 * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that hands the record over unformatted.
+
+    The stock handler formats the message on the calling thread; here the
+    listener's handlers do all formatting, so a request only pays for the
+    enqueue. The listener thread has no request context, so the request
+    fields the JSON formatter reads from it are copied onto the record
+    first.
+    """
+
+    def prepare(self, record):
+        if has_request_context():
+            if not hasattr(record, 'request_id') and hasattr(request, 'request_id'):
+                record.request_id = request.request_id
+            if not hasattr(record, 'request'):
+                record.request = {
+                    'method': request.method,
+                    'path': request.path,
+                    'url': request.url,
+                    'remote_addr': request.remote_addr,
+                }
+            if not hasattr(record, 'user_id') and 'user_id' in g:
+                record.user_id = g.user_id
+        return record
+
+
+class RequestInstrumentation:
+    """One before/after hook pair for request timing, metrics and logging.
+
+    Every request gets a Prometheus count/latency observation. Sampled
+    requests (``INSTRUMENTATION_SAMPLE_RATES``: path prefix -> rate) are also
+    written to the in-memory span ring buffer. Only slow or failed requests
+    produce a log line, and log records are written by a background
+    listener thread. The hooks time themselves so the per-request overhead
+    can be checked against ``INSTRUMENTATION_OVERHEAD_BUDGET_US``.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.enabled = True
+        self.default_sample_rate = 1.0
+        self.sample_rates: Dict[str, float] = {}
+        self.slow_request_threshold = 1.0
+        self.overhead_budget_us = 100.0
+        self.spans = RingBuffer(4096)
+        self.overhead = array('d', [0.0]) * 1024
+        self._overhead_counter = itertools.count()
+        self._overhead_written = 0
+        self._listeners: List[logging.handlers.QueueListener] = []
+        self._http_request_total = None
+        self._http_request_duration = None
+
+    def init_app(self, app):
+        """Register the request hooks and move log I/O to a background thread"""
+        self.app = app
+        self.enabled = app.config.get('INSTRUMENTATION_ENABLED', True)
+        self.default_sample_rate = app.config.get('INSTRUMENTATION_DEFAULT_SAMPLE_RATE', 1.0)
+        # Longest prefix wins
+        self.sample_rates = dict(sorted(
+            app.config.get('INSTRUMENTATION_SAMPLE_RATES', {}).items(),
+            key=lambda item: len(item[0]), reverse=True
+        ))
+        self.slow_request_threshold = app.config.get('SLOW_REQUEST_THRESHOLD', 1.0)
+        self.overhead_budget_us = app.config.get('INSTRUMENTATION_OVERHEAD_BUDGET_US', 100.0)
+        self.spans = RingBuffer(app.config.get('INSTRUMENTATION_BUFFER_SIZE', 4096))
+
+        try:
+            from app.utils.prometheus_metrics import http_request_total, http_request_duration
+            self._http_request_total = http_request_total
+            self._http_request_duration = http_request_duration
+        except Exception as e:
+            logger.warning(f"Prometheus request metrics unavailable: {e}")
+
+        if app.config.get('LOG_ASYNC_ENABLED', True):
+            self.install_async_logging(['PipLinePro', app.logger.name])
+
+        if self.enabled:
+            app.before_request(self.before_request)
+            app.after_request(self.after_request)
+
+    def install_async_logging(self, logger_names: List[str]):
+        """Route the named loggers through a queue drained by a listener thread"""
+        for name in logger_names:
+            target = logging.getLogger(name)
+            handlers = [h for h in target.handlers if not isinstance(h, logging.handlers.QueueHandler)]
+            if not handlers:
+                continue
+            log_queue: queue.Queue = queue.Queue(-1)
+            listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+            for handler in handlers:
+                target.removeHandler(handler)
+            target.addHandler(_DeferredQueueHandler(log_queue))
+            listener.start()
+            self._listeners.append(listener)
+
+    def stop(self):
+        """Flush queued log records (called at shutdown)"""
+        for listener in self._listeners:
+            try:
+                listener.stop()
+            except Exception:
+                pass
+        self._listeners = []
+
+    def _sample_rate(self, path: str) -> float:
+        for prefix, rate in self.sample_rates.items():
+            if path.startswith(prefix):
+                return rate
+        return self.default_sample_rate
+
+    def before_request(self):
+        started = time.perf_counter()
+        g._instr_start = started
+        rate = self._sample_rate(request.path)
+        g._instr_sampled = rate >= 1.0 or (rate > 0.0 and random.random() < rate)
+        g._instr_overhead = time.perf_counter() - started
+
+    def after_request(self, response):
+        hook_started = time.perf_counter()
+        started = g.pop('_instr_start', None)
+        if started is None:
+            return response
+
+        duration = hook_started - started
+        endpoint = request.endpoint or 'unknown'
+        method = request.method
+        status = response.status_code
+
+        if self._http_request_total is not None:
+            try:
+                self._http_request_total.labels(method=method, endpoint=endpoint, status=status).inc()
+                self._http_request_duration.labels(method=method, endpoint=endpoint).observe(duration)
+            except Exception:
+                pass
+
+        if g.pop('_instr_sampled', False):
+            self.spans.record(endpoint, method, status, duration)
+
+        if duration >= self.slow_request_threshold or status >= 500:
+            logger.warning(
+                "Request %s %s -> %s in %.3fs (request_id=%s)",
+                method, request.path, status, duration, getattr(g, 'request_id', None)
+            )
+
+        self._record_overhead(g.pop('_instr_overhead', 0.0) + (time.perf_counter() - hook_started))
+        return response
+
+    def _record_overhead(self, seconds: float):
+        index = next(self._overhead_counter)
+        self.overhead[index % len(self.overhead)] = seconds
+        self._overhead_written = index + 1
+
+    def get_overhead_stats(self) -> Dict[str, Any]:
+        """Per-request cost of the instrumentation hooks themselves"""
+        size = min(self._overhead_written, len(self.overhead))
+        values = sorted(self.overhead[:size])
+        p99_us = round(_percentile(values, 99) * 1e6, 1)
+        return {
+            'samples': size,
+            'p50_us': round(_percentile(values, 50) * 1e6, 1),
+            'p99_us': p99_us,
+            'max_us': round(values[-1] * 1e6, 1) if values else 0.0,
+            'budget_us': self.overhead_budget_us,
+            'within_budget': p99_us <= self.overhead_budget_us
+        }
+
+    def get_stats(self, top: int = 20) -> Dict[str, Any]:
+        return {
+            'enabled': self.enabled,
+            'default_sample_rate': self.default_sample_rate,
+            'sample_rates': self.sample_rates,
+            'async_logging': bool(self._listeners),
+            'overhead': self.get_overhead_stats(),
+            'requests': self.spans.summary(top=top)
+        }
+
+    def benchmark(self, iterations: int = 10000, path: str = '/api/v1/benchmark') -> Dict[str, Any]:
+        """Micro-benchmark the hook pair inside a test request context"""
+        from flask import Response
+
+        if iterations < 1:
+            raise ValueError(f"iterations must be at least 1, got {iterations}")
+
+        response = Response('', status=200)
+        timings = array('d', [0.0]) * iterations
+        with self.app.test_request_context(path):
+            for i in range(iterations):
+                started = time.perf_counter()
+                self.before_request()
+                self.after_request(response)
+                timings[i] = time.perf_counter() - started
+        values = sorted(timings)
+        mean_us = sum(values) / iterations * 1e6
+        p99_us = _percentile(values, 99) * 1e6
+        return {
+            'iterations': iterations,
+            'mean_us': round(mean_us, 2),
+            'p50_us': round(_percentile(values, 50) * 1e6, 2),
+            'p99_us': round(p99_us, 2),
+            'budget_us': self.overhead_budget_us,
+            'within_budget': p99_us <= self.overhead_budget_us
+        }
+
+
+# Global instrumentation instance (initialized in app factory)
+request_instrumentation = RequestInstrumentation()
@@ -0,0 +1,107 @@
+"""
+Lazy Loading Utilities
+Defer heavy imports and startup work until they are first needed
+"""
+import importlib
+import re
+import subprocess
+import sys
+import threading
+import types
+from typing import Any, Dict, List
+
+
+class LazyModule(types.ModuleType):
+    """Module placeholder that imports the real module on first attribute access.
+
+    ``pd = lazy_import('pandas')`` costs nothing at import time; the first
+    ``pd.read_excel`` pays for the import exactly once.
+    """
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__['_lazy_module'] = None
+        self.__dict__['_lazy_lock'] = threading.Lock()
+
+    def _load(self) -> types.ModuleType:
+        module = self.__dict__['_lazy_module']
+        if module is None:
+            with self.__dict__['_lazy_lock']:
+                module = self.__dict__['_lazy_module']
+                if module is None:
+                    module = importlib.import_module(self.__name__)
+                    self.__dict__['_lazy_module'] = module
+        return module
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._load(), name)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        loaded = self.__dict__['_lazy_module'] is not None
+        return f"<lazy module '{self.__name__}' ({'loaded' if loaded else 'not loaded'})>"
+
+
+def lazy_import(name: str) -> types.ModuleType:
+    """Return the module if already imported, otherwise a lazy placeholder"""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    return LazyModule(name)
+
+
+_IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+_PROFILE_SNIPPET = (
+    "import time, os; os.environ.setdefault('SCHEDULER_ENABLED', 'false'); "
+    "t = time.perf_counter(); from app import create_app; "
+    "imported = time.perf_counter(); create_app({config!r}); "
+    "print('STARTUP_IMPORT_SECONDS', imported - t); "
+    "print('STARTUP_TOTAL_SECONDS', time.perf_counter() - t)"
+)
+
+
+def profile_startup(config_name: str = None, top: int = 25) -> Dict[str, Any]:
+    """Boot the app in a fresh interpreter under ``-X importtime`` and summarize.
+
+    Returns total boot time, time spent importing the app package, and the
+    ``top`` top-level imports by cumulative import time.
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', _PROFILE_SNIPPET.format(config=config_name)],
+        capture_output=True, text=True
+    )
+
+    imports: List[Dict[str, Any]] = []
+    total_import_us = 0
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, module = match.groups()
+        total_import_us += int(self_us)
+        # Depth 0 entries carry the cumulative cost of their whole subtree
+        if len(indent) <= 1:
+            imports.append({
+                'module': module,
+                'self_ms': int(self_us) / 1000.0,
+                'cumulative_ms': int(cumulative_us) / 1000.0
+            })
+
+    timings = {}
+    for line in result.stdout.splitlines():
+        if line.startswith('STARTUP_'):
+            key, _, value = line.partition(' ')
+            timings[key.lower()] = float(value)
+
+    imports.sort(key=lambda entry: entry['cumulative_ms'], reverse=True)
+    return {
+        'success': result.returncode == 0,
+        'total_seconds': timings.get('startup_total_seconds'),
+        'import_seconds': timings.get('startup_import_seconds'),
+        'all_imports_ms': round(total_import_us / 1000.0, 1),
+        'top_imports': imports[:top],
+        'error': result.stderr.strip().splitlines()[-1] if result.returncode != 0 and result.stderr else None
+    }
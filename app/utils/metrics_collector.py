@@ -22,7 +22,8 @@ class MetricsCollector:
     """Collect and aggregate application metrics"""
     
     def __init__(self):
-        self.request_metrics = defaultdict(list)
+        # Bounded per endpoint: keep only the last 1000 requests
+        self.request_metrics = defaultdict(lambda: deque(maxlen=1000))
         self.query_metrics = defaultdict(list)
         self.cache_metrics = defaultdict(int)
         self.business_metrics = defaultdict(int)
@@ -48,10 +49,7 @@ class MetricsCollector:
             'duration': duration,
             'timestamp': datetime.now(timezone.utc)
         })
-        
-        # Keep only last 1000 requests per endpoint
-        if len(self.request_metrics[endpoint]) > 1000:
-            self.request_metrics[endpoint] = self.request_metrics[endpoint][-1000:]
+
     
     def record_query(self, operation: str, table: str, duration: float):
         """Record database query metrics"""
@@ -46,6 +46,26 @@ db_slow_queries_total = Counter(
     ['table']
 )
 
+db_queries_per_request = Histogram(
+    'db_queries_per_request',
+    'Database queries issued per HTTP request',
+    ['endpoint'],
+    buckets=[0, 1, 2, 5, 10, 20, 50, 100, 250, 500]
+)
+
+db_time_per_request = Histogram(
+    'db_time_per_request_seconds',
+    'Total database time per HTTP request in seconds',
+    ['endpoint'],
+    buckets=[0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5]
+)
+
+db_n_plus_one_total = Counter(
+    'db_n_plus_one_total',
+    'Requests with a statement fingerprint repeated above the N+1 threshold',
+    ['endpoint']
+)
+
 # Cache Metrics
 cache_operations_total = Counter(
     'cache_operations_total',
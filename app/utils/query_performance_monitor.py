@@ -1,12 +1,15 @@
 """
 Query Performance Monitoring
-Automatically detects and logs slow database queries
+Automatically detects and logs slow database queries, and profiles queries per request
 """
 import logging
+import re
+import threading
 import time
-from functools import wraps
-from typing import Any
+from functools import lru_cache, wraps
+from typing import Any, Dict, Optional
 from collections.abc import Callable
+from flask import g, has_request_context, request
 from sqlalchemy import event
 from sqlalchemy.engine import Engine
 from datetime import datetime
@@ -30,6 +33,80 @@ query_stats = {
     'slowest_query': {'time': 0.0, 'sql': '', 'timestamp': None}
 }
 
+_COMMENT_RE = re.compile(r'--[^\n]*|/\*.*?\*/', re.S)
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER_RE = re.compile(r'%\(\w+\)s|%s|:\w+|\?')
+_IN_LIST_RE = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+_VALUES_LIST_RE = re.compile(r'(VALUES\s*\([^)]*\))(?:\s*,\s*\([^)]*\))+', re.I)
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+@lru_cache(maxsize=4096)
+def fingerprint_statement(statement: str) -> str:
+    """Normalize a SQL statement so executions differing only in literals match.
+
+    Literals and bind placeholders become ``?``, IN lists and multi-row
+    VALUES collapse to a single element, comments and whitespace runs go.
+    """
+    sql = _COMMENT_RE.sub(' ', statement)
+    sql = _STRING_RE.sub('?', sql)
+    sql = _PLACEHOLDER_RE.sub('?', sql)
+    sql = _NUMBER_RE.sub('?', sql)
+    sql = _IN_LIST_RE.sub('(?+)', sql)
+    sql = _VALUES_LIST_RE.sub(r'\1 /* ... */', sql)
+    return _WHITESPACE_RE.sub(' ', sql).strip()
+
+
+class RequestQueryProfile:
+    """Queries issued during one request, grouped by fingerprint"""
+
+    __slots__ = ('fingerprints', 'query_count', 'total_time')
+
+    def __init__(self):
+        # fingerprint -> [count, total_time, max_time]
+        self.fingerprints: Dict[str, list] = {}
+        self.query_count = 0
+        self.total_time = 0.0
+
+    def record(self, statement: str, duration: float):
+        fingerprint = fingerprint_statement(statement)
+        entry = self.fingerprints.get(fingerprint)
+        if entry is None:
+            self.fingerprints[fingerprint] = [1, duration, duration]
+        else:
+            entry[0] += 1
+            entry[1] += duration
+            if duration > entry[2]:
+                entry[2] = duration
+        self.query_count += 1
+        self.total_time += duration
+
+    def repeated(self, threshold: int) -> Dict[str, list]:
+        """Fingerprints executed at least ``threshold`` times (likely N+1)"""
+        return {fp: entry for fp, entry in self.fingerprints.items() if entry[0] >= threshold}
+
+    def to_dict(self, n_plus_one_threshold: int, limit: int = 25) -> Dict[str, Any]:
+        ordered = sorted(self.fingerprints.items(), key=lambda item: item[1][1], reverse=True)
+        return {
+            'query_count': self.query_count,
+            'total_time_ms': round(self.total_time * 1000, 2),
+            'distinct_statements': len(self.fingerprints),
+            'n_plus_one': [
+                {'fingerprint': fp, 'count': entry[0]}
+                for fp, entry in self.repeated(n_plus_one_threshold).items()
+            ],
+            'statements': [
+                {
+                    'fingerprint': fp,
+                    'count': entry[0],
+                    'total_ms': round(entry[1] * 1000, 2),
+                    'max_ms': round(entry[2] * 1000, 2)
+                }
+                for fp, entry in ordered[:limit]
+            ]
+        }
+
 
 class QueryPerformanceMonitor:
     """
@@ -38,22 +115,49 @@ class QueryPerformanceMonitor:
     
     def __init__(self, app=None):
         self.app = app
+        self.profiling_enabled = False
+        self.n_plus_one_threshold = 5
+        self.profile_header_enabled = False
+        self.endpoint_stats: Dict[str, Dict[str, Any]] = {}
+        self.n_plus_one_patterns: Dict[str, Dict[str, Any]] = {}
+        self._stats_lock = threading.Lock()
         if app is not None:
             self.init_app(app)
     
     def init_app(self, app):
         """Initialize query performance monitoring with Flask app"""
+        self.app = app
+        self.profiling_enabled = app.config.get('SQL_PROFILER_ENABLED', True)
+        self.n_plus_one_threshold = app.config.get('SQL_N_PLUS_ONE_THRESHOLD', 5)
+        self.profile_header_enabled = app.config.get('SQL_PROFILE_HEADER_ENABLED', False) or app.debug
+        profiler = self
+        advisor = None
+        if app.config.get('INDEX_ADVISOR_ENABLED', True):
+            from app.services.index_advisor_service import index_advisor
+            index_advisor.init_app(app)
+            advisor = index_advisor
+        
         # SQLAlchemy event listeners for query timing
         @event.listens_for(Engine, "before_cursor_execute")
         def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
             """Record query start time"""
-            conn.info.setdefault('query_start_time', []).append(time.time())
+            conn.info.setdefault('query_start_time', []).append(time.perf_counter())
         
         @event.listens_for(Engine, "after_cursor_execute")
         def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
             """Calculate and log query execution time"""
             try:
-                total_time = time.time() - conn.info['query_start_time'].pop(-1)
+                total_time = time.perf_counter() - conn.info['query_start_time'].pop(-1)
+                
+                # Attribute the query to the current request
+                if profiler.profiling_enabled and has_request_context():
+                    profile = g.get('_query_profile')
+                    if profile is not None:
+                        profile.record(statement, total_time)
+                
+                # Feed the index advisor's workload
+                if advisor is not None and not executemany:
+                    advisor.record(statement, parameters, total_time)
                 
                 # Update statistics
                 query_stats['total_queries'] += 1
@@ -92,9 +196,120 @@ class QueryPerformanceMonitor:
                 # If timing data is missing, skip logging
                 pass
         
+        if self.profiling_enabled:
+            app.before_request(self._start_request_profile)
+            app.after_request(self._finish_request_profile)
+        
         app.query_performance_monitor = self
         logger.info("Query performance monitoring initialized")
     
+    def _start_request_profile(self):
+        g._query_profile = RequestQueryProfile()
+    
+    def _finish_request_profile(self, response):
+        profile = g.pop('_query_profile', None)
+        if profile is None:
+            return response
+        
+        endpoint = request.endpoint or 'unknown'
+        repeated = profile.repeated(self.n_plus_one_threshold)
+        self._record_endpoint(endpoint, profile, repeated)
+        
+        try:
+            from app.utils.prometheus_metrics import (
+                db_queries_per_request, db_time_per_request, db_n_plus_one_total
+            )
+            db_queries_per_request.labels(endpoint=endpoint).observe(profile.query_count)
+            db_time_per_request.labels(endpoint=endpoint).observe(profile.total_time)
+            if repeated:
+                db_n_plus_one_total.labels(endpoint=endpoint).inc()
+        except Exception:
+            pass
+        
+        if repeated:
+            worst_fp, worst = max(repeated.items(), key=lambda item: item[1][0])
+            logger.warning(
+                "Possible N+1 on %s: %d executions of %s (%d queries in request)",
+                endpoint, worst[0], worst_fp[:200], profile.query_count
+            )
+        
+        if request.headers.get('X-Profile') and self._profile_allowed():
+            self._attach_profile(response, profile)
+        return response
+    
+    def _record_endpoint(self, endpoint: str, profile: RequestQueryProfile, repeated: Dict[str, list]):
+        with self._stats_lock:
+            stats = self.endpoint_stats.get(endpoint)
+            if stats is None:
+                stats = {'requests': 0, 'queries': 0, 'query_time': 0.0, 'max_queries': 0, 'n_plus_one_requests': 0}
+                self.endpoint_stats[endpoint] = stats
+            stats['requests'] += 1
+            stats['queries'] += profile.query_count
+            stats['query_time'] += profile.total_time
+            stats['max_queries'] = max(stats['max_queries'], profile.query_count)
+            if repeated:
+                stats['n_plus_one_requests'] += 1
+            for fingerprint, entry in repeated.items():
+                pattern = self.n_plus_one_patterns.get(fingerprint)
+                if pattern is None:
+                    if len(self.n_plus_one_patterns) >= 200:
+                        continue
+                    pattern = {'endpoints': set(), 'occurrences': 0, 'max_count': 0}
+                    self.n_plus_one_patterns[fingerprint] = pattern
+                pattern['endpoints'].add(endpoint)
+                pattern['occurrences'] += 1
+                pattern['max_count'] = max(pattern['max_count'], entry[0])
+    
+    def _profile_allowed(self) -> bool:
+        if self.profile_header_enabled:
+            return True
+        try:
+            from flask_login import current_user
+            return current_user.is_authenticated and current_user.is_any_admin()
+        except Exception:
+            return False
+    
+    def _attach_profile(self, response, profile: RequestQueryProfile):
+        """Expose the query breakdown: headers always, body for JSON objects"""
+        response.headers['X-Query-Count'] = str(profile.query_count)
+        response.headers['X-Query-Time-Ms'] = f"{profile.total_time * 1000:.2f}"
+        if response.is_json and not response.direct_passthrough:
+            data = response.get_json(silent=True)
+            if isinstance(data, dict):
+                from flask import json
+                data['_profile'] = profile.to_dict(self.n_plus_one_threshold)
+                response.set_data(json.dumps(data))
+    
+    def get_endpoint_stats(self, limit: int = 50) -> Dict[str, Any]:
+        """Per-endpoint query counts and detected N+1 patterns"""
+        with self._stats_lock:
+            endpoints = {
+                endpoint: {
+                    'requests': stats['requests'],
+                    'avg_queries': round(stats['queries'] / stats['requests'], 2),
+                    'max_queries': stats['max_queries'],
+                    'avg_query_time_ms': round(stats['query_time'] / stats['requests'] * 1000, 2),
+                    'n_plus_one_requests': stats['n_plus_one_requests']
+                }
+                for endpoint, stats in self.endpoint_stats.items()
+            }
+            patterns = [
+                {
+                    'fingerprint': fingerprint,
+                    'endpoints': sorted(pattern['endpoints']),
+                    'occurrences': pattern['occurrences'],
+                    'max_count': pattern['max_count']
+                }
+                for fingerprint, pattern in self.n_plus_one_patterns.items()
+            ]
+        ranked = sorted(endpoints.items(), key=lambda item: item[1]['avg_queries'], reverse=True)[:limit]
+        patterns.sort(key=lambda item: item['occurrences'], reverse=True)
+        return {
+            'n_plus_one_threshold': self.n_plus_one_threshold,
+            'endpoints': dict(ranked),
+            'n_plus_one_patterns': patterns[:limit]
+        }
+    
     @staticmethod
     def get_stats():
         """Get query performance statistics"""
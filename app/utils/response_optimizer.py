@@ -5,10 +5,11 @@ Provides compression, caching headers, and response optimization
 import gzip
 import json
 import time
-from typing import Any, Dict, Optional
-from flask import Response, request, jsonify
+from typing import Any, Callable, Dict, Iterable, Optional
+from flask import Response, current_app, g, request, jsonify
 from functools import wraps
 import logging
+from app.utils import fast_json
 
 logger = logging.getLogger(__name__)
 
@@ -26,22 +27,24 @@ class ResponseOptimizer:
     
     def compress_response(self, data: Any, content_type: str = 'application/json') -> Response:
         """Compress response data if beneficial"""
-        # Convert to JSON if needed
-        if not isinstance(data, (str, bytes)):
-            json_data = json.dumps(data, default=str)
-        else:
+        # Convert to JSON if needed (str() for Decimals and dates, as before)
+        if isinstance(data, str):
+            json_data = data.encode('utf-8')
+        elif isinstance(data, bytes):
             json_data = data
+        else:
+            json_data = fast_json.dumps(data, default=str, passthrough_datetime=True)
         
         # Check if compression is beneficial
-        if len(json_data.encode('utf-8')) < self.compression_threshold:
+        if len(json_data) < self.compression_threshold:
             return Response(
                 json_data,
                 mimetype=content_type,
-                headers={'Content-Length': str(len(json_data.encode('utf-8')))}
+                headers={'Content-Length': str(len(json_data))}
             )
         
         # Compress the data
-        compressed_data = gzip.compress(json_data.encode('utf-8'))
+        compressed_data = gzip.compress(json_data)
         
         return Response(
             compressed_data,
@@ -53,35 +56,59 @@ class ResponseOptimizer:
             }
         )
     
-    def add_cache_headers(self, response: Response, cache_type: str = 'default') -> Response:
-        """Add appropriate cache headers to response"""
-        cache_header = self.cache_headers.get(cache_type, 'no-cache')
+    def add_cache_headers(self, response: Response, cache_type: str = 'default', etag: str = None) -> Response:
+        """Add appropriate cache headers to response
         
-        # Add cache headers
-        response.headers['Cache-Control'] = cache_header
-        response.headers['ETag'] = f'"{int(time.time())}"'
-        response.headers['Last-Modified'] = time.strftime('%a, %d %b %Y %H:%M:%S GMT', time.gmtime())
+        Responses with a data-version ETag are revalidated on every use
+        instead of being cached for a fixed time.
+        """
+        if etag:
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'private, no-cache'
+        else:
+            response.headers['Cache-Control'] = self.cache_headers.get(cache_type, 'no-cache')
         
         return response
     
     def optimize_json_response(self, data: Any, cache_type: str = 'default', 
-                             compress: bool = True) -> Response:
+                             compress: bool = True, etag: str = None) -> Response:
         """Create optimized JSON response with compression and caching"""
         response = self.compress_response(data) if compress else Response(
-            json.dumps(data, default=str),
+            fast_json.dumps(data, default=str, passthrough_datetime=True),
             mimetype='application/json'
         )
         
-        return self.add_cache_headers(response, cache_type)
+        return self.add_cache_headers(response, cache_type, etag)
+    
+    @staticmethod
+    def etag_matches(etag: str) -> bool:
+        """True when If-None-Match contains ``etag``
+        
+        Also accepts the tag with a suffix, as added by compression
+        middleware (``"<etag>:gzip"``), and weak comparisons.
+        """
+        header = request.headers.get('If-None-Match')
+        if not etag or not header:
+            return False
+        for token in header.split(','):
+            token = token.strip()
+            if token.startswith('W/'):
+                token = token[2:]
+            token = token.strip('"')
+            if token == '*' or token == etag or token.startswith(etag + ':') or token.startswith(etag + '-'):
+                return True
+        return False
     
     def handle_conditional_request(self, etag: str = None, last_modified: str = None) -> Optional[Response]:
         """Handle conditional requests (304 Not Modified)"""
-        if_none_match = request.headers.get('If-None-Match')
         if_modified_since = request.headers.get('If-Modified-Since')
         
         # Check ETag
-        if etag and if_none_match and etag in if_none_match:
-            return Response(status=304)
+        if etag and self.etag_matches(etag):
+            response = Response(status=304)
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
         
         # Check Last-Modified
         if last_modified and if_modified_since:
@@ -95,39 +122,69 @@ class ResponseOptimizer:
                 pass  # Invalid date format, continue with normal response
         
         return None
+    
+    def data_version_etag(self, domains: Iterable[str], months: Optional[Iterable[str]] = None,
+                          whole_history: Iterable[str] = ()) -> Optional[str]:
+        """ETag for the current request from the data versions it depends on
+        
+        The variant covers the endpoint, its arguments and the viewer, so
+        users with different permissions never share a 304.
+        """
+        from flask_login import current_user
+        from app.services.data_version_service import data_version_service
+        
+        try:
+            user_id = current_user.get_id() if current_user and current_user.is_authenticated else None
+        except Exception:
+            user_id = None
+        org = getattr(g, 'organization_id', None)
+        variant = f"{request.endpoint}|{request.query_string.decode('latin-1')}|{user_id}|{org}"
+        etag = data_version_service.etag(variant, org, domains, months, whole_history)
+        if etag:
+            # Lets in-process and Redis result caches key on the data version too
+            g.data_version_etag = etag
+        return etag
 
 # Global response optimizer instance
 response_optimizer = ResponseOptimizer()
 
-def optimized_response(cache_type: str = 'default', compress: bool = True):
-    """Decorator for optimized API responses"""
+def optimized_response(cache_type: str = 'default', compress: bool = True, depends_on: Iterable[str] = ()):
+    """Decorator for optimized API responses
+    
+    With ``depends_on`` (data version domains) the response carries a
+    data-version ETag and matching conditional requests get a 304 before
+    the view runs.
+    """
     def decorator(func):
         @wraps(func)
         def wrapper(*args, **kwargs):
             start_time = time.time()
             
             try:
-                # Execute the function
-                result = func(*args, **kwargs)
-                
-                # Handle conditional requests
-                conditional_response = response_optimizer.handle_conditional_request()
+                # Handle conditional requests before doing any work
+                etag = response_optimizer.data_version_etag(depends_on) if depends_on else None
+                conditional_response = response_optimizer.handle_conditional_request(etag)
                 if conditional_response:
                     return conditional_response
                 
+                # Execute the function
+                result = func(*args, **kwargs)
+                
                 # Optimize the response
                 if isinstance(result, tuple) and len(result) == 2:
                     # Handle (data, status_code) tuple
                     data, status_code = result
-                    response = response_optimizer.optimize_json_response(data, cache_type, compress)
+                    response = response_optimizer.optimize_json_response(
+                        data, cache_type, compress, etag if status_code == 200 else None)
                     response.status_code = status_code
                     return response
                 elif hasattr(result, 'json'):
                     # Handle Flask Response object
-                    return response_optimizer.add_cache_headers(result, cache_type)
+                    return response_optimizer.add_cache_headers(
+                        result, cache_type, etag if result.status_code == 200 else None)
                 else:
                     # Handle plain data
-                    return response_optimizer.optimize_json_response(result, cache_type, compress)
+                    return response_optimizer.optimize_json_response(result, cache_type, compress, etag)
                     
             except Exception as e:
                 execution_time = time.time() - start_time
@@ -137,5 +194,64 @@ def optimized_response(cache_type: str = 'default', compress: bool = True):
         return wrapper
     return decorator
 
+def versioned_response(*domains: str, months: Callable[[], Optional[Iterable[str]]] = None,
+                       whole_history: Iterable[str] = ()):
+    """Answer conditional requests from data versions before the view runs
+    
+    Args:
+        domains: Data version domains the view reads (see data_version_service)
+        months: Returns the 'YYYY-MM' months the request covers (None: all)
+        whole_history: Domains read across all months even when ``months`` is set
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            from app.services.data_version_service import data_version_service
+            
+            try:
+                etag = response_optimizer.data_version_etag(
+                    domains, months() if months else None, whole_history)
+            except Exception as e:
+                logger.warning(f"Data version ETag unavailable for {func.__name__}: {e}")
+                etag = None
+            if etag is None:
+                return func(*args, **kwargs)
+            
+            conditional_response = response_optimizer.handle_conditional_request(etag)
+            if conditional_response:
+                data_version_service.record(not_modified=True)
+                return conditional_response
+            
+            response = current_app.make_response(func(*args, **kwargs))
+            data_version_service.record(not_modified=False)
+            if response.status_code == 200:
+                response.set_etag(etag)
+                response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+        
+        return wrapper
+    return decorator
+
+def request_months() -> Optional[Iterable[str]]:
+    """Months covered by year/month or start_date/end_date query parameters"""
+    year = request.args.get('year', type=int)
+    month = request.args.get('month', type=int)
+    if year and month and 1 <= month <= 12:
+        return [f"{year:04d}-{month:02d}"]
+    start = request.args.get('start_date') or request.args.get('start')
+    end = request.args.get('end_date') or request.args.get('end')
+    if start and end:
+        try:
+            start_year, start_month = (int(part) for part in start[:7].split('-'))
+            end_year, end_month = (int(part) for part in end[:7].split('-'))
+        except ValueError:
+            return None
+        months = []
+        while (start_year, start_month) <= (end_year, end_month) and len(months) <= 120:
+            months.append(f"{start_year:04d}-{start_month:02d}")
+            start_year, start_month = (start_year + 1, 1) if start_month == 12 else (start_year, start_month + 1)
+        return months if len(months) <= 120 else None
+    return None
+
 # Export commonly used functions
-__all__ = ['ResponseOptimizer', 'response_optimizer', 'optimized_response']
+__all__ = ['ResponseOptimizer', 'response_optimizer', 'optimized_response', 'versioned_response', 'request_months']
@@ -59,18 +59,133 @@ class Config:
     # Enhanced rate limiting
     RATELIMIT_STORAGE_URL = "memory://"
     RATELIMIT_DEFAULT = "200 per day; 50 per hour; 10 per minute"
-    RATELIMIT_STORAGE_OPTIONS = {
-        'key_prefix': 'pipeline_ratelimit'
-    }
+    # Key prefix is a limiter setting; storage options are passed to the Redis client as-is
+    RATELIMIT_KEY_PREFIX = 'pipeline_ratelimit'
+    RATELIMIT_STORAGE_OPTIONS = {}
+    # Moving window gives exact limits on shared (Redis) storage
+    RATELIMIT_STRATEGY = 'moving-window'
+    RATELIMIT_IN_MEMORY_FALLBACK_ENABLED = True  # Keep limiting per worker if Redis is down
+    # Telemetry: per-minute buckets kept for one hour, top-N IPs per bucket
+    RATELIMIT_TELEMETRY_BUCKET_SECONDS = 60
+    RATELIMIT_TELEMETRY_WINDOW_BUCKETS = 60
+    RATELIMIT_TELEMETRY_MAX_IPS = 1000
     
     # Enhanced logging
     LOG_LEVEL = 'INFO'
     LOG_FILE = 'logs/pipeline.log'
+    LOG_ASYNC_ENABLED = os.environ.get('LOG_ASYNC_ENABLED', 'true').lower() == 'true'  # Handlers run on a background thread
+    
+    # Request instrumentation - one timing hook per request, spans in a ring buffer
+    INSTRUMENTATION_ENABLED = True
+    INSTRUMENTATION_DEFAULT_SAMPLE_RATE = 1.0
+    INSTRUMENTATION_SAMPLE_RATES = {  # Path prefix -> fraction of requests recorded as spans
+        '/static/': 0.0,
+        '/assets/': 0.0,
+        '/api/v1/health': 0.1,
+    }
+    INSTRUMENTATION_BUFFER_SIZE = 4096
+    INSTRUMENTATION_OVERHEAD_BUDGET_US = 100
+    SLOW_REQUEST_THRESHOLD = 1.0  # Seconds; slower requests are logged
+    
+    # Audit log writer - records are queued and inserted in batches off the request path
+    AUDIT_ASYNC_ENABLED = os.environ.get('AUDIT_ASYNC_ENABLED', 'true').lower() == 'true'
+    AUDIT_BATCH_SIZE = 200  # Max rows per INSERT
+    AUDIT_FLUSH_INTERVAL = 1.0  # Seconds the writer waits for new records
+    AUDIT_QUEUE_MAX_SIZE = 10000  # Overflow is written synchronously
+    
+    # Auth principal cache - compact identity per request instead of a full User load
+    AUTH_PRINCIPAL_CACHE_ENABLED = os.environ.get('AUTH_PRINCIPAL_CACHE_ENABLED', 'true').lower() == 'true'
+    AUTH_PRINCIPAL_L1_TTL = 5.0  # Seconds; bounds cross-worker staleness
+    AUTH_PRINCIPAL_L1_MAX_SIZE = 10000
+    AUTH_PRINCIPAL_REDIS_TTL = 3600
+    
+    # Translation catalog - compiled per language, recompiled when the Redis version moves
+    TRANSLATION_VERSION_CHECK_INTERVAL = 2.0  # Seconds between version checks per worker
+    
+    # Data-version ETags - dashboard/analytics endpoints answer If-None-Match from Redis counters
+    DATA_VERSION_ETAGS_ENABLED = os.environ.get('DATA_VERSION_ETAGS_ENABLED', 'true').lower() == 'true'
+    DATA_VERSION_SALT = os.environ.get('DATA_VERSION_SALT', '')  # Change to invalidate every ETag
+    
+    # Dimension tables - transactions carry integer psp/client/company/payment method keys
+    DIMENSION_DUAL_WRITE_ENABLED = os.environ.get('DIMENSION_DUAL_WRITE_ENABLED', 'true').lower() == 'true'
+    DIMENSION_READS_ENABLED = os.environ.get('DIMENSION_READS_ENABLED', 'true').lower() == 'true'
+    DIMENSION_READY_CHECK_TTL = 600  # Seconds before re-checking that a dimension is fully backfilled
+    
+    # Index advisor - fingerprints the SELECT workload and proposes covering/partial indexes as migrations
+    INDEX_ADVISOR_ENABLED = os.environ.get('INDEX_ADVISOR_ENABLED', 'true').lower() == 'true'
+    INDEX_ADVISOR_MAX_FINGERPRINTS = 500  # Distinct statements tracked per worker
+    INDEX_ADVISOR_MIN_CALLS = 5  # Ignore statements seen fewer times than this
+    INDEX_ADVISOR_FLUSH_INTERVAL = 60  # Seconds between merges of worker counts into Redis
+    INDEX_ADVISOR_WORKLOAD_TTL = 7 * 86400  # Seconds Redis keeps the workload after the last flush
+    INDEX_ADVISOR_SCRATCH_MAX_MB = 2048  # Largest SQLite database copied for scratch benchmarks
+    
+    # Transaction partitions - monthly RANGE (date) partitions on PostgreSQL (scripts/partition_transactions.py convert)
+    TRANSACTION_PARTITION_PREMAKE_MONTHS = 3  # Months of partitions created ahead by the scheduler
+    TRANSACTION_PARTITION_ARCHIVE_AFTER_MONTHS = int(os.environ.get('TRANSACTION_PARTITION_ARCHIVE_AFTER_MONTHS', '0'))  # 0 = never archive
+    TRANSACTION_PARTITION_ARCHIVE_DIR = os.environ.get('TRANSACTION_PARTITION_ARCHIVE_DIR', 'archives')
+    
+    # Read replica - reporting endpoints read from DATABASE_REPLICA_URL (PostgreSQL standby or a SQLite copy)
+    DATABASE_REPLICA_URL = os.environ.get('DATABASE_REPLICA_URL')
+    SQLALCHEMY_BINDS = {
+        'replica': {
+            'url': DATABASE_REPLICA_URL,
+            # Separate pool, autosized from request threads unless set explicitly
+            **({'pool_size': int(os.environ['DATABASE_REPLICA_POOL_SIZE'])} if os.environ.get('DATABASE_REPLICA_POOL_SIZE') else {}),
+        }
+    } if DATABASE_REPLICA_URL else {}
+    DATABASE_REPLICA_BLUEPRINTS = [
+        'analytics_api', 'analytics', 'consolidated_dashboard_api', 'financial_performance',
+        'realtime_analytics_api', 'ai_analysis_api', 'ai_assistant'
+    ]
+    DATABASE_REPLICA_MAX_LAG = float(os.environ.get('DATABASE_REPLICA_MAX_LAG', '5'))  # Seconds; beyond this reads use the primary
+    DATABASE_REPLICA_STICKY_SECONDS = 5  # Reads stay on the primary this long after the user's own write
+    DATABASE_REPLICA_CHECK_INTERVAL = 5  # Seconds between lag checks per worker
+    DATABASE_REPLICA_RETRY_AFTER = 30  # Seconds to avoid the replica after a connection failure
+    
+    # Connection pools - sized per worker from the server concurrency and the database's connection limit
+    DB_POOL_AUTOSIZE = os.environ.get('DB_POOL_AUTOSIZE', 'true').lower() == 'true'  # Off: use the engine options below as-is
+    DB_POOL_WORKERS = int(os.environ.get('WEB_CONCURRENCY', '4'))  # Gunicorn worker processes per instance
+    DB_POOL_THREADS = int(os.environ.get('GUNICORN_THREADS', '2'))  # Request threads per worker
+    DB_POOL_BACKGROUND_THREADS = 3  # Scheduler, Socket.IO and background tasks holding connections
+    DB_POOL_INSTANCES = int(os.environ.get('DB_POOL_INSTANCES', '1'))  # App servers sharing the database
+    DB_MAX_CONNECTIONS = int(os.environ.get('DB_MAX_CONNECTIONS', '100'))  # Server max_connections (PgBouncer max_client_conn)
+    DB_REPLICA_MAX_CONNECTIONS = int(os.environ.get('DB_REPLICA_MAX_CONNECTIONS', '0')) or None  # Defaults to DB_MAX_CONNECTIONS
+    DB_RESERVED_CONNECTIONS = 10  # Left for admin sessions, migrations and replication
+    DB_POOL_TIMEOUT = 10  # Seconds a checkout may wait before failing
+    DB_POOL_RECYCLE = 1800  # Below typical server/PgBouncer idle timeouts
+    DB_POOL_IDLE_CHECK_SECONDS = 300  # Only connections idle this long are checked on checkout (replaces pre-ping)
+    DB_PGBOUNCER_MODE = os.environ.get('DB_PGBOUNCER_MODE', 'session')  # 'transaction' drops session state and prepared statements
+    
+    # Unit of work - cache tags, events, audit rows and data-version bumps of a write go out once after its commit
+    UNIT_OF_WORK_ENABLED = os.environ.get('UNIT_OF_WORK_ENABLED', 'true').lower() == 'true'  # Off: side effects run immediately
+    
+    # Background job scheduler - periodic jobs run once per cluster on the elected leader
+    SCHEDULER_ENABLED = os.environ.get('SCHEDULER_ENABLED', 'true').lower() == 'true'
+    SCHEDULER_LEADER_TTL = 30  # Seconds; followers retry the lease every TTL/3
+    SCHEDULER_TICK_INTERVAL = 1.0
+    SCHEDULER_MAX_WORKERS = 2  # Concurrent jobs on the leader
+    SCHEDULER_LOCK_KEY = 'pipeline:scheduler:leader'
+    SCHEDULER_LOCK_FILE = None  # Fallback lock when Redis is unavailable (default: instance/scheduler.lock)
+    TRUST_WALLET_SYNC_ENABLED = os.environ.get('TRUST_WALLET_SYNC_ENABLED', 'false').lower() == 'true'
     
     # Backup Configuration
     BACKUP_ENABLED = True
     BACKUP_RETENTION_DAYS = 30  # Keep backups for 30 days
     BACKUP_SCHEDULE_TIME = '23:59'  # Schedule time in 24-hour format (HH:MM) - Daily at 23:59 local time
+    BACKUP_COMPRESSION = os.environ.get('BACKUP_COMPRESSION', 'zstd')  # zstd, gzip or none (zstd falls back to gzip if unavailable)
+    BACKUP_COMPRESSION_LEVEL = int(os.environ.get('BACKUP_COMPRESSION_LEVEL', '3'))
+    BACKUP_INCREMENTAL_ENABLED = True  # Scheduled backups only copy changed tables between full backups
+    BACKUP_FULL_INTERVAL_DAYS = 7  # Take a full backup when the last one is older than this
+    BACKUP_SQLITE_PAGES_PER_STEP = 1024  # Online backup step size; writers can commit between steps
+    BACKUP_SQLITE_STEP_SLEEP = 0.005  # Seconds to yield to writers between steps
+    BACKUP_PG_JOBS = int(os.environ.get('BACKUP_PG_JOBS', '1'))  # >1 uses pg_dump directory format with parallel jobs
+    BACKUP_PG_TIMEOUT = 3600
+    BACKUP_S3_PART_SIZE = 16 * 1024 * 1024  # Multipart upload part size
+    BACKUP_S3_CONCURRENCY = 4  # Parts uploaded in parallel while the dump is running
+    BACKUP_TABLE_CHECKSUMS = True  # Store per-table row checksums in the manifest for restore verification
+    RESTORE_JOBS = int(os.environ.get('RESTORE_JOBS', '4'))  # Parallel pg_restore jobs / verification workers
+    RESTORE_CHUNK_ROWS = 50000  # Rows per chunk for selective SQLite restores
+    RESTORE_PG_TIMEOUT = 3600
     
     # Redis Configuration for Caching
     REDIS_URL = os.environ.get('REDIS_URL', 'redis://localhost:6379/0')
@@ -142,6 +257,11 @@ class Config:
     DB_PERFORMANCE_MONITORING = True
     DB_SLOW_QUERY_THRESHOLD = 0.5  # 500ms threshold for slow queries
     DB_CONNECTION_POOL_MONITORING = True
+    
+    # Per-request SQL profiling (query counts per endpoint, N+1 detection)
+    SQL_PROFILER_ENABLED = os.environ.get('SQL_PROFILER_ENABLED', 'true').lower() == 'true'
+    SQL_N_PLUS_ONE_THRESHOLD = int(os.environ.get('SQL_N_PLUS_ONE_THRESHOLD', '5'))  # Same statement shape this many times = N+1
+    SQL_PROFILE_HEADER_ENABLED = os.environ.get('SQL_PROFILE_HEADER_ENABLED', 'false').lower() == 'true'  # X-Profile for non-admins
     DB_QUERY_CACHE_ENABLED = True
     DB_QUERY_CACHE_TTL = 600  # 10 minutes cache TTL
     
@@ -160,6 +280,21 @@ class Config:
     REDIS_CACHE_TTL = 3600  # 1 hour default cache TTL
     REDIS_SESSION_TTL = 28800  # 8 hours session TTL
     
+    # Real-time (Socket.IO) cross-worker delivery
+    # Emits are published once to the message queue and every worker delivers
+    # them to its own clients. Defaults to REDIS_URL when Redis is enabled.
+    SOCKETIO_MESSAGE_QUEUE = os.environ.get('SOCKETIO_MESSAGE_QUEUE')
+    SOCKETIO_CHANNEL = os.environ.get('SOCKETIO_CHANNEL', 'pipelinepro-socketio')
+    # Drive event handlers from the Redis Stream consumer group (one handler run per event cluster-wide)
+    EVENT_STREAM_DISPATCH_ENABLED = os.environ.get('EVENT_STREAM_DISPATCH_ENABLED', 'true').lower() == 'true'
+    # Event publishing: buffer per request and flush in one Redis pipeline after the response
+    EVENT_BATCHING_ENABLED = os.environ.get('EVENT_BATCHING_ENABLED', 'true').lower() == 'true'
+    EVENT_PIPELINE_CHUNK_SIZE = 500  # XADDs per pipeline round trip
+    EVENT_HANDLER_WORKERS = 2  # Local handler executor threads (0 runs handlers inline)
+    EVENT_HANDLER_QUEUE_SIZE = 1000  # Max in-flight handler tasks before running inline
+    # Per-room coalescing window for transaction/financial updates (0 disables batching)
+    REALTIME_COALESCE_WINDOW_MS = int(os.environ.get('REALTIME_COALESCE_WINDOW_MS', '250'))
+    
     # Background Task Processing (Celery)
     # Celery uses Redis as both broker and result backend
     # Uses different Redis DBs to separate concerns:
@@ -674,6 +809,9 @@ class TestingConfig(Config):
     
     # Disable backup for testing
     BACKUP_ENABLED = False
+    # Write audit rows synchronously so tests can assert on them immediately
+    AUDIT_ASYNC_ENABLED = False
+    SCHEDULER_ENABLED = False
     DB_CONNECTION_MONITORING = False
     
     # Relaxed security for testing
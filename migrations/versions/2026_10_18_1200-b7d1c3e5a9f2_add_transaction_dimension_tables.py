@@ -0,0 +1,62 @@
+"""Add dimension tables for PSP, client, company and payment method
+
+Revision ID: b7d1c3e5a9f2
+Revises: 4aed66069409
+Create Date: 2026-10-18 12:00:00.000000
+
+Adds dim_psp, dim_client, dim_company and dim_payment_method plus nullable,
+indexed foreign keys on transactions. The string columns stay; the
+application dual-writes both, and scripts/backfill_dimensions.py fills the
+keys of existing rows.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7d1c3e5a9f2'
+down_revision = '4aed66069409'
+branch_labels = None
+depends_on = None
+
+DIMENSIONS = [
+    # (table, name length, transactions key column)
+    ('dim_psp', 50, 'psp_id'),
+    ('dim_client', 100, 'client_id'),
+    ('dim_company', 100, 'company_id'),
+    ('dim_payment_method', 50, 'payment_method_id'),
+]
+
+
+def upgrade() -> None:
+    for table, length, _ in DIMENSIONS:
+        op.create_table(
+            table,
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('name', sa.String(length=length), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(f'idx_{table}_name', table, ['name'], unique=True)
+
+    with op.batch_alter_table('transactions') as batch_op:
+        for table, _, key_column in DIMENSIONS:
+            batch_op.add_column(sa.Column(key_column, sa.Integer(), nullable=True))
+            batch_op.create_foreign_key(f'fk_transactions_{key_column}', table, [key_column], ['id'])
+            batch_op.create_index(f'idx_transaction_{key_column}', [key_column], unique=False)
+        batch_op.create_index('idx_transaction_date_psp_id', ['date', 'psp_id'], unique=False)
+        batch_op.create_index('idx_transaction_psp_id_date_category', ['psp_id', 'date', 'category'], unique=False)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('transactions') as batch_op:
+        batch_op.drop_index('idx_transaction_psp_id_date_category')
+        batch_op.drop_index('idx_transaction_date_psp_id')
+        for table, _, key_column in reversed(DIMENSIONS):
+            batch_op.drop_index(f'idx_transaction_{key_column}')
+            batch_op.drop_constraint(f'fk_transactions_{key_column}', type_='foreignkey')
+            batch_op.drop_column(key_column)
+
+    for table, _, _ in reversed(DIMENSIONS):
+        op.drop_index(f'idx_{table}_name', table_name=table)
+        op.drop_table(table)
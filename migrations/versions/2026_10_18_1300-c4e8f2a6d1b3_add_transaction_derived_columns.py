@@ -0,0 +1,67 @@
+"""Add canonical direction and effective amount columns to transactions
+
+Revision ID: c4e8f2a6d1b3
+Revises: b7d1c3e5a9f2
+Create Date: 2026-10-18 13:00:00.000000
+
+direction, effective_amount_try, effective_net_try and reporting_amount
+replace the UPPER(category) / COALESCE(amount_try, amount) / CASE on
+Tether expressions in analytics queries. The model keeps them current on
+every write; this revision backfills existing rows in id ranges and adds
+covering indexes for date range aggregates.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4e8f2a6d1b3'
+down_revision = 'b7d1c3e5a9f2'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 50000
+
+BACKFILL = sa.text("""
+    UPDATE transactions SET
+        direction = CASE
+            WHEN UPPER(TRIM(category)) IN ('DEP', 'DEPOSIT', 'INVESTMENT') THEN 'DEP'
+            WHEN UPPER(TRIM(category)) IN ('WD', 'WITHDRAW', 'WITHDRAWAL') THEN 'WD'
+        END,
+        effective_amount_try = COALESCE(amount_try, amount),
+        effective_net_try = COALESCE(net_amount_try, net_amount),
+        reporting_amount = CASE
+            WHEN UPPER(TRIM(psp)) = 'TETHER' THEN COALESCE(amount, 0)
+            ELSE COALESCE(amount_try, amount)
+        END
+    WHERE id >= :low AND id < :high
+""")
+
+
+def upgrade() -> None:
+    op.add_column('transactions', sa.Column('direction', sa.String(length=3), nullable=True))
+    op.add_column('transactions', sa.Column('effective_amount_try', sa.Numeric(15, 2), nullable=True))
+    op.add_column('transactions', sa.Column('effective_net_try', sa.Numeric(15, 2), nullable=True))
+    op.add_column('transactions', sa.Column('reporting_amount', sa.Numeric(15, 2), nullable=True))
+
+    # Backfill in id ranges so no single statement holds locks on the whole table
+    bind = op.get_bind()
+    low, high = bind.execute(sa.text("SELECT MIN(id), MAX(id) FROM transactions")).first()
+    if low is not None:
+        for start in range(low, high + 1, BATCH_SIZE):
+            bind.execute(BACKFILL, {'low': start, 'high': start + BATCH_SIZE})
+
+    op.create_index('idx_transaction_date_direction_amounts', 'transactions',
+                    ['date', 'direction', 'effective_amount_try', 'effective_net_try'], unique=False)
+    op.create_index('idx_transaction_date_psp_direction_reporting', 'transactions',
+                    ['date', 'psp', 'direction', 'reporting_amount'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_transaction_date_psp_direction_reporting', table_name='transactions')
+    op.drop_index('idx_transaction_date_direction_amounts', table_name='transactions')
+    with op.batch_alter_table('transactions') as batch_op:
+        batch_op.drop_column('reporting_amount')
+        batch_op.drop_column('effective_net_try')
+        batch_op.drop_column('effective_amount_try')
+        batch_op.drop_column('direction')
@@ -0,0 +1,72 @@
+"""
+Backfill Dimension Keys
+=======================
+
+WHAT IS THIS?
+-------------
+Fills transactions.psp_id, client_id, company_id and payment_method_id for
+rows written before the dimension tables existed (migration b7d1c3e5a9f2).
+New and edited transactions get their keys automatically; this only has to
+run once after the migration, and again after a bulk load that bypassed
+the application.
+
+Safe to run while the application is up and safe to rerun: it only touches
+rows whose key is still empty. Until a dimension is fully backfilled the
+application keeps reading the string columns for it.
+
+HOW TO USE:
+----------
+python scripts/apply_migrations.py
+python scripts/backfill_dimensions.py
+python scripts/backfill_dimensions.py --only psp,company --batch-size 1000
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+# Load environment variables
+try:
+    from dotenv import load_dotenv
+    env_file = project_root / '.env'
+    if env_file.exists():
+        load_dotenv(env_file)
+except ImportError:
+    pass
+
+from app import create_app
+from app.services.dimension_service import dimension_service, DIMENSIONS
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Backfill transaction dimension keys')
+    parser.add_argument('--only', help=f"Comma separated dimensions (default: {','.join(DIMENSIONS)})")
+    parser.add_argument('--batch-size', type=int, default=5000, help='Names per commit (default: 5000)')
+    args = parser.parse_args()
+
+    kinds = [kind.strip() for kind in args.only.split(',')] if args.only else list(DIMENSIONS)
+    unknown = [kind for kind in kinds if kind not in DIMENSIONS]
+    if unknown:
+        parser.error(f"Unknown dimension(s): {', '.join(unknown)}")
+
+    app = create_app()
+    with app.app_context():
+        print("=" * 60)
+        print("BACKFILLING DIMENSION KEYS")
+        print("=" * 60)
+        for kind in kinds:
+            started = time.perf_counter()
+            result = dimension_service.backfill(kind, batch_size=args.batch_size)
+            ready = dimension_service.is_ready(kind)
+            print(f"  {kind}: {result['names']} names, {result['rows']} rows keyed "
+                  f"in {time.perf_counter() - started:.1f}s ({'ready' if ready else 'NOT ready'})")
+        print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
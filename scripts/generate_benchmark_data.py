@@ -0,0 +1,314 @@
+"""
+Generate Benchmark Dataset
+==========================
+
+WHAT IS THIS?
+-------------
+Fills an EMPTY database with a large, realistic, reproducible dataset so
+endpoint performance can be measured (see scripts/run_benchmarks.py).
+
+The same --seed and --end-date always produce exactly the same rows, so
+benchmark results from different commits are comparable.
+
+WHAT IT CREATES (defaults):
+--------------------------
+- 2,000,000 transactions over 3 years (DEP/WD, TL/USD/EUR mix)
+- 60 PSPs with commission rates (a few large PSPs carry most volume)
+- 50,000 clients (heavy-tailed: some clients trade daily, most rarely)
+- Daily USD/TRY and EUR/TRY rate history for the whole period
+- Dimension rows and keys (psp_id, client_id, ...) for every transaction
+- A 'benchmark' main-admin user the benchmark runner logs in as
+
+HOW TO USE:
+----------
+DATABASE_URL=sqlite:///instance/benchmark.db python scripts/generate_benchmark_data.py
+DATABASE_URL=postgresql://localhost/pipeline_bench python scripts/generate_benchmark_data.py --transactions 500000
+
+Refuses to run against a database that already has transactions unless
+--force is given.
+"""
+
+import argparse
+import math
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+# Load environment variables
+try:
+    from dotenv import load_dotenv
+    env_file = project_root / '.env'
+    if env_file.exists():
+        load_dotenv(env_file)
+except ImportError:
+    pass
+
+# Background jobs would compete with the bulk load
+os.environ.setdefault('SCHEDULER_ENABLED', 'false')
+
+BENCHMARK_USERNAME = 'benchmark'
+BATCH_SIZE = 20000
+
+FIRST_NAMES = [
+    'Ahmet', 'Mehmet', 'Mustafa', 'Ali', 'Hüseyin', 'Hasan', 'İbrahim', 'Murat', 'Ömer', 'Yusuf',
+    'Ayşe', 'Fatma', 'Emine', 'Hatice', 'Zeynep', 'Elif', 'Meryem', 'Şerife', 'Zehra', 'Sultan',
+    'Emre', 'Burak', 'Can', 'Deniz', 'Ece', 'Selin', 'Kerem', 'Onur', 'Tolga', 'Volkan',
+]
+LAST_NAMES = [
+    'Yılmaz', 'Kaya', 'Demir', 'Şahin', 'Çelik', 'Yıldız', 'Yıldırım', 'Öztürk', 'Aydın', 'Özdemir',
+    'Arslan', 'Doğan', 'Kılıç', 'Aslan', 'Çetin', 'Kara', 'Koç', 'Kurt', 'Özkan', 'Şimşek',
+    'Polat', 'Korkmaz', 'Karataş', 'Erdoğan', 'Güneş', 'Aksoy', 'Tekin', 'Bulut', 'Ünal', 'Acar',
+]
+PAYMENT_METHODS = [('BANKA', 0.55), ('Tether', 0.2), ('KK', 0.15), ('EFT', 0.1)]
+CURRENCIES = [('TL', 0.7), ('USD', 0.2), ('EUR', 0.1)]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Generate a reproducible benchmark dataset')
+    parser.add_argument('--transactions', type=int, default=2000000)
+    parser.add_argument('--psps', type=int, default=60)
+    parser.add_argument('--clients', type=int, default=50000)
+    parser.add_argument('--companies', type=int, default=200)
+    parser.add_argument('--years', type=int, default=3)
+    parser.add_argument('--end-date', default=None, help='Last transaction date (YYYY-MM-DD, default: today)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--force', action='store_true', help='Add to a database that already has transactions')
+    return parser.parse_args(argv)
+
+
+def weighted_picker(rng, items, exponent=1.1):
+    """Return a function picking from ``items`` with Zipf-like weights"""
+    weights = [1.0 / math.pow(rank + 1, exponent) for rank in range(len(items))]
+    cumulative = []
+    total = 0.0
+    for weight in weights:
+        total += weight
+        cumulative.append(total)
+    return lambda: rng.choices(items, cum_weights=cumulative, k=1)[0]
+
+
+def build_rate_history(rng, start, end):
+    """Daily USD/TRY and EUR/TRY random walk with a steady TRY depreciation"""
+    days = (end - start).days + 1
+    usd = 18.5
+    # Roughly 40% depreciation per year, as seen in recent history
+    drift = math.log(1.4) / 365.0
+    rates = []
+    for offset in range(days):
+        usd *= math.exp(drift + rng.gauss(0, 0.006))
+        eur = usd * (1.08 + rng.gauss(0, 0.01))
+        rates.append((start + timedelta(days=offset), round(usd, 4), round(eur, 4)))
+    return rates
+
+
+def generate_dataset(app, args):
+    """Insert the dataset described by ``args``; returns a summary dict"""
+    from app import db
+    from app.models.config import Option, ExchangeRate as DailyRate
+    from app.models.exchange_rate import ExchangeRate
+    from app.models.transaction import Transaction
+    from app.models.user import User
+    from app.services.dimension_service import dimension_service
+    from werkzeug.security import generate_password_hash
+
+    rng = random.Random(args.seed)
+    end = date.fromisoformat(args.end_date) if args.end_date else date.today()
+    start = end - timedelta(days=365 * args.years - 1)
+    now = datetime.now(timezone.utc)
+
+    with app.app_context():
+        db.create_all()
+
+        existing = db.session.query(db.func.count(Transaction.id)).scalar()
+        if existing and not args.force:
+            print(f"✗ Database already has {existing} transactions; use --force to add to it")
+            return None
+
+        # Benchmark login
+        user = User.query.filter_by(username=BENCHMARK_USERNAME).first()
+        if user is None:
+            user = User(
+                username=BENCHMARK_USERNAME,
+                email='benchmark@localhost',
+                password=generate_password_hash(uuid.uuid4().hex),
+                role='admin',
+                admin_level=1,
+                is_active=True
+            )
+            db.session.add(user)
+            db.session.commit()
+        print(f"✓ Benchmark user: {BENCHMARK_USERNAME} (id {user.id})")
+
+        # PSPs
+        psps = []
+        for index in range(args.psps):
+            name = f"#{60 + index} PSP{index:02d}"
+            commission_rate = Decimal(str(round(rng.uniform(0.01, 0.12), 4)))
+            psps.append((name, commission_rate))
+        db.session.execute(Option.__table__.insert(), [
+            {
+                'id': str(uuid.UUID(int=rng.getrandbits(128))),
+                'field_name': 'psp',
+                'value': name,
+                'commission_rate': rate,
+                'is_active': True,
+                'created_at': now
+            }
+            for name, rate in psps
+        ])
+        db.session.commit()
+        print(f"✓ {len(psps)} PSPs")
+
+        # Rate history (both the daily table and the per-pair history)
+        rates = build_rate_history(rng, start, end)
+        existing_days = {row[0] for row in db.session.query(DailyRate.date).filter(
+            DailyRate.date.between(start, end)).all()}
+        daily_rows = [
+            {'date': day, 'usd_to_tl': Decimal(str(usd)), 'eur_to_tl': Decimal(str(eur)),
+             'is_manual': False, 'created_at': now, 'updated_at': now}
+            for day, usd, eur in rates if day not in existing_days
+        ]
+        if daily_rows:
+            db.session.execute(DailyRate.__table__.insert(), daily_rows)
+        pair_rows = []
+        for day, usd, eur in rates:
+            for pair, rate in (('USDTRY', usd), ('EURTRY', eur)):
+                pair_rows.append({
+                    'date': day, 'currency_pair': pair, 'rate': Decimal(str(rate)),
+                    'source': 'benchmark', 'is_manual_override': False,
+                    'data_quality': 'closing_price', 'created_at': now, 'is_active': day == end
+                })
+        db.session.execute(ExchangeRate.__table__.insert(), pair_rows)
+        db.session.commit()
+        rate_by_day = {day: {'USD': usd, 'EUR': eur} for day, usd, eur in rates}
+        print(f"✓ {len(rates)} days of exchange rates")
+
+        # Transactions
+        clients = [
+            f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {index:05d}"
+            for index in range(args.clients)
+        ]
+        rng.shuffle(clients)
+        companies = [f"Company {index:03d}" for index in range(args.companies)]
+        pick_client = weighted_picker(rng, clients, exponent=0.8)
+        pick_psp = weighted_picker(rng, psps, exponent=1.2)
+        pick_company = weighted_picker(rng, companies, exponent=1.0)
+        method_names, method_weights = zip(*PAYMENT_METHODS)
+        currency_names, currency_weights = zip(*CURRENCIES)
+
+        # Dimension keys, so reads take the keyed path as they do in production
+        dimension_ids = {}
+        for kind, names in (('psp', [name for name, _ in psps]), ('client', clients),
+                            ('company', companies), ('payment_method', list(method_names))):
+            dimension_ids[kind] = {}
+            for chunk_start in range(0, len(names), 1000):
+                dimension_ids[kind].update(dimension_service.resolve(
+                    db.session, kind, names[chunk_start:chunk_start + 1000]))
+                db.session.commit()
+        print(f"✓ Dimension keys for {sum(len(ids) for ids in dimension_ids.values()):,} names")
+        # Volume grows over time: sqrt() of a uniform draw gives a linearly
+        # increasing density, so the last month is busier than the first
+        days = [day for day, _, _ in rates]
+        day_count = len(days)
+
+        table = Transaction.__table__
+        inserted = 0
+        started = time.perf_counter()
+        while inserted < args.transactions:
+            batch = []
+            for _ in range(min(BATCH_SIZE, args.transactions - inserted)):
+                day = days[min(int(day_count * math.sqrt(rng.random())), day_count - 1)]
+                psp, commission_rate = pick_psp()
+                currency = rng.choices(currency_names, weights=currency_weights, k=1)[0]
+                category = 'DEP' if rng.random() < 0.75 else 'WD'
+                amount = Decimal(str(max(round(rng.lognormvariate(8.0, 1.2), 2), 1.0)))
+                if category == 'WD':
+                    amount = -amount
+                    commission = Decimal('0.00')
+                else:
+                    commission = (amount * commission_rate).quantize(Decimal('0.01'))
+                net_amount = amount - commission
+
+                row = {
+                    'client_name': pick_client(),
+                    'company': pick_company(),
+                    'payment_method': rng.choices(method_names, weights=method_weights, k=1)[0],
+                    'date': day,
+                    'category': category,
+                    'amount': amount,
+                    'commission': commission,
+                    'net_amount': net_amount,
+                    'currency': currency,
+                    'psp': psp,
+                    'notes': None,
+                    'created_at': datetime.combine(day, datetime.min.time(), timezone.utc)
+                                  + timedelta(seconds=rng.randrange(86400)),
+                    'created_by': user.id
+                }
+                if currency != 'TL':
+                    rate = Decimal(str(rate_by_day[day][currency]))
+                    row['exchange_rate'] = rate
+                    row['amount_try'] = (amount * rate).quantize(Decimal('0.01'))
+                    row['commission_try'] = (commission * rate).quantize(Decimal('0.01'))
+                    row['net_amount_try'] = (net_amount * rate).quantize(Decimal('0.01'))
+                else:
+                    row['exchange_rate'] = None
+                    row['amount_try'] = amount
+                    row['commission_try'] = commission
+                    row['net_amount_try'] = net_amount
+                row['updated_at'] = row['created_at']
+                row['psp_id'] = dimension_ids['psp'][psp]
+                row['client_id'] = dimension_ids['client'][row['client_name']]
+                row['company_id'] = dimension_ids['company'][row['company']]
+                row['payment_method_id'] = dimension_ids['payment_method'][row['payment_method']]
+                # Raw inserts skip the model events that maintain the derived columns
+                row.update(Transaction.derived_values(category, psp, amount, row['amount_try'],
+                                                      net_amount, row['net_amount_try']))
+                batch.append(row)
+
+            db.session.execute(table.insert(), batch)
+            db.session.commit()
+            inserted += len(batch)
+            elapsed = time.perf_counter() - started
+            print(f"  {inserted:>9,} / {args.transactions:,} transactions ({inserted / elapsed:,.0f} rows/s)", end='\r')
+        print()
+
+        summary = {
+            'seed': args.seed,
+            'start_date': start.isoformat(),
+            'end_date': end.isoformat(),
+            'transactions': inserted,
+            'psps': len(psps),
+            'clients': len(clients),
+            'rate_days': len(rates),
+            'seconds': round(time.perf_counter() - started, 1)
+        }
+        print(f"✓ {inserted:,} transactions in {summary['seconds']}s")
+        return summary
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    from app import create_app
+
+    print("=" * 60)
+    print("GENERATING BENCHMARK DATASET")
+    print("=" * 60)
+    app = create_app(os.environ.get('FLASK_CONFIG'))
+    print(f"Database: {app.config['SQLALCHEMY_DATABASE_URI'][:60]}")
+    summary = generate_dataset(app, args)
+    return summary is not None
+
+
+if __name__ == '__main__':
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,112 @@
+"""
+Partition Transactions by Month
+===============================
+
+WHAT IS THIS?
+-------------
+Converts the PostgreSQL `transactions` table into a table partitioned by
+RANGE (date), one partition per month (transactions_y2026m10, ...) plus a
+DEFAULT partition. Month-scoped queries (dashboards, PSP monthly stats,
+daily net, exports) then only read their own partitions, and vacuum and
+index maintenance work on small tables.
+
+After conversion the job scheduler creates upcoming months ahead of time.
+With TRANSACTION_PARTITION_ARCHIVE_AFTER_MONTHS set it also detaches old
+months and archives them as compressed CSV (local and S3 when configured).
+
+SQLite keeps the single-table layout; this script refuses to run there.
+
+`convert` locks the table for the duration of the copy: run it in a
+maintenance window, after a backup. The old table is kept as
+`transactions_legacy` unless --drop-legacy is given.
+
+HOW TO USE:
+----------
+python scripts/partition_transactions.py status
+python scripts/partition_transactions.py convert [--drop-legacy]
+python scripts/partition_transactions.py ensure [--through 2027-06]
+python scripts/partition_transactions.py archive --before 2024-01 [--keep]
+"""
+
+import argparse
+import sys
+from datetime import datetime
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+# Load environment variables
+try:
+    from dotenv import load_dotenv
+    env_file = project_root / '.env'
+    if env_file.exists():
+        load_dotenv(env_file)
+except ImportError:
+    pass
+
+from app import create_app, db
+from app.services.partition_service import transaction_partition_service
+
+
+def parse_month(value: str):
+    return datetime.strptime(value, '%Y-%m').date()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Monthly partitions for the transactions table (PostgreSQL)')
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('status', help='Show whether the table is partitioned and list partitions')
+    convert = commands.add_parser('convert', help='Rebuild transactions as a partitioned table')
+    convert.add_argument('--drop-legacy', action='store_true', help='Drop transactions_legacy after copying')
+    ensure = commands.add_parser('ensure', help='Create upcoming monthly partitions')
+    ensure.add_argument('--through', type=parse_month, help='Last month to create (YYYY-MM)')
+    archive = commands.add_parser('archive', help='Detach and archive partitions older than a month')
+    archive.add_argument('--before', type=parse_month, required=True, help='First month to keep (YYYY-MM)')
+    archive.add_argument('--keep', action='store_true', help='Keep the detached tables instead of dropping them')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        if db.engine.dialect.name != 'postgresql':
+            print("Partitioning is only available on PostgreSQL; SQLite keeps a single transactions table")
+            sys.exit(1)
+
+        print("=" * 60)
+        if args.command == 'status':
+            partitioned = transaction_partition_service.is_partitioned()
+            print(f"transactions partitioned: {'yes' if partitioned else 'no'}")
+            if partitioned:
+                with db.engine.connect() as conn:
+                    partitions = transaction_partition_service.partitions(conn)
+                    for name in sorted(partitions):
+                        rows = conn.exec_driver_sql(f"SELECT COUNT(*) FROM {name}").scalar()
+                        print(f"  {name}: {rows} rows")
+
+        elif args.command == 'convert':
+            print("CONVERTING transactions TO MONTHLY PARTITIONS")
+            result = transaction_partition_service.convert(drop_legacy=args.drop_legacy)
+            if not result['converted']:
+                print(f"  Nothing to do: {result['reason']}")
+            else:
+                print(f"  {result['rows']} rows copied into {result['partitions']} partitions "
+                      f"in {result['duration_seconds']}s")
+                if result['legacy_table']:
+                    print(f"  Old table kept as {result['legacy_table']}; drop it once verified")
+
+        elif args.command == 'ensure':
+            created = transaction_partition_service.ensure_partitions(through=args.through)
+            print(f"Created {len(created)} partitions: {', '.join(created) or '-'}")
+
+        elif args.command == 'archive':
+            archived = transaction_partition_service.archive(args.before, drop=not args.keep)
+            for manifest in archived:
+                print(f"  {manifest['partition']}: {manifest['rows']} rows -> {manifest['file']}"
+                      + (f" ({manifest['s3_uri']})" if manifest.get('s3_uri') else ''))
+            print(f"Archived {len(archived)} partitions")
+        print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
@@ -2,104 +2,43 @@
 """
 Database Restore Script
 Restores database from backup file (SQLite or PostgreSQL)
+
+Incremental backups are restored together with the full backup they build
+on. Use --tables and/or --from/--to to restore part of a backup; SQLite
+partial restores go to a scratch file unless --target is given. PostgreSQL
+partial restores need an explicit --database-url that is not DATABASE_URL;
+only the selected range of the selected tables is replaced there.
+
+Examples:
+    python scripts/restore_database.py backups/sqlite_full_backup_20250101_235900.db.zst
+    python scripts/restore_database.py backups/sqlite_incremental_backup_20250105_235900.db.zst \\
+        --tables transaction --from 2025-01-01 --to 2025-01-31
+    python scripts/restore_database.py backups/postgres_full_backup_20250101_235900.dump.zst \\
+        --database-url postgresql://localhost/pipeline_scratch --jobs 8
 """
 import os
 import sys
 import argparse
 from pathlib import Path
-from datetime import datetime
+from datetime import date
 
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from app.services.backup_service import BackupService
+from app.services.restore_service import RestoreService
 from dotenv import load_dotenv
 
 
-def restore_sqlite(backup_path: Path, target_path: Path = None):
-    """Restore SQLite database from backup"""
-    import shutil
-    
-    if not backup_path.exists():
-        print(f"❌ Backup file not found: {backup_path}")
-        return False
-    
-    if target_path is None:
-        target_path = Path("instance/treasury_improved.db")
-    
-    # Create backup of current database before restore
-    if target_path.exists():
-        current_backup = target_path.parent / f"{target_path.stem}_before_restore_{datetime.now().strftime('%Y%m%d_%H%M%S')}.db"
-        shutil.copy2(target_path, current_backup)
-        print(f"✅ Current database backed up to: {current_backup}")
-    
-    # Restore from backup
-    try:
-        shutil.copy2(backup_path, target_path)
-        print(f"✅ Database restored from: {backup_path}")
-        print(f"📁 Target: {target_path}")
-        return True
-    except Exception as e:
-        print(f"❌ Restore failed: {e}")
-        return False
-
-
-def restore_postgresql(backup_path: Path, database_url: str):
-    """Restore PostgreSQL database from backup"""
-    import subprocess
-    from urllib.parse import urlparse
-    
-    if not backup_path.exists():
-        print(f"❌ Backup file not found: {backup_path}")
-        return False
-    
-    try:
-        parsed = urlparse(database_url)
-        
-        # Set environment variables
-        env = os.environ.copy()
-        if parsed.password:
-            env['PGPASSWORD'] = parsed.password
-        
-        # Build pg_restore command
-        cmd = [
-            'pg_restore',
-            '-h', parsed.hostname or 'localhost',
-            '-p', str(parsed.port or 5432),
-            '-U', parsed.username or 'postgres',
-            '-d', parsed.path.lstrip('/') if parsed.path else 'postgres',
-            '--clean',  # Drop existing objects
-            '--if-exists',  # Don't error if objects don't exist
-            '--verbose',
-            str(backup_path)
-        ]
-        
-        print(f"🔄 Restoring PostgreSQL database...")
-        print(f"   Host: {parsed.hostname or 'localhost'}")
-        print(f"   Database: {parsed.path.lstrip('/')}")
-        
-        result = subprocess.run(
-            cmd,
-            env=env,
-            capture_output=True,
-            text=True,
-            timeout=600  # 10 minute timeout
-        )
-        
-        if result.returncode != 0:
-            print(f"❌ Restore failed:")
-            print(result.stderr)
-            return False
-        
-        print(f"✅ PostgreSQL database restored successfully")
-        return True
-        
-    except FileNotFoundError:
-        print("❌ pg_restore not found. Please install PostgreSQL client tools.")
-        return False
-    except Exception as e:
-        print(f"❌ Restore failed: {e}")
-        return False
+def print_progress(event):
+    """Print restore progress events on one updating line"""
+    phase = event['phase']
+    if 'percent' in event:
+        label = event.get('table') or event.get('file') or ''
+        print(f"\r   {phase:<10} {event['percent']:5.1f}%  {label[:40]:<40}", end='', flush=True)
+    elif phase in ('resolve', 'apply', 'apply_incremental', 'swap', 'table_done', 'scratch'):
+        detail = event.get('chain') or event.get('table') or event.get('file') or event.get('target') or ''
+        print(f"\r   {phase:<10} {detail}".ljust(60))
 
 
 def main():
@@ -108,6 +47,13 @@ def main():
     parser.add_argument('backup_path', help='Path to backup file')
     parser.add_argument('--target', help='Target database path (SQLite only)')
     parser.add_argument('--database-url', help='PostgreSQL database URL')
+    parser.add_argument('--tables', help='Comma separated tables to restore')
+    parser.add_argument('--from', dest='date_from', type=date.fromisoformat, help='Only rows on/after this date (YYYY-MM-DD)')
+    parser.add_argument('--to', dest='date_to', type=date.fromisoformat, help='Only rows on/before this date (YYYY-MM-DD)')
+    parser.add_argument('--date-column', default='date', help='Column used by --from/--to (default: date)')
+    parser.add_argument('--jobs', type=int, help='Parallel restore/verification workers')
+    parser.add_argument('--no-verify', action='store_true', help='Skip row count and checksum verification')
+    parser.add_argument('--yes', action='store_true', help='Do not ask for confirmation')
     parser.add_argument('--dry-run', action='store_true', help='Validate backup without restoring')
     
     args = parser.parse_args()
@@ -128,53 +74,73 @@ def main():
         load_dotenv(env_file)
         print(f"✅ Environment variables loaded from {env_file}")
     
-    # Verify backup
-    print(f"\n🔍 Verifying backup: {backup_path}")
-    backup_service = BackupService()
-    is_valid, verify_msg, details = backup_service.verify_backup(backup_path)
-    
-    if not is_valid:
-        print(f"❌ Backup verification failed: {verify_msg}")
-        sys.exit(1)
+    backup_service = BackupService({'BACKUP_DIR': str(backup_path.parent)})
+    restore_service = RestoreService(backup_service.config, backup_service=backup_service)
     
-    print(f"✅ {verify_msg}")
-    if details and 'tables' in details:
-        print(f"📊 Tables in backup: {details['tables']}")
+    # Verify every backup in the chain
+    chain = restore_service.resolve_chain(backup_path)
+    for path, _ in chain:
+        print(f"\n🔍 Verifying backup: {path}")
+        is_valid, verify_msg, details = backup_service.verify_backup(path)
+        if not is_valid:
+            print(f"❌ Backup verification failed: {verify_msg}")
+            sys.exit(1)
+        print(f"✅ {verify_msg}")
+        if details and 'tables' in details:
+            print(f"📊 Tables in backup: {details['tables']}")
     
     if args.dry_run:
         print("\n✅ Dry run completed - backup is valid")
         sys.exit(0)
     
-    # Confirm restore
-    print("\n⚠️  WARNING: This will overwrite the current database!")
-    response = input("Type 'RESTORE' to confirm: ")
-    if response != 'RESTORE':
-        print("❌ Restore cancelled")
+    tables = [name.strip() for name in args.tables.split(',') if name.strip()] if args.tables else None
+    selective = bool(tables) or args.date_from or args.date_to
+    database_url = args.database_url or os.getenv('DATABASE_URL')
+    dialect = chain[-1][1].get('dialect') or restore_service._guess_dialect(chain[-1][0])
+    if selective and dialect == 'postgresql' and (
+            not args.database_url or args.database_url == os.getenv('DATABASE_URL')):
+        print("❌ Selective PostgreSQL restores need an explicit --database-url other than DATABASE_URL")
         sys.exit(1)
     
-    # Determine database type and restore
-    if backup_path.suffix == '.db' or 'sqlite' in backup_path.name.lower():
-        # SQLite restore
-        target = Path(args.target) if args.target else None
-        success = restore_sqlite(backup_path, target)
-    elif backup_path.suffix == '.sql' or 'postgres' in backup_path.name.lower():
-        # PostgreSQL restore
-        database_url = args.database_url or os.getenv('DATABASE_URL')
-        if not database_url:
-            print("❌ PostgreSQL database URL required. Use --database-url or set DATABASE_URL")
+    # Confirm restore
+    if not args.yes:
+        if selective:
+            print("\n⚠️  WARNING: Rows of the selected tables in the selected date range are replaced; "
+                  "other rows are kept")
+        else:
+            print("\n⚠️  WARNING: This will overwrite the current database!")
+        response = input("Type 'RESTORE' to confirm: ")
+        if response != 'RESTORE':
+            print("❌ Restore cancelled")
             sys.exit(1)
-        success = restore_postgresql(backup_path, database_url)
-    else:
-        print("❌ Unknown backup format. Use .db for SQLite or .sql for PostgreSQL")
-        sys.exit(1)
     
-    if success:
+    report = restore_service.restore(
+        backup_path,
+        database_url=database_url,
+        target=args.target,
+        tables=tables,
+        date_from=args.date_from,
+        date_to=args.date_to,
+        date_column=args.date_column,
+        verify=not args.no_verify,
+        jobs=args.jobs,
+        progress=print_progress
+    )
+    print()
+    
+    for name, result in sorted(report.get('tables', {}).items()):
+        if not result:
+            continue
+        status = {True: '✅', False: '❌', None: '➖'}[result.get('verified')]
+        print(f"   {status} {name}: {result.get('rows')} rows")
+    
+    if report['success']:
         print("\n" + "="*70)
-        print("✅ Database restore completed successfully")
+        print(f"✅ {report['message']} ({report['duration_seconds']}s)")
         print("="*70)
     else:
         print("\n" + "="*70)
-        print("❌ Database restore failed")
+        print(f"❌ {report['message']}")
         print("="*70)
         sys.exit(1)
 
@@ -0,0 +1,310 @@
+"""
+Run Endpoint Benchmarks
+=======================
+
+WHAT IS THIS?
+-------------
+Measures latency and SQL query counts of the heaviest endpoints against a
+database filled by scripts/generate_benchmark_data.py, and writes the
+results as JSON so runs from different commits can be compared.
+
+SCENARIOS:
+---------
+psp_monthly_stats, psp_monthly_stats_summary, transactions_clients,
+consolidated_dashboard, analytics_consolidated, financial_performance,
+ledger_data, export_csv, import_csv
+
+Caches are cleared before every measured iteration unless --warm is given,
+so the numbers reflect the query path, not the cache.
+
+HOW TO USE:
+----------
+DATABASE_URL=sqlite:///instance/benchmark.db python scripts/run_benchmarks.py
+DATABASE_URL=postgresql://localhost/pipeline_bench python scripts/run_benchmarks.py --iterations 20
+
+# Compare against an earlier run (exit code 1 on a regression > 10%)
+python scripts/run_benchmarks.py --compare benchmarks/results/<earlier>.json --threshold 0.10
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import date, datetime, timezone
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+# Load environment variables
+try:
+    from dotenv import load_dotenv
+    env_file = project_root / '.env'
+    if env_file.exists():
+        load_dotenv(env_file)
+except ImportError:
+    pass
+
+# Keep background jobs from running during measurements
+os.environ.setdefault('SCHEDULER_ENABLED', 'false')
+
+from generate_benchmark_data import BENCHMARK_USERNAME
+
+RESULTS_DIR = project_root / 'benchmarks' / 'results'
+IMPORT_MARKER = 'benchmark-import'
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark endpoint latency')
+    parser.add_argument('--iterations', type=int, default=10)
+    parser.add_argument('--warmup', type=int, default=1)
+    parser.add_argument('--scenario', action='append', help='Only run these scenarios (repeatable)')
+    parser.add_argument('--warm', action='store_true', help='Keep caches between iterations')
+    parser.add_argument('--import-rows', type=int, default=1000)
+    parser.add_argument('--output', help='Result file (default: benchmarks/results/<time>-<commit>.json)')
+    parser.add_argument('--compare', help='Earlier result file to compare against')
+    parser.add_argument('--threshold', type=float, default=0.10, help='Allowed p50 slowdown when comparing')
+    return parser.parse_args(argv)
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(int(round(pct / 100.0 * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=project_root,
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def build_import_csv(rows, day):
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(['client_name', 'amount', 'date', 'category', 'psp', 'currency', 'payment_method', 'notes'])
+    for index in range(rows):
+        writer.writerow([f"Import Client {index % 500:03d}", f"{100 + index % 900}.00", day.isoformat(),
+                         'DEP', '#60 PSP00', 'TL', 'BANKA', IMPORT_MARKER])
+    return output.getvalue().encode('utf-8')
+
+
+def build_scenarios(args, end):
+    """(name, method, path, params, extra request kwargs factory, teardown, (expected status, mimetype))"""
+    month_start = end.replace(day=1)
+    import_day = end
+
+    def import_request():
+        return {
+            'data': {'file': (io.BytesIO(build_import_csv(args.import_rows, import_day)), 'benchmark.csv')},
+            'content_type': 'multipart/form-data'
+        }
+
+    def remove_imported():
+        from app import db
+        from app.models.transaction import Transaction
+        Transaction.query.filter(Transaction.notes == IMPORT_MARKER).delete(synchronize_session=False)
+        db.session.commit()
+
+    json_ok = (200, 'application/json')
+    return [
+        ('psp_monthly_stats', 'GET', '/api/v1/transactions/psp_monthly_stats',
+         {'year': end.year, 'month': end.month}, None, None, json_ok),
+        ('psp_monthly_stats_summary', 'GET', '/api/v1/transactions/psp_monthly_stats',
+         {'year': end.year, 'month': end.month, 'include_daily': 'false'}, None, None, json_ok),
+        ('transactions_clients', 'GET', '/api/v1/transactions/clients', {}, None, None, json_ok),
+        ('consolidated_dashboard', 'GET', '/api/v1/dashboard/consolidated', {'range': 'all'}, None, None, json_ok),
+        ('analytics_consolidated', 'GET', '/api/v1/analytics/consolidated-dashboard', {'range': '1y'}, None, None,
+         json_ok),
+        ('financial_performance', 'GET', '/api/v1/financial-performance', {'range': 'all'}, None, None, json_ok),
+        ('ledger_data', 'GET', '/api/v1/analytics/ledger-data', {'page': 1, 'per_page': 1000}, None, None, json_ok),
+        ('export_csv', 'GET', '/export',
+         {'start_date': month_start.isoformat(), 'end_date': end.isoformat()}, None, None, (200, 'text/csv')),
+        # A successful import redirects to the client list; errors re-render the import page
+        ('import_csv', 'POST', '/import', {}, import_request, remove_imported, (302, None)),
+    ]
+
+
+def clear_caches():
+    """Drop every application-level cache the benchmarked endpoints use"""
+    try:
+        from app.api.v1.endpoints import financial_performance
+        financial_performance._financial_performance_cache.clear()
+    except Exception:
+        pass
+    try:
+        from app.services.enhanced_cache_service import cache_service
+        cache_service.clear_all()
+    except Exception:
+        pass
+
+
+def describe_dataset(app):
+    from app import db
+    from app.models.transaction import Transaction
+
+    count, first, last = db.session.query(
+        db.func.count(Transaction.id), db.func.min(Transaction.date), db.func.max(Transaction.date)
+    ).one()
+    psps = db.session.query(db.func.count(db.distinct(Transaction.psp))).scalar()
+    return {
+        'transactions': count,
+        'psps': psps,
+        'start_date': first.isoformat() if first else None,
+        'end_date': last.isoformat() if last else None
+    }
+
+
+def run_scenario(app, client, scenario, args):
+    name, method, path, params, request_kwargs, teardown, (expected_status, expected_mimetype) = scenario
+    timings = []
+    query_counts = []
+    statuses = {}
+    unexpected = set()
+    first_ms = None
+
+    for iteration in range(args.warmup + args.iterations):
+        if not args.warm:
+            clear_caches()
+        kwargs = request_kwargs() if request_kwargs else {}
+        started = time.perf_counter()
+        response = client.open(path, method=method, query_string=params,
+                               headers={'X-Profile': '1'}, **kwargs)
+        response.get_data()  # Streamed bodies are produced while they are read
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        response.close()
+        if teardown:
+            with app.app_context():
+                teardown()
+
+        if iteration == 0:
+            first_ms = elapsed_ms
+        if iteration < args.warmup:
+            continue
+        timings.append(elapsed_ms)
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+        # A wrong route answers too (SPA catch-all, 405); only the expected response counts
+        if response.status_code != expected_status or (
+                expected_mimetype and response.mimetype != expected_mimetype):
+            unexpected.add(f"{response.status_code} {response.mimetype}")
+        if 'X-Query-Count' in response.headers:
+            query_counts.append(int(response.headers['X-Query-Count']))
+
+    timings.sort()
+    return {
+        'iterations': len(timings),
+        'first_ms': round(first_ms, 2),
+        'min_ms': round(timings[0], 2),
+        'p50_ms': round(percentile(timings, 50), 2),
+        'p95_ms': round(percentile(timings, 95), 2),
+        'max_ms': round(timings[-1], 2),
+        'mean_ms': round(sum(timings) / len(timings), 2),
+        'queries': max(query_counts) if query_counts else None,
+        'statuses': {str(code): count for code, count in statuses.items()},
+        'unexpected': sorted(unexpected),
+        'ok': not unexpected
+    }
+
+
+def compare(current, baseline, threshold):
+    """Print p50 deltas; return the names of scenarios that regressed"""
+    regressions = []
+    if baseline.get('dataset') != current.get('dataset'):
+        print("⚠️  Baseline was measured on a different dataset; deltas are indicative only")
+    print(f"\n{'scenario':<28}{'baseline p50':>14}{'current p50':>14}{'delta':>10}{'queries':>12}")
+    for name, result in current['scenarios'].items():
+        before = baseline.get('scenarios', {}).get(name)
+        if not before or not before.get('p50_ms'):
+            print(f"{name:<28}{'-':>14}{result['p50_ms']:>14.1f}{'new':>10}")
+            continue
+        delta = (result['p50_ms'] - before['p50_ms']) / before['p50_ms']
+        queries = f"{before.get('queries')}→{result.get('queries')}"
+        marker = ' ⚠️' if delta > threshold else ''
+        print(f"{name:<28}{before['p50_ms']:>14.1f}{result['p50_ms']:>14.1f}{delta:>+10.1%}{queries:>12}{marker}")
+        if delta > threshold:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    from flask_login import FlaskLoginClient
+    from app import create_app, db, limiter
+    from app.models.user import User
+    from app.utils.query_performance_monitor import query_performance_monitor
+
+    app = create_app(os.environ.get('FLASK_CONFIG'))
+    app.config['WTF_CSRF_ENABLED'] = False
+    limiter.enabled = False
+    # Report X-Query-Count for every benchmark request
+    query_performance_monitor.profile_header_enabled = True
+    app.test_client_class = FlaskLoginClient
+
+    with app.app_context():
+        user = User.query.filter_by(username=BENCHMARK_USERNAME).first()
+        if user is None:
+            print("✗ No benchmark user; run scripts/generate_benchmark_data.py first")
+            return 1
+        dataset = describe_dataset(app)
+        engine = db.engine
+
+    end = date.fromisoformat(dataset['end_date']) if dataset['end_date'] else date.today()
+    scenarios = build_scenarios(args, end)
+    if args.scenario:
+        scenarios = [scenario for scenario in scenarios if scenario[0] in args.scenario]
+
+    print("=" * 60)
+    print(f"BENCHMARKING {len(scenarios)} SCENARIOS")
+    print(f"Database: {engine.dialect.name} ({dataset['transactions']:,} transactions)")
+    print("=" * 60)
+
+    results = {}
+    client = app.test_client(user=user)
+    for scenario in scenarios:
+        name = scenario[0]
+        result = run_scenario(app, client, scenario, args)
+        results[name] = result
+        status = '✓' if result['ok'] else '✗'
+        print(f"{status} {name:<28} p50 {result['p50_ms']:>9.1f}ms  p95 {result['p95_ms']:>9.1f}ms  "
+              f"queries {result['queries']}  statuses {result['statuses']}")
+        if result['unexpected']:
+            print(f"    unexpected responses: {', '.join(result['unexpected'])}")
+
+    report = {
+        'commit': git_commit(),
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'database': engine.dialect.name,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'iterations': args.iterations,
+        'warm_cache': args.warm,
+        'dataset': dataset,
+        'scenarios': results
+    }
+
+    output = Path(args.output) if args.output else RESULTS_DIR / (
+        f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{report['commit'] or 'unknown'}-{report['database']}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"\n✗ Regressed beyond {args.threshold:.0%}: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())